@@ -0,0 +1,35 @@
+"""
+benchmark the anytime answers of model 2: objective, gap and time to the answer of every backend by deadline, and
+the time to the first incumbent
+
+usage: python -m benchmarks.bench_anytime
+"""
+import logging
+
+from src.opt_service import OptService
+from src.utils.instance_generator import generate_instance, pizza_data
+
+NUM_STORES = 200
+BACKENDS = ["lns", "ortools-CP-SAT", "cvxpy-HIGHS"]
+DEADLINES = [1.0, 3.0, 10.0]
+
+
+def main():
+    logging.disable(logging.ERROR)
+    instance = pizza_data(generate_instance(NUM_STORES, budget_tightness=0.3, seed=0))
+    print(f"{'backend':>16} {'deadline s':>10} {'answer s':>10} {'first s':>8} {'incumbents':>10} {'status':>10} "
+          f"{'objective':>12} {'gap':>8}")
+    for backend in BACKENDS:
+        for deadline in DEADLINES:
+            incumbents = []
+            result = OptService().optimize_anytime(instance, True, deadline=deadline, backends=backend,
+                                                   on_incumbent=incumbents.append)
+            first = incumbents[0].elapsed if incumbents else float('nan')
+            objective = float('nan') if result.objective is None else result.objective
+            gap = float('nan') if result.gap is None else result.gap
+            print(f"{backend:>16} {deadline:>10.1f} {result.elapsed:>10.3f} {first:>8.3f} {len(incumbents):>10} "
+                  f"{result.status:>10} {objective:>12.3f} {gap:>8.4%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+benchmark the budget frontier against one full solve per budget: the knapsack engine and the cvxpy model 1 with
+HiGHS, and the strengthened cvxpy model 2 with HiGHS
+
+usage: python -m benchmarks.bench_budget_frontier
+"""
+import logging
+import time
+
+import numpy as np
+
+from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
+from src.model.pizza_assortment_optimizer_group import PizzaAssortmentOptimizerWtGroup
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.utils.instance_generator import generate_instance
+
+# budgets of the frontier as fractions of the budget of the instance
+BUDGET_FRACTIONS = [0.8, 0.9, 1.0, 1.2]
+# name -> (optimizer factory, number of stores)
+OPTIMIZERS = {
+    "knapsack": (PizzaAssortmentOptimizerKnapsack, 300),
+    "cvxpy-HIGHS model 1": (lambda: PizzaAssortmentOptimizer(solver="HIGHS"), 300),
+    "cvxpy-HIGHS model 2": (lambda: PizzaAssortmentOptimizerWtGroup(solver="HIGHS", time_limit=60.0,
+                                                                     strengthen=True), 8),
+}
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'optimizer':>20} {'stores':>8} {'frontier s':>12} {'per budget s':>14} {'max. difference':>16}")
+    for name, (create_optimizer, num_stores) in OPTIMIZERS.items():
+        data_center = generate_instance(num_stores, budget_tightness=0.45)
+        budgets = np.array(BUDGET_FRACTIONS) * data_center.max_budget
+
+        start = time.perf_counter()
+        frontier = create_optimizer().optimize_frontier(data_center, budgets)
+        frontier_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        profits = []
+        for budget in budgets:
+            optimizer = create_optimizer()
+            optimizer.optimize(data_center.with_max_budget(budget))
+            profits.append(optimizer.maximal_profits)
+        single_time = time.perf_counter() - start
+        print(f"{name:>20} {num_stores:>8} {frontier_time:>12.3f} {single_time:>14.3f} "
+              f"{np.max(np.abs(frontier - profits)):>16.6f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+benchmark the throughput and latency of one shared OptService serving concurrent optimize_async() requests, by
+the max. number of requests solved at once. the threads overlap where the solver releases the GIL, e.g. in
+HiGHS, the pure python parts of a call run one at a time
+
+usage: python -m benchmarks.bench_concurrency
+"""
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+from src.opt_service import OptService
+from src.utils.instance_generator import generate_instance, pizza_data
+
+NUM_REQUESTS = 16
+NUM_STORES = 300
+BACKEND = "cvxpy-HIGHS"
+CONCURRENCY = [1, 2, 4, 8]
+
+
+async def serve(opt_service: OptService, requests) -> np.ndarray:
+    """
+    submit all requests at once
+    :return: latency of every request in seconds
+    """
+    async def request(instance):
+        start = time.perf_counter()
+        _, error_msg = await opt_service.optimize_async(instance, False)
+        assert len(error_msg) < 1, error_msg
+        return time.perf_counter() - start
+
+    return np.array(await asyncio.gather(*(request(instance) for instance in requests)))
+
+
+def main():
+    logging.disable(logging.INFO)
+    requests = [pizza_data(generate_instance(NUM_STORES, seed=seed)) for seed in range(NUM_REQUESTS)]
+    print(f"{'concurrency':>11} {'requests/s':>10} {'p50 s':>8} {'p95 s':>8}")
+    for max_concurrency in CONCURRENCY:
+        opt_service = OptService(BACKEND, max_concurrency=max_concurrency)
+        start = time.perf_counter()
+        latencies = asyncio.run(serve(opt_service, requests))
+        total_time = time.perf_counter() - start
+        opt_service.close()
+        print(f"{max_concurrency:>11} {NUM_REQUESTS / total_time:>10.2f} {np.percentile(latencies, 50):>8.3f} "
+              f"{np.percentile(latencies, 95):>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
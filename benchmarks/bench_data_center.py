@@ -0,0 +1,59 @@
+"""
+benchmark the memory held by the data center per store, compared to the former layout that kept
+four pizza type -> value dicts in every store object
+
+usage: python -m benchmarks.bench_data_center
+"""
+import logging
+import tracemalloc
+
+from benchmarks.bench_input_processor import make_pizza_data
+from src.processor.input_processor import InputProcessor
+
+# number of stores to benchmark
+STORE_COUNTS = [1_000, 100_000]
+
+
+class _DictStore:
+    """
+    the former store layout
+    """
+
+    def __init__(self, store_id, prices, costs, alpha, beta):
+        self._id = store_id
+        self._prices = prices
+        self._costs = costs
+        self._alpha = alpha
+        self._beta = beta
+
+
+def _traced_bytes(build):
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'stores':>10} {'dict bytes/store':>18} {'array bytes/store':>18}")
+    for num_stores in STORE_COUNTS:
+        pizza_data = make_pizza_data(num_stores * 3)
+        data_center = InputProcessor().process(pizza_data)
+        types = data_center.pizza_types
+        rows = list(zip(data_center.store_ids.tolist(), data_center.prices, data_center.costs,
+                        data_center.alpha, data_center.beta))
+
+        dict_bytes = _traced_bytes(lambda: {
+            store_id: _DictStore(store_id, dict(zip(types, p.tolist())), dict(zip(types, c.tolist())),
+                                 dict(zip(types, a.tolist())), dict(zip(types, b.tolist())))
+            for store_id, p, c, a, b in rows
+        })
+        array_bytes = _traced_bytes(lambda: InputProcessor().process(pizza_data))
+        print(f"{num_stores:>10} {dict_bytes / num_stores:>18.1f} {array_bytes / num_stores:>18.1f}")
+
+
+if __name__ == '__main__':
+    main()
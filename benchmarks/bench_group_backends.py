@@ -0,0 +1,48 @@
+"""
+benchmark the time-to-optimal of the model 2 backends: cvxpy + MOSEK against the tabulated linear models
+solved by OR-Tools and by the open-source solvers of cvxpy
+
+usage: python -m benchmarks.bench_group_backends
+"""
+import logging
+import time
+
+from src.model.solver_backend import get_backend
+from src.utils.instance_generator import generate_instance
+
+# number of stores to benchmark
+STORE_COUNTS = [6, 8, 10]
+# budget as a share of the cost of filling every store, small enough to make the budget binding
+BUDGET_TIGHTNESS = 0.45
+# backends to compare
+BACKENDS = ["heuristic", "cvxpy-MOSEK", "ortools-CP-SAT", "ortools-SCIP", "cvxpy-HIGHS"]
+# max. solve time of every backend in seconds
+TIME_LIMIT = 60.0
+
+
+def run_backend(data_center, name: str):
+    optimizer = get_backend(name).create_optimizer(True, TIME_LIMIT)
+    optimizer.optimize(data_center)
+    return optimizer.status, optimizer.maximal_profits, getattr(optimizer, 'best_bound', None)
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'backend':>14} {'stores':>8} {'status':>12} {'seconds':>10} {'profit':>12} {'bound':>12}")
+    for num_stores in STORE_COUNTS:
+        data_center = generate_instance(num_stores, budget_tightness=BUDGET_TIGHTNESS)
+        for backend in BACKENDS:
+            start = time.perf_counter()
+            try:
+                status, profit, bound = run_backend(data_center, backend)
+            except Exception as ex:
+                # e.g. MOSEK without a license
+                print(f"{backend:>14} {num_stores:>8} {'unavailable':>12}  {type(ex).__name__}")
+                continue
+            elapsed = time.perf_counter() - start
+            bound = float('nan') if bound is None else bound
+            print(f"{backend:>14} {num_stores:>8} {status:>12} {elapsed:>10.3f} {profit:>12.3f} {bound:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+benchmark the decomposition of model 2 over the pizza types: its bound and gap against the model 1 bound of the
+constructive heuristic, with the subproblems solved in this process and in one worker process per pizza type
+
+usage: python -m benchmarks.bench_group_decomposition
+"""
+import logging
+import time
+
+from src.model.pizza_assortment_optimizer_group_decomposition import PizzaAssortmentOptimizerWtGroupDecomposition
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+from src.utils.instance_generator import generate_instance
+
+# number of stores to benchmark
+STORE_COUNTS = [200, 2_000, 20_000]
+# budget as a share of the cost of filling every store, small enough to make the budget binding
+BUDGET_TIGHTNESS = 0.45
+# worker processes solving the subproblems
+NUM_WORKERS = [1, 3]
+# max. solve time in seconds
+TIME_LIMIT = 60.0
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'stores':>8} {'engine':>16} {'seconds':>10} {'profit':>14} {'bound':>14} {'gap':>10} "
+          f"{'iterations':>10}")
+    for num_stores in STORE_COUNTS:
+        data_center = generate_instance(num_stores, budget_tightness=BUDGET_TIGHTNESS)
+        start = time.perf_counter()
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic(exact_relaxation=False)
+        heuristic.solve(data_center)
+        elapsed = time.perf_counter() - start
+        print(f"{num_stores:>8} {'heuristic':>16} {elapsed:>10.3f} {heuristic.maximal_profits:>14.3f} "
+              f"{heuristic.upper_bound:>14.3f} {heuristic.gap:>10.4%} {'':>10}")
+        for num_workers in NUM_WORKERS:
+            start = time.perf_counter()
+            decomposition = PizzaAssortmentOptimizerWtGroupDecomposition(time_limit=TIME_LIMIT,
+                                                                         num_workers=num_workers)
+            decomposition.solve(data_center)
+            elapsed = time.perf_counter() - start
+            engine = f"decomposition x{num_workers}"
+            print(f"{num_stores:>8} {engine:>16} {elapsed:>10.3f} {decomposition.maximal_profits:>14.3f} "
+                  f"{decomposition.upper_bound:>14.3f} {decomposition.gap:>10.4%} "
+                  f"{decomposition.num_iterations:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+benchmark the strengthened formulation of model 2 against the default one: node count and solve time of every
+backend on synthetic chains, without warm start so the formulations are compared on their own
+
+usage: python -m benchmarks.bench_group_formulation
+"""
+import logging
+import time
+
+from src.model.pizza_assortment_optimizer_group import PizzaAssortmentOptimizerWtGroup
+from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+from src.utils.instance_generator import generate_instance
+
+# number of stores to benchmark
+STORE_COUNTS = [8, 10, 12]
+# budget as a share of the cost of filling every store, small enough to make the budget binding
+BUDGET_TIGHTNESS = 0.45
+# max. solve time of every run in seconds
+TIME_LIMIT = 60.0
+
+# backend name -> optimizer factory taking the strengthen flag
+BACKENDS = {
+    "cvxpy-HIGHS": lambda strengthen: PizzaAssortmentOptimizerWtGroup(
+        solver="HIGHS", time_limit=TIME_LIMIT, warm_start=False, strengthen=strengthen),
+    "ortools-CP-SAT": lambda strengthen: PizzaAssortmentOptimizerWtGroupOrtools(
+        "CP-SAT", time_limit=TIME_LIMIT, warm_start=False, strengthen=strengthen),
+    "ortools-SCIP": lambda strengthen: PizzaAssortmentOptimizerWtGroupOrtools(
+        "SCIP", time_limit=TIME_LIMIT, warm_start=False, strengthen=strengthen),
+}
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'backend':>14} {'stores':>8} {'strengthen':>10} {'status':>12} {'nodes':>10} "
+          f"{'seconds':>10} {'profit':>12}")
+    for num_stores in STORE_COUNTS:
+        data_center = generate_instance(num_stores, budget_tightness=BUDGET_TIGHTNESS)
+        for backend, create_optimizer in BACKENDS.items():
+            for strengthen in (False, True):
+                optimizer = create_optimizer(strengthen)
+                start = time.perf_counter()
+                optimizer.optimize(data_center)
+                elapsed = time.perf_counter() - start
+                print(f"{backend:>14} {num_stores:>8} {str(strengthen):>10} {optimizer.status:>12} "
+                      f"{str(optimizer.node_count):>10} {elapsed:>10.3f} {optimizer.maximal_profits:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
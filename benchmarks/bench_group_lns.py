@@ -0,0 +1,65 @@
+"""
+benchmark the anytime large neighbourhood search of model 2: the incumbent objective and the gap to the model 1
+bound over time, against the constructive heuristic it starts from and CP-SAT on the full model under the same
+time limit
+
+usage: python -m benchmarks.bench_group_lns
+"""
+import logging
+import time
+
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+from src.model.pizza_assortment_optimizer_group_lns import PizzaAssortmentOptimizerWtGroupLns
+from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+from src.utils.instance_generator import generate_instance
+
+# number of stores to benchmark
+STORE_COUNTS = [50, 300, 2_000, 20_000]
+# budget as a share of the cost of filling every store, small enough to make the budget binding
+BUDGET_TIGHTNESS = 0.45
+# wall-clock budget of the search in seconds
+TIME_LIMIT = 30.0
+# CP-SAT on the full model is only run up to this many stores, it does not build larger models in time
+MAX_FULL_MIP_STORES = 300
+# elapsed seconds at which the incumbent of the search is reported
+CHECKPOINTS = [1.0, 5.0, 10.0, 30.0]
+
+
+def incumbent_at(history, elapsed: float) -> float:
+    objectives = [objective for seconds, objective in history if seconds <= elapsed]
+    return objectives[-1] if objectives else float('nan')
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'stores':>8} {'engine':>10} {'seconds':>10} {'profit':>14} {'gap':>10}")
+    for num_stores in STORE_COUNTS:
+        data_center = generate_instance(num_stores, budget_tightness=BUDGET_TIGHTNESS)
+        start = time.perf_counter()
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic(exact_relaxation=False)
+        heuristic.solve(data_center)
+        elapsed = time.perf_counter() - start
+        print(f"{num_stores:>8} {'heuristic':>10} {elapsed:>10.3f} {heuristic.maximal_profits:>14.3f} "
+              f"{heuristic.gap:>10.4%}")
+
+        lns = PizzaAssortmentOptimizerWtGroupLns(time_limit=TIME_LIMIT)
+        lns.solve(data_center)
+        for checkpoint in CHECKPOINTS:
+            profit = incumbent_at(lns.history, checkpoint)
+            gap = (lns.upper_bound - profit) / lns.upper_bound
+            print(f"{num_stores:>8} {'lns':>10} {checkpoint:>10.3f} {profit:>14.3f} {gap:>10.4%}")
+        print(f"{num_stores:>8} {'lns':>10} {lns.solve_time:>10.3f} {lns.maximal_profits:>14.3f} "
+              f"{lns.gap:>10.4%}  {lns.num_iterations} neighbourhoods")
+
+        if num_stores <= MAX_FULL_MIP_STORES:
+            start = time.perf_counter()
+            optimizer = PizzaAssortmentOptimizerWtGroupOrtools(time_limit=TIME_LIMIT)
+            optimizer.optimize(data_center)
+            elapsed = time.perf_counter() - start
+            gap = (lns.upper_bound - optimizer.maximal_profits) / lns.upper_bound
+            print(f"{num_stores:>8} {'cp-sat':>10} {elapsed:>10.3f} {optimizer.maximal_profits:>14.3f} "
+                  f"{gap:>10.4%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+benchmark the start-up of the command line: the time to import its modules and the wall time of short runs, each in
+a fresh interpreter, against IMPORT_TIME_LIMIT of src/cli.py
+
+usage: python -m benchmarks.bench_import_time
+"""
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from src.cli import IMPORT_TIME_LIMIT
+
+NUM_RUNS = 5
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PIZZA_PATH = os.path.join(ROOT_PATH, "tests", "data", "new_pizza.csv")
+MODULES = ["src.cli", "src.opt_service", "src.model.pizza_assortment_optimizer",
+           "src.model.pizza_assortment_optimizer_group_ortools"]
+COMMANDS = {
+    "--help": ["--help"],
+    "validate": ["validate", PIZZA_PATH],
+    "optimize knapsack": ["optimize", PIZZA_PATH, "--backends", "knapsack"],
+    "optimize cvxpy-HIGHS": ["optimize", PIZZA_PATH, "--backends", "cvxpy-HIGHS"],
+}
+
+
+def import_seconds(module: str) -> float:
+    code = f"import time\nstart = time.perf_counter()\nimport {module}\nprint(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT_PATH, capture_output=True, text=True, check=True)
+    return float(output.stdout)
+
+
+def run_seconds(args) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "src"] + args, cwd=ROOT_PATH, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"import time limit of src.cli: {IMPORT_TIME_LIMIT:.3f} seconds")
+    print(f"{'import':>52} {'p50 s':>8} {'max s':>8}")
+    for module in MODULES:
+        seconds = [import_seconds(module) for _ in range(NUM_RUNS)]
+        print(f"{module:>52} {np.median(seconds):>8.3f} {np.max(seconds):>8.3f}")
+    print(f"{'command':>52} {'p50 s':>8} {'max s':>8}")
+    for name, args in COMMANDS.items():
+        seconds = [run_seconds(args) for _ in range(NUM_RUNS)]
+        print(f"{name:>52} {np.median(seconds):>8.3f} {np.max(seconds):>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+benchmark the input processor on synthetic pizza data of increasing size, as a data frame and read from csv and
+Parquet files chunk by chunk
+
+usage: python -m benchmarks.bench_input_processor
+"""
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.processor.input_processor import InputProcessor
+
+# number of input rows to benchmark
+ROW_COUNTS = [1_000, 100_000, 1_000_000]
+
+
+def make_pizza_data(num_rows: int, pizza_types=("A", "B", "C"), seed: int = 0) -> pd.DataFrame:
+    """
+    create a random pizza data frame with (roughly) the requested number of rows
+    :param num_rows: number of rows
+    :param pizza_types: pizza types offered by every store
+    :param seed: random seed
+    :return: pizza data in the input format of the optimizer
+    """
+    rng = np.random.default_rng(seed)
+    num_stores = max(1, num_rows // len(pizza_types))
+    size = num_stores * len(pizza_types)
+    return pd.DataFrame({
+        'store': np.repeat(np.arange(1, num_stores + 1), len(pizza_types)),
+        'type': np.tile(pizza_types, num_stores),
+        'price': rng.uniform(10, 15, size),
+        'cost': rng.uniform(4, 6, size),
+        'alpha': rng.uniform(1, 3, size),
+        'beta': rng.uniform(0.1, 1, size),
+    })
+
+
+def main():
+    logging.disable(logging.INFO)
+    processor = InputProcessor()
+    print(f"{'rows':>10} {'stores':>10} {'input':>8} {'seconds':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for num_rows in ROW_COUNTS:
+            pizza_data = make_pizza_data(num_rows)
+            inputs = {'frame': pizza_data, 'csv': os.path.join(directory, "pizza.csv")}
+            pizza_data.to_csv(inputs['csv'])
+            try:
+                inputs['parquet'] = os.path.join(directory, "pizza.parquet")
+                pizza_data.to_parquet(inputs['parquet'])
+            except ImportError:
+                # pyarrow is not installed
+                del inputs['parquet']
+            for name, source in inputs.items():
+                start = time.perf_counter()
+                data_center = processor.process(source)
+                elapsed = time.perf_counter() - start
+                print(f"{len(pizza_data):>10} {len(data_center.stores):>10} {name:>8} {elapsed:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
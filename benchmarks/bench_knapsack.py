@@ -0,0 +1,35 @@
+"""
+benchmark the knapsack engine of model 1 with a loose and a binding budget
+
+usage: python -m benchmarks.bench_knapsack
+"""
+import logging
+import time
+
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.utils.instance_generator import generate_instance
+
+# number of stores to benchmark, with a loose and a binding budget respectively
+LOOSE_STORE_COUNTS = [10, 1_000, 100_000]
+BINDING_STORE_COUNTS = [10, 100, 1_000, 10_000]
+# max. solve time in seconds, a binding budget over many stores stops at it with a feasible solution and a bound
+TIME_LIMIT = 20.0
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'budget':>8} {'stores':>8} {'seconds':>10} {'status':>9} {'profit':>14} {'bound':>14}")
+    for budget, store_counts, budget_tightness in [('loose', LOOSE_STORE_COUNTS, 1.0),
+                                                   ('binding', BINDING_STORE_COUNTS, 0.45)]:
+        for num_stores in store_counts:
+            data_center = generate_instance(num_stores, budget_tightness=budget_tightness)
+            optimizer = PizzaAssortmentOptimizerKnapsack(time_limit=TIME_LIMIT)
+            start = time.perf_counter()
+            optimizer.optimize(data_center)
+            elapsed = time.perf_counter() - start
+            print(f"{budget:>8} {num_stores:>8} {elapsed:>10.3f} {optimizer.status:>9} "
+                  f"{optimizer.maximal_profits:>14.3f} {optimizer.upper_bound:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+benchmark the Lagrangian decomposition of model 1 on chains up to 1M stores with a binding budget, against the
+exact knapsack engine where it is fast enough
+
+usage: python -m benchmarks.bench_lagrangian
+"""
+import logging
+import time
+
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.model.pizza_assortment_optimizer_lagrangian import PizzaAssortmentOptimizerLagrangian
+from src.utils.instance_generator import generate_instance
+
+STORE_COUNTS = [300, 10_000, 100_000, 1_000_000]
+# largest chain also solved by the knapsack engine
+MAX_KNAPSACK_STORES = 300
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'stores':>10} {'seconds':>10} {'profit':>16} {'gap':>10} {'knapsack s':>12} "
+          f"{'knapsack profit':>16}")
+    for num_stores in STORE_COUNTS:
+        data_center = generate_instance(num_stores, budget_tightness=0.45)
+        optimizer = PizzaAssortmentOptimizerLagrangian()
+        start = time.perf_counter()
+        optimizer.solve(data_center)
+        elapsed = time.perf_counter() - start
+        knapsack_time, knapsack_profit = float('nan'), float('nan')
+        if num_stores <= MAX_KNAPSACK_STORES:
+            knapsack = PizzaAssortmentOptimizerKnapsack()
+            start = time.perf_counter()
+            knapsack.solve(data_center)
+            knapsack_time, knapsack_profit = time.perf_counter() - start, knapsack.maximal_profits
+        print(f"{num_stores:>10} {elapsed:>10.3f} {optimizer.maximal_profits:>16.3f} {optimizer.gap:>10.2e} "
+              f"{knapsack_time:>12.3f} {knapsack_profit:>16.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+benchmark the model build time of both optimizers in the vectorized and scalar build modes,
+the canonicalization time is reported as well when MOSEK is installed
+
+usage: python -m benchmarks.bench_model_build
+"""
+import logging
+import time
+
+import cvxpy as cpy
+
+from benchmarks.bench_input_processor import make_pizza_data
+from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
+from src.model.pizza_assortment_optimizer_group import PizzaAssortmentOptimizerWtGroup
+from src.processor.input_processor import InputProcessor
+
+# number of stores to benchmark
+STORE_COUNTS = [100, 1_000, 10_000]
+# the scalar build mode is skipped beyond this number of stores
+MAX_SCALAR_STORES = 100
+
+
+def _canonicalization_time(problem: cpy.Problem):
+    if cpy.MOSEK not in cpy.installed_solvers():
+        return float('nan')
+    start = time.perf_counter()
+    problem.get_problem_data(cpy.MOSEK)
+    return time.perf_counter() - start
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'model':>8} {'mode':>11} {'stores':>8} {'build (s)':>10} {'canon (s)':>10}")
+    for num_stores in STORE_COUNTS:
+        data_center = InputProcessor().process(make_pizza_data(num_stores * 3))
+        for name, optimizer_cls in [('model 1', PizzaAssortmentOptimizer),
+                                    ('model 2', PizzaAssortmentOptimizerWtGroup)]:
+            for build_mode in optimizer_cls.BUILD_MODES:
+                if build_mode == "scalar" and num_stores > MAX_SCALAR_STORES:
+                    continue
+                optimizer = optimizer_cls(build_mode)
+                problem = optimizer.build(data_center)
+                canon_time = _canonicalization_time(problem)
+                print(f"{name:>8} {build_mode:>11} {num_stores:>8} {optimizer.build_time:>10.3f} {canon_time:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
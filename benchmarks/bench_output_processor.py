@@ -0,0 +1,40 @@
+"""
+benchmark the columnar result of the output processor: building the result table from the solution matrices and
+writing it to csv, Parquet and Arrow files
+
+usage: python -m benchmarks.bench_output_processor
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.bench_validator import make_solution
+from src.processor.output_processor import OutputProcessor
+from src.utils.instance_generator import generate_instance
+
+# number of stores to benchmark
+STORE_COUNTS = [10_000, 100_000, 1_000_000]
+
+
+def main():
+    processor = OutputProcessor()
+    print(f"{'stores':>10} {'step':>8} {'seconds':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for num_stores in STORE_COUNTS:
+            data_center = generate_instance(num_stores, budget_tightness=1.0)
+            counts, assign, _ = make_solution(data_center)
+            start = time.perf_counter()
+            table = processor.result_table(data_center, counts, assign.argmax(axis=2))
+            print(f"{num_stores:>10} {'table':>8} {time.perf_counter() - start:>10.3f}")
+            for suffix in ("csv", "parquet", "arrow"):
+                start = time.perf_counter()
+                try:
+                    processor.write(table, os.path.join(directory, f"result.{suffix}"))
+                except ImportError:
+                    # pyarrow is not installed
+                    continue
+                print(f"{num_stores:>10} {suffix:>8} {time.perf_counter() - start:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
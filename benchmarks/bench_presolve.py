@@ -0,0 +1,43 @@
+"""
+benchmark the presolve of model 1 on chains of many identical stores: solve time, objective and gap of every
+backend with and without presolve, and how much the presolve shrank the instance
+
+usage: python -m benchmarks.bench_presolve
+"""
+import logging
+
+from src.opt_service import OptService
+from src.utils.instance_generator import generate_instance, pizza_data
+
+NUM_PROFILES = 50
+# chains solved without presolve too, the knapsack engine runs out of memory on 3k identical stores
+SIZES = {"knapsack": [1_000], "lagrangian": [1_000, 10_000, 100_000], "cvxpy-HIGHS": [1_000, 3_000]}
+PRESOLVE_SIZES = [1_000, 10_000, 100_000]
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'backend':>12} {'stores':>7} {'presolve':>8} {'seconds':>8} {'solve s':>8} {'objective':>14} "
+          f"{'gap':>9} {'reduced':>7} {'vars cut':>8}")
+    for backend, sizes in SIZES.items():
+        for num_stores in sorted(set(sizes) | set(PRESOLVE_SIZES)):
+            # the budget of the service is binding from about 1k stores on
+            instance = pizza_data(generate_instance(num_stores, cost_range=(4.0, 11.0), num_profiles=NUM_PROFILES,
+                                                    seed=0))
+            for presolve in (False, True):
+                if not presolve and num_stores not in sizes:
+                    continue
+                _, error_msg, report = OptService(presolve=presolve).optimize(instance, False, backends=backend,
+                                                                            return_report=True)
+                assert len(error_msg) < 1, error_msg
+                stats = report['presolve']
+                objective, gap = report['solver']['objective'], report['solver']['gap']
+                reduced, reduction = ("", "") if stats is None else (stats['num_reduced_stores'],
+                                                                     f"{stats['reduction']:.2%}")
+                print(f"{backend:>12} {num_stores:>7} {str(presolve):>8} {report['total_seconds']:>8.3f} "
+                      f"{report['phases'][f'backend.{backend}']:>8.3f} {objective:>14.3f} "
+                      f"{float('nan') if gap is None else gap:>9.3e} {reduced:>7} {reduction:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+benchmark the cache of compiled problems: repeat solves of model 1 with HiGHS on the same stores with new store
+data, with and without the cache. the budget is loose so that building and canonicalization, not the
+branch-and-bound, dominate the run time
+
+usage: python -m benchmarks.bench_problem_cache
+"""
+import logging
+import time
+
+from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
+from src.model.problem_cache import ProblemCache
+from src.utils.instance_generator import generate_instance
+
+# number of stores to benchmark
+STORE_COUNTS = [300, 1_000]
+# number of solves per store count, every one with new store data
+NUM_SOLVES = 3
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'stores':>8} {'cache':>6} {'solve':>6} {'build s':>10} {'compile s':>10} {'total s':>10}")
+    for num_stores in STORE_COUNTS:
+        for cache in (None, ProblemCache(max_bytes=2 ** 30)):
+            for seed in range(NUM_SOLVES):
+                data_center = generate_instance(num_stores, budget_tightness=1.0, seed=seed)
+                optimizer = PizzaAssortmentOptimizer(solver="HIGHS", cache=cache)
+                start = time.perf_counter()
+                optimizer.optimize(data_center)
+                elapsed = time.perf_counter() - start
+                print(f"{num_stores:>8} {str(cache is not None):>6} {seed:>6} {optimizer.build_time:>10.3f} "
+                      f"{optimizer.compile_time:>10.3f} {elapsed:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+benchmark re-optimizing after 1% of the stores changed against a cold solve of the changed instance: the knapsack
+engine of model 1 and the heuristic of model 2
+
+usage: python -m benchmarks.bench_reoptimize
+"""
+import logging
+import time
+
+import numpy as np
+
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.utils.instance_generator import generate_instance
+
+# name -> optimizer factory
+OPTIMIZERS = {
+    "knapsack": PizzaAssortmentOptimizerKnapsack,
+    "heuristic": PizzaAssortmentOptimizerWtGroupHeuristic,
+}
+STORE_COUNTS = [300, 1_000]
+# share of the stores whose costs and elasticities change
+CHANGE_SHARE = 0.01
+
+
+def make_delta(data_center, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(data_center.num_stores, max(1, int(CHANGE_SHARE * data_center.num_stores)), replace=False)
+    changed = data_center.subset(rows)
+    changed.load(changed.store_ids, changed.prices, changed.costs * rng.uniform(0.8, 1.2, changed.costs.shape),
+                 changed.alpha * rng.uniform(0.8, 1.2, changed.alpha.shape), changed.beta)
+    return data_center.with_delta(changed)
+
+
+def main():
+    logging.disable(logging.INFO)
+    print(f"{'optimizer':>10} {'stores':>8} {'reoptimize s':>14} {'cold s':>10} {'profit':>14} "
+          f"{'cold profit':>14}")
+    for name, create_optimizer in OPTIMIZERS.items():
+        for num_stores in STORE_COUNTS:
+            data_center = generate_instance(num_stores, budget_tightness=0.45)
+            optimizer = create_optimizer()
+            optimizer.solve(data_center)
+            data_center, previous_rows = make_delta(data_center)
+
+            start = time.perf_counter()
+            optimizer.reoptimize(data_center, previous_rows)
+            warm_time = time.perf_counter() - start
+
+            cold = create_optimizer()
+            start = time.perf_counter()
+            cold.solve(data_center)
+            cold_time = time.perf_counter() - start
+            print(f"{name:>10} {num_stores:>8} {warm_time:>14.3f} {cold_time:>10.3f} "
+                  f"{optimizer.maximal_profits:>14.3f} {cold.maximal_profits:>14.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+benchmark how every backend scales on generated instances: build, solve and validation time, peak memory and
+objective per backend and number of stores, written to a json report that can be compared across releases
+
+usage: python -m benchmarks.bench_scaling [--output report.json] [--baseline previous_report.json]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from src.model.solver_backend import get_backend
+from src.utils.instance_generator import generate_instance
+from src.utils.validator import Validator
+
+# number of stores to benchmark
+STORE_COUNTS = [10, 100, 1_000, 10_000, 100_000]
+# (model, backend, max. number of stores), the exact MIP backends stop at the sizes they solve in a few minutes
+BACKENDS = [
+    (1, "knapsack", 100_000),
+    (1, "lagrangian", 100_000),
+    (1, "cvxpy-HIGHS", 1_000),
+    (1, "cvxpy-MOSEK", 10_000),
+    (2, "heuristic", 100_000),
+    (2, "lns", 100_000),
+    (2, "decomposition", 100_000),
+    (2, "ortools-CP-SAT", 100),
+    (2, "cvxpy-HIGHS", 10),
+    (2, "cvxpy-MOSEK", 100),
+]
+# budget as a share of the cost of filling every store to its capacity, small enough to make the budget binding
+BUDGET_TIGHTNESS = 0.3
+# max. solve time of every backend in seconds
+TIME_LIMIT = 60.0
+
+
+def run_case(model: int, backend: str, num_stores: int, budget_tightness: float, time_limit: float,
+             seed: int) -> Dict:
+    """
+    solve one generated instance with one backend, in a fresh worker process so that the peak memory is its own
+    :return: record of the run
+    """
+    logging.disable(logging.INFO)
+    # silence the logs the solvers write to stdout
+    os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    record = {'model': model, 'backend': backend, 'stores': num_stores, 'seed': seed}
+    enable_group_constraint = model == 2
+    if not get_backend(backend).is_available():
+        return {**record, 'status': "unavailable"}
+
+    data_center = generate_instance(num_stores, budget_tightness=budget_tightness, seed=seed)
+    optimizer = get_backend(backend).create_optimizer(enable_group_constraint, time_limit)
+    start = time.perf_counter()
+    try:
+        optimizer.optimize(data_center)
+    except Exception as ex:
+        # e.g. MOSEK without a license
+        return {**record, 'status': f"{type(ex).__name__}: {ex}"}
+    total_time = time.perf_counter() - start
+
+    counts = getattr(optimizer, 'optimal_count_matrix', None)
+    start = time.perf_counter()
+    validator = Validator(data_center)
+    if counts is None:
+        violations = None
+    elif enable_group_constraint:
+        violations = validator.check_model2(counts, optimizer.optimal_assign_matrix)
+    else:
+        violations = validator.check_model1(counts)
+    validate_time = time.perf_counter() - start
+
+    build_time = getattr(optimizer, 'build_time', None)
+    solve_time = getattr(optimizer, 'solve_time', None)
+    return {
+        **record,
+        'status': str(getattr(optimizer, 'status', None) or ("optimal" if counts is not None else "no solution")),
+        'objective': float('nan') if optimizer.maximal_profits is None else float(optimizer.maximal_profits),
+        'bound': getattr(optimizer, 'best_bound', getattr(optimizer, 'upper_bound', None)),
+        'total_seconds': total_time,
+        'build_seconds': build_time,
+        'solve_seconds': total_time - (build_time or 0.0) if solve_time is None else solve_time,
+        'validate_seconds': validate_time if violations is not None else None,
+        'violations': None if violations is None else len(violations),
+        # kilobytes on linux
+        'peak_memory_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def environment() -> Dict:
+    """
+    :return: versions of the code, python and the solver packages the report was created with
+    """
+    versions = {}
+    for package in ("numpy", "pandas", "cvxpy", "ortools"):
+        try:
+            versions[package] = __import__(package).__version__
+        except ImportError:
+            versions[package] = None
+    try:
+        revision = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {'created': datetime.now(timezone.utc).isoformat(), 'revision': revision,
+            'python': sys.version.split()[0], 'platform': platform.platform(), 'packages': versions}
+
+
+def compare(results: List[Dict], baseline: Dict) -> None:
+    """
+    print the solve time and objective of every run against the same run of a baseline report
+    """
+    previous = {(record['model'], record['backend'], record['stores']): record for record in baseline['results']}
+    print(f"\ncompared to {baseline['environment'].get('revision')}:")
+    print(f"{'model':>5} {'backend':>16} {'stores':>8} {'time ratio':>10} {'objective change':>16}")
+    for record in results:
+        old = previous.get((record['model'], record['backend'], record['stores']))
+        if old is None or 'total_seconds' not in record or 'total_seconds' not in old:
+            continue
+        ratio = record['total_seconds'] / max(old['total_seconds'], 1e-9)
+        change = record['objective'] - old['objective']
+        print(f"{record['model']:>5} {record['backend']:>16} {record['stores']:>8} {ratio:>10.2f} {change:>16.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, nargs="+", default=STORE_COUNTS, help="numbers of stores")
+    parser.add_argument("--backends", nargs="+", help="backends to run, all of BACKENDS if not given")
+    parser.add_argument("--tightness", type=float, default=BUDGET_TIGHTNESS, help="budget tightness")
+    parser.add_argument("--time-limit", type=float, default=TIME_LIMIT, help="max. solve time in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated instances")
+    parser.add_argument("--output", default="scaling_report.json", help="json report to write")
+    parser.add_argument("--baseline", help="json report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    cases = [(model, backend, num_stores) for model, backend, max_stores in BACKENDS
+             if args.backends is None or backend in args.backends
+             for num_stores in args.stores if num_stores <= max_stores]
+    print(f"{'model':>5} {'backend':>16} {'stores':>8} {'status':>12} {'seconds':>10} {'validate':>10} "
+          f"{'memory MB':>10} {'objective':>14}")
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for model, backend, num_stores in cases:
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            record = executor.submit(run_case, model, backend, num_stores, args.tightness, args.time_limit,
+                                     args.seed).result()
+        results.append(record)
+        if 'total_seconds' not in record:
+            print(f"{model:>5} {backend:>16} {num_stores:>8} {record['status'][:12]:>12}")
+            continue
+        validate = float('nan') if record['validate_seconds'] is None else record['validate_seconds']
+        print(f"{model:>5} {backend:>16} {num_stores:>8} {record['status'][:12]:>12} "
+              f"{record['total_seconds']:>10.3f} {validate:>10.3f} {record['peak_memory_mb']:>10.1f} "
+              f"{record['objective']:>14.3f}")
+
+    report = {'environment': environment(),
+              'settings': {'budget_tightness': args.tightness, 'time_limit': args.time_limit, 'seed': args.seed},
+              'results': results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nreport written to {args.output}")
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+benchmark the validator on valid model 2 solutions: the checks on the solution matrices, and the nested dict
+outputs of the optimizers, converted to matrices first
+
+usage: python -m benchmarks.bench_validator
+"""
+import time
+
+import numpy as np
+
+from src.model.solution import group_solution_dicts
+from src.utils.instance_generator import generate_instance
+from src.utils.validator import Validator
+
+# number of stores to benchmark
+STORE_COUNTS = [10_000, 100_000, 1_000_000]
+# the nested dict outputs are only benchmarked up to this many stores, building them takes longer than checking
+MAX_DICT_STORES = 100_000
+
+
+def make_solution(data_center, seed: int = 0):
+    """
+    :return: (store x pizza type) counts, (store x pizza type x group) assignment, (pizza type x group) levels of
+    a random solution within the capacity of the stores and a loose budget
+    """
+    rng = np.random.default_rng(seed)
+    num_types, num_groups = len(data_center.pizza_types), data_center.num_pizza_groups
+    levels = np.sort(rng.integers(0, data_center.max_pizza_count // num_types + 1, (num_types, num_groups)), axis=1)
+    groups = rng.integers(0, num_groups, (data_center.num_stores, num_types))
+    counts = np.take_along_axis(levels.T, groups, axis=0)
+    return counts, np.eye(num_groups, dtype=np.int64)[groups], levels
+
+
+def main():
+    print(f"{'stores':>10} {'input':>8} {'seconds':>10} {'violations':>10}")
+    for num_stores in STORE_COUNTS:
+        data_center = generate_instance(num_stores, budget_tightness=1.0)
+        counts, assign, levels = make_solution(data_center)
+        validator = Validator(data_center)
+        start = time.perf_counter()
+        violations = validator.check_model2(counts, assign)
+        elapsed = time.perf_counter() - start
+        print(f"{num_stores:>10} {'matrix':>8} {elapsed:>10.3f} {len(violations):>10}")
+
+        if num_stores <= MAX_DICT_STORES:
+            assortment, _, assignment, _ = group_solution_dicts(data_center, counts, assign, levels)
+            start = time.perf_counter()
+            error_msg = validator.validate_model2_solution(assortment, assignment)
+            elapsed = time.perf_counter() - start
+            print(f"{num_stores:>10} {'dict':>8} {elapsed:>10.3f} {len(error_msg):>10}")
+
+
+if __name__ == '__main__':
+    main()
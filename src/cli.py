@@ -0,0 +1,168 @@
+"""
+command line interface of the optimizer
+
+usage:
+    pizza-opt optimize INPUT [--model {1,2}] [--backends NAME ...] [--deadline S] [--presolve] [--output PATH]
+    pizza-opt validate INPUT [--result PATH] [--model {1,2}]
+    pizza-opt benchmark INPUT [--model {1,2}] [--backends NAME ...] [--presolve] [--repeat N]
+
+INPUT and the result files are csv, Parquet or Arrow IPC files, the format follows the file suffix. the module only
+imports the standard library on start, pandas and the solvers are imported by the subcommand that needs them, so a
+--help or a parse error answers at once. IMPORT_TIME_LIMIT bounds the time to import the module, see
+tests/test_cli.py and benchmarks/bench_import_time.py
+"""
+import argparse
+import logging
+import sys
+from typing import Dict, List, Sequence
+
+from src.model.solver_backend import backend_names
+
+# max. seconds to import the module, checked by the tests
+IMPORT_TIME_LIMIT = 0.2
+
+# exit status of a run whose result is missing or breaks a constraint, argparse exits with 2 on usage errors
+EXIT_FAILURE = 1
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """
+    run a subcommand
+    :param argv: command line arguments, sys.argv[1:] if None
+    :return: exit status
+    """
+    args = _parser().parse_args(argv)
+    logging.basicConfig(level=(logging.WARNING, logging.INFO, logging.DEBUG)[min(args.verbose, 2)],
+                        format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        return args.run(args)
+    except (OSError, ValueError, KeyError) as ex:
+        # unreadable or invalid files, the traceback is only logged with -vv
+        logging.debug("subcommand failed", exc_info=True)
+        print(f"pizza-opt: error: {ex}", file=sys.stderr)
+        return EXIT_FAILURE
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="pizza-opt", description="pizza assortment optimization")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="log progress, -vv to also log the solver details")
+    subparsers = parser.add_subparsers(title="subcommands", required=True, metavar="{optimize,validate,benchmark}")
+
+    optimize = subparsers.add_parser('optimize', help="find the optimal assortment of the stores of a file")
+    _add_input_arguments(optimize)
+    _add_backend_argument(optimize)
+    optimize.add_argument('--time-limit', type=float, help="max. solve time of every backend in seconds")
+    optimize.add_argument('--deadline', type=float, help="max. seconds to answer with the best assortment found")
+    optimize.add_argument('--target-gap', type=float, help="relative gap at which the backends may stop, e.g. 0.01")
+    optimize.add_argument('-o', '--output', help="csv, Parquet or Arrow file to write the result table to")
+    optimize.set_defaults(run=_optimize)
+
+    validate = subparsers.add_parser('validate', help="check an input file and optionally a result file")
+    _add_input_arguments(validate)
+    validate.add_argument('-r', '--result', help="result table written by optimize --output to check against the "
+                                                 "operational constraints")
+    validate.set_defaults(run=_validate)
+
+    benchmark = subparsers.add_parser('benchmark', help="time the backends on the stores of a file")
+    _add_input_arguments(benchmark)
+    _add_backend_argument(benchmark)
+    benchmark.add_argument('--repeat', type=int, default=1, help="number of solves of every backend")
+    benchmark.set_defaults(run=_benchmark)
+    return parser
+
+
+def _add_input_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('input', help="csv, Parquet or Arrow file of the store data")
+    parser.add_argument('-m', '--model', type=int, choices=(1, 2), default=1,
+                        help="1 without, 2 with the pizza type group constraints")
+
+
+def _add_backend_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument('-b', '--backends', nargs='+', choices=backend_names(), metavar="NAME",
+                        help=f"fallback chain of solver backends, the service defaults if not given, "
+                             f"one of: {', '.join(backend_names())}")
+    parser.add_argument('--presolve', action='store_true',
+                        help="fix the pizza types without profit and solve identical stores as one, model 1 only")
+
+
+def _optimize(args: argparse.Namespace) -> int:
+    from src.opt_service import OptService
+
+    opt_service = OptService(presolve=args.presolve)
+    result = opt_service.optimize_anytime(args.input, args.model == 2, deadline=args.deadline,
+                                          target_gap=args.target_gap, backends=args.backends,
+                                          time_limits=_time_limits(args.backends, args.time_limit))
+    print(f"status: {result.status}, backend: {result.backend}, objective: {_format(result.objective)}, "
+          f"bound: {_format(result.bound)}, gap: {_format(result.gap)}, seconds: {result.elapsed:.3f}")
+    for key, message in result.errors.items():
+        print(f"error: {key}: {message}", file=sys.stderr)
+    if result.status == "failed":
+        return EXIT_FAILURE
+    if args.output is not None:
+        opt_service.write_result(args.output)
+        print(f"result written to {args.output}")
+    return 0
+
+
+def _validate(args: argparse.Namespace) -> int:
+    from src.processor.input_processor import InputProcessor
+
+    data_center = InputProcessor().process(args.input)
+    print(f"input: {data_center.num_stores} stores, pizza types: {', '.join(data_center.pizza_types)}")
+    if args.result is None:
+        return 0
+
+    from src.processor.output_processor import OutputProcessor
+    from src.utils.validator import Validator
+
+    validator = Validator(data_center)
+    counts, assign = validator.table_matrices(OutputProcessor().read(args.result))
+    if args.model == 2:
+        violations = validator.check_model2(counts, assign)
+    else:
+        violations = validator.check_model1(counts)
+    for violation in violations:
+        print(f"violation: {violation.message}", file=sys.stderr)
+    print(f"result: {len(violations)} violations")
+    return EXIT_FAILURE if violations else 0
+
+
+def _benchmark(args: argparse.Namespace) -> int:
+    from src.opt_service import OptService
+    from src.processor.input_processor import InputProcessor
+    from src.utils.instance_generator import pizza_data
+
+    enable_group_constraint = args.model == 2
+    # parse the file once, the solves take the parsed rows
+    instance = pizza_data(InputProcessor().process(args.input))
+    names = args.backends or backend_names(enable_group_constraint, available_only=True)
+    status = 0
+    print(f"{'backend':>18} {'seconds':>9} {'objective':>12} {'gap':>8}  slowest phases")
+    for name in names:
+        # an untimed solve first, so that the timings leave out importing the solver of the backend
+        OptService(presolve=args.presolve).optimize(instance, enable_group_constraint, backends=name)
+        for _ in range(args.repeat):
+            _, error_msg, report = OptService(presolve=args.presolve).optimize(
+                instance, enable_group_constraint, backends=name, return_report=True)
+            if error_msg:
+                status = EXIT_FAILURE
+            phases = sorted(report['phases'].items(), key=lambda phase: -phase[1])[:3]
+            print(f"{name:>18} {report['total_seconds']:>9.3f} {_format(report['solver'].get('objective')):>12} "
+                  f"{_format(report['solver'].get('gap')):>8}  "
+                  f"{', '.join(f'{phase} {seconds:.3f}' for phase, seconds in phases)}")
+    return status
+
+
+def _time_limits(backends: List[str], time_limit: float) -> Dict[str, float]:
+    if time_limit is None:
+        return None
+    return {name: time_limit for name in (backends or backend_names())}
+
+
+def _format(value) -> str:
+    return "-" if value is None else f"{value:.6g}"
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,33 +1,239 @@
-from typing import Dict, List
+from collections.abc import Mapping
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
 
 from src.common.store import Store
 
 
+class StoreCollection(Mapping):
+    """
+    this class defines a read-only store id -> store mapping over the rows of a data center,
+    the store views are created on access
+    """
+
+    __slots__ = ('_data_center',)
+
+    def __init__(self, data_center: 'DataCenter'):
+        self._data_center = data_center
+
+    def __getitem__(self, store_id: int) -> Store:
+        return Store(store_id, self._data_center.row_of(store_id), self._data_center)
+
+    def __contains__(self, store_id) -> bool:
+        return self._data_center.row_of(store_id, strict=False) >= 0
+
+    def __iter__(self):
+        return iter(self._data_center.store_ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self._data_center.store_ids)
+
+    def values(self):
+        data_center = self._data_center
+        return [Store(store_id, row, data_center) for row, store_id in enumerate(data_center.store_ids.tolist())]
+
+    def items(self):
+        return [(store.id, store) for store in self.values()]
+
+
 class DataCenter:
     """
-    this class defines a centralized place to hold all the data required for optimization
+    this class defines a centralized place to hold all the data required for optimization,
+    the store data are kept as (store x pizza type) matrices
     """
 
-    def __init__(self):
-        # store id -> store
-        self._stores: Dict[int, Store] = {}
+    # pizza types of the assessment
+    PIZZA_TYPES = ("A", "B", "C")
+
+    def __init__(self, max_pizza_count: int = 20, max_budget: float = 100_000, num_pizza_groups: int = 3,
+                 pizza_types: Sequence[str] = PIZZA_TYPES):
+        """
+        constructor
+        :param max_pizza_count: max. no. of pizza a store can display
+        :param max_budget: max. budget across the chain
+        :param num_pizza_groups: number of groups for each pizza type
+        :param pizza_types: all the available pizza types, one per matrix column
+        """
         # all the available pizza types
-        self._pizza_types: List[str] = ["A", "B", "C"]
+        self._pizza_types: List[str] = list(pizza_types)
+        # pizza type -> matrix column
+        self._type_index: Dict[str, int] = {pizza_type: col for col, pizza_type in enumerate(self._pizza_types)}
         # max. no. of pizza a store can display
-        self._max_pizza_count = 20
+        self._max_pizza_count = max_pizza_count
         # max. budget across the chain
-        self._max_budget = 100_000
+        self._max_budget = max_budget
         # number of groups for each pizza type
-        self._num_pizza_groups = 3
+        self._num_pizza_groups = num_pizza_groups
+
+        # matrix row -> store id
+        self._store_ids: np.ndarray = np.empty(0, dtype=np.int64)
+        # positions that sort the store ids, used to locate the row of a store
+        self._store_order: np.ndarray = np.empty(0, dtype=np.int64)
+        self._sorted_store_ids: np.ndarray = self._store_ids
+        # (store x pizza type) matrices
+        self._prices: np.ndarray = np.empty((0, len(self._pizza_types)))
+        self._costs: np.ndarray = np.empty((0, len(self._pizza_types)))
+        self._alpha: np.ndarray = np.empty((0, len(self._pizza_types)))
+        self._beta: np.ndarray = np.empty((0, len(self._pizza_types)))
+        # store id -> store
+        self._stores = StoreCollection(self)
+
+    def load(self, store_ids, prices, costs, alpha, beta) -> None:
+        """
+        replace the store data, every matrix has one row per store and one column per pizza type
+        :param store_ids: unique store identifiers
+        :param prices: price matrix
+        :param costs: cost matrix
+        :param alpha: alpha matrix
+        :param beta: beta matrix
+        :return:
+        """
+        store_ids = np.asarray(store_ids)
+        shape = (len(store_ids), len(self._pizza_types))
+        matrices = [np.ascontiguousarray(matrix, dtype=np.float64) for matrix in (prices, costs, alpha, beta)]
+        for matrix in matrices:
+            if matrix.shape != shape:
+                raise ValueError(f"invalid data matrix shape: {matrix.shape}, expected: {shape}")
+
+        store_order = np.argsort(store_ids, kind='stable')
+        sorted_store_ids = store_ids[store_order]
+        if len(store_ids) > 1 and (sorted_store_ids[1:] == sorted_store_ids[:-1]).any():
+            raise ValueError("store ids are not unique")
+
+        self._store_ids = store_ids
+        self._store_order = store_order
+        self._sorted_store_ids = sorted_store_ids
+        self._prices, self._costs, self._alpha, self._beta = matrices
+
+    def with_max_budget(self, max_budget: float) -> 'DataCenter':
+        """
+        create a data center that shares the store data of this one under another budget
+        :param max_budget: max. budget across the chain
+        :return: data center
+        """
+        data_center = DataCenter(self._max_pizza_count, max_budget, self._num_pizza_groups, self._pizza_types)
+        data_center._store_ids = self._store_ids
+        data_center._store_order = self._store_order
+        data_center._sorted_store_ids = self._sorted_store_ids
+        data_center._prices, data_center._costs = self._prices, self._costs
+        data_center._alpha, data_center._beta = self._alpha, self._beta
+        return data_center
+
+    def subset(self, rows) -> 'DataCenter':
+        """
+        create a data center holding some of the stores of this one
+        :param rows: matrix rows of the stores
+        :return: data center
+        """
+        data_center = DataCenter(self._max_pizza_count, self._max_budget, self._num_pizza_groups, self._pizza_types)
+        data_center.load(self._store_ids[rows], self._prices[rows], self._costs[rows], self._alpha[rows],
+                         self._beta[rows])
+        return data_center
+
+    def with_delta(self, changed: 'DataCenter' = None, removed_store_ids=()) -> Tuple['DataCenter', np.ndarray]:
+        """
+        create a data center with a few stores changed, added or removed. the remaining stores keep the order of
+        their rows, and the added stores come last
+        :param changed: data center holding the new data of the changed and added stores
+        :param removed_store_ids: identifiers of the removed stores
+        :return: data center, row in this data center of every store whose data did not change, -1 for the
+        changed and added stores
+        """
+        removed_store_ids = np.asarray(removed_store_ids)
+        removed = self.rows_of(removed_store_ids) if removed_store_ids.size > 0 else np.empty(0, dtype=np.int64)
+        if (removed < 0).any():
+            raise KeyError(f"unknown stores: {removed_store_ids[removed < 0].tolist()[:10]}")
+        keep = np.ones(self.num_stores, dtype=bool)
+        keep[removed] = False
+        previous_rows = np.flatnonzero(keep)
+        store_ids = self._store_ids[keep]
+        matrices = [matrix[keep] for matrix in (self._prices, self._costs, self._alpha, self._beta)]
+
+        if changed is not None and changed.num_stores > 0:
+            rows = self.rows_of(changed.store_ids)
+            # old row -> new row of the remaining stores
+            new_rows = np.full(self.num_stores, -1)
+            new_rows[previous_rows] = np.arange(len(previous_rows))
+            existing = rows >= 0
+            existing[existing] = keep[rows[existing]]
+            target = new_rows[rows[existing]]
+            previous_rows[target] = -1
+            added = ~existing
+            store_ids = np.concatenate([store_ids, changed.store_ids[added]])
+            previous_rows = np.concatenate([previous_rows, np.full(int(added.sum()), -1)])
+            new_matrices = (changed.prices, changed.costs, changed.alpha, changed.beta)
+            for matrix, new_matrix in zip(matrices, new_matrices):
+                matrix[target] = new_matrix[existing]
+            matrices = [np.concatenate([matrix, new_matrix[added]]) for matrix, new_matrix in
+                        zip(matrices, new_matrices)]
+
+        data_center = DataCenter(self._max_pizza_count, self._max_budget, self._num_pizza_groups, self._pizza_types)
+        data_center.load(store_ids, *matrices)
+        return data_center, previous_rows
+
+    def row_of(self, store_id: int, strict: bool = True) -> int:
+        """
+        locate the matrix row of a store
+        :param store_id: store identifier
+        :param strict: raise a KeyError for an unknown store if True, return -1 otherwise
+        :return: matrix row
+        """
+        pos = int(np.searchsorted(self._sorted_store_ids, store_id))
+        if pos < len(self._sorted_store_ids) and self._sorted_store_ids[pos] == store_id:
+            return int(self._store_order[pos])
+        if strict:
+            raise KeyError(store_id)
+        return -1
+
+    def rows_of(self, store_ids) -> np.ndarray:
+        """
+        locate the matrix rows of many stores at once
+        :param store_ids: store identifiers
+        :return: matrix rows, -1 for unknown stores
+        """
+        store_ids = np.asarray(store_ids)
+        if len(self._sorted_store_ids) == 0:
+            return np.full(store_ids.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted_store_ids, store_ids), len(self._sorted_store_ids) - 1)
+        return np.where(self._sorted_store_ids[pos] == store_ids, self._store_order[pos], -1)
 
     @property
-    def stores(self) -> Dict[int, Store]:
+    def stores(self) -> StoreCollection:
         return self._stores
 
+    @property
+    def store_ids(self) -> np.ndarray:
+        return self._store_ids
+
+    @property
+    def num_stores(self) -> int:
+        return len(self._store_ids)
+
     @property
     def pizza_types(self) -> List[str]:
         return self._pizza_types
 
+    @property
+    def type_index(self) -> Dict[str, int]:
+        return self._type_index
+
+    @property
+    def prices(self) -> np.ndarray:
+        return self._prices
+
+    @property
+    def costs(self) -> np.ndarray:
+        return self._costs
+
+    @property
+    def alpha(self) -> np.ndarray:
+        return self._alpha
+
+    @property
+    def beta(self) -> np.ndarray:
+        return self._beta
+
     @property
     def max_pizza_count(self):
         return self._max_pizza_count
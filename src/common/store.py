@@ -1,73 +1,130 @@
-from typing import Dict
+from collections.abc import Mapping
+from typing import Dict, Union
 import logging
 
+import numpy as np
+
+# pizza type -> value of a store, a view over the data center matrices, or a plain dict for a detached store
+StoreData = Union['StoreRowView', Dict[str, float]]
+
+
+class StoreRowView(Mapping):
+    """
+    this class defines a pizza type -> value mapping over one row of a (store x pizza type) matrix
+    """
+
+    __slots__ = ('_matrix', '_row', '_type_index')
+
+    def __init__(self, matrix: np.ndarray, row: int, type_index: Dict[str, int]):
+        # (store x pizza type) matrix
+        self._matrix = matrix
+        # row of the store in the matrix
+        self._row = row
+        # pizza type -> matrix column
+        self._type_index = type_index
+
+    def __getitem__(self, pizza_type: str) -> float:
+        return float(self._matrix[self._row, self._type_index[pizza_type]])
+
+    def __setitem__(self, pizza_type: str, value: float) -> None:
+        self._matrix[self._row, self._type_index[pizza_type]] = value
+
+    def __iter__(self):
+        return iter(self._type_index)
+
+    def __len__(self) -> int:
+        return len(self._type_index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
 
 class Store:
     """
-    this class defines a data container to hold all the data related to a specific store
+    this class defines a data container to hold all the data related to a specific store,
+    it is a light view over one row of the matrices kept in the data center. a detached store keeps its
+    data in plain dicts
     """
 
-    def __init__(self, store_id: int):
+    __slots__ = ('_id', '_row', '_data_center', '_detached')
+
+    def __init__(self, store_id: int, row: int = 0, data_center=None):
         """
         constructor
+        :param store_id: unique store identifier
+        :param row: row of the store in the data center matrices
+        :param data_center: data center that holds the store data, None for a detached store
         """
         # unique store identifier
         self._id: int = store_id
-        # pizza type -> price
-        self._prices: Dict[str, float] = {}
-        # pizza type -> cost
-        self._costs: Dict[str, float] = {}
-        # pizza type -> alpha value
-        self._alpha: Dict[str, float] = {}
-        # pizza type -> beta value
-        self._beta: Dict[str, float] = {}
+        # row of the store in the data center matrices
+        self._row: int = row
+        # owner of the store data
+        self._data_center = data_center
+        # data name -> pizza type -> value of a detached store
+        self._detached: Dict[str, Dict[str, float]] = None
+        if data_center is None:
+            self._detached = {'prices': {}, 'costs': {}, 'alpha': {}, 'beta': {}}
 
     @property
     def id(self) -> int:
         return self._id
 
     @property
-    def prices(self) -> Dict[str, float]:
-        return self._prices
+    def prices(self) -> StoreData:
+        return self._view('prices')
 
     @prices.setter
     def prices(self, value) -> None:
-        if type(value) is not dict:
+        if not isinstance(value, Mapping):
             logging.error(f"invalid store prices: {value}")
-        self._prices = value
+        self._assign('prices', value)
 
     @property
-    def costs(self) -> Dict[str, float]:
-        return self._costs
+    def costs(self) -> StoreData:
+        return self._view('costs')
 
     @costs.setter
     def costs(self, value) -> None:
-        if type(value) is not dict:
+        if not isinstance(value, Mapping):
             logging.error(f"invalid store costs: {value}")
-        self._costs = value
+        self._assign('costs', value)
 
     @property
-    def alpha(self) -> Dict[str, float]:
-        return self._alpha
+    def alpha(self) -> StoreData:
+        return self._view('alpha')
 
     @alpha.setter
     def alpha(self, value) -> None:
-        if type(value) is not dict:
+        if not isinstance(value, Mapping):
             logging.error(f"invalid store alpha: {value}")
-        self._alpha = value
+        self._assign('alpha', value)
 
     @property
-    def beta(self) -> Dict[str, float]:
-        return self._beta
+    def beta(self) -> StoreData:
+        return self._view('beta')
 
     @beta.setter
     def beta(self, value) -> None:
-        if type(value) is not dict:
+        if not isinstance(value, Mapping):
             logging.error(f"invalid store beta: {value}")
-        self._beta = value
+        self._assign('beta', value)
+
+    def _view(self, name: str) -> StoreData:
+        if self._detached is not None:
+            return self._detached[name]
+        return StoreRowView(getattr(self._data_center, name), self._row, self._data_center.type_index)
+
+    def _assign(self, name: str, value) -> None:
+        if self._detached is not None:
+            self._detached[name] = dict(value)
+            return
+        view = self._view(name)
+        for pizza_type, item in dict(value).items():
+            view[pizza_type] = item
 
     def __str__(self):
-        return f"""id: {self._id}, prices: {self._prices},
-        costs: {self._costs}, alpha: {self._alpha},
-        beta: {self._beta}
+        return f"""id: {self._id}, prices: {self.prices},
+        costs: {self.costs}, alpha: {self.alpha},
+        beta: {self.beta}
         """
@@ -0,0 +1,54 @@
+import math
+from typing import Tuple
+import numpy as np
+
+from src.common.data_center import DataCenter
+
+# largest distance of a scaled value from an integer that is taken as floating point noise
+_SCALE_TOLERANCE = 1e-6
+
+
+def store_count_bounds(data_center: DataCenter) -> np.ndarray:
+    """
+    bound the pizza count of every store-type pair by the max. pizza count of the store and by the number of
+    pizzas the whole budget pays for
+    :param data_center: data center
+    :return: (store x pizza type) integer upper bounds
+    """
+    max_count = data_center.max_pizza_count
+    costs = data_center.costs
+    with np.errstate(divide='ignore'):
+        affordable = np.where(costs > 0, np.floor(data_center.max_budget / costs + 1e-9), max_count)
+    return np.clip(affordable, 0, max_count).astype(np.int64)
+
+
+def group_level_bounds(count_bounds: np.ndarray) -> np.ndarray:
+    """
+    bound the pizza count of the groups of every pizza type, a group holds at least 2 stores, so its count is at
+    most the second largest store bound of the pizza type
+    :param count_bounds: (store x pizza type) store count bounds from store_count_bounds()
+    :return: (pizza type) integer upper bounds
+    """
+    if count_bounds.shape[0] < 2:
+        return count_bounds.max(axis=0, initial=0)
+    return np.sort(count_bounds, axis=0)[-2]
+
+
+def scaled_budget_row(data_center: DataCenter, scale: int) -> Tuple[np.ndarray, int, bool]:
+    """
+    scale the costs and the budget to integers, e.g. for CP-SAT, which takes integer constraint coefficients only.
+    the costs are rounded up and the budget down, so that a solution never breaks the original budget
+    :param data_center: data center
+    :param scale: scale factor
+    :return: (store x pizza type) scaled costs, scaled budget, True if nothing was rounded, otherwise the scaled
+    budget cuts off solutions of the original one and a proof of optimality only holds for the scaled problem
+    """
+    scaled_costs = data_center.costs * scale
+    scaled_budget = data_center.max_budget * scale
+    # values within floating point noise of an integer, e.g. 12.34 * 10000, are taken as that integer
+    rounded_costs = np.round(scaled_costs)
+    exact_costs = np.abs(scaled_costs - rounded_costs) <= _SCALE_TOLERANCE
+    costs = np.where(exact_costs, rounded_costs, np.ceil(scaled_costs)).astype(np.int64)
+    exact_budget = abs(scaled_budget - round(scaled_budget)) <= _SCALE_TOLERANCE
+    budget = round(scaled_budget) if exact_budget else math.floor(scaled_budget)
+    return costs, int(budget), bool(exact_costs.all() and exact_budget)
@@ -0,0 +1,52 @@
+from typing import Dict
+
+# cvxpy solvers that handle integer variables together with the power cone of the profit hypograph,
+# the other mixed-integer solvers get the tabulated linear profit objective instead
+MI_CONIC_SOLVERS = ("MOSEK",)
+# open-source mixed-integer solvers cvxpy can drive
+OPEN_SOURCE_MI_SOLVERS = ("HIGHS", "SCIP", "CBC", "GLPK_MI")
+
+
+def solve_params(solver: str, time_limit: float = None, num_threads: int = None, target_gap: float = None) -> Dict:
+    """
+    translate a time limit, a thread cap and a target gap into the keyword arguments the cvxpy interface of a
+    solver expects
+    :param solver: cvxpy solver name
+    :param time_limit: max. solve time in seconds, no limit if None
+    :param num_threads: max. number of solver threads, the solver default if None. the other solvers are
+    single-threaded through cvxpy
+    :param target_gap: relative gap at which the branch and bound stops, the solver default if None. MOSEK, HiGHS
+    and SCIP take it
+    :return: keyword arguments of Problem.solve()
+    """
+    params = _time_limit_params(solver, time_limit)
+    if target_gap is not None:
+        if solver == "MOSEK":
+            params.setdefault('mosek_params', {})['MSK_DPAR_MIO_TOL_REL_GAP'] = float(target_gap)
+        elif solver == "HIGHS":
+            params['mip_rel_gap'] = float(target_gap)
+        elif solver == "SCIP":
+            params.setdefault('scip_params', {})['limits/gap'] = float(target_gap)
+    if num_threads is None:
+        return params
+    if solver == "MOSEK":
+        params.setdefault('mosek_params', {})['MSK_IPAR_NUM_THREADS'] = int(num_threads)
+    elif solver == "HIGHS":
+        params['threads'] = int(num_threads)
+    return params
+
+
+def _time_limit_params(solver: str, time_limit: float = None) -> Dict:
+    if time_limit is None:
+        return {}
+    if solver == "MOSEK":
+        return {'mosek_params': {'MSK_DPAR_OPTIMIZER_MAX_TIME': float(time_limit)}}
+    if solver == "HIGHS":
+        return {'time_limit': float(time_limit)}
+    if solver == "SCIP":
+        return {'scip_params': {'limits/time': float(time_limit)}}
+    if solver == "CBC":
+        return {'maximumSeconds': int(time_limit)}
+    if solver == "GLPK_MI":
+        return {'tm_lim': int(time_limit * 1000)}
+    return {}
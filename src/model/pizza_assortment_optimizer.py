@@ -1,9 +1,18 @@
 import logging
+import time
 import cvxpy as cpy
+import numpy as np
 from typing import Dict, List
 import pandas as pd
 
 from src.common.data_center import DataCenter
+from src.model.cvxpy_solvers import MI_CONIC_SOLVERS, solve_params
+from src.model.problem_cache import ProblemCache, instance_shape_key, problem_nbytes
+from src.model.profit import (create_profit_hypograph, create_profit_selection, profit_coefficients,
+                              profit_parameter_value)
+from src.model.solution import assortment_dict
+from src.model.solve_control import target_gap
+from src.utils.metrics import add_time, timed
 
 
 class PizzaAssortmentOptimizer:
@@ -11,10 +20,44 @@ class PizzaAssortmentOptimizer:
     this class aims to find the optimal number of pizzas for each store
     """
 
-    def __init__(self):
+    # "vectorized" builds the model over (store x type) matrix variables,
+    # "scalar" builds it with one variable per store and type
+    BUILD_MODES = ("vectorized", "scalar")
+
+    def __init__(self, build_mode: str = "vectorized", solver: str = "MOSEK", time_limit: float = None,
+                 num_threads: int = None, cache: ProblemCache = None, verbose: bool = False):
+        """
+        constructor
+        :param build_mode: "vectorized" or "scalar"
+        :param solver: cvxpy solver name, solvers without mixed-integer power cone support get the tabulated
+        profit objective, which needs the vectorized build mode
+        :param time_limit: max. solve time in seconds, no limit if None
+        :param num_threads: max. number of solver threads, the solver default if None
+        :param cache: cache of compiled problems, which lets a repeat solve of the same stores in the vectorized
+        build mode skip building and canonicalization, no caching if None
+        :param verbose: show the solver log if True
+        """
+        if build_mode not in self.BUILD_MODES:
+            raise ValueError(f"invalid build mode: {build_mode}")
+        if build_mode == "scalar" and solver not in MI_CONIC_SOLVERS:
+            raise ValueError(f"the scalar build mode needs a mixed-integer conic solver, got: {solver}")
+        self._build_mode = build_mode
+        self._solver = solver
+        self._time_limit = time_limit
+        self._num_threads = num_threads
+        self._cache = cache
+        self._verbose = verbose
+        # cache key of the compiled problem checked out of the cache, None if not cached
+        self._cache_key = None
         self._data_center: DataCenter = None
         # store + type -> integer variable
         self._var_pizza_count: Dict[int, Dict[str, cpy.Variable]] = {}
+        # (store x type) integer variable
+        self._var_pizza_count_matrix: cpy.Variable = None
+        # budget across the chain, a parameter so that the model is canonicalized once for many budgets
+        self._param_max_budget: cpy.Parameter = None
+        # vectorized (store x type) costs
+        self._param_costs: cpy.Parameter = None
         self._objective = None
         self._constraints: List = []
         self._problem: cpy.Problem = None
@@ -22,32 +65,158 @@ class PizzaAssortmentOptimizer:
         # optimal solution
         self._opt_obj: float = None
         self._opt_pizza_count: Dict[int, Dict[str, int]] = {}
+        # (store x pizza type) pizza counts of the solution, None in the scalar build mode
+        self._opt_pizza_count_matrix: np.ndarray = None
+
+        # max. profit and optimal assortment per budget of the budget frontier
+        self._frontier_profits: np.ndarray = None
+        self._frontier_assortments: List[Dict[int, Dict[str, int]]] = []
+
+        # elapsed seconds of model building and solving
+        self._build_time: float = None
+        self._solve_time: float = None
 
     def optimize(self, data_center: DataCenter):
         logging.info("PizzaAssortOptimizer optimizer() starts.")
-        self._data_center = data_center
 
-        # build model
-        self._create_variables()
-        self._create_objective()
-        self._create_constr_max_pizza_count()
-        self._create_constr_max_budget()
-        self._create_constr_variable_types()
-        self._problem = cpy.Problem(self._objective, self._constraints)
+        # build model, or reuse the compiled one of the same stores
+        self._compile(data_center)
 
         # solve the problem
-        self._problem.solve(solver=cpy.MOSEK, verbose=True)
+        solved = self._solve()
+        self._check_in()
+        if solved:
+            self._show_opt_values()
+
+        logging.info("PizzaAssortOptimizer optimizer() completes.")
+
+    def optimize_frontier(self, data_center: DataCenter, budgets) -> np.ndarray:
+        """
+        solve the model for a range of budgets. the model is built and canonicalized once with the budget as a
+        parameter, and the budgets are solved in ascending order, each one warm started from the solution of the
+        next smaller one
+        :param data_center: data center, its budget is ignored
+        :param budgets: budgets across the chain
+        :return: max. profit per budget, nan if no solution is found
+        """
+        logging.info("PizzaAssortOptimizer optimize_frontier() starts.")
+        budgets = np.asarray(budgets, dtype=np.float64)
+        self._compile(data_center)
+        self._frontier_profits = np.full(len(budgets), np.nan)
+        self._frontier_assortments = [{} for _ in budgets]
+        solved = False
+        for index in np.argsort(budgets, kind='stable'):
+            self._param_max_budget.value = budgets[index]
+            solved = self._solve(warm_start=solved)
+            if solved:
+                self._frontier_profits[index] = self._opt_obj
+                self._frontier_assortments[index] = self._opt_pizza_count
+        self._check_in()
+        logging.info("PizzaAssortOptimizer optimize_frontier() completes.")
+        return self._frontier_profits
+
+    def _compile(self, data_center: DataCenter):
+        """
+        check out the compiled problem of the same instance shape from the cache and load the store data into its
+        parameters, or build the problem if it is not cached
+        :param data_center: data center
+        """
+        self._cache_key = None
+        if self._cache is None or self._build_mode != "vectorized":
+            self.build(data_center)
+            return
+        self._cache_key = self._shape_key(data_center)
+        compiled = self._cache.get(self._cache_key)
+        if compiled is None:
+            logging.info("the compiled problem is not cached.")
+            self.build(data_center)
+            return
+
+        start = time.perf_counter()
+        self._data_center = data_center
+        self._problem, self._var_pizza_count_matrix = compiled
+        self._objective, self._constraints = self._problem.objective, list(self._problem.constraints)
+        for param in self._problem.parameters():
+            if param.name() == "max_budget":
+                self._param_max_budget = param
+                param.value = data_center.max_budget
+            elif param.name() == "costs":
+                self._param_costs = param
+                param.value = data_center.costs.ravel(order='F')
+            else:
+                param.value = profit_parameter_value(param, data_center)
+        self._build_time = time.perf_counter() - start
+        logging.info(f"finish loading the data into the cached problem in {self._build_time:.3f} seconds.")
+
+    def _shape_key(self, data_center: DataCenter):
+        if self._solver not in MI_CONIC_SOLVERS:
+            return instance_shape_key(data_center, "model 1", self._solver)
+        # the hypograph fixes beta and the store-type pairs that make a profit in the model structure
+        structure = np.concatenate([data_center.beta.ravel(), (profit_coefficients(data_center) > 0).ravel()])
+        return instance_shape_key(data_center, "model 1", self._solver, structure.tobytes())
 
-        # obtain optimal solution
-        if self._problem.status == "optimal":
+    def _check_in(self):
+        if self._cache_key is not None:
+            self._cache.put(self._cache_key, (self._problem, self._var_pizza_count_matrix),
+                            problem_nbytes(self._problem))
+            self._cache_key = None
+
+    def _solve(self, warm_start: bool = False) -> bool:
+        """
+        solve the built model
+        :param warm_start: start the solver from the current variable values if True
+        :return: True if a solution is found
+        """
+        start = time.perf_counter()
+        self._problem.solve(solver=self._solver, verbose=self._verbose, warm_start=warm_start,
+                            **solve_params(self._solver, self._time_limit, self._num_threads, target_gap()))
+        self._solve_time = time.perf_counter() - start
+        add_time("canonicalize", self._problem.compilation_time)
+        add_time("solve", self._solve_time - (self._problem.compilation_time or 0.0))
+
+        # obtain optimal solution, or the best one found within the time limit
+        if self._problem.status in cpy.settings.SOLUTION_PRESENT and self._problem.value is not None:
             logging.info(f"solve success, opt_obj: {self._problem.value}")
             self._opt_obj = float(self._problem.value)
-            self._retrieve_opt_values()
-            self._show_opt_values()
-        else:
-            logging.info(f"solve failure, status: {self._problem.status}")
+            with timed("retrieve"):
+                self._retrieve_opt_values()
+            return True
+        logging.info(f"solve failure, status: {self._problem.status}")
+        return False
 
-        logging.info("PizzaAssortOptimizer optimizer() completes.")
+    def build(self, data_center: DataCenter) -> cpy.Problem:
+        """
+        build the optimization model without solving it
+        :param data_center: data center
+        :return: the model
+        """
+        self._data_center = data_center
+        self._constraints = []
+        self._param_max_budget = cpy.Parameter(nonneg=True, name="max_budget", value=data_center.max_budget)
+        start = time.perf_counter()
+        if self._build_mode == "vectorized":
+            steps = [
+                self._create_matrix_variables,
+                self._create_matrix_objective,
+                self._create_matrix_constr_max_pizza_count,
+                self._create_matrix_constr_max_budget,
+                self._create_matrix_constr_variable_types,
+            ]
+        else:
+            steps = [
+                self._create_variables,
+                self._create_objective,
+                self._create_constr_max_pizza_count,
+                self._create_constr_max_budget,
+                self._create_constr_variable_types,
+            ]
+        for step in steps:
+            with timed(f"build.{step.__name__.lstrip('_')}"):
+                step()
+        self._problem = cpy.Problem(self._objective, self._constraints)
+        self._build_time = time.perf_counter() - start
+        logging.info(f"finish building the model in {self._build_time:.3f} seconds.")
+        return self._problem
 
     def _create_variables(self):
         for store_id, store in self._data_center.stores.items():
@@ -85,7 +254,7 @@ class PizzaAssortmentOptimizer:
             for store in self._data_center.stores.values()
             for pizza_type in self._data_center.pizza_types
         ]
-        self._constraints.append(cpy.sum(constr_expr) <= self._data_center.max_budget)
+        self._constraints.append(cpy.sum(constr_expr) <= self._param_max_budget)
         logging.info("finish creating the budget constraint.")
 
     def _create_constr_variable_types(self):
@@ -97,7 +266,47 @@ class PizzaAssortmentOptimizer:
                 )
         logging.info("finish creating variable bound constraints.")
 
+    def _create_matrix_variables(self):
+        shape = (self._data_center.num_stores, len(self._data_center.pizza_types))
+        self._var_pizza_count_matrix = cpy.Variable(shape, name="x", integer=True)
+        logging.info("finish creating decision variables.")
+
+    def _create_matrix_objective(self):
+        create_objective = create_profit_hypograph if self._solver in MI_CONIC_SOLVERS else create_profit_selection
+        self._objective, constraints = create_objective(self._var_pizza_count_matrix, self._data_center,
+                                                        parameterized=True)
+        self._constraints.extend(constraints)
+        logging.info("finish creating objective function.")
+
+    def _create_matrix_constr_max_pizza_count(self):
+        self._constraints.append(
+            cpy.sum(self._var_pizza_count_matrix, axis=1) <= self._data_center.max_pizza_count
+        )
+        logging.info("finish creating max pizza count constraints.")
+
+    def _create_matrix_constr_max_budget(self):
+        # the costs enter as a parameter of an inner product, which lets a cached problem take new costs
+        self._param_costs = cpy.Parameter(self._data_center.costs.size, name="costs",
+                                          value=self._data_center.costs.ravel(order='F'))
+        self._constraints.append(
+            self._param_costs @ cpy.vec(self._var_pizza_count_matrix, order='F') <= self._param_max_budget
+        )
+        logging.info("finish creating the budget constraint.")
+
+    def _create_matrix_constr_variable_types(self):
+        self._constraints.append(self._var_pizza_count_matrix >= 0)
+        self._constraints.append(self._var_pizza_count_matrix <= self._data_center.max_pizza_count)
+        logging.info("finish creating variable bound constraints.")
+
     def _retrieve_opt_values(self):
+        self._opt_pizza_count = {}
+        self._opt_pizza_count_matrix = None
+        if self._build_mode == "vectorized":
+            self._opt_pizza_count_matrix = np.rint(self._var_pizza_count_matrix.value).astype(np.int64)
+            self._opt_pizza_count = assortment_dict(self._data_center, self._opt_pizza_count_matrix)
+            logging.info("finish retrieving the optimal solution from solver.")
+            return
+
         for store in self._data_center.stores.values():
             opt_count = {
                 pizza_type: round(float(self._var_pizza_count[store.id][pizza_type].value))
@@ -107,8 +316,29 @@ class PizzaAssortmentOptimizer:
         logging.info("finish retrieving the optimal solution from solver.")
 
     def _show_opt_values(self):
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
         df = pd.DataFrame(self._opt_pizza_count)
-        print(df)
+        logging.debug(f"show pizza assortment results:\n{df}")
+
+    @property
+    def status(self) -> str:
+        return None if self._problem is None else self._problem.status
+
+    @property
+    def build_time(self):
+        return self._build_time
+
+    @property
+    def compile_time(self) -> float:
+        """
+        seconds cvxpy spent on canonicalizing the problem in the last solve
+        """
+        return None if self._problem is None else self._problem.compilation_time
+
+    @property
+    def solve_time(self):
+        return self._solve_time
 
     @property
     def maximal_profits(self):
@@ -117,3 +347,19 @@ class PizzaAssortmentOptimizer:
     @property
     def optimal_assortment(self):
         return self._opt_pizza_count
+
+    @property
+    def optimal_count_matrix(self) -> np.ndarray:
+        return self._opt_pizza_count_matrix
+
+    @property
+    def cache(self) -> ProblemCache:
+        return self._cache
+
+    @property
+    def frontier_profits(self) -> np.ndarray:
+        return self._frontier_profits
+
+    @property
+    def frontier_assortments(self) -> List[Dict[int, Dict[str, int]]]:
+        return self._frontier_assortments
@@ -1,9 +1,18 @@
 import logging
+import time
 import cvxpy as cpy
-from typing import Dict, List
+import numpy as np
+from typing import Dict, List, Tuple
 import pandas as pd
 
 from src.common.data_center import DataCenter
+from src.model.bounds import group_level_bounds, store_count_bounds
+from src.model.cvxpy_solvers import MI_CONIC_SOLVERS, solve_params
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+from src.model.profit import create_profit_hypograph, create_profit_selection, profit_auxiliary_value
+from src.model.solution import group_solution_dicts
+from src.model.solve_control import remaining_time, report_incumbent, target_gap
+from src.utils.metrics import add_time, timed
 
 
 class PizzaAssortmentOptimizerWtGroup:
@@ -12,7 +21,44 @@ class PizzaAssortmentOptimizerWtGroup:
     extra operational constraints
     """
 
-    def __init__(self):
+    # "vectorized" builds the model over (store x type) matrix variables,
+    # "scalar" builds it with one variable per store, type and group
+    BUILD_MODES = ("vectorized", "scalar")
+    # share of the time limit the heuristic warm start takes at most
+    _WARM_START_SHARE = 0.25
+
+    def __init__(self, build_mode: str = "vectorized", solver: str = "MOSEK", time_limit: float = 20.0,
+                 warm_start: bool = True, strengthen: bool = False, num_threads: int = None, verbose: bool = False):
+        """
+        constructor
+        :param build_mode: "vectorized" or "scalar"
+        :param solver: cvxpy solver name, solvers without mixed-integer power cone support get the tabulated
+        profit objective, which needs the vectorized build mode
+        :param time_limit: max. time in seconds of optimize(), or of every budget of optimize_frontier(), the warm
+        start and the model build included, no limit if None. it is cut to the time left until the deadline of the
+        request, see SolveControl
+        :param warm_start: start the solver from the heuristic incumbent if True, which is also kept if the solver
+        does not beat it
+        :param strengthen: build the strengthened formulation if True, which orders the groups by their pizza count
+        to break their symmetry, bounds the counts per store, declares the bounds on the variables instead of as
+        constraints, and makes the assignment variables boolean. it needs the vectorized build mode
+        :param num_threads: max. number of solver threads, the solver default if None
+        :param verbose: show the solver log if True
+        """
+        if build_mode not in self.BUILD_MODES:
+            raise ValueError(f"invalid build mode: {build_mode}")
+        if build_mode == "scalar" and strengthen:
+            raise ValueError("the strengthened formulation needs the vectorized build mode")
+        if build_mode == "scalar" and solver not in MI_CONIC_SOLVERS:
+            raise ValueError(f"the scalar build mode needs a mixed-integer conic solver, got: {solver}")
+        self._build_mode = build_mode
+        self._solver = solver
+        self._time_limit = time_limit
+        self._warm_start = warm_start
+        self._strengthen = strengthen
+        self._num_threads = num_threads
+        self._verbose = verbose
+        self._heuristic: PizzaAssortmentOptimizerWtGroupHeuristic = None
         self._data_center: DataCenter = None
         # store + type -> integer variable
         self._var_count_per_store_type: Dict[int, Dict[str, cpy.Variable]] = {}
@@ -22,52 +68,236 @@ class PizzaAssortmentOptimizerWtGroup:
         self._var_assign_store_type_group: Dict[int, Dict[str, Dict[int, cpy.Variable]]] = {}
         # type + group -> integer variable
         self._var_count_per_type_group: Dict[str, Dict[int, cpy.Variable]] = {}
+        # (store x type) integer variable
+        self._var_count_matrix: cpy.Variable = None
+        # group -> (store x type) integer variable
+        self._var_count_group_matrices: List[cpy.Variable] = []
+        # group -> (store x type) binary variable
+        self._var_assign_group_matrices: List[cpy.Variable] = []
+        # (group x type) integer variable
+        self._var_count_type_group_matrix: cpy.Variable = None
+        # auxiliary variable of the profit objective
+        self._var_profit_aux: cpy.Variable = None
+        # budget across the chain, a parameter so that the model is canonicalized once for many budgets
+        self._param_max_budget: cpy.Parameter = None
         self._objective = None
         self._constraints: List = []
         self._problem: cpy.Problem = None
         self._BIG_M = None
+        # (store x type) count bounds and (type) group count bounds of the strengthened formulation
+        self._count_bounds: np.ndarray = None
+        self._level_bounds: np.ndarray = None
 
         # optimal solution
+        self._status: str = None
         self._opt_obj: float = None
         self._opt_count_per_store_type = {}
         self._opt_count_per_store_type_group = {}
         self._opt_assign_store_type_group = {}
         self._opt_count_per_type_group = {}
+        # (counts, assign, count_type_group) matrices of the solution, None in the scalar build mode
+        self._opt_matrices: Tuple = None
+
+        # max. profit, optimal assortment and store assignment per budget of the budget frontier
+        self._frontier_profits: np.ndarray = None
+        self._frontier_assortments: List[Dict] = []
+        self._frontier_assign_store_type_group: List[Dict] = []
+
+        # elapsed seconds of model building and solving
+        self._build_time: float = None
+        self._solve_time: float = None
+        # time.perf_counter() at which the running solve started, the time limit counts from it
+        self._start: float = None
 
     def optimize(self, data_center: DataCenter):
         logging.info("PizzaAssortOptimizerWtGroup optimizer() starts.")
-        self._data_center = data_center
-        self._BIG_M = self._data_center.max_pizza_count
+        self._start = time.perf_counter()
+        # construct an incumbent to warm start the solver
+        incumbent, incumbent_obj = self._construct_incumbent(data_center)
 
         # build model
-        self._create_variables()
-        self._create_objective()
-        self._create_constr_max_pizza_count()
-        self._create_constr_max_budget()
-        self._create_constr_derive_count_per_store_type()
-        self._create_constr_enforce_one_group_per_pizza_type()
-        self._create_constr_min_stores_in_group()
-        self._create_constr_linearization()
-        self._create_constr_variable_types()
-        self._problem = cpy.Problem(self._objective, self._constraints)
+        self.build(data_center)
 
         # solve the problem
-        self._problem.solve(solver=cpy.MOSEK, verbose=True,
-                            mosek_params={'MSK_DPAR_OPTIMIZER_MAX_TIME': 20.0,
-                                          'MSK_IPAR_INTPNT_SOLVE_FORM': 'MSK_SOLVE_DUAL'}
-                            )
+        if self._solve(incumbent, incumbent_obj):
+            self._show_opt_values()
+
+        logging.info("PizzaAssortOptimizerWtGroup optimizer() completes.")
 
-        # obtain optimal solution
-        if self._problem.status not in ("infeasible", "unbounded"):
+    def optimize_frontier(self, data_center: DataCenter, budgets) -> np.ndarray:
+        """
+        solve the model for a range of budgets. the model is built and canonicalized once with the budget as a
+        parameter, and the budgets are solved in ascending order, each one warm started from the better of the
+        heuristic solution and the solution of the next smaller budget
+        :param data_center: data center, its budget is ignored
+        :param budgets: budgets across the chain
+        :return: max. profit per budget, nan if no solution is found
+        """
+        logging.info("PizzaAssortOptimizerWtGroup optimize_frontier() starts.")
+        budgets = np.asarray(budgets, dtype=np.float64)
+        # the count bounds of the strengthened formulation are derived from the largest budget
+        self.build(data_center.with_max_budget(budgets.max()))
+        self._frontier_profits = np.full(len(budgets), np.nan)
+        self._frontier_assortments = [{} for _ in budgets]
+        self._frontier_assign_store_type_group = [{} for _ in budgets]
+        previous, previous_obj = None, None
+        for index in np.argsort(budgets, kind='stable'):
+            self._start = time.perf_counter()
+            self._param_max_budget.value = budgets[index]
+            incumbent, incumbent_obj = self._construct_incumbent(data_center.with_max_budget(budgets[index]))
+            if previous is not None and (incumbent is None or previous_obj > incumbent_obj):
+                # the solution of the next smaller budget stays feasible
+                incumbent, incumbent_obj = previous, previous_obj
+            if self._solve(incumbent, incumbent_obj):
+                self._frontier_profits[index] = self._opt_obj
+                self._frontier_assortments[index] = self._opt_count_per_store_type
+                self._frontier_assign_store_type_group[index] = self._opt_assign_store_type_group
+                if self._warm_start:
+                    previous, previous_obj = self._opt_matrices, self._opt_obj
+        logging.info("PizzaAssortOptimizerWtGroup optimize_frontier() completes.")
+        return self._frontier_profits
+
+    def _construct_incumbent(self, data_center: DataCenter) -> Tuple[Tuple, float]:
+        """
+        construct a solution with the heuristic if warm start is enabled
+        :param data_center: data center
+        :return: (counts, assign, count_type_group) solution, its profit, None if not constructed
+        """
+        if not self._warm_start:
+            return None, None
+        time_left = remaining_time(self._time_limit, self._start)
+        self._heuristic = PizzaAssortmentOptimizerWtGroupHeuristic(
+            time_limit=None if time_left is None else self._WARM_START_SHARE * time_left)
+        with timed("heuristic"):
+            incumbent = self._heuristic.solve(data_center)
+        if incumbent is None:
+            return None, None
+        report_incumbent(self._heuristic.maximal_profits, self._heuristic.upper_bound)
+        return incumbent, self._heuristic.maximal_profits
+
+    def _solve(self, incumbent: Tuple = None, incumbent_obj: float = None) -> bool:
+        """
+        solve the built model
+        :param incumbent: (counts, assign, count_type_group) solution to warm start the solver, which is kept if
+        the solver does not beat it
+        :param incumbent_obj: profit of the incumbent
+        :return: True if a solution is found
+        """
+        time_limit = remaining_time(self._time_limit, self._start)
+        if incumbent is not None and time_limit is not None and time_limit <= 0:
+            # no time is left to canonicalize the model and to solve it
+            logging.info(f"the time limit is reached, keep the incumbent, obj: {incumbent_obj}")
+            self._solve_time = 0.0
+            self._keep_incumbent(incumbent, incumbent_obj)
+            return True
+        if incumbent is not None:
+            self._set_initial_values(*incumbent)
+        start = time.perf_counter()
+        params = solve_params(self._solver, time_limit, self._num_threads, target_gap())
+        if self._solver == "MOSEK":
+            params.setdefault('mosek_params', {})['MSK_IPAR_INTPNT_SOLVE_FORM'] = 'MSK_SOLVE_DUAL'
+        self._problem.solve(solver=self._solver, verbose=self._verbose, warm_start=incumbent is not None, **params)
+        self._solve_time = time.perf_counter() - start
+        add_time("canonicalize", self._problem.compilation_time)
+        add_time("solve", self._solve_time - (self._problem.compilation_time or 0.0))
+        self._status = self._problem.status
+
+        # obtain optimal solution, or the best one found within the time limit
+        solved = self._problem.status in cpy.settings.SOLUTION_PRESENT and self._problem.value is not None
+        if solved and (incumbent is None or self._problem.value >= incumbent_obj):
             logging.info(f"solve success, opt_obj: {self._problem.value}")
             self._opt_obj = float(self._problem.value)
-            self._retrieve_opt_values()
-            self._show_opt_values()
+            with timed("retrieve"):
+                self._retrieve_opt_values()
+            return True
+        if incumbent is not None:
+            # the solver did not beat the incumbent within its time limit
+            logging.info(f"solver status: {self._problem.status}, keep the incumbent, obj: {incumbent_obj}")
+            self._keep_incumbent(incumbent, incumbent_obj)
+            return True
+        self._opt_obj = 0
+        logging.info(f"solve failure, status: {self._problem.status}")
+        return False
+
+    def _keep_incumbent(self, incumbent: Tuple, incumbent_obj: float):
+        self._status = "feasible"
+        self._opt_obj = incumbent_obj
+        self._opt_matrices = incumbent
+        (self._opt_count_per_store_type, self._opt_count_per_store_type_group,
+         self._opt_assign_store_type_group, self._opt_count_per_type_group) = group_solution_dicts(
+            self._data_center, *incumbent)
+
+    def _set_initial_values(self, counts: np.ndarray, assign: np.ndarray, count_type_group: np.ndarray):
+        """
+        load a solution into the variables of the vectorized model as the warm start of the solver
+        :param counts: (store x pizza type) pizza counts
+        :param assign: (store x pizza type x group) binary group assignment
+        :param count_type_group: (pizza type x group) pizza count of every group
+        """
+        if self._build_mode != "vectorized":
+            return
+        self._var_count_matrix.value = counts
+        for group in range(self._data_center.num_pizza_groups):
+            self._var_count_group_matrices[group].value = counts * assign[:, :, group]
+            self._var_assign_group_matrices[group].value = assign[:, :, group]
+        self._var_count_type_group_matrix.value = count_type_group.T
+        self._var_profit_aux.value = profit_auxiliary_value(self._var_profit_aux, counts, self._data_center)
+        logging.info("finish loading the warm start.")
+
+    def build(self, data_center: DataCenter) -> cpy.Problem:
+        """
+        build the optimization model without solving it
+        :param data_center: data center
+        :return: the model
+        """
+        self._data_center = data_center
+        self._BIG_M = self._data_center.max_pizza_count
+        self._constraints = []
+        self._param_max_budget = cpy.Parameter(nonneg=True, name="max_budget", value=data_center.max_budget)
+        start = time.perf_counter()
+        if self._build_mode == "vectorized" and self._strengthen:
+            steps = [
+                self._create_strong_variables,
+                self._create_matrix_objective,
+                self._create_matrix_constr_max_pizza_count,
+                self._create_matrix_constr_max_budget,
+                self._create_matrix_constr_derive_count_per_store_type,
+                self._create_matrix_constr_enforce_one_group_per_pizza_type,
+                self._create_matrix_constr_min_stores_in_group,
+                self._create_strong_constr_linearization,
+                self._create_strong_constr_group_order,
+            ]
+        elif self._build_mode == "vectorized":
+            steps = [
+                self._create_matrix_variables,
+                self._create_matrix_objective,
+                self._create_matrix_constr_max_pizza_count,
+                self._create_matrix_constr_max_budget,
+                self._create_matrix_constr_derive_count_per_store_type,
+                self._create_matrix_constr_enforce_one_group_per_pizza_type,
+                self._create_matrix_constr_min_stores_in_group,
+                self._create_matrix_constr_linearization,
+                self._create_matrix_constr_variable_types,
+            ]
         else:
-            self._opt_obj = 0
-            logging.info(f"solve failure, status: {self._problem.status}")
-
-        logging.info("PizzaAssortOptimizerWtGroup optimizer() completes.")
+            steps = [
+                self._create_variables,
+                self._create_objective,
+                self._create_constr_max_pizza_count,
+                self._create_constr_max_budget,
+                self._create_constr_derive_count_per_store_type,
+                self._create_constr_enforce_one_group_per_pizza_type,
+                self._create_constr_min_stores_in_group,
+                self._create_constr_linearization,
+                self._create_constr_variable_types,
+            ]
+        for step in steps:
+            with timed(f"build.{step.__name__.lstrip('_')}"):
+                step()
+        self._problem = cpy.Problem(self._objective, self._constraints)
+        self._build_time = time.perf_counter() - start
+        logging.info(f"finish building the model in {self._build_time:.3f} seconds.")
+        return self._problem
 
     def _create_variables(self):
         # store + type -> pizza count variable
@@ -139,7 +369,7 @@ class PizzaAssortmentOptimizerWtGroup:
             for store in self._data_center.stores.values()
             for pizza_type in self._data_center.pizza_types
         ]
-        self._constraints.append(cpy.sum(constr_expr) <= self._data_center.max_budget)
+        self._constraints.append(cpy.sum(constr_expr) <= self._param_max_budget)
         logging.info("finish creating the budget constraint.")
 
     def _create_constr_derive_count_per_store_type(self):
@@ -216,7 +446,137 @@ class PizzaAssortmentOptimizerWtGroup:
                     self._var_count_per_type_group[pizza_type][group] <= self._data_center.max_pizza_count)
         logging.info("finish creating data type variables.")
 
+    def _create_matrix_variables(self):
+        shape = (self._data_center.num_stores, len(self._data_center.pizza_types))
+        groups = range(self._data_center.num_pizza_groups)
+        # store + type -> pizza count variable
+        self._var_count_matrix = cpy.Variable(shape, name="x", integer=True)
+        # store + type + group -> pizza count variables
+        self._var_count_group_matrices = [cpy.Variable(shape, name=f"v_g{group}", integer=True) for group in groups]
+        # store + type + group -> binary assignment variable
+        self._var_assign_group_matrices = [cpy.Variable(shape, name=f"y_g{group}", integer=True) for group in groups]
+        # type + group -> integer variable
+        self._var_count_type_group_matrix = cpy.Variable((len(groups), shape[1]), name="z", integer=True)
+        logging.info("finish creating decision variables.")
+
+    def _create_matrix_objective(self):
+        create_objective = create_profit_hypograph if self._solver in MI_CONIC_SOLVERS else create_profit_selection
+        self._objective, constraints = create_objective(self._var_count_matrix, self._data_center)
+        self._var_profit_aux = self._objective.variables()[0]
+        self._constraints.extend(constraints)
+        logging.info("finish creating objective function.")
+
+    def _create_matrix_constr_max_pizza_count(self):
+        self._constraints.append(cpy.sum(self._var_count_matrix, axis=1) <= self._data_center.max_pizza_count)
+        logging.info("finish creating max pizza count constraints.")
+
+    def _create_matrix_constr_max_budget(self):
+        self._constraints.append(
+            cpy.sum(cpy.multiply(self._data_center.costs, self._var_count_matrix)) <= self._param_max_budget
+        )
+        logging.info("finish creating the budget constraint.")
+
+    def _create_matrix_constr_derive_count_per_store_type(self):
+        self._constraints.append(cpy.sum(self._var_count_group_matrices) == self._var_count_matrix)
+        logging.info("finish creating linking constraints.")
+
+    def _create_matrix_constr_enforce_one_group_per_pizza_type(self):
+        self._constraints.append(cpy.sum(self._var_assign_group_matrices) == 1)
+        logging.info("finish creating constraints to make sure a pizza type is assigned to only one group.")
+
+    def _create_matrix_constr_min_stores_in_group(self):
+        for var_assign in self._var_assign_group_matrices:
+            self._constraints.append(cpy.sum(var_assign, axis=0) >= 2)
+        logging.info("finish creating constraints to limit min. no. of stores in a group.")
+
+    def _broadcast_count_type_group(self, group: int):
+        # (store x type) expression whose rows all equal z[group, :]
+        ones = np.ones((self._data_center.num_stores, 1))
+        return ones @ self._var_count_type_group_matrix[group:group + 1, :]
+
+    def _create_matrix_constr_linearization(self):
+        for group in range(self._data_center.num_pizza_groups):
+            var_count = self._var_count_group_matrices[group]
+            var_assign = self._var_assign_group_matrices[group]
+            count_type_group = self._broadcast_count_type_group(group)
+            self._constraints.append(var_count >= count_type_group - self._BIG_M * (1 - var_assign))
+            self._constraints.append(var_count <= self._BIG_M * var_assign)
+            self._constraints.append(var_count >= 0)
+            self._constraints.append(var_count <= count_type_group)
+        logging.info("finish creating linearization constraints.")
+
+    def _create_matrix_constr_variable_types(self):
+        max_pizza_count = self._data_center.max_pizza_count
+        self._constraints.append(self._var_count_matrix >= 0)
+        self._constraints.append(self._var_count_matrix <= max_pizza_count)
+        for group in range(self._data_center.num_pizza_groups):
+            self._constraints.append(self._var_count_group_matrices[group] >= 0)
+            self._constraints.append(self._var_count_group_matrices[group] <= max_pizza_count)
+            self._constraints.append(self._var_assign_group_matrices[group] >= 0)
+            self._constraints.append(self._var_assign_group_matrices[group] <= 1)
+        self._constraints.append(self._var_count_type_group_matrix >= 0)
+        self._constraints.append(self._var_count_type_group_matrix <= max_pizza_count)
+        logging.info("finish creating data type variables.")
+
+    def _create_strong_variables(self):
+        shape = (self._data_center.num_stores, len(self._data_center.pizza_types))
+        groups = range(self._data_center.num_pizza_groups)
+        self._count_bounds = store_count_bounds(self._data_center)
+        self._level_bounds = group_level_bounds(self._count_bounds)
+        # store + type -> pizza count variable
+        self._var_count_matrix = cpy.Variable(shape, name="x", integer=True, bounds=[0, self._count_bounds])
+        # store + type + group -> pizza count variables
+        self._var_count_group_matrices = [
+            cpy.Variable(shape, name=f"v_g{group}", integer=True, bounds=[0, self._count_bounds]) for group in groups
+        ]
+        # store + type + group -> binary assignment variable
+        self._var_assign_group_matrices = [cpy.Variable(shape, name=f"y_g{group}", boolean=True) for group in groups]
+        # type + group -> integer variable
+        level_bounds = np.tile(self._level_bounds, (len(groups), 1))
+        self._var_count_type_group_matrix = cpy.Variable((len(groups), shape[1]), name="z", integer=True,
+                                                         bounds=[0, level_bounds])
+        logging.info("finish creating decision variables.")
+
+    def _create_strong_constr_linearization(self):
+        # big-M of v >= z - M(1 - y) is the group count bound, big-M of v <= M y the store count bound
+        level_bounds = np.tile(self._level_bounds, (self._data_center.num_stores, 1))
+        for group in range(self._data_center.num_pizza_groups):
+            var_count = self._var_count_group_matrices[group]
+            var_assign = self._var_assign_group_matrices[group]
+            count_type_group = self._broadcast_count_type_group(group)
+            self._constraints.append(var_count >= count_type_group - cpy.multiply(level_bounds, 1 - var_assign))
+            self._constraints.append(var_count <= cpy.multiply(self._count_bounds, var_assign))
+            self._constraints.append(var_count <= count_type_group)
+        logging.info("finish creating linearization constraints.")
+
+    def _create_strong_constr_group_order(self):
+        # the groups are interchangeable, ordering them by their pizza count removes the permuted copies of
+        # every solution
+        if self._data_center.num_pizza_groups > 1:
+            self._constraints.append(
+                self._var_count_type_group_matrix[:-1, :] <= self._var_count_type_group_matrix[1:, :])
+        logging.info("finish creating symmetry breaking constraints.")
+
+    def _retrieve_matrix_opt_values(self):
+        counts = np.rint(self._var_count_matrix.value)
+        assign = np.stack([np.rint(var.value) for var in self._var_assign_group_matrices], axis=2)
+        count_type_group = np.rint(self._var_count_type_group_matrix.value).T
+        self._opt_matrices = (counts, assign, count_type_group)
+        (self._opt_count_per_store_type, self._opt_count_per_store_type_group,
+         self._opt_assign_store_type_group, self._opt_count_per_type_group) = group_solution_dicts(
+            self._data_center, counts, assign, count_type_group)
+
     def _retrieve_opt_values(self):
+        if self._build_mode == "vectorized":
+            self._retrieve_matrix_opt_values()
+            return
+
+        self._opt_matrices = None
+        self._opt_count_per_store_type = {}
+        self._opt_count_per_store_type_group = {}
+        self._opt_assign_store_type_group = {}
+        self._opt_count_per_type_group = {}
+
         # retrieve optimal values for _var_count_per_store_type
         for store_id, store in self._data_center.stores.items():
             opt_count_per_type = {}
@@ -252,29 +612,58 @@ class PizzaAssortmentOptimizerWtGroup:
             self._opt_count_per_type_group[pizza_type] = opt_count_per_group
 
     def _show_opt_values(self):
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
         df_x = pd.DataFrame.from_dict(self._opt_count_per_store_type, orient='index')
         df_x.index.name = 'store'
         df_x.columns.name = 'pizza type'
-        print("\nshow pizza assortment results: ")
-        print(df_x)
+        logging.debug(f"show pizza assortment results:\n{df_x}")
 
         df_v = pd.DataFrame.from_dict(self._opt_count_per_store_type_group, orient='index')
         df_v.index.name = 'store'
         df_v.columns.name = 'pizza type'
-        print("\nshow pizza count in each pizza type: ")
-        print(df_v)
+        logging.debug(f"show pizza count in each pizza type:\n{df_v}")
 
         df_y = pd.DataFrame.from_dict(self._opt_assign_store_type_group, orient='index')
         df_y.index.name = 'store'
         df_y.columns.name = 'pizza type'
-        print("\nshow store assignment in each pizza type: ")
-        print(df_y)
+        logging.debug(f"show store assignment in each pizza type:\n{df_y}")
 
         df_z = pd.DataFrame.from_dict(self._opt_count_per_type_group)
         df_z.index.name = 'group'
         df_z.columns.name = 'pizza type'
-        print("\nshow pizza count for each group")
-        print(df_z)
+        logging.debug(f"show pizza count for each group:\n{df_z}")
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def best_bound(self):
+        """
+        upper bound on the profit: the profit if the solver proved it optimal, the model 1 bound of the heuristic
+        otherwise, None without a warm start
+        """
+        if self._status == cpy.OPTIMAL:
+            return self._opt_obj
+        return None if self._heuristic is None else self._heuristic.upper_bound
+
+    @property
+    def node_count(self) -> int:
+        """
+        number of branch-and-bound nodes of the last solve, None if the solver does not report it
+        """
+        if self._problem is None or self._problem.solver_stats is None:
+            return None
+        return getattr(self._problem.solver_stats.extra_stats, 'mip_node_count', None)
+
+    @property
+    def build_time(self):
+        return self._build_time
+
+    @property
+    def solve_time(self):
+        return self._solve_time
 
     @property
     def maximal_profits(self):
@@ -295,3 +684,23 @@ class PizzaAssortmentOptimizerWtGroup:
     @property
     def optimal_count_per_type_group(self):
         return self._opt_count_per_type_group
+
+    @property
+    def optimal_count_matrix(self) -> np.ndarray:
+        return None if self._opt_matrices is None else self._opt_matrices[0]
+
+    @property
+    def optimal_assign_matrix(self) -> np.ndarray:
+        return None if self._opt_matrices is None else self._opt_matrices[1]
+
+    @property
+    def frontier_profits(self) -> np.ndarray:
+        return self._frontier_profits
+
+    @property
+    def frontier_assortments(self) -> List[Dict]:
+        return self._frontier_assortments
+
+    @property
+    def frontier_assign_store_type_group(self) -> List[Dict]:
+        return self._frontier_assign_store_type_group
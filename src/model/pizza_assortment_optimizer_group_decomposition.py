@@ -0,0 +1,286 @@
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+import numpy as np
+
+from src.common.data_center import DataCenter
+from src.model.pizza_assortment_optimizer_group_heuristic import GroupSolution, \
+    PizzaAssortmentOptimizerWtGroupHeuristic, sort_groups
+
+
+def _solve_type(net: np.ndarray, num_groups: int) -> Tuple[float, np.ndarray, np.ndarray]:
+    """
+    solve the grouping subproblem of one pizza type: pick the levels of its groups and let every store join the
+    group of its most profitable level. the levels are enumerated over all sorted tuples, the last level in one
+    vectorized pass. the rows asking for at least 2 stores per group are dropped, which keeps the bound valid
+    :param net: (store x count) profit net of the priced budget and store capacity
+    :param num_groups: number of groups
+    :return: subproblem value, group levels, group of every store
+    """
+    width = net.shape[1]
+    best_value, best_levels = -np.inf, None
+    for prefix in itertools.combinations_with_replacement(range(width), num_groups - 1):
+        first = prefix[-1] if prefix else 0
+        joined = net[:, list(prefix)].max(axis=1) if prefix else np.full(len(net), -np.inf)
+        values = np.maximum(joined[:, None], net[:, first:]).sum(axis=0)
+        last = int(np.argmax(values))
+        if values[last] > best_value:
+            best_value, best_levels = float(values[last]), np.array(prefix + (first + last,))
+    return best_value, best_levels, np.argmax(net[:, best_levels], axis=1)
+
+
+class PizzaAssortmentOptimizerWtGroupDecomposition(PizzaAssortmentOptimizerWtGroupHeuristic):
+    """
+    this class solves model 2 by a Lagrangian decomposition over the pizza types. the groups of a pizza type do
+    not involve the other types, only the store capacity and the budget rows tie the types together. they are
+    priced with multipliers, which splits model 2 into one grouping subproblem per pizza type:
+    1. start from the constructive heuristic, its model 1 relaxation gives the first budget multiplier
+    2. solve the subproblems, in parallel worker processes, which gives an upper bound
+    3. repair the group levels of the subproblems into a feasible solution: the stores join their most profitable
+       combination of groups within their capacity, then the levels are fit to the budget
+    4. coordinate the multipliers: bisect on the budget multiplier, with every store capacity priced at the
+       marginal profit of the first pizza that no longer fits, then move all the multipliers along the subgradient
+       of the violated rows with the Polyak step
+    steps 2 - 4 repeat until the gap closes, the step vanishes or the time limit is reached
+    """
+
+    # initial factor of the Polyak step of the refinement, halved after a number of rounds without a better bound
+    _STEP_FACTOR = 1.0
+    _ROUNDS_PER_HALVING = 5
+    # the search stops once the step factor falls below this
+    _MIN_STEP_FACTOR = 1e-4
+
+    def __init__(self, time_limit: float = 20.0, max_iterations: int = 200, tolerance: float = 1e-4,
+                 num_workers: int = None):
+        """
+        constructor
+        :param time_limit: max. solve time in seconds
+        :param max_iterations: max. number of multiplier updates
+        :param tolerance: relative optimality gap at which the search stops
+        :param num_workers: number of worker processes solving the subproblems, one per pizza type up to the
+        number of cores if None, the subproblems are solved in this process if 1
+        """
+        super().__init__(exact_relaxation=False)
+        self._time_limit = time_limit
+        self._max_iterations = max_iterations
+        self._tolerance = tolerance
+        self._num_workers = num_workers
+        # budget multiplier and (store) capacity multipliers of the best bound
+        self._budget_multiplier: float = None
+        self._capacity_multipliers: np.ndarray = None
+        # (upper bound, incumbent objective) after every iteration
+        self._bound_history: List[Tuple[float, float]] = []
+        self._num_iterations: int = 0
+        # pool of the worker processes solving the subproblems during a solve, None to solve them in this process
+        self._executor: ProcessPoolExecutor = None
+
+    def optimize(self, data_center: DataCenter):
+        logging.info("PizzaAssortOptimizerWtGroupDecomposition optimizer() starts.")
+        if self.solve(data_center) is not None:
+            self._show_opt_values()
+        logging.info("PizzaAssortOptimizerWtGroupDecomposition optimizer() completes.")
+
+    def solve(self, data_center: DataCenter) -> Optional[GroupSolution]:
+        """
+        solve model 2 by the decomposition without showing the solution
+        :param data_center: data center
+        :return: pizza counts, group assignment and group levels, None if the group constraints cannot be met
+        """
+        start = time.perf_counter()
+        self._bound_history = []
+        self._num_iterations = 0
+        if super().solve(data_center) is None:
+            return None
+
+        num_types = len(data_center.pizza_types)
+        num_workers = self._num_workers or min(num_types, os.cpu_count() or 1)
+        self._executor = ProcessPoolExecutor(max_workers=num_workers) if num_workers > 1 else None
+        try:
+            low, high = self._bracket_budget_multiplier(self._relaxation.budget_multiplier, start)
+            self._bisect_budget_multiplier(low, high, start)
+            self._refine_multipliers(start)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+            self._executor = None
+
+        self._solve_time = time.perf_counter() - start
+        logging.info(f"decomposition complete, obj: {self._opt_obj}, upper bound: {self._upper_bound}, "
+                     f"gap: {self.gap:.4%}, iterations: {self._num_iterations}, "
+                     f"solve time: {self._solve_time:.3f} seconds")
+        return self._solution
+
+    def reoptimize(self, data_center: DataCenter, previous_rows: np.ndarray) -> Optional[GroupSolution]:
+        """
+        solve model 2 again after a few stores changed. the decomposition keeps no state worth reusing across the
+        change, so unlike the heuristic it solves from scratch, which keeps its bound and its multipliers
+        :param data_center: data center after the change, see DataCenter.with_delta()
+        :param previous_rows: row in the last data center of every store whose data did not change, -1 otherwise
+        :return: pizza counts, group assignment and group levels, None if the group constraints cannot be met
+        """
+        return self.solve(data_center)
+
+    def _should_stop(self, start: float) -> bool:
+        return (self._num_iterations >= self._max_iterations or self.gap <= self._tolerance
+                or time.perf_counter() - start >= self._time_limit)
+
+    def _capacity_prices(self, budget_multiplier: float) -> np.ndarray:
+        """
+        price the capacity of every store at the marginal profit of the first pizza that no longer fits, so that
+        the pizza counts of its subproblems fit the store if the groups left it free to choose
+        :param budget_multiplier: budget multiplier
+        :return: (store) capacity multipliers
+        """
+        counts = np.arange(self._data_center.max_pizza_count + 1)
+        net_table = self._profit_table - budget_multiplier * self._data_center.costs[:, :, None] * counts
+        marginals = np.diff(net_table, axis=2).reshape(len(net_table), -1)
+        max_count = self._data_center.max_pizza_count
+        if marginals.shape[1] <= max_count:
+            return np.zeros(len(net_table))
+        return np.maximum(0.0, -np.partition(-marginals, max_count, axis=1)[:, max_count])
+
+    def _evaluate(self, budget_multiplier: float, capacity_multipliers: np.ndarray, start: float) -> Tuple[
+            float, np.ndarray]:
+        """
+        solve the subproblems under a set of multipliers, keep the bound if it is the best one, and repair the
+        group levels of the subproblems into a solution
+        :param budget_multiplier: budget multiplier
+        :param capacity_multipliers: (store) capacity multipliers
+        :param start: start time of the solve
+        :return: upper bound, (store x pizza type) pizza counts of the subproblems
+        """
+        self._num_iterations += 1
+        data_center = self._data_center
+        max_count = data_center.max_pizza_count
+        # (store x pizza type x count) profit net of the priced rows
+        prices = budget_multiplier * data_center.costs + capacity_multipliers[:, None]
+        net_table = self._profit_table - prices[:, :, None] * np.arange(max_count + 1)[None, None, :]
+        tasks = [(net_table[:, col], data_center.num_pizza_groups) for col in range(net_table.shape[1])]
+        if self._executor is None:
+            results = [_solve_type(*task) for task in tasks]
+        else:
+            results = list(self._executor.map(_solve_type, *zip(*tasks)))
+        bound = float(sum(value for value, _, _ in results) + budget_multiplier * data_center.max_budget +
+                      max_count * capacity_multipliers.sum())
+        if bound < self._upper_bound:
+            self._upper_bound = bound
+            self._budget_multiplier, self._capacity_multipliers = budget_multiplier, capacity_multipliers
+
+        levels = np.stack([levels for _, levels, _ in results])
+        groups = np.stack([groups for _, _, groups in results], axis=1)
+        counts = np.take_along_axis(levels.T, groups, axis=0)
+        self._repair_levels(groups, levels, budget_multiplier, start)
+        self._bound_history.append((self._upper_bound, self._opt_obj))
+        return bound, counts
+
+    def _overspends(self, budget_multiplier: float, start: float) -> bool:
+        _, counts = self._evaluate(budget_multiplier, self._capacity_prices(budget_multiplier), start)
+        return float((self._data_center.costs * counts).sum()) > self._data_center.max_budget
+
+    def _bracket_budget_multiplier(self, guess: float, start: float) -> Tuple[float, float]:
+        """
+        bracket the budget multiplier around a guess by steps that double away from it, the capacity is priced
+        by _capacity_prices()
+        :return: multiplier whose subproblems overspend or 0, multiplier whose subproblems respect the budget
+        """
+        step = 1e-2 * max(guess, 1e-9)
+        if not self._overspends(guess, start):
+            high = guess
+            while guess - step > 0 and not self._should_stop(start) and not self._overspends(guess - step, start):
+                high, step = guess - step, 2 * step
+            return max(guess - step, 0.0), high
+        low = guess
+        while not self._should_stop(start) and self._overspends(guess + step, start):
+            low, step = guess + step, 2 * step
+        return low, guess + step
+
+    def _bisect_budget_multiplier(self, low: float, high: float, start: float):
+        """
+        bisect on the budget multiplier: the lower end overspends, the upper end respects the budget
+        """
+        while not self._should_stop(start) and high - low > self._tolerance * high:
+            mid = (low + high) / 2
+            if self._overspends(mid, start):
+                low = mid
+            else:
+                high = mid
+
+    def _refine_multipliers(self, start: float):
+        """
+        move all the multipliers along the subgradient of the priced rows with the Polyak step, starting from the
+        best ones found, until the step vanishes
+        """
+        data_center = self._data_center
+        max_count = data_center.max_pizza_count
+        budget_multiplier, capacity_multipliers = self._budget_multiplier, self._capacity_multipliers
+        step_factor, stalled = self._STEP_FACTOR, 0
+        best_bound = self._upper_bound
+        while step_factor >= self._MIN_STEP_FACTOR and not self._should_stop(start):
+            bound, counts = self._evaluate(budget_multiplier, capacity_multipliers, start)
+            if bound < best_bound - 1e-9 * abs(best_bound):
+                best_bound, stalled = bound, 0
+            else:
+                stalled += 1
+                if stalled >= self._ROUNDS_PER_HALVING:
+                    step_factor, stalled = step_factor / 2, 0
+            # a multiplier only moves where its row is violated or it is positive
+            budget_slack = data_center.max_budget - float((data_center.costs * counts).sum())
+            capacity_slack = (max_count - counts.sum(axis=1)).astype(np.float64)
+            if budget_multiplier <= 0 and budget_slack > 0:
+                budget_slack = 0.0
+            capacity_slack[(capacity_multipliers <= 0) & (capacity_slack > 0)] = 0.0
+            norm = budget_slack ** 2 + float((capacity_slack ** 2).sum())
+            if norm == 0:
+                # the subproblem solution is feasible and priced right, the bound is tight
+                return
+            step = step_factor * max(bound - self._opt_obj, 1e-9) / norm
+            budget_multiplier = max(0.0, budget_multiplier - step * budget_slack)
+            capacity_multipliers = np.maximum(0.0, capacity_multipliers - step * capacity_slack)
+
+    def _repair_levels(self, groups: np.ndarray, levels: np.ndarray, budget_multiplier: float, start: float):
+        """
+        repair the groups and levels of the subproblems into a feasible solution, the way the heuristic repairs its
+        clusters, and keep it if it beats the incumbent
+        :param groups: (store x pizza type) groups of the subproblems
+        :param levels: (pizza type x group) levels of the subproblems
+        :param budget_multiplier: budget multiplier the subproblems were solved with
+        :param start: start time of the solve
+        """
+        counts = np.arange(self._data_center.max_pizza_count + 1)
+        net_table = self._profit_table - budget_multiplier * self._data_center.costs[:, :, None] * counts
+        groups = self._reassign_stores(groups, levels, net_table)
+        self._repair_budget(groups, levels)
+        self._raise_levels(groups, levels)
+        counts = np.take_along_axis(levels.T, groups, axis=0)
+        if (self._data_center.costs * counts).sum() > self._data_center.max_budget:
+            return
+        rows = np.arange(counts.shape[0])[:, None]
+        cols = np.arange(counts.shape[1])[None, :]
+        if self._profit_table[rows, cols, counts].sum() <= self._opt_obj:
+            return
+        sort_groups(groups, levels)
+        counts = np.take_along_axis(levels.T, groups, axis=0)
+        self._set_solution(counts, np.eye(self._data_center.num_pizza_groups, dtype=np.int64)[groups], levels)
+        logging.info(f"better solution after {time.perf_counter() - start:.3f} seconds, obj: {self._opt_obj}")
+
+    @property
+    def budget_multiplier(self) -> float:
+        return self._budget_multiplier
+
+    @property
+    def capacity_multipliers(self) -> np.ndarray:
+        return self._capacity_multipliers
+
+    @property
+    def bound_history(self) -> List[Tuple[float, float]]:
+        """
+        (upper bound, incumbent objective) after every multiplier update
+        """
+        return self._bound_history
+
+    @property
+    def num_iterations(self) -> int:
+        return self._num_iterations
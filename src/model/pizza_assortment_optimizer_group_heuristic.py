@@ -0,0 +1,573 @@
+import itertools
+import logging
+import math
+import time
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from src.common.data_center import DataCenter
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.model.pizza_assortment_optimizer_lagrangian import PizzaAssortmentOptimizerLagrangian
+from src.model.profit import profit_coefficients, tabulate_profits
+from src.model.solution import group_solution_dicts
+from src.model.solve_control import active_control
+
+# (store x pizza type) pizza counts, (store x pizza type x group) binary assignment, (pizza type x group) levels
+GroupSolution = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def sort_groups(groups: np.ndarray, levels: np.ndarray):
+    """
+    number the groups of every pizza type by increasing level in place, the order the strengthened formulations
+    expect
+    :param groups: (store x pizza type) group
+    :param levels: (pizza type x group) level
+    """
+    for col in range(groups.shape[1]):
+        order = np.argsort(levels[col], kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        groups[:, col] = rank[groups[:, col]]
+        levels[col] = levels[col, order]
+
+
+class PizzaAssortmentOptimizerWtGroupHeuristic:
+    """
+    this class constructs a feasible solution of model 2 without a MIP solver:
+    1. solve model 1, a relaxation of model 2, which gives the best pizza counts of every store, an upper bound and
+       the lagrangian multiplier of the budget
+    2. for every pizza type, cluster the stores into num_pizza_groups count levels by their model 1 counts
+       with an exact 1-D k-means
+    3. alternately move every store to its best combination of groups within its capacity, and every group to
+       its best level within the capacity of its stores, until nothing changes. the profit is taken net of the
+       budget priced at its multiplier
+    4. lower the group levels until the chain fits its budget, then raise them again as long as the slack allows
+    the solution is an anytime answer with a reported optimality gap, and the warm start of the MIP backends
+    """
+
+    # max. number of rounds of step 3
+    _NUM_REASSIGN_ROUNDS = 20
+    # the knapsack engine solves the model 1 relaxation up to this many count vectors per store, which it enumerates
+    # and keeps in memory. above it, the Lagrangian engine solves it from the marginal profits of every pizza type
+    # if the profits are concave
+    _MAX_COUNT_VECTORS = 2_000
+    # step 3 scores every combination of groups for every store, it is skipped if the (store x combination) scores
+    # take more entries than this
+    _MAX_COMBO_SCORES = 20_000_000
+
+    def __init__(self, exact_relaxation: bool = True, time_limit: float = None):
+        """
+        constructor
+        :param exact_relaxation: solve the model 1 relaxation to optimality if True, stop at its greedy solution
+        otherwise, which gives the same bound and nearly the same counts in a fraction of the time on large chains.
+        the Lagrangian engine, which takes over from the knapsack engine on many pizza types, stops at its greedy
+        solution either way
+        :param time_limit: max. solve time in seconds, no limit if None. it is cut to the time left until the
+        deadline of the request, see SolveControl. the model 1 relaxation takes half of it at most, and step 3
+        stops at it
+        """
+        self._exact_relaxation = exact_relaxation
+        self._time_limit = time_limit
+        self._data_center: DataCenter = None
+        # (store x pizza type x count) profit table
+        self._profit_table: np.ndarray = None
+        # model 1 relaxation of the last solve
+        self._relaxation: Union[PizzaAssortmentOptimizerKnapsack, PizzaAssortmentOptimizerLagrangian] = None
+
+        # best solution found
+        self._status: str = None
+        self._solution: Optional[GroupSolution] = None
+        self._opt_obj: float = None
+        self._upper_bound: float = None
+        self._opt_count_per_store_type = {}
+        self._opt_count_per_store_type_group = {}
+        self._opt_assign_store_type_group = {}
+        self._opt_count_per_type_group = {}
+        self._solve_time: float = None
+
+    def optimize(self, data_center: DataCenter):
+        logging.info("PizzaAssortOptimizerWtGroupHeuristic optimizer() starts.")
+        if self.solve(data_center) is not None:
+            self._show_opt_values()
+        logging.info("PizzaAssortOptimizerWtGroupHeuristic optimizer() completes.")
+
+    def solve(self, data_center: DataCenter) -> Optional[GroupSolution]:
+        """
+        construct a solution of model 2 without showing it
+        :param data_center: data center
+        :return: pizza counts, group assignment and group levels, None if the group constraints cannot be met
+        """
+        start = time.perf_counter()
+        self._data_center = data_center
+        self._profit_table = tabulate_profits(data_center)
+        self._solution = None
+        self._opt_obj = 0
+        num_groups = data_center.num_pizza_groups
+        if data_center.num_stores < 2 * num_groups:
+            self._status = "infeasible"
+            self._solve_time = time.perf_counter() - start
+            logging.info(f"{data_center.num_stores} stores cannot fill {num_groups} groups of at least 2 stores.")
+            return None
+
+        time_limit = self._time_limit
+        control = active_control()
+        if control is not None:
+            time_limit = control.time_limit(time_limit)
+        deadline = None if time_limit is None else start + time_limit
+        relaxed_counts = self._solve_relaxation(data_center, None if time_limit is None else time_limit / 2)
+        net_table = self.net_table()
+
+        num_types = len(data_center.pizza_types)
+        groups = np.empty((data_center.num_stores, num_types), dtype=np.int64)
+        levels = np.empty((num_types, num_groups), dtype=np.int64)
+        for col in range(num_types):
+            groups[:, col], levels[col] = self._cluster_stores(relaxed_counts[:, col])
+        groups = self._reassign_stores(groups, levels, net_table, deadline)
+        return self._complete_solution(groups, levels, start)
+
+    def reoptimize(self, data_center: DataCenter, previous_rows: np.ndarray) -> Optional[GroupSolution]:
+        """
+        construct a solution of model 2 again after a few stores changed, reusing the last solution: the model 1
+        relaxation is re-optimized, the unchanged stores keep their groups, the changed and added stores join their
+        most profitable combination of groups, and the group levels are updated, repaired and raised as in
+        solve(). the gap is reported against the Lagrangian bound of model 1. falls back to solve() if there is no
+        solution to reuse, the group settings changed or a removed store leaves a group with less than 2 stores
+        :param data_center: data center after the change, see DataCenter.with_delta()
+        :param previous_rows: row in the last data center of every store whose data did not change, -1 otherwise
+        :return: pizza counts, group assignment and group levels, None if the group constraints cannot be met
+        """
+        previous = self._data_center
+        if (self._solution is None or previous.num_pizza_groups != data_center.num_pizza_groups
+                or previous.max_pizza_count != data_center.max_pizza_count):
+            logging.info("nothing to reuse, solve from scratch.")
+            return self.solve(data_center)
+        kept = previous_rows >= 0
+        num_groups = data_center.num_pizza_groups
+        groups = np.zeros((data_center.num_stores, len(data_center.pizza_types)), dtype=np.int64)
+        groups[kept] = self._solution[1].argmax(axis=2)[previous_rows[kept]]
+        sizes = self._group_sizes(groups[kept])
+        if (sizes < 2).any():
+            logging.info("the unchanged stores leave a group with less than 2 stores, solve from scratch.")
+            return self.solve(data_center)
+
+        start = time.perf_counter()
+        levels = self._solution[2].copy()
+        self._data_center = data_center
+        self._profit_table = tabulate_profits(data_center)
+        self._solution = None
+        self._opt_obj = 0
+        # the multiplier and the Lagrangian bound are all that is needed of the relaxation
+        if isinstance(self._relaxation, PizzaAssortmentOptimizerKnapsack):
+            self._relaxation.reoptimize(data_center, previous_rows, exact=False)
+        else:
+            self._solve_relaxation(data_center)
+        net_table = self.net_table()
+
+        fresh = np.flatnonzero(~kept)
+        combos = np.array(list(itertools.product(range(num_groups), repeat=groups.shape[1])))
+        score = self._combo_scores(levels, net_table[fresh], combos)
+        groups[fresh] = combos[np.argmax(score, axis=1)]
+        self._update_levels(groups, levels, net_table)
+        self._repair_capacity(groups, levels)
+        logging.info(f"{len(fresh)} changed stores join their groups.")
+        return self._complete_solution(groups, levels, start)
+
+    def _solve_relaxation(self, data_center: DataCenter, time_limit: float = None) -> np.ndarray:
+        """
+        solve the model 1 relaxation with the knapsack engine, or with the Lagrangian engine if the stores have too
+        many count vectors to enumerate and the profits are concave
+        :param data_center: data center
+        :param time_limit: max. solve time in seconds, no limit if None
+        :return: (store x pizza type) model 1 pizza counts
+        """
+        num_types = len(data_center.pizza_types)
+        num_vectors = math.comb(data_center.max_pizza_count + num_types, num_types)
+        concave = not (data_center.beta[profit_coefficients(data_center) > 0] > 1).any()
+        if num_vectors > self._MAX_COUNT_VECTORS and concave:
+            self._relaxation = PizzaAssortmentOptimizerLagrangian(time_limit=time_limit)
+            return self._relaxation.solve(data_center).astype(np.int64)
+        self._relaxation = PizzaAssortmentOptimizerKnapsack(time_limit=time_limit)
+        return self._relaxation.solve(data_center, self._exact_relaxation).astype(np.int64)
+
+    def net_table(self) -> np.ndarray:
+        """
+        :return: (store x pizza type x count) profit net of the budget priced at the multiplier of the model 1
+        relaxation
+        """
+        counts = np.arange(self._data_center.max_pizza_count + 1)
+        return (self._profit_table - self._relaxation.budget_multiplier *
+                self._data_center.costs[:, :, None] * counts[None, None, :])
+
+    def _complete_solution(self, groups: np.ndarray, levels: np.ndarray, start: float) -> GroupSolution:
+        """
+        fit the group levels to the budget and keep the solution
+        :param groups: (store x pizza type) group
+        :param levels: (pizza type x group) level
+        :param start: start time of the solve
+        :return: pizza counts, group assignment and group levels
+        """
+        self._upper_bound = self._relaxation.upper_bound
+        self._repair_budget(groups, levels)
+        self._raise_levels(groups, levels)
+        sort_groups(groups, levels)
+
+        counts = np.take_along_axis(levels.T, groups, axis=0)
+        assign = np.eye(self._data_center.num_pizza_groups, dtype=np.int64)[groups]
+        self._set_solution(counts, assign, levels)
+        self._status = "feasible"
+        self._solve_time = time.perf_counter() - start
+        logging.info(f"solve success, obj: {self._opt_obj}, upper bound: {self._upper_bound}, gap: {self.gap:.4%}, "
+                     f"solve time: {self._solve_time:.3f} seconds")
+        return self._solution
+
+    def _cluster_stores(self, relaxed_counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        cluster the stores of one pizza type into groups by their model 1 counts with an exact 1-D k-means, a
+        dynamic program over the count values that minimizes the squared deviation from the cluster means.
+        every cluster has at least 2 stores, a cluster of m stores may be split into up to m // 2 groups at the
+        same level, and the level of a group is the rounded mean of its cluster
+        :param relaxed_counts: model 1 pizza count of every store
+        :return: group of every store, level of every group
+        """
+        num_groups = self._data_center.num_pizza_groups
+        width = self._data_center.max_pizza_count + 1
+        values = np.arange(width, dtype=np.float64)
+        bin_size = np.bincount(relaxed_counts, minlength=width)
+        prefix_size = np.concatenate([[0], np.cumsum(bin_size)])
+        prefix_sum = np.concatenate([[0], np.cumsum(bin_size * values)])
+        prefix_square = np.concatenate([[0], np.cumsum(bin_size * values ** 2)])
+
+        # best[g, b]: min. squared deviation of the count values 0..b-1 split into clusters that make up g groups
+        best = np.full((num_groups + 1, width + 1), np.inf)
+        best[0, 0] = 0
+        parent = {}
+        for end in range(1, width + 1):
+            for begin in range(end):
+                size = prefix_size[end] - prefix_size[begin]
+                if size < 2:
+                    continue
+                total = prefix_sum[end] - prefix_sum[begin]
+                deviation = prefix_square[end] - prefix_square[begin] - total ** 2 / size
+                level = int(round(total / size))
+                for used in range(num_groups):
+                    if best[used, begin] == np.inf:
+                        continue
+                    for split in range(1, min(size // 2, num_groups - used) + 1):
+                        if best[used, begin] + deviation < best[used + split, end]:
+                            best[used + split, end] = best[used, begin] + deviation
+                            parent[used + split, end] = (used, begin, split, level)
+
+        # walk back through the clusters and split every cluster into its groups
+        order = np.argsort(relaxed_counts, kind='stable')
+        groups = np.empty(len(relaxed_counts), dtype=np.int64)
+        levels = np.empty(num_groups, dtype=np.int64)
+        used, end = num_groups, width
+        while used > 0:
+            prev_used, begin, split, level = parent[used, end]
+            members = order[prefix_size[begin]:prefix_size[end]]
+            for part, chunk in enumerate(np.array_split(members, split)):
+                groups[chunk] = prev_used + part
+                levels[prev_used + part] = level
+            used, end = prev_used, begin
+        return groups, levels
+
+    def _group_sizes(self, groups: np.ndarray) -> np.ndarray:
+        # (pizza type x group) number of stores
+        num_groups = self._data_center.num_pizza_groups
+        return np.stack([np.bincount(groups[:, col], minlength=num_groups) for col in range(groups.shape[1])])
+
+    def _reassign_stores(self, groups: np.ndarray, levels: np.ndarray, net_table: np.ndarray,
+                         deadline: float = None) -> np.ndarray:
+        """
+        alternately assign the stores to their groups and the groups to their levels until nothing changes
+        :param groups: (store x pizza type) initial group
+        :param levels: (pizza type x group) level, updated in place
+        :param net_table: (store x pizza type x count) profit table net of the priced budget
+        :param deadline: time.perf_counter() after which no round starts, no limit if None
+        :return: (store x pizza type) group
+        """
+        num_types = groups.shape[1]
+        self._fit_smallest_levels(levels)
+        if len(groups) * self._data_center.num_pizza_groups ** num_types > self._MAX_COMBO_SCORES:
+            logging.info("too many combinations of groups to reassign the stores, keep their clusters.")
+            self._repair_capacity(groups, levels)
+            return groups
+        # combination -> group of every pizza type
+        combos = np.array(list(itertools.product(range(self._data_center.num_pizza_groups), repeat=num_types)))
+        for _ in range(self._NUM_REASSIGN_ROUNDS):
+            if deadline is not None and time.perf_counter() > deadline:
+                logging.info("the reassignment of the stores reaches its time limit.")
+                break
+            moved = self._assign_stores(levels, net_table, combos)
+            if moved is None:
+                break
+            old_levels = levels.copy()
+            self._update_levels(moved, levels, net_table)
+            if (moved == groups).all() and (levels == old_levels).all():
+                break
+            groups = moved
+        self._repair_capacity(groups, levels)
+        return groups
+
+    def _repair_capacity(self, groups: np.ndarray, levels: np.ndarray):
+        """
+        lower the highest group of every store above the max. pizza count until all stores fit, only needed if
+        the stores could not be reassigned
+        """
+        max_count = self._data_center.max_pizza_count
+        cols = np.arange(groups.shape[1])[None, :]
+        while True:
+            counts = levels[cols, groups]
+            over = np.nonzero(counts.sum(axis=1) > max_count)[0]
+            if len(over) == 0:
+                return
+            row = over[0]
+            col = int(np.argmax(counts[row]))
+            levels[col, groups[row, col]] -= 1
+
+    def _fit_smallest_levels(self, levels: np.ndarray):
+        """
+        lower the smallest level of the pizza types until their sum fits the max. pizza count, which leaves
+        every store at least one combination of groups within its capacity
+        """
+        while levels.min(axis=1).sum() > self._data_center.max_pizza_count:
+            col = int(np.argmax(levels.min(axis=1)))
+            levels[col, np.argmin(levels[col])] -= 1
+
+    def _combo_scores(self, levels: np.ndarray, net_table: np.ndarray, combos: np.ndarray) -> np.ndarray:
+        """
+        :return: (store x combination) net profit of every combination of groups, -inf beyond the store capacity
+        """
+        num_types = combos.shape[1]
+        combo_levels = levels[np.arange(num_types)[None, :], combos]
+        # summed type by type, which keeps the memory at one (store x combination) matrix
+        score = np.zeros((len(net_table), len(combos)))
+        for col in range(num_types):
+            score += net_table[:, col, combo_levels[:, col]]
+        score[:, combo_levels.sum(axis=1) > self._data_center.max_pizza_count] = -np.inf
+        return score
+
+    def _assign_stores(self, levels: np.ndarray, net_table: np.ndarray, combos: np.ndarray) -> Optional[np.ndarray]:
+        """
+        move every store to its most profitable combination of groups within its capacity, then fill the groups
+        left with less than 2 stores: such a group is moved to the level where its cheapest joiners lose the
+        least profit, and the joiners are pulled in
+        :param levels: (pizza type x group) level, the levels of the filled groups are updated in place
+        :return: (store x pizza type) group, None if some group cannot be filled
+        """
+        num_types = combos.shape[1]
+        score = self._combo_scores(levels, net_table, combos)
+        choice = np.argmax(score, axis=1)
+        groups = combos[choice]
+        rows = np.arange(len(groups))
+        for _ in range(levels.size):
+            sizes = self._group_sizes(groups)
+            small = np.argwhere(sizes < 2)
+            if len(small) == 0:
+                return groups
+            col, group = small[0]
+            # a store may only join if every group it leaves keeps 2 stores
+            leavable = sizes[np.arange(num_types)[None, :], groups] > 2
+            joining = np.flatnonzero(combos[:, col] == group)
+            best_loss, best_fill = np.inf, None
+            old_level = levels[col, group]
+            # only the term of the group changes with its level, the scores of the other pizza types and the
+            # capacity they take are computed once
+            levels[col, group] = 0
+            others = self._combo_scores(levels, net_table, combos[joining]) - net_table[:, col, :1]
+            others_count = levels[np.arange(num_types)[None, :], combos[joining]].sum(axis=1)
+            for level in range(self._data_center.max_pizza_count + 1):
+                joined = others + net_table[:, col, level, None]
+                joined[:, others_count + level > self._data_center.max_pizza_count] = -np.inf
+                target = joining[np.argmax(joined, axis=1)]
+                with np.errstate(invalid='ignore'):
+                    loss = score[rows, choice] - joined.max(axis=1)
+                keeps = ((combos[target] == groups) | leavable).all(axis=1)
+                loss[~keeps | (groups[:, col] == group) | ~np.isfinite(loss)] = np.inf
+                joiners = np.argsort(loss, kind='stable')[:2 - sizes[col, group]]
+                if loss[joiners].sum() < best_loss:
+                    best_loss, best_fill = loss[joiners].sum(), (level, joiners, target[joiners])
+            if best_fill is None:
+                levels[col, group] = old_level
+                return None
+            level, joiners, target = best_fill
+            levels[col, group] = level
+            score[:, joining] = self._combo_scores(levels, net_table, combos[joining])
+            choice[joiners] = target
+            groups[joiners] = combos[target]
+        return groups if (self._group_sizes(groups) >= 2).all() else None
+
+    def _update_levels(self, groups: np.ndarray, levels: np.ndarray, net_table: np.ndarray):
+        """
+        move every group to its most profitable level within the spare capacity of its stores
+        """
+        num_groups = self._data_center.num_pizza_groups
+        max_count = self._data_center.max_pizza_count
+        cols = np.arange(groups.shape[1])[None, :]
+        group_index = np.arange(num_groups)
+        for col in range(groups.shape[1]):
+            counts = levels[cols, groups]
+            spare = max_count - counts.sum(axis=1) + counts[:, col]
+            group_profit = np.zeros((num_groups, net_table.shape[2]))
+            np.add.at(group_profit, groups[:, col], net_table[:, col])
+            max_level = np.full(num_groups, max_count)
+            np.minimum.at(max_level, groups[:, col], spare)
+            group_profit[np.arange(net_table.shape[2])[None, :] > max_level[:, None]] = -np.inf
+            best = np.argmax(group_profit, axis=1)
+            levels[col] = np.where(group_profit[group_index, best] > group_profit[group_index, levels[col]],
+                                   best, levels[col])
+
+    def _level_change(self, groups: np.ndarray, levels: np.ndarray, step: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        evaluate moving the level of every group by one step
+        :return: (pizza type x group) profit change and cost change
+        """
+        num_groups = self._data_center.num_pizza_groups
+        rows = np.arange(len(groups))[:, None]
+        cols = np.arange(groups.shape[1])[None, :]
+        counts = levels[cols, groups]
+        moved = np.clip(counts + step, 0, self._data_center.max_pizza_count)
+        gain = self._profit_table[rows, cols, moved] - self._profit_table[rows, cols, counts]
+        cost = self._data_center.costs * (moved - counts)
+        profit_change = np.stack([np.bincount(groups[:, col], gain[:, col], minlength=num_groups)
+                                  for col in range(groups.shape[1])])
+        cost_change = np.stack([np.bincount(groups[:, col], cost[:, col], minlength=num_groups)
+                                for col in range(groups.shape[1])])
+        return profit_change, cost_change
+
+    def _total_cost(self, groups: np.ndarray, levels: np.ndarray) -> float:
+        cols = np.arange(groups.shape[1])[None, :]
+        return float((self._data_center.costs * levels[cols, groups]).sum())
+
+    def _repair_budget(self, groups: np.ndarray, levels: np.ndarray):
+        """
+        lower the group level that loses the least profit per saved cost until the budget is met
+        """
+        total_cost = self._total_cost(groups, levels)
+        while total_cost > self._data_center.max_budget:
+            profit_change, cost_change = self._level_change(groups, levels, -1)
+            saved = -cost_change
+            ratio = np.where((levels > 0) & (saved > 0), -profit_change / np.maximum(saved, 1e-12), np.inf)
+            col, group = np.unravel_index(np.argmin(ratio), ratio.shape)
+            if ratio[col, group] == np.inf:
+                break
+            levels[col, group] -= 1
+            total_cost -= saved[col, group]
+
+    def _raise_levels(self, groups: np.ndarray, levels: np.ndarray):
+        """
+        raise the group level with the largest profit gain per cost as long as capacity and budget allow
+        """
+        max_count = self._data_center.max_pizza_count
+        cols = np.arange(groups.shape[1])[None, :]
+        total_cost = self._total_cost(groups, levels)
+        while True:
+            profit_change, cost_change = self._level_change(groups, levels, 1)
+            # a group can only go up if all its stores have spare capacity
+            full = levels[cols, groups].sum(axis=1) >= max_count
+            blocked = np.zeros(levels.shape, dtype=bool)
+            for col in range(groups.shape[1]):
+                blocked[col, np.unique(groups[full, col])] = True
+            allowed = ((levels < max_count) & ~blocked & (profit_change > 0) &
+                       (total_cost + cost_change <= self._data_center.max_budget))
+            if not allowed.any():
+                return
+            ratio = np.where(allowed, profit_change / np.maximum(cost_change, 1e-12), -np.inf)
+            col, group = np.unravel_index(np.argmax(ratio), ratio.shape)
+            levels[col, group] += 1
+            total_cost += cost_change[col, group]
+
+    def _set_solution(self, counts: np.ndarray, assign: np.ndarray, levels: np.ndarray):
+        rows = np.arange(counts.shape[0])[:, None]
+        cols = np.arange(counts.shape[1])[None, :]
+        self._solution = (counts, assign, levels)
+        self._opt_obj = float(self._profit_table[rows, cols, counts].sum())
+        (self._opt_count_per_store_type, self._opt_count_per_store_type_group,
+         self._opt_assign_store_type_group, self._opt_count_per_type_group) = group_solution_dicts(
+            self._data_center, counts, assign, levels)
+
+    def _show_opt_values(self):
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+        df_x = pd.DataFrame(self._solution[0], index=self._data_center.store_ids,
+                            columns=self._data_center.pizza_types)
+        df_x.index.name = 'store'
+        df_x.columns.name = 'pizza type'
+        logging.debug(f"show pizza assortment results:\n{df_x}")
+
+        df_z = pd.DataFrame.from_dict(self._opt_count_per_type_group)
+        df_z.index.name = 'group'
+        df_z.columns.name = 'pizza type'
+        logging.debug(f"show pizza count for each group:\n{df_z}")
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def solution(self) -> Optional[GroupSolution]:
+        return self._solution
+
+    @property
+    def profit_table(self) -> np.ndarray:
+        """
+        (store x pizza type x count) profit of the last solve, see tabulate_profits()
+        """
+        return self._profit_table
+
+    @property
+    def budget_multiplier(self) -> Optional[float]:
+        """
+        budget multiplier of the model 1 relaxation of the last solve
+        """
+        return None if self._relaxation is None else self._relaxation.budget_multiplier
+
+    @property
+    def solve_time(self):
+        return self._solve_time
+
+    @property
+    def upper_bound(self):
+        return self._upper_bound
+
+    @property
+    def best_bound(self):
+        return self._upper_bound
+
+    @property
+    def gap(self) -> float:
+        """
+        relative optimality gap of the solution against the model 1 bound
+        """
+        if self._solution is None or self._upper_bound is None:
+            return np.inf
+        return max(0.0, self._upper_bound - self._opt_obj) / max(abs(self._upper_bound), 1e-9)
+
+    @property
+    def maximal_profits(self):
+        return self._opt_obj
+
+    @property
+    def optimal_assortment(self) -> Dict[int, Dict[str, int]]:
+        return self._opt_count_per_store_type
+
+    @property
+    def optimal_count_per_store_type_group(self):
+        return self._opt_count_per_store_type_group
+
+    @property
+    def optimal_assign_store_type_group(self):
+        return self._opt_assign_store_type_group
+
+    @property
+    def optimal_count_per_type_group(self):
+        return self._opt_count_per_type_group
+
+    @property
+    def optimal_count_matrix(self) -> np.ndarray:
+        return None if self._solution is None else self._solution[0]
+
+    @property
+    def optimal_assign_matrix(self) -> np.ndarray:
+        return None if self._solution is None else self._solution[1]
@@ -0,0 +1,439 @@
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from src.common.data_center import DataCenter
+from src.model.bounds import scaled_budget_row
+from src.model.pizza_assortment_optimizer_group_heuristic import GroupSolution, \
+    PizzaAssortmentOptimizerWtGroupHeuristic, sort_groups
+from src.model.solution import group_solution_dicts
+from src.model.solve_control import active_control, report_incumbent
+from src.utils.metrics import timed
+
+
+class PizzaAssortmentOptimizerWtGroupLns:
+    """
+    this class solves model 2 with an anytime large neighbourhood search:
+    1. start from the constructive heuristic, whose model 1 relaxation also gives the upper bound
+    2. free a neighbourhood, i.e. the group assignment of some stores and the group levels of some pizza types,
+       and solve the small sub-MIP with everything else fixed with CP-SAT. the fixed stores enter the sub-MIP
+       only through their per-group profit and cost totals, so its size does not grow with the chain
+    3. keep the sub-MIP solution if it improves the incumbent, grow the neighbourhood while its sub-MIPs are
+       solved to optimality and shrink it while they time out, and repeat until the time limit
+    the incumbent is always feasible, its objective over time is kept in history
+    """
+
+    # CP-SAT takes integer constraint coefficients only, the costs are scaled by this factor, rounding the costs
+    # up and the budget down so a solution never breaks the original budget
+    _COST_SCALE = 10_000
+    # ways to pick the stores of a neighbourhood, taken in turn
+    _STORE_STRATEGIES = ("random", "group", "regret")
+
+    def __init__(self, time_limit: float = 20.0, neighbourhood_size: int = 30, sub_time_limit: float = 2.0,
+                 num_workers: int = 8, seed: int = 0,
+                 progress_callback: Callable[[float, float, float], Optional[bool]] = None):
+        """
+        constructor
+        :param time_limit: wall-clock budget of the search in seconds, the initial heuristic included
+        :param neighbourhood_size: initial number of stores freed in a neighbourhood
+        :param sub_time_limit: max. solve time of a sub-MIP in seconds
+        :param num_workers: number of CP-SAT search threads of a sub-MIP
+        :param seed: seed of the neighbourhood choice
+        :param progress_callback: called with (elapsed seconds, incumbent objective, upper bound) at the start and
+        on every improvement, the search stops if it returns True
+        """
+        self._time_limit = time_limit
+        self._neighbourhood_size = neighbourhood_size
+        self._sub_time_limit = sub_time_limit
+        self._num_workers = num_workers
+        self._seed = seed
+        self._progress_callback = progress_callback
+        self._heuristic: PizzaAssortmentOptimizerWtGroupHeuristic = None
+        self._data_center: DataCenter = None
+        # (store x pizza type x count) profit table
+        self._profit_table: np.ndarray = None
+        # (store x pizza type) scaled integer costs, the scaled budget, and whether the scaling rounded nothing
+        self._scaled_costs: np.ndarray = None
+        self._scaled_budget: int = None
+        self._exact_costs: bool = None
+        # multiplier of the budget in the model 1 relaxation, and the best profit of every store net of the budget
+        # priced at it, which rank the stores by their regret
+        self._multiplier: float = None
+        self._best_net: np.ndarray = None
+
+        # incumbent: (store x pizza type) group, (pizza type x group) level
+        self._groups: np.ndarray = None
+        self._levels: np.ndarray = None
+        # (pizza type x group x count) profit and (pizza type x group) scaled cost of all the stores of a group
+        self._group_profit: np.ndarray = None
+        self._group_cost: np.ndarray = None
+
+        # best solution found
+        self._status: str = None
+        self._solution: Optional[GroupSolution] = None
+        self._opt_obj: float = None
+        self._upper_bound: float = None
+        # (elapsed seconds, incumbent objective) after the heuristic and every improvement
+        self._history: List[Tuple[float, float]] = []
+        self._num_iterations: int = 0
+        self._opt_count_per_store_type = {}
+        self._opt_count_per_store_type_group = {}
+        self._opt_assign_store_type_group = {}
+        self._opt_count_per_type_group = {}
+        self._solve_time: float = None
+
+    def optimize(self, data_center: DataCenter):
+        logging.info("PizzaAssortOptimizerWtGroupLns optimizer() starts.")
+        if self.solve(data_center) is not None:
+            self._show_opt_values()
+        logging.info("PizzaAssortOptimizerWtGroupLns optimizer() completes.")
+
+    def solve(self, data_center: DataCenter) -> Optional[GroupSolution]:
+        """
+        search for a solution of model 2 without showing it
+        :param data_center: data center
+        :return: pizza counts, group assignment and group levels, None if the group constraints cannot be met
+        """
+        start = time.perf_counter()
+        self._data_center = data_center
+        self._solution = None
+        self._history = []
+        self._num_iterations = 0
+        # the search improves on the start anyway, it need not wait for the exact model 1 solution
+        self._heuristic = PizzaAssortmentOptimizerWtGroupHeuristic(exact_relaxation=False)
+        with timed("heuristic"):
+            incumbent = self._heuristic.solve(data_center)
+        self._status = self._heuristic.status
+        self._opt_obj = self._heuristic.maximal_profits
+        self._upper_bound = self._heuristic.upper_bound
+        if incumbent is None:
+            self._solve_time = time.perf_counter() - start
+            return None
+
+        self._profit_table = self._heuristic.profit_table
+        self._scaled_costs, self._scaled_budget, self._exact_costs = scaled_budget_row(data_center, self._COST_SCALE)
+        self._groups = incumbent[1].argmax(axis=2)
+        self._levels = incumbent[2].copy()
+        self._multiplier = self._heuristic.budget_multiplier
+        self._best_net = self._heuristic.net_table().max(axis=2).sum(axis=1)
+        self._tabulate_groups()
+        self._record(start)
+        if not self._search(start):
+            logging.info("the search stops on request.")
+
+        counts = self._counts()
+        sort_groups(self._groups, self._levels)
+        assign = np.eye(data_center.num_pizza_groups, dtype=np.int64)[self._groups]
+        self._solution = (counts, assign, self._levels.copy())
+        (self._opt_count_per_store_type, self._opt_count_per_store_type_group,
+         self._opt_assign_store_type_group, self._opt_count_per_type_group) = group_solution_dicts(
+            data_center, *self._solution)
+        self._solve_time = time.perf_counter() - start
+        logging.info(f"solve success, status: {self._status}, obj: {self._opt_obj}, upper bound: {self._upper_bound}, "
+                     f"gap: {self.gap:.4%}, iterations: {self._num_iterations}, "
+                     f"solve time: {self._solve_time:.3f} seconds")
+        return self._solution
+
+    def _search(self, start: float) -> bool:
+        """
+        improve the incumbent neighbourhood by neighbourhood until the time limit, or until the incumbent is within
+        the target gap of the request
+        :return: False if the progress callback stopped the search, True otherwise
+        """
+        num_stores, num_types = self._groups.shape
+        rng = np.random.default_rng(self._seed)
+        size = min(self._neighbourhood_size, num_stores)
+        control = active_control()
+        while time.perf_counter() - start < self._time_limit:
+            if control is not None and control.gap_reached(self._opt_obj, self._upper_bound):
+                logging.info("the incumbent is within the target gap.")
+                return True
+            strategy = self._STORE_STRATEGIES[self._num_iterations % len(self._STORE_STRATEGIES)]
+            self._num_iterations += 1
+            # free the levels of every pizza type every other round, of a single one otherwise
+            if rng.random() < 0.5:
+                types = np.arange(num_types)
+            else:
+                types = rng.choice(num_types, 1)
+            stores = self._pick_stores(strategy, size, types, rng)
+            remaining = self._time_limit - (time.perf_counter() - start)
+            status, moved = self._solve_neighbourhood(stores, types, min(self._sub_time_limit, remaining))
+            if moved is not None and self._accept(stores, types, *moved):
+                self._record(start)
+                if self._progress_callback is not None and self._progress_callback(*self._history[-1],
+                                                                                   self._upper_bound):
+                    return False
+            if status == cp_model.OPTIMAL:
+                if len(stores) == num_stores and len(types) == num_types:
+                    # the whole problem was solved to optimality, for the original costs unless they were rounded
+                    if self._exact_costs:
+                        self._status = "optimal"
+                    return True
+                size = min(num_stores, max(size + 1, int(size * 1.2)))
+            elif status != cp_model.INFEASIBLE:
+                size = max(2, int(size * 0.8))
+        return True
+
+    def _pick_stores(self, strategy: str, size: int, types: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        pick the stores of a neighbourhood
+        :param strategy: "random" picks any stores, "group" the stores of two groups of a freed pizza type, so that
+        they can swap groups, and "regret" favours the stores that lose the most profit against their best counts
+        :return: rows of the stores, sorted
+        """
+        num_stores = self._groups.shape[0]
+        if strategy == "group":
+            col = rng.choice(types)
+            pair = rng.choice(self._data_center.num_pizza_groups, 2, replace=False)
+            members = np.flatnonzero(np.isin(self._groups[:, col], pair))
+            if len(members) >= size:
+                return np.sort(rng.choice(members, size, replace=False))
+        elif strategy == "regret":
+            rows = np.arange(num_stores)[:, None]
+            cols = np.arange(self._groups.shape[1])[None, :]
+            counts = self._counts()
+            net = self._profit_table[rows, cols, counts] - self._multiplier * self._data_center.costs * counts
+            regret = self._best_net - net.sum(axis=1)
+            weights = regret - regret.min() + 1e-9
+            return np.sort(rng.choice(num_stores, size, replace=False, p=weights / weights.sum()))
+        return np.sort(rng.choice(num_stores, size, replace=False))
+
+    def _tabulate_groups(self):
+        """
+        total the profit table and the scaled costs of the stores over their groups
+        """
+        num_types = self._groups.shape[1]
+        num_groups = self._data_center.num_pizza_groups
+        self._group_profit = np.zeros((num_types, num_groups, self._profit_table.shape[2]))
+        self._group_cost = np.zeros((num_types, num_groups), dtype=np.int64)
+        for col in range(num_types):
+            np.add.at(self._group_profit[col], self._groups[:, col], self._profit_table[:, col])
+            self._group_cost[col] = np.bincount(self._groups[:, col], self._scaled_costs[:, col],
+                                                minlength=num_groups).round().astype(np.int64)
+
+    def _counts(self) -> np.ndarray:
+        cols = np.arange(self._groups.shape[1])[None, :]
+        return self._levels[cols, self._groups]
+
+    def _solve_neighbourhood(self, stores: np.ndarray, types: np.ndarray, time_limit: float):
+        """
+        solve the sub-MIP of a neighbourhood: the freed stores choose their groups of the freed pizza types, the
+        groups of the freed pizza types choose their levels, everything else keeps its incumbent value
+        :param stores: rows of the freed stores
+        :param types: columns of the freed pizza types
+        :param time_limit: max. solve time in seconds
+        :return: CP-SAT status, (freed store x freed type) groups and (freed type x group) levels if a solution
+        was found, None otherwise
+        """
+        data_center = self._data_center
+        num_groups = data_center.num_pizza_groups
+        max_count = data_center.max_pizza_count
+        width = max_count + 1
+        counts = self._counts()
+        free = np.zeros(len(self._groups), dtype=bool)
+        free[stores] = True
+        fixed_types = np.setdiff1d(np.arange(self._groups.shape[1]), types)
+
+        # profit, cost and size of the groups of the freed types without the freed stores
+        group_profit = self._group_profit[types].copy()
+        group_cost = self._group_cost[types].copy()
+        group_size = np.zeros((len(types), num_groups), dtype=np.int64)
+        for index, col in enumerate(types):
+            np.subtract.at(group_profit[index], self._groups[stores, col], self._profit_table[stores, col])
+            np.subtract.at(group_cost[index], self._groups[stores, col], self._scaled_costs[stores, col])
+            group_size[index] = np.bincount(self._groups[~free, col], minlength=num_groups)
+        fixed_cost = int((self._scaled_costs[:, fixed_types] * counts[:, fixed_types]).sum())
+        # spare capacity of the stores for the freed types
+        spare = max_count - counts[:, fixed_types].sum(axis=1)
+
+        model = cp_model.CpModel()
+        level_select = [[[model.NewBoolVar(f"l_t{t}_g{g}_n{n}") for n in range(width)] for g in range(num_groups)]
+                        for t in types]
+        level = [[model.NewIntVar(0, max_count, f"z_t{t}_g{g}") for g in range(num_groups)] for t in types]
+        for index in range(len(types)):
+            for g in range(num_groups):
+                model.AddExactlyOne(level_select[index][g])
+                model.Add(level[index][g] == sum(n * level_select[index][g][n] for n in range(1, width)))
+
+        select = [[[model.NewBoolVar(f"w_s{s}_t{t}_n{n}") for n in range(width)] for t in types] for s in stores]
+        count = [[model.NewIntVar(0, max_count, f"x_s{s}_t{t}") for t in types] for s in stores]
+        assign = [[[model.NewBoolVar(f"y_s{s}_t{t}_g{g}") for g in range(num_groups)] for t in types]
+                  for s in stores]
+        for i, s in enumerate(stores):
+            for index in range(len(types)):
+                model.AddExactlyOne(select[i][index])
+                model.Add(count[i][index] == sum(n * select[i][index][n] for n in range(1, width)))
+                model.AddExactlyOne(assign[i][index])
+                for g in range(num_groups):
+                    model.Add(count[i][index] == level[index][g]).OnlyEnforceIf(assign[i][index][g])
+            model.Add(sum(count[i]) <= int(spare[s]))
+
+        # the fixed stores of every combination of groups of the freed types must fit the tightest of them
+        fixed_rows = np.flatnonzero(~free)
+        combo = np.zeros(len(fixed_rows), dtype=np.int64)
+        for col in types:
+            combo = combo * num_groups + self._groups[fixed_rows, col]
+        tightest = np.full(num_groups ** len(types), max_count + 1, dtype=np.int64)
+        np.minimum.at(tightest, combo, spare[fixed_rows])
+        for code in np.flatnonzero(tightest <= max_count):
+            combo_groups = np.unravel_index(code, (num_groups,) * len(types))
+            model.Add(sum(level[index][g] for index, g in enumerate(combo_groups)) <= int(tightest[code]))
+
+        for index in range(len(types)):
+            for g in range(num_groups):
+                if group_size[index, g] < 2:
+                    model.Add(sum(assign[i][index][g] for i in range(len(stores))) >= 2 - int(group_size[index, g]))
+
+        budget = self._scaled_budget - fixed_cost
+        model.Add(sum(int(group_cost[index, g]) * level[index][g] for index in range(len(types))
+                      for g in range(num_groups)) +
+                  sum(int(self._scaled_costs[s, t]) * count[i][index] for i, s in enumerate(stores)
+                      for index, t in enumerate(types)) <= budget)
+        model.Maximize(sum(float(group_profit[index, g, n]) * level_select[index][g][n]
+                           for index in range(len(types)) for g in range(num_groups) for n in range(width)) +
+                       sum(float(self._profit_table[s, t, n]) * select[i][index][n]
+                           for i, s in enumerate(stores) for index, t in enumerate(types) for n in range(width)))
+
+        # start from the incumbent
+        for index, t in enumerate(types):
+            for g in range(num_groups):
+                model.AddHint(level[index][g], int(self._levels[t, g]))
+                for n in range(width):
+                    model.AddHint(level_select[index][g][n], int(n == self._levels[t, g]))
+            for i, s in enumerate(stores):
+                model.AddHint(count[i][index], int(counts[s, t]))
+                for n in range(width):
+                    model.AddHint(select[i][index][n], int(n == counts[s, t]))
+                for g in range(num_groups):
+                    model.AddHint(assign[i][index][g], int(g == self._groups[s, t]))
+
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(time_limit, 0.01)
+        solver.parameters.num_workers = self._num_workers
+        solver.parameters.random_seed = self._seed + self._num_iterations
+        status = solver.Solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return status, None
+        groups = np.array([[np.argmax([solver.Value(var) for var in per_group]) for per_group in row]
+                           for row in assign], dtype=np.int64).reshape(len(stores), len(types))
+        levels = np.array([[solver.Value(var) for var in row] for row in level], dtype=np.int64)
+        return status, (groups, levels)
+
+    def _accept(self, stores: np.ndarray, types: np.ndarray, groups: np.ndarray, levels: np.ndarray) -> bool:
+        """
+        keep the solution of a neighbourhood if it improves the incumbent
+        :return: True if kept
+        """
+        old_groups = self._groups[stores][:, types]
+        old_levels = self._levels[types]
+        self._groups[np.ix_(stores, types)] = groups
+        self._levels[types] = levels
+        counts = self._counts()
+        rows = np.arange(len(counts))[:, None]
+        cols = np.arange(counts.shape[1])[None, :]
+        objective = float(self._profit_table[rows, cols, counts].sum())
+        feasible = float((self._data_center.costs * counts).sum()) <= self._data_center.max_budget
+        if not feasible or objective <= self._opt_obj + 1e-9 * max(1.0, abs(self._opt_obj)):
+            self._groups[np.ix_(stores, types)] = old_groups
+            self._levels[types] = old_levels
+            return False
+
+        # move the stores between the group totals
+        for index, col in enumerate(types):
+            np.subtract.at(self._group_profit[col], old_groups[:, index], self._profit_table[stores, col])
+            np.add.at(self._group_profit[col], groups[:, index], self._profit_table[stores, col])
+            np.subtract.at(self._group_cost[col], old_groups[:, index], self._scaled_costs[stores, col])
+            np.add.at(self._group_cost[col], groups[:, index], self._scaled_costs[stores, col])
+        self._opt_obj = objective
+        return True
+
+    def _record(self, start: float):
+        self._history.append((time.perf_counter() - start, self._opt_obj))
+        report_incumbent(self._opt_obj, self._upper_bound)
+        logging.info(f"incumbent after {self._num_iterations} neighbourhoods: {self._opt_obj}, "
+                     f"elapsed: {self._history[-1][0]:.3f} seconds")
+
+    def _show_opt_values(self):
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+        df_x = pd.DataFrame(self._solution[0], index=self._data_center.store_ids,
+                            columns=self._data_center.pizza_types)
+        df_x.index.name = 'store'
+        df_x.columns.name = 'pizza type'
+        logging.debug(f"show pizza assortment results:\n{df_x}")
+
+        df_z = pd.DataFrame.from_dict(self._opt_count_per_type_group)
+        df_z.index.name = 'group'
+        df_z.columns.name = 'pizza type'
+        logging.debug(f"show pizza count for each group:\n{df_z}")
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def solution(self) -> Optional[GroupSolution]:
+        return self._solution
+
+    @property
+    def history(self) -> List[Tuple[float, float]]:
+        """
+        (elapsed seconds, incumbent objective) after the initial heuristic and after every improvement
+        """
+        return self._history
+
+    @property
+    def num_iterations(self) -> int:
+        return self._num_iterations
+
+    @property
+    def solve_time(self):
+        return self._solve_time
+
+    @property
+    def upper_bound(self):
+        return self._upper_bound
+
+    @property
+    def best_bound(self):
+        return self._upper_bound
+
+    @property
+    def gap(self) -> float:
+        """
+        relative optimality gap of the solution against the model 1 bound
+        """
+        if self._solution is None or self._upper_bound is None:
+            return np.inf
+        return max(0.0, self._upper_bound - self._opt_obj) / max(abs(self._upper_bound), 1e-9)
+
+    @property
+    def maximal_profits(self):
+        return self._opt_obj
+
+    @property
+    def optimal_assortment(self) -> Dict[int, Dict[str, int]]:
+        return self._opt_count_per_store_type
+
+    @property
+    def optimal_count_per_store_type_group(self):
+        return self._opt_count_per_store_type_group
+
+    @property
+    def optimal_assign_store_type_group(self):
+        return self._opt_assign_store_type_group
+
+    @property
+    def optimal_count_per_type_group(self):
+        return self._opt_count_per_type_group
+
+    @property
+    def optimal_count_matrix(self) -> np.ndarray:
+        return None if self._solution is None else self._solution[0]
+
+    @property
+    def optimal_assign_matrix(self) -> np.ndarray:
+        return None if self._solution is None else self._solution[1]
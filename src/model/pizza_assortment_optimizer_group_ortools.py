@@ -0,0 +1,439 @@
+import logging
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from ortools.linear_solver import pywraplp
+from ortools.sat.python import cp_model
+
+from src.common.data_center import DataCenter
+from src.model.bounds import group_level_bounds, scaled_budget_row, store_count_bounds
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+from src.model.profit import tabulate_profits
+from src.model.solution import group_solution_dicts
+from src.model.solve_control import SolveControl, active_control, remaining_time
+from src.utils.metrics import add_time, timed
+
+
+class _IncumbentCallback(cp_model.CpSolverSolutionCallback):
+    """
+    pass every solution CP-SAT finds to the control of the request, CP-SAT calls it from its search threads
+    """
+
+    def __init__(self, control: SolveControl, exact_costs: bool = True, bound: float = None):
+        """
+        constructor
+        :param control: control of the request
+        :param exact_costs: True if the costs were scaled without rounding, so that the bound of CP-SAT holds
+        :param bound: bound to report otherwise, None if unknown
+        """
+        super().__init__()
+        self._control = control
+        self._exact_costs = exact_costs
+        self._bound = bound
+
+    def on_solution_callback(self):
+        self._control.report(self.ObjectiveValue(), self.BestObjectiveBound() if self._exact_costs else self._bound)
+
+
+class PizzaAssortmentOptimizerWtGroupOrtools:
+    """
+    this class solves model 2 with OR-Tools.
+
+    the power term x^beta of every store-type pair is replaced by one binary selection variable per integer
+    count 0..max_pizza_count whose profit is tabulated exactly, so the model becomes a pure linear model that
+    CP-SAT or SCIP solve with their own (multi-threaded) search. with CP-SAT, a store follows the count of its
+    group through enforced equalities, with SCIP through big-M rows
+    """
+
+    # supported OR-Tools solvers
+    SOLVERS = ("CP-SAT", "SCIP")
+    # CP-SAT takes integer constraint coefficients only, the costs are scaled by this factor, rounding the costs
+    # up and the budget down so a solution never breaks the original budget, see scaled_budget_row(). a solution
+    # is then only reported optimal if nothing was rounded
+    _COST_SCALE = 10_000
+    # share of the time limit the heuristic warm start takes at most
+    _WARM_START_SHARE = 0.25
+
+    def __init__(self, solver: str = "CP-SAT", time_limit: float = 20.0, num_workers: int = 8,
+                 verbose: bool = False, warm_start: bool = True, strengthen: bool = False):
+        """
+        constructor
+        :param solver: "CP-SAT" or "SCIP"
+        :param time_limit: max. time in seconds of optimize(), the warm start and the model build included. it is cut
+        to the time left until the deadline of the request, see SolveControl
+        :param num_workers: number of search threads
+        :param verbose: show the solver log if True
+        :param warm_start: pass the heuristic incumbent to the solver as a hint if True, which is also kept if the
+        solver does not beat it
+        :param strengthen: order the groups by their pizza count to break their symmetry and bound the counts per
+        store if True
+        """
+        if solver not in self.SOLVERS:
+            raise ValueError(f"invalid OR-Tools solver: {solver}")
+        self._solver_name = solver
+        self._time_limit = time_limit
+        self._num_workers = num_workers
+        self._verbose = verbose
+        self._warm_start = warm_start
+        self._strengthen = strengthen
+        self._heuristic: PizzaAssortmentOptimizerWtGroupHeuristic = None
+        # pizza counts, group assignment and group levels of the incumbent passed as a hint
+        self._hint = None
+        self._data_center: DataCenter = None
+        # (store x pizza type x count) profit table
+        self._profit_table: np.ndarray = None
+        # time.perf_counter() at which the last optimize() started
+        self._start: float = None
+
+        # optimal solution
+        self._status: str = None
+        self._opt_obj: float = None
+        self._best_bound: float = None
+        self._opt_count_per_store_type = {}
+        self._opt_count_per_store_type_group = {}
+        self._opt_assign_store_type_group = {}
+        self._opt_count_per_type_group = {}
+        # (counts, assign, count_type_group) matrices of the solution
+        self._opt_matrices: Tuple = None
+        self._node_count: int = None
+        self._build_time: float = None
+        self._solve_time: float = None
+
+    def optimize(self, data_center: DataCenter):
+        logging.info(f"PizzaAssortOptimizerWtGroupOrtools optimizer() starts, solver: {self._solver_name}.")
+        self._start = time.perf_counter()
+        self._data_center = data_center
+        self._opt_obj = self._best_bound = None
+        self._opt_matrices = None
+        self._hint = None
+        control = active_control()
+        if self._warm_start:
+            time_left = remaining_time(self._time_limit, self._start)
+            self._heuristic = PizzaAssortmentOptimizerWtGroupHeuristic(
+                time_limit=None if time_left is None else self._WARM_START_SHARE * time_left)
+            with timed("heuristic"):
+                self._hint = self._heuristic.solve(data_center)
+            if self._hint is not None and control is not None:
+                control.report(self._heuristic.maximal_profits, self._heuristic.upper_bound)
+        self._profit_table = tabulate_profits(data_center)
+        if self._solver_name == "CP-SAT":
+            solution = self._solve_cp_sat(control)
+        else:
+            solution = self._solve_scip(control)
+        add_time("build", self._build_time)
+        add_time("solve", self._solve_time)
+
+        if self._hint is not None and (solution is None or self._opt_obj < self._heuristic.maximal_profits):
+            # the solver did not beat the incumbent within its time limit
+            logging.info(f"solver status: {self._status}, keep the incumbent, obj: {self._heuristic.maximal_profits}")
+            solution = self._hint
+            self._status = "feasible"
+            self._opt_obj = self._heuristic.maximal_profits
+            if self._best_bound is None or self._heuristic.upper_bound < self._best_bound:
+                self._best_bound = self._heuristic.upper_bound
+
+        if solution is not None:
+            logging.info(f"solve success, status: {self._status}, opt_obj: {self._opt_obj}, "
+                         f"best bound: {self._best_bound}")
+            self._opt_matrices = solution
+            (self._opt_count_per_store_type, self._opt_count_per_store_type_group,
+             self._opt_assign_store_type_group, self._opt_count_per_type_group) = group_solution_dicts(
+                data_center, *solution)
+            self._show_opt_values()
+        else:
+            self._opt_obj = 0
+            logging.info(f"solve failure, status: {self._status}")
+        logging.info("PizzaAssortOptimizerWtGroupOrtools optimizer() completes.")
+
+    def _count_bounds(self):
+        """
+        :return: (store x pizza type) store count bounds and (pizza type) group count bounds
+        """
+        num_stores, num_types = self._data_center.num_stores, len(self._data_center.pizza_types)
+        if not self._strengthen:
+            max_count = self._data_center.max_pizza_count
+            return np.full((num_stores, num_types), max_count), np.full(num_types, max_count)
+        count_bounds = store_count_bounds(self._data_center)
+        return count_bounds, group_level_bounds(count_bounds)
+
+    def _solve_cp_sat(self, control: SolveControl = None):
+        """
+        :param control: control of the request, which takes every solution found and sets the target gap
+        :return: counts, assignment and group levels of the best solution, None if none was found
+        """
+        start = time.perf_counter()
+        num_stores, num_types, width = self._profit_table.shape
+        num_groups = self._data_center.num_pizza_groups
+        max_count = self._data_center.max_pizza_count
+        model = cp_model.CpModel()
+        count_bounds, level_bounds = self._count_bounds()
+
+        # type + group -> pizza count variable
+        count_type_group = [[model.NewIntVar(0, int(level_bounds[t]), f"z_t{t}_g{g}") for g in range(num_groups)]
+                            for t in range(num_types)]
+        # store + type + count -> binary selection variable
+        select = []
+        # store + type -> pizza count variable
+        count = []
+        # store + type + group -> binary assignment variable
+        assign = []
+
+        costs, budget, exact_costs = scaled_budget_row(self._data_center, self._COST_SCALE)
+        for s in range(num_stores):
+            if self._out_of_time():
+                return self._stop_building("unknown", start)
+            select.append([[model.NewBoolVar(f"w_s{s}_t{t}_n{n}") for n in range(width)] for t in range(num_types)])
+            count.append([model.NewIntVar(0, int(count_bounds[s, t]), f"x_s{s}_t{t}") for t in range(num_types)])
+            assign.append([[model.NewBoolVar(f"y_s{s}_t{t}_g{g}") for g in range(num_groups)]
+                           for t in range(num_types)])
+            for t in range(num_types):
+                model.AddExactlyOne(select[s][t])
+                model.Add(count[s][t] == sum(n * select[s][t][n] for n in range(1, width)))
+                model.AddExactlyOne(assign[s][t])
+                for g in range(num_groups):
+                    model.Add(count[s][t] == count_type_group[t][g]).OnlyEnforceIf(assign[s][t][g])
+            model.Add(sum(count[s]) <= max_count)
+        model.Add(cp_model.LinearExpr.WeightedSum([var for row in count for var in row],
+                                                  costs.ravel().tolist()) <= budget)
+        for t in range(num_types):
+            for g in range(num_groups):
+                model.Add(cp_model.LinearExpr.Sum([assign[s][t][g] for s in range(num_stores)]) >= 2)
+        if self._strengthen:
+            # the groups are interchangeable, order them by their pizza count
+            for t in range(num_types):
+                for g in range(num_groups - 1):
+                    model.Add(count_type_group[t][g] <= count_type_group[t][g + 1])
+        if self._out_of_time():
+            return self._stop_building("unknown", start)
+        model.Maximize(cp_model.LinearExpr.WeightedSum(
+            [select[s][t][n] for s in range(num_stores) for t in range(num_types) for n in range(1, width)],
+            self._profit_table[:, :, 1:].ravel().tolist()))
+        if self._out_of_time():
+            return self._stop_building("unknown", start)
+        if self._hint is not None:
+            for var, value in self._hint_values(select, count, assign, count_type_group):
+                model.AddHint(var, value)
+        if self._out_of_time():
+            return self._stop_building("unknown", start)
+        self._build_time = time.perf_counter() - start
+        logging.info(f"finish building the CP-SAT model in {self._build_time:.3f} seconds.")
+
+        start = time.perf_counter()
+        solver = cp_model.CpSolver()
+        time_limit = remaining_time(self._time_limit, self._start)
+        if time_limit is not None:
+            solver.parameters.max_time_in_seconds = time_limit
+        solver.parameters.num_workers = self._num_workers
+        solver.parameters.log_search_progress = self._verbose
+        if control is not None and control.target_gap is not None:
+            solver.parameters.relative_gap_limit = control.target_gap
+        # the rounded costs cut off solutions, so the bound of CP-SAT only holds for them. the model 1 bound of the
+        # heuristic holds for the original costs
+        bound = None if self._hint is None else self._heuristic.upper_bound
+        callback = None if control is None else _IncumbentCallback(control, exact_costs, bound)
+        status = solver.Solve(model, callback)
+        self._solve_time = time.perf_counter() - start
+        self._node_count = int(solver.NumBranches())
+        self._status = {cp_model.OPTIMAL: "optimal", cp_model.FEASIBLE: "feasible",
+                        cp_model.INFEASIBLE: "infeasible"}.get(status, solver.StatusName(status).lower())
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return None
+
+        self._opt_obj = float(solver.ObjectiveValue())
+        self._best_bound = float(solver.BestObjectiveBound())
+        if not exact_costs:
+            self._status = "feasible"
+            self._best_bound = bound
+        counts = np.array([[solver.Value(var) for var in row] for row in count])
+        assignment = np.array([[[solver.Value(var) for var in per_group] for per_group in row] for row in assign])
+        levels = np.array([[solver.Value(var) for var in row] for row in count_type_group])
+        return counts, assignment, levels
+
+    def _solve_scip(self, control: SolveControl = None):
+        """
+        :param control: control of the request, which sets the target gap
+        :return: counts, assignment and group levels of the best solution, None if none was found
+        """
+        start = time.perf_counter()
+        num_stores, num_types, width = self._profit_table.shape
+        num_groups = self._data_center.num_pizza_groups
+        max_count = self._data_center.max_pizza_count
+        solver = pywraplp.Solver.CreateSolver("SCIP")
+        count_bounds, level_bounds = self._count_bounds()
+
+        count_type_group = [[solver.IntVar(0, int(level_bounds[t]), f"z_t{t}_g{g}") for g in range(num_groups)]
+                            for t in range(num_types)]
+        select = []
+        assign = []
+        # store + type -> pizza count expression
+        count: List[List] = []
+
+        costs = self._data_center.costs
+        for s in range(num_stores):
+            if self._out_of_time():
+                return self._stop_building("not_solved", start)
+            # counts above the store bound cannot be selected
+            select.append([[solver.IntVar(0, int(n <= count_bounds[s, t]), f"w_s{s}_t{t}_n{n}") for n in range(width)]
+                           for t in range(num_types)])
+            assign.append([[solver.BoolVar(f"y_s{s}_t{t}_g{g}") for g in range(num_groups)]
+                           for t in range(num_types)])
+            count.append([solver.Sum([n * select[s][t][n] for n in range(1, width)]) for t in range(num_types)])
+            for t in range(num_types):
+                solver.Add(solver.Sum(select[s][t]) == 1)
+                solver.Add(solver.Sum(assign[s][t]) == 1)
+                for g in range(num_groups):
+                    # count == z when the store is assigned to the group
+                    solver.Add(count[s][t] - count_type_group[t][g] <=
+                               int(count_bounds[s, t]) * (1 - assign[s][t][g]))
+                    solver.Add(count_type_group[t][g] - count[s][t] <= int(level_bounds[t]) * (1 - assign[s][t][g]))
+            solver.Add(solver.Sum(count[s]) <= max_count)
+        solver.Add(solver.Sum([float(costs[s, t]) * count[s][t] for s in range(num_stores)
+                               for t in range(num_types)]) <= self._data_center.max_budget)
+        for t in range(num_types):
+            for g in range(num_groups):
+                solver.Add(solver.Sum([assign[s][t][g] for s in range(num_stores)]) >= 2)
+        if self._strengthen:
+            # the groups are interchangeable, order them by their pizza count
+            for t in range(num_types):
+                for g in range(num_groups - 1):
+                    solver.Add(count_type_group[t][g] <= count_type_group[t][g + 1])
+        if self._out_of_time():
+            return self._stop_building("not_solved", start)
+        solver.Maximize(solver.Sum([float(self._profit_table[s, t, n]) * select[s][t][n]
+                                    for s in range(num_stores) for t in range(num_types) for n in range(1, width)]))
+        if self._out_of_time():
+            return self._stop_building("not_solved", start)
+        if self._hint is not None:
+            hint = self._hint_values(select, None, assign, count_type_group)
+            solver.SetHint([var for var, _ in hint], [float(value) for _, value in hint])
+        if self._out_of_time():
+            return self._stop_building("not_solved", start)
+        self._build_time = time.perf_counter() - start
+        logging.info(f"finish building the SCIP model in {self._build_time:.3f} seconds.")
+
+        start = time.perf_counter()
+        time_limit = remaining_time(self._time_limit, self._start)
+        if time_limit is not None:
+            # SCIP starts its clock once the model is passed to it, which takes a while on a large chain
+            solver.SetTimeLimit(int(time_limit * 1000))
+        solver.SetNumThreads(self._num_workers)
+        if self._verbose:
+            solver.EnableOutput()
+        params = pywraplp.MPSolverParameters()
+        if control is not None and control.target_gap is not None:
+            params.SetDoubleParam(params.RELATIVE_MIP_GAP, control.target_gap)
+        status = solver.Solve(params)
+        self._solve_time = time.perf_counter() - start
+        self._node_count = int(solver.nodes())
+        self._status = {pywraplp.Solver.OPTIMAL: "optimal", pywraplp.Solver.FEASIBLE: "feasible",
+                        pywraplp.Solver.INFEASIBLE: "infeasible",
+                        pywraplp.Solver.UNBOUNDED: "unbounded"}.get(status, "not_solved")
+        if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+            return None
+
+        self._opt_obj = float(solver.Objective().Value())
+        self._best_bound = float(solver.Objective().BestBound())
+        counts = np.array([[round(expr.solution_value()) for expr in row] for row in count])
+        assignment = np.array([[[round(var.solution_value()) for var in per_group] for per_group in row]
+                               for row in assign])
+        levels = np.array([[round(var.solution_value()) for var in row] for row in count_type_group])
+        return counts, assignment, levels
+
+    def _out_of_time(self) -> bool:
+        time_left = remaining_time(self._time_limit, self._start)
+        return time_left is not None and time_left <= 0
+
+    def _stop_building(self, status: str, start: float) -> None:
+        """
+        give up building the model once the time limit is reached, which keeps the incumbent if any
+        :param status: status of the solver that was not run
+        :param start: start time of the build
+        :return: None, no solution
+        """
+        self._build_time = time.perf_counter() - start
+        self._solve_time = 0.0
+        self._node_count = 0
+        self._status = status
+        logging.info(f"the time limit is reached after building the model for {self._build_time:.3f} seconds.")
+        return None
+
+    def _hint_values(self, select, count, assign, count_type_group) -> List[Tuple]:
+        """
+        pair the variables of a model with their values in the incumbent
+        :return: (variable, value) pairs
+        """
+        counts, assignment, levels = self._hint
+        hint = []
+        for s in range(counts.shape[0]):
+            for t in range(counts.shape[1]):
+                hint.extend((var, int(n == counts[s, t])) for n, var in enumerate(select[s][t]))
+                hint.extend((var, int(assignment[s, t, g])) for g, var in enumerate(assign[s][t]))
+                if count is not None:
+                    hint.append((count[s][t], int(counts[s, t])))
+        hint.extend((var, int(levels[t, g])) for t, row in enumerate(count_type_group) for g, var in enumerate(row))
+        return hint
+
+    def _show_opt_values(self):
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+        df_x = pd.DataFrame.from_dict(self._opt_count_per_store_type, orient='index')
+        df_x.index.name = 'store'
+        df_x.columns.name = 'pizza type'
+        logging.debug(f"show pizza assortment results:\n{df_x}")
+
+        df_z = pd.DataFrame.from_dict(self._opt_count_per_type_group)
+        df_z.index.name = 'group'
+        df_z.columns.name = 'pizza type'
+        logging.debug(f"show pizza count for each group:\n{df_z}")
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def best_bound(self):
+        return self._best_bound
+
+    @property
+    def node_count(self) -> int:
+        """
+        number of search branches of CP-SAT or branch-and-bound nodes of SCIP in the last solve
+        """
+        return self._node_count
+
+    @property
+    def build_time(self):
+        return self._build_time
+
+    @property
+    def solve_time(self):
+        return self._solve_time
+
+    @property
+    def maximal_profits(self):
+        return self._opt_obj
+
+    @property
+    def optimal_assortment(self) -> Dict[int, Dict[str, int]]:
+        return self._opt_count_per_store_type
+
+    @property
+    def optimal_count_per_store_type_group(self):
+        return self._opt_count_per_store_type_group
+
+    @property
+    def optimal_assign_store_type_group(self):
+        return self._opt_assign_store_type_group
+
+    @property
+    def optimal_count_per_type_group(self):
+        return self._opt_count_per_type_group
+
+    @property
+    def optimal_count_matrix(self) -> np.ndarray:
+        return None if self._opt_matrices is None else self._opt_matrices[0]
+
+    @property
+    def optimal_assign_matrix(self) -> np.ndarray:
+        return None if self._opt_matrices is None else self._opt_matrices[1]
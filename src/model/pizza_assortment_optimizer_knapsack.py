@@ -0,0 +1,615 @@
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from src.common.data_center import DataCenter
+from src.model.profit import tabulate_profits
+from src.model.solution import assortment_dict
+from src.model.solve_control import active_control
+
+
+def enumerate_count_vectors(num_types: int, max_count: int) -> np.ndarray:
+    """
+    enumerate every vector of non-negative integer pizza counts whose sum does not exceed max_count
+    :param num_types: number of pizza types
+    :param max_count: max. no. of pizzas in total
+    :return: (vector x pizza type) count matrix, the all-zero vector comes first
+    """
+    counts = np.zeros((1, 0), dtype=np.int64)
+    for _ in range(num_types):
+        reps = max_count - counts.sum(axis=1) + 1
+        new_col = np.concatenate([np.arange(rep) for rep in reps])
+        counts = np.column_stack([np.repeat(counts, reps, axis=0), new_col])
+    return counts
+
+
+class PizzaAssortmentOptimizerKnapsack:
+    """
+    this class solves model 1 exactly without a MIP solver.
+
+    since every pizza count is an integer in [0, max_pizza_count], the profit of a store is tabulated for all
+    its count vectors, which turns model 1 into a multiple-choice knapsack: pick one count vector per store
+    under the single budget constraint. the knapsack is solved by a dynamic program over the stores whose
+    states are the non-dominated (cost, profit) pairs of the stores processed so far. instead of discretizing
+    the budget, which would lose exactness for fractional costs, the states are pruned with the Lagrangian
+    bound of the remaining stores against the best known feasible profit, so the optimum is never discarded.
+    on a tightly binding budget the states can still grow too many to prove optimality in time: the exact pass
+    then stops at its time limit or state cap and the engine answers the beam search solution with the Lagrangian
+    bound and status "feasible"
+    """
+
+    # number of stores whose count vectors are evaluated at once
+    _CHUNK_SIZE = 1024
+    # number of bisection steps on the budget multiplier
+    _NUM_BISECTIONS = 100
+    # number of states kept per store by the heuristic pass that tightens the lower bound
+    _BEAM_WIDTH = 1024
+
+    def __init__(self, time_limit: float = None, max_states: int = 100_000):
+        """
+        constructor
+        :param time_limit: max. solve time of a budget in seconds, no limit if None. it is cut to the time left
+        until the deadline of the request, see SolveControl
+        :param max_states: max. number of states per store of the exact dynamic program
+        """
+        self._time_limit = time_limit
+        self._max_states = max_states
+        self._data_center: DataCenter = None
+        # count vector -> pizza counts
+        self._count_vectors: np.ndarray = None
+        # (store x frontier) cost, profit and count vector index of the non-dominated count vectors per store,
+        # the padding entries have zero cost, -inf profit and index -1
+        self._front_cost: np.ndarray = None
+        self._front_profit: np.ndarray = None
+        self._front_vector: np.ndarray = None
+        # frontier size per store
+        self._front_size: np.ndarray = None
+
+        # optimal solution
+        self._status: str = None
+        self._opt_obj: float = None
+        self._opt_pizza_count: Dict[int, Dict[str, int]] = {}
+        self._opt_pizza_count_matrix: np.ndarray = None
+        self._upper_bound: float = None
+        # lagrangian multiplier of the budget constraint, 0 if the budget is not binding
+        self._multiplier: float = None
+        # choice per store of the last solve, None if its budget was not binding
+        self._choice: np.ndarray = None
+        # multiplier and upper bound per budget of the last knapsack solve
+        self._multipliers: np.ndarray = None
+        self._upper_bounds: np.ndarray = None
+        self._solve_time: float = None
+
+        # max. profit, its upper bound and the optimal counts per budget of the budget frontier
+        self._frontier_profits: np.ndarray = None
+        self._frontier_upper_bounds: np.ndarray = None
+        self._frontier_count_matrices: List[np.ndarray] = []
+        self._frontier_assortments: List[Dict[int, Dict[str, int]]] = []
+
+    def optimize(self, data_center: DataCenter):
+        logging.info("PizzaAssortOptimizerKnapsack optimizer() starts.")
+        self.solve(data_center)
+        self._show_opt_values()
+        logging.info("PizzaAssortOptimizerKnapsack optimizer() completes.")
+
+    def solve(self, data_center: DataCenter, exact: bool = True) -> np.ndarray:
+        """
+        solve model 1 without showing the solution
+        :param data_center: data center
+        :param exact: prove optimality by the dynamic program if True, stop at the greedy solution and the
+        Lagrangian bound otherwise
+        :return: (store x pizza type) pizza counts, optimal if exact and the status is "optimal"
+        """
+        start = time.perf_counter()
+        deadline = self._deadline(start)
+        self._data_center = data_center
+        table = tabulate_profits(data_center)
+
+        counts, profit = self._best_count_vectors(table)
+        if (counts * data_center.costs).sum() <= data_center.max_budget:
+            # the budget is not binding, every store takes its most profitable count vector
+            self._opt_obj = self._upper_bound = profit
+            self._multiplier = 0.0
+            self._choice = None
+            logging.info("the budget is not binding.")
+        else:
+            self._create_store_frontiers(table)
+            self._choice = self._solve_knapsack(np.array([data_center.max_budget]), exact, deadline)[0]
+            self._opt_obj = self._choice_profit(self._choice)
+            self._upper_bound, self._multiplier = float(self._upper_bounds[0]), float(self._multipliers[0])
+            counts = self._choice_counts(self._choice)
+        self._status = self._bound_status()
+
+        self._retrieve_opt_values(counts)
+        self._solve_time = time.perf_counter() - start
+        logging.info(f"solve success, status: {self._status}, opt_obj: {self._opt_obj}, "
+                     f"solve time: {self._solve_time:.3f} seconds")
+        return counts
+
+    def reoptimize(self, data_center: DataCenter, previous_rows: np.ndarray, exact: bool = True) -> np.ndarray:
+        """
+        solve model 1 again after a few stores changed, reusing the last solve: only the count vectors of the
+        changed stores are tabulated and pruned, the budget multiplier of the last solve brackets the bisection,
+        and the last choice of the unchanged stores, repaired to fit the budget, warm starts the dynamic program.
+        it falls back to solve() if the last solve has no store frontiers to reuse, e.g. its budget was not
+        binding, or the pizza counts changed
+        :param data_center: data center after the change, see DataCenter.with_delta()
+        :param previous_rows: row in the last data center of every store whose data did not change, -1 otherwise
+        :param exact: prove optimality by the dynamic program if True, stop at the greedy solution and the
+        Lagrangian bound otherwise, which is enough to price the budget
+        :return: (store x pizza type) pizza counts, optimal if exact and the status is "optimal"
+        """
+        previous = self._data_center
+        if (self._choice is None or previous.max_pizza_count != data_center.max_pizza_count
+                or previous.pizza_types != data_center.pizza_types):
+            logging.info("nothing to reuse, solve from scratch.")
+            return self.solve(data_center, exact)
+
+        start = time.perf_counter()
+        deadline = self._deadline(start)
+        kept = previous_rows >= 0
+        fresh = np.flatnonzero(~kept)
+        # store frontiers of the changed stores merged with the ones of the unchanged stores
+        fresh_front = self._store_frontiers(tabulate_profits(data_center.subset(fresh)), data_center.costs[fresh])
+        width = max(self._front_cost.shape[1], fresh_front[0].shape[1])
+        fronts = []
+        for old, new, fill in zip((self._front_cost, self._front_profit, self._front_vector),
+                                  fresh_front[:3], (0.0, -np.inf, -1)):
+            front = np.full((data_center.num_stores, width), fill, dtype=old.dtype)
+            front[kept, :old.shape[1]] = old[previous_rows[kept]]
+            front[fresh, :new.shape[1]] = new
+            fronts.append(front)
+        front_size = np.zeros(data_center.num_stores, dtype=np.int64)
+        front_size[kept] = self._front_size[previous_rows[kept]]
+        front_size[fresh] = fresh_front[3]
+        multiplier = self._multiplier
+        choice = np.zeros(data_center.num_stores, dtype=np.int64)
+        choice[kept] = self._choice[previous_rows[kept]]
+        self._data_center = data_center
+        self._front_cost, self._front_profit, self._front_vector = fronts
+        self._front_size = front_size
+
+        budget = data_center.max_budget
+        choice[fresh] = self._lagrangian_choice(multiplier)[fresh]
+        if self._choice_cost(self._lagrangian_choice(0.0)) <= budget:
+            # the budget is no longer binding
+            self._choice = self._lagrangian_choice(0.0)
+            self._opt_obj = self._upper_bound = self._choice_profit(self._choice)
+            self._multiplier = 0.0
+        else:
+            low, high = self._bracket_multiplier(budget, multiplier)
+            self._multiplier = self._bisect_multiplier(budget, high, low)
+            self._choice, self._upper_bound = self._solve_budget(budget, self._multiplier,
+                                                                 [self._repair_greedily(choice, budget)], exact,
+                                                                 deadline)
+            self._opt_obj = self._choice_profit(self._choice)
+        counts = self._choice_counts(self._choice)
+        self._status = self._bound_status()
+
+        self._retrieve_opt_values(counts)
+        self._solve_time = time.perf_counter() - start
+        logging.info(f"reoptimize {len(fresh)} changed stores, opt_obj: {self._opt_obj}, "
+                     f"solve time: {self._solve_time:.3f} seconds")
+        return counts
+
+    def optimize_frontier(self, data_center: DataCenter, budgets) -> np.ndarray:
+        """
+        solve model 1 for a range of budgets. the count vectors are tabulated and pruned to the store frontiers
+        once, and the budgets are solved in ascending order, each one warm started from the solution of the next
+        smaller one, whose budget multiplier also caps the bisection of the next. the time limit applies to every
+        budget
+        :param data_center: data center, its budget is ignored
+        :param budgets: budgets across the chain
+        :return: max. profit per budget
+        """
+        logging.info("PizzaAssortOptimizerKnapsack optimize_frontier() starts.")
+        start = time.perf_counter()
+        self._data_center = data_center
+        self._choice = None
+        budgets = np.asarray(budgets, dtype=np.float64)
+        order = np.argsort(budgets, kind='stable')
+        table = tabulate_profits(data_center)
+
+        counts, profit = self._best_count_vectors(table)
+        # budgets that cover the most profitable count vectors of all stores are not binding
+        binding = budgets[order] < (counts * data_center.costs).sum()
+        self._frontier_profits = np.full(len(budgets), profit)
+        self._frontier_upper_bounds = np.full(len(budgets), profit)
+        self._frontier_count_matrices = [counts] * len(budgets)
+        if binding.any():
+            self._create_store_frontiers(table)
+            choices = self._solve_knapsack(budgets[order[binding]])
+            for index, choice, upper_bound in zip(order[binding], choices, self._upper_bounds):
+                self._frontier_profits[index] = self._choice_profit(choice)
+                self._frontier_upper_bounds[index] = upper_bound
+                self._frontier_count_matrices[index] = self._choice_counts(choice)
+        self._frontier_assortments = [assortment_dict(data_center, counts)
+                                      for counts in self._frontier_count_matrices]
+        self._solve_time = time.perf_counter() - start
+        logging.info(f"solve {len(budgets)} budgets in {self._solve_time:.3f} seconds.")
+        logging.info("PizzaAssortOptimizerKnapsack optimize_frontier() completes.")
+        return self._frontier_profits
+
+    def _best_count_vectors(self, table: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        find the most profitable count vector of every store regardless of the budget, by a dynamic program
+        over the pizza types whose state is the max. no. of pizzas displayed so far
+        :param table: (store x pizza type x count) profit table
+        :return: (store x pizza type) counts, total profit
+        """
+        num_stores, num_types, width = table.shape
+        counts = np.zeros((num_stores, num_types), dtype=np.int64)
+        total_profit = 0.0
+        # (limit x count of the type) -> limit left for the types before, -1 if the count exceeds the limit
+        rest = np.arange(width)[:, None] - np.arange(width)[None, :]
+        for begin in range(0, num_stores, self._CHUNK_SIZE):
+            end = min(begin + self._CHUNK_SIZE, num_stores)
+            # best[s, k]: max. profit of the types so far with at most k pizzas
+            best = np.zeros((end - begin, width))
+            picks = []
+            for col in range(num_types):
+                value = table[begin:end, col, None, :] + best[:, np.maximum(rest, 0)]
+                value[:, rest < 0] = -np.inf
+                picks.append(value.argmax(axis=2))
+                best = value.max(axis=2)
+            total_profit += float(best[:, -1].sum())
+
+            limit = np.full(end - begin, width - 1)
+            for col in range(num_types - 1, -1, -1):
+                counts[begin:end, col] = picks[col][np.arange(end - begin), limit]
+                limit -= counts[begin:end, col]
+        return counts, total_profit
+
+    def _create_store_frontiers(self, table: np.ndarray):
+        num_types = len(self._data_center.pizza_types)
+        self._count_vectors = enumerate_count_vectors(num_types, self._data_center.max_pizza_count)
+        (self._front_cost, self._front_profit, self._front_vector,
+         self._front_size) = self._store_frontiers(table, self._data_center.costs)
+        logging.info(f"finish tabulating {len(self._count_vectors)} count vectors per store, "
+                     f"at most {self._front_cost.shape[1]} of them are non-dominated.")
+
+    def _store_frontiers(self, table: np.ndarray, costs: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        prune the count vectors of every store to the non-dominated ones
+        :param table: (store x pizza type x count) profit table
+        :param costs: (store x pizza type) cost matrix
+        :return: (store x frontier) cost, profit and count vector index, frontier size per store
+        """
+        num_stores, num_types = costs.shape
+        count_vectors = self._count_vectors
+
+        fronts: List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = []
+        for begin in range(0, num_stores, self._CHUNK_SIZE):
+            end = min(begin + self._CHUNK_SIZE, num_stores)
+            profit = sum(table[begin:end, col, count_vectors[:, col]] for col in range(num_types))
+            cost = costs[begin:end] @ count_vectors.T
+
+            # sort by cost and keep the vectors that improve on all cheaper ones
+            order = np.argsort(cost, axis=1, kind='stable')
+            cost = np.take_along_axis(cost, order, axis=1)
+            profit = np.take_along_axis(profit, order, axis=1)
+            best_before = np.maximum.accumulate(profit, axis=1)
+            best_before = np.concatenate([np.full((end - begin, 1), -np.inf), best_before[:, :-1]], axis=1)
+            fronts.append((order, cost, profit, profit > best_before))
+
+        width = max([int(keep.sum(axis=1).max()) for _, _, _, keep in fronts], default=1)
+        front_cost = np.zeros((num_stores, width))
+        front_profit = np.full((num_stores, width), -np.inf)
+        front_vector = np.full((num_stores, width), -1, dtype=np.int64)
+        front_size = np.zeros(num_stores, dtype=np.int64)
+        for chunk, (order, cost, profit, keep) in enumerate(fronts):
+            rows, cols = np.nonzero(keep)
+            pos = np.cumsum(keep, axis=1)[rows, cols] - 1
+            rows_global = rows + chunk * self._CHUNK_SIZE
+            front_cost[rows_global, pos] = cost[rows, cols]
+            front_profit[rows_global, pos] = profit[rows, cols]
+            front_vector[rows_global, pos] = order[rows, cols]
+            front_size[chunk * self._CHUNK_SIZE: chunk * self._CHUNK_SIZE + len(keep)] = keep.sum(axis=1)
+        return front_cost, front_profit, front_vector, front_size
+
+    def _choice_cost(self, choice: np.ndarray) -> float:
+        return float(np.take_along_axis(self._front_cost, choice[:, None], axis=1).sum())
+
+    def _choice_profit(self, choice: np.ndarray) -> float:
+        return float(np.take_along_axis(self._front_profit, choice[:, None], axis=1).sum())
+
+    def _choice_counts(self, choice: np.ndarray) -> np.ndarray:
+        return self._count_vectors[np.take_along_axis(self._front_vector, choice[:, None], axis=1)[:, 0]]
+
+    def _lagrangian_choice(self, multiplier: float) -> np.ndarray:
+        return (self._front_profit - multiplier * self._front_cost).argmax(axis=1)
+
+    def _lagrangian_bound(self, multiplier: float, budget: float) -> Tuple[np.ndarray, float]:
+        """
+        :param multiplier: budget multiplier
+        :param budget: budget across the chain
+        :return: per store relaxed profit, upper bound of the total profit
+        """
+        relaxed = (self._front_profit - multiplier * self._front_cost).max(axis=1)
+        return relaxed, float(relaxed.sum()) + multiplier * budget
+
+    def _max_multiplier(self) -> float:
+        # a multiplier above the best profit per unit cost of all count vectors leaves every store empty
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(self._front_cost > 0, self._front_profit / self._front_cost, 0)
+        return float(np.nanmax(ratio)) + 1.0
+
+    def _bracket_multiplier(self, budget: float, guess: float) -> Tuple[float, float]:
+        """
+        bracket the multiplier around a guess, e.g. the multiplier before a few stores changed, by steps that
+        double away from it
+        :param budget: budget across the chain
+        :param guess: multiplier guess
+        :return: multiplier that overspends or 0, multiplier that respects the budget
+        """
+        max_multiplier = self._max_multiplier()
+        step = 1e-3 * max(guess, 1e-9)
+        if self._choice_cost(self._lagrangian_choice(guess)) <= budget:
+            high = guess
+            while guess - step > 0 and self._choice_cost(self._lagrangian_choice(guess - step)) <= budget:
+                high, step = guess - step, 2 * step
+            return max(guess - step, 0.0), high
+        low = guess
+        while guess + step < max_multiplier and self._choice_cost(self._lagrangian_choice(guess + step)) > budget:
+            low, step = guess + step, 2 * step
+        return low, min(guess + step, max_multiplier)
+
+    def _bisect_multiplier(self, budget: float, high: float, low: float = 0.0) -> float:
+        """
+        bisect on the multiplier: the lower end overspends, the upper end respects the budget
+        :param budget: budget across the chain
+        :param high: multiplier that respects the budget
+        :param low: multiplier that overspends, or 0
+        :return: smallest multiplier found that respects the budget
+        """
+        for _ in range(self._NUM_BISECTIONS):
+            mid = (low + high) / 2
+            if self._choice_cost(self._lagrangian_choice(mid)) > budget:
+                low = mid
+            else:
+                high = mid
+            if high - low <= 1e-12 * high:
+                break
+        return high
+
+    def _solve_knapsack(self, budgets: np.ndarray, exact: bool = True, deadline: float = None) -> np.ndarray:
+        """
+        solve the knapsack for ascending budgets over the same store frontiers, the multiplier and upper bound
+        of every budget are kept in self._multipliers and self._upper_bounds
+        :param budgets: ascending budgets across the chain
+        :param exact: run the dynamic program if True, stop at the greedy solutions otherwise
+        :param deadline: time.perf_counter() at which to stop the dynamic program of every budget, the time limit
+        from the start of each budget if None
+        :return: (budget x store) choice per store
+        """
+        high = self._max_multiplier()
+        self._multipliers = np.zeros(len(budgets))
+        self._upper_bounds = np.zeros(len(budgets))
+        choices = np.zeros((len(budgets), self._data_center.num_stores), dtype=np.int64)
+        for index, budget in enumerate(budgets):
+            # the multiplier falls as the budget grows, so the one of the next smaller budget caps the bisection
+            multiplier = high = self._bisect_multiplier(budget, high)
+            # the solution of the next smaller budget stays feasible
+            starts = [choices[index - 1]] if index > 0 else []
+            budget_deadline = self._deadline(time.perf_counter()) if deadline is None else deadline
+            choices[index], self._upper_bounds[index] = self._solve_budget(budget, multiplier, starts, exact,
+                                                                           budget_deadline)
+            self._multipliers[index] = multiplier
+        return choices
+
+    def _solve_budget(self, budget: float, multiplier: float, starts: List[np.ndarray],
+                      exact: bool = True, deadline: float = None) -> Tuple[np.ndarray, float]:
+        """
+        solve the knapsack for one budget
+        :param budget: budget across the chain
+        :param multiplier: smallest multiplier found that respects the budget
+        :param starts: feasible choices per store to warm start from, on top of the Lagrangian choice
+        :param exact: run the dynamic program if True, stop at the greedy solution and the Lagrangian bound otherwise
+        :param deadline: time.perf_counter() at which to stop the dynamic program, no limit if None
+        :return: choice per store, upper bound of the total profit, the Lagrangian one unless the dynamic program
+        completes
+        """
+        relaxed, upper_bound = self._lagrangian_bound(multiplier, budget)
+        incumbent = self._improve_greedily(self._lagrangian_choice(multiplier), budget)
+        for start in starts:
+            start = self._improve_greedily(start, budget)
+            if self._choice_profit(start) > self._choice_profit(incumbent):
+                incumbent = start
+        lower_bound = self._choice_profit(incumbent)
+        logging.info(f"budget: {budget}, lagrangian multiplier: {multiplier}, lower bound: {lower_bound}, "
+                     f"upper bound: {upper_bound}")
+
+        # a beam search first finds a near-optimal lower bound, which lets the exact pass prune far more states
+        for beam_width in (self._BEAM_WIDTH, None) if exact else ():
+            if upper_bound - lower_bound <= 1e-9 * max(1.0, abs(lower_bound)):
+                break
+            incumbent, completed = self._run_dynamic_program(budget, multiplier, relaxed, upper_bound, lower_bound,
+                                                             incumbent, beam_width, deadline)
+            lower_bound = self._choice_profit(incumbent)
+            if beam_width is None and completed:
+                upper_bound = lower_bound
+            elif beam_width is None:
+                logging.info(f"the dynamic program stops unfinished, keep the lower bound: {lower_bound}")
+            else:
+                logging.info(f"beam search lower bound: {lower_bound}")
+            if not completed and beam_width is not None:
+                # the time is up
+                break
+        return incumbent, upper_bound
+
+    def _improve_greedily(self, choice: np.ndarray, budget: float) -> np.ndarray:
+        """
+        spend the remaining budget on moving stores to their next, more expensive count vector,
+        the most profitable moves per unit cost first
+        """
+        choice = choice.copy()
+        remaining = budget - self._choice_cost(choice)
+        stores = np.flatnonzero(choice + 1 < self._front_size)
+        if len(stores) == 0:
+            return choice
+        delta_cost = self._front_cost[stores, choice[stores] + 1] - self._front_cost[stores, choice[stores]]
+        delta_profit = self._front_profit[stores, choice[stores] + 1] - self._front_profit[stores, choice[stores]]
+        order = np.argsort(-delta_profit / np.maximum(delta_cost, 1e-12), kind='stable')
+        affordable = np.cumsum(delta_cost[order]) <= remaining
+        choice[stores[order[affordable]]] += 1
+        return choice
+
+    def _repair_greedily(self, choice: np.ndarray, budget: float) -> np.ndarray:
+        """
+        move stores back to their next, cheaper count vector until the budget is met, the least profit lost per
+        unit cost saved first
+        """
+        choice = choice.copy()
+        excess = self._choice_cost(choice) - budget
+        while excess > 0:
+            stores = np.flatnonzero(choice > 0)
+            if len(stores) == 0:
+                break
+            saved = self._front_cost[stores, choice[stores]] - self._front_cost[stores, choice[stores] - 1]
+            lost = self._front_profit[stores, choice[stores]] - self._front_profit[stores, choice[stores] - 1]
+            order = np.argsort(lost / np.maximum(saved, 1e-12), kind='stable')
+            num_moves = int(np.searchsorted(np.cumsum(saved[order]), excess)) + 1
+            choice[stores[order[:num_moves]]] -= 1
+            excess = self._choice_cost(choice) - budget
+        return choice
+
+    def _run_dynamic_program(self, budget: float, multiplier: float, relaxed: np.ndarray, upper_bound: float,
+                             lower_bound: float, incumbent: np.ndarray, beam_width: int = None,
+                             deadline: float = None) -> Tuple[np.ndarray, bool]:
+        """
+        run the dynamic program over the stores
+        :param budget: budget across the chain
+        :param multiplier: budget multiplier of the Lagrangian bound
+        :param relaxed: per store relaxed profit at the multiplier
+        :param upper_bound: Lagrangian bound of the total profit
+        :param lower_bound: profit of the incumbent
+        :param incumbent: best known choice per store
+        :param beam_width: if given, keep only this many states with the best bound per store, which makes
+        the program a heuristic
+        :param deadline: time.perf_counter() at which to stop, no limit if None
+        :return: choice per store, False if the program stopped at the deadline or, without a beam width, at the
+        state cap, in which case the choice is the incumbent
+        """
+        num_stores = self._data_center.num_stores
+        tolerance = 1e-9 * max(1.0, abs(lower_bound))
+        # relaxed profit of the stores after a given one
+        relaxed_rest = np.concatenate([np.cumsum(relaxed[::-1])[::-1][1:], [0.0]])
+        # a count vector whose relaxed profit falls behind the best one by more than the gap cannot be optimal
+        deficit = relaxed[:, None] - (self._front_profit - multiplier * self._front_cost)
+        max_deficit = upper_bound - lower_bound + tolerance
+
+        state_cost = np.zeros(1)
+        state_profit = np.zeros(1)
+        parents: List[np.ndarray] = []
+        options: List[np.ndarray] = []
+        max_states = 1
+        for row in range(num_stores):
+            if deadline is not None and time.perf_counter() > deadline:
+                logging.info(f"dynamic program reaches its time limit at store {row} of {num_stores}.")
+                return incumbent, False
+            vectors = np.flatnonzero(deficit[row, :self._front_size[row]] <= max_deficit)
+            cost = (state_cost[:, None] + self._front_cost[row, vectors][None, :]).ravel()
+            profit = (state_profit[:, None] + self._front_profit[row, vectors][None, :]).ravel()
+
+            bound = profit + relaxed_rest[row] + multiplier * (budget - cost)
+            candidates = np.flatnonzero((cost <= budget) & (bound >= lower_bound - tolerance))
+            cost, profit, bound = cost[candidates], profit[candidates], bound[candidates]
+
+            # keep the non-dominated states only
+            order = np.lexsort((-profit, cost))
+            cost, profit, candidates = cost[order], profit[order], candidates[order]
+            best_before = np.concatenate([[-np.inf], np.maximum.accumulate(profit)[:-1]])
+            keep = profit > best_before
+            if beam_width is None and keep.sum() > self._max_states:
+                logging.info(f"dynamic program exceeds {self._max_states} states at store {row} of {num_stores}.")
+                return incumbent, False
+            if beam_width is not None and keep.sum() > beam_width:
+                keep[keep] = bound[order][keep] >= np.sort(bound[order][keep])[-beam_width]
+            state_cost, state_profit, candidates = cost[keep], profit[keep], candidates[keep]
+            parents.append(candidates // len(vectors))
+            options.append(vectors[candidates % len(vectors)])
+            max_states = max(max_states, len(candidates))
+
+        if len(state_profit) == 0 or state_profit.max() < lower_bound:
+            return incumbent, True
+
+        logging.info(f"dynamic program completes with at most {max_states} states per store.")
+        choice = np.zeros(num_stores, dtype=np.int64)
+        state = int(state_profit.argmax())
+        for row in range(num_stores - 1, -1, -1):
+            choice[row] = options[row][state]
+            state = int(parents[row][state])
+        return choice, True
+
+    def _deadline(self, start: float) -> Optional[float]:
+        """
+        :return: time.perf_counter() at which the time limit from a start, cut to the deadline of the request,
+        runs out, None without either
+        """
+        time_limit = self._time_limit
+        control = active_control()
+        if control is not None:
+            time_limit = control.time_limit(time_limit)
+        return None if time_limit is None else start + time_limit
+
+    def _bound_status(self) -> str:
+        """
+        :return: "optimal" if the solution meets its upper bound, "feasible" otherwise
+        """
+        if self._upper_bound - self._opt_obj <= 1e-9 * max(1.0, abs(self._opt_obj)):
+            return "optimal"
+        return "feasible"
+
+    def _retrieve_opt_values(self, counts: np.ndarray):
+        self._opt_pizza_count_matrix = counts
+        self._opt_pizza_count = assortment_dict(self._data_center, counts)
+        logging.info("finish retrieving the optimal solution.")
+
+    def _show_opt_values(self):
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+        df = pd.DataFrame(self._opt_pizza_count_matrix.T, index=self._data_center.pizza_types,
+                          columns=self._data_center.store_ids)
+        logging.debug(f"show pizza assortment results:\n{df}")
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def solve_time(self):
+        return self._solve_time
+
+    @property
+    def upper_bound(self):
+        return self._upper_bound
+
+    @property
+    def budget_multiplier(self):
+        return self._multiplier
+
+    @property
+    def maximal_profits(self):
+        return self._opt_obj
+
+    @property
+    def optimal_assortment(self):
+        return self._opt_pizza_count
+
+    @property
+    def optimal_count_matrix(self) -> np.ndarray:
+        return self._opt_pizza_count_matrix
+
+    @property
+    def frontier_profits(self) -> np.ndarray:
+        return self._frontier_profits
+
+    @property
+    def frontier_upper_bounds(self) -> np.ndarray:
+        return self._frontier_upper_bounds
+
+    @property
+    def frontier_assortments(self) -> List[Dict[int, Dict[str, int]]]:
+        return self._frontier_assortments
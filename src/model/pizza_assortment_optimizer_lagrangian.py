@@ -0,0 +1,345 @@
+import logging
+import time
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+
+from src.common.data_center import DataCenter
+from src.model.profit import profit_coefficients, tabulate_profits
+from src.model.solution import assortment_dict
+from src.model.solve_control import active_control
+
+
+class PizzaAssortmentOptimizerLagrangian:
+    """
+    this class solves model 1 for very large chains by a Lagrangian decomposition.
+
+    the budget is the only constraint that couples the stores. once it is priced by a multiplier, every store
+    solves its own subproblem: pick the pizza counts within its capacity that maximize the profit net of the
+    priced cost. since the profit of a pizza type is concave in its count, the subproblem is solved exactly by
+    taking the units with the largest positive net marginal profit, up to the max. pizza count, which is done for
+    all stores at once on the (store x pizza type x count) tensor of marginal profits. the smallest multiplier
+    whose subproblem solutions respect the budget is searched, and the remaining budget is spent greedily. the
+    solution comes with the Lagrangian upper bound and its optimality gap, which shrinks as the chain grows.
+    unlike the knapsack engine, nothing is enumerated per store, so the solve time grows linearly with the chain
+    """
+
+    # number of stores whose subproblems are solved at once, which caps the memory of the temporary tensors
+    _CHUNK_SIZE = 65_536
+    # max. number of steps of the search for the budget multiplier
+    _NUM_SEARCH_STEPS = 100
+    # number of stores of the sample that brackets the multiplier of a large chain
+    _SAMPLE_SIZE = 20_000
+
+    def __init__(self, time_limit: float = None):
+        """
+        constructor
+        :param time_limit: max. time in seconds of the search for the budget multiplier, which then answers the
+        best multiplier that respects the budget, no limit if None. it is cut to the time left until the deadline
+        of the request, see SolveControl
+        """
+        self._time_limit = time_limit
+        self._data_center: DataCenter = None
+        # (store x pizza type x count) marginal profit of the count-th pizza
+        self._marginal_profits: np.ndarray = None
+        # (store x pizza type) profit of displaying no pizza
+        self._base_profits: np.ndarray = None
+
+        # best solution found
+        self._opt_obj: float = None
+        self._opt_pizza_count: Dict[int, Dict[str, int]] = None
+        self._opt_pizza_count_matrix: np.ndarray = None
+        # subproblem solutions at the budget multiplier, before the remaining budget is spent
+        self._relaxed_count_matrix: np.ndarray = None
+        self._upper_bound: float = None
+        # lagrangian multiplier of the budget constraint, 0 if the budget is not binding
+        self._multiplier: float = None
+        self._solve_time: float = None
+
+    def optimize(self, data_center: DataCenter):
+        logging.info("PizzaAssortOptimizerLagrangian optimizer() starts.")
+        self.solve(data_center)
+        self._show_opt_values()
+        logging.info("PizzaAssortOptimizerLagrangian optimizer() completes.")
+
+    def solve(self, data_center: DataCenter) -> np.ndarray:
+        """
+        solve model 1 without showing the solution
+        :param data_center: data center
+        :return: (store x pizza type) pizza counts
+        """
+        start = time.perf_counter()
+        time_limit = self._time_limit
+        control = active_control()
+        if control is not None:
+            time_limit = control.time_limit(time_limit)
+        deadline = None if time_limit is None else start + time_limit
+        self._data_center = data_center
+        self._opt_pizza_count = None
+        self._tabulate_marginal_profits()
+        budget = data_center.max_budget
+
+        self._multiplier, relaxed_counts = self._search_multiplier(budget, deadline)
+        if self._multiplier == 0:
+            logging.info("the budget is not binding.")
+        counts = self._improve_greedily(relaxed_counts, budget - self._counts_cost(relaxed_counts))
+        relaxed = float(self._base_profits.sum() + self._counts_gain(relaxed_counts).sum() -
+                        self._multiplier * self._counts_cost(relaxed_counts))
+
+        self._upper_bound = relaxed + self._multiplier * budget
+        self._relaxed_count_matrix = relaxed_counts
+        self._opt_pizza_count_matrix = counts
+        self._opt_obj = float((self._base_profits.sum(axis=1) + self._counts_gain(counts)).sum())
+        self._solve_time = time.perf_counter() - start
+        logging.info(f"solve success, opt_obj: {self._opt_obj}, upper bound: {self._upper_bound}, "
+                     f"gap: {self.gap:.6%}, lagrangian multiplier: {self._multiplier}, "
+                     f"solve time: {self._solve_time:.3f} seconds")
+        return counts
+
+    def _tabulate_marginal_profits(self):
+        data_center = self._data_center
+        coef = profit_coefficients(data_center)
+        if (data_center.beta[coef > 0] > 1).any():
+            raise ValueError("beta > 1 makes the profit function convex")
+        num_stores, num_types = coef.shape
+        max_count = data_center.max_pizza_count
+        self._marginal_profits = np.empty((num_stores, num_types, max_count))
+        self._base_profits = np.empty((num_stores, num_types))
+        for begin in range(0, num_stores, self._CHUNK_SIZE):
+            end = min(begin + self._CHUNK_SIZE, num_stores)
+            table = tabulate_profits(data_center.subset(np.arange(begin, end)))
+            self._marginal_profits[begin:end] = np.diff(table, axis=2)
+            self._base_profits[begin:end] = table[:, :, 0]
+
+    def _max_multiplier(self) -> float:
+        # a multiplier above the best marginal profit per unit cost leaves every store empty
+        costs = self._data_center.costs
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(costs > 0, self._marginal_profits[:, :, 0] / costs, 0)
+        return float(np.nanmax(ratio, initial=0.0)) + 1.0
+
+    def _bracket_multiplier(self, budget: float) -> Tuple[float, float, np.ndarray, np.ndarray]:
+        """
+        bracket the multiplier. for a large chain, a random sample of the stores is solved under its share of the
+        budget first, its multiplier is close to the one of the chain, and the bracket steps away from it by
+        doubling steps
+        :param budget: budget across the chain
+        :return: multiplier that overspends, multiplier that respects the budget, and their subproblem solutions.
+        both multipliers are 0 if the budget is not binding
+        """
+        max_multiplier = self._max_multiplier()
+        num_stores = self._data_center.num_stores
+        guess = 0.0
+        if num_stores >= 4 * self._SAMPLE_SIZE:
+            rows = np.sort(np.random.default_rng(0).choice(num_stores, self._SAMPLE_SIZE, replace=False))
+            sample = PizzaAssortmentOptimizerLagrangian()
+            sample.solve(self._data_center.subset(rows).with_max_budget(budget * self._SAMPLE_SIZE / num_stores))
+            guess = sample.budget_multiplier
+            logging.info(f"the lagrangian multiplier of a sample of {self._SAMPLE_SIZE} stores: {guess}")
+        if not 0 < guess < max_multiplier:
+            zero_counts = self._subproblem_counts(0.0)
+            if self._counts_cost(zero_counts) <= budget:
+                return 0.0, 0.0, zero_counts, zero_counts
+            return 0.0, max_multiplier, zero_counts, np.zeros_like(zero_counts)
+
+        step = 0.01 * guess
+        counts = self._subproblem_counts(guess)
+        if self._counts_cost(counts) > budget:
+            low, low_counts = guess, counts
+            while True:
+                high = min(guess + step, max_multiplier)
+                high_counts = self._subproblem_counts(high)
+                if self._counts_cost(high_counts) <= budget:
+                    return low, high, low_counts, high_counts
+                low, low_counts, step = high, high_counts, 2 * step
+        high, high_counts = guess, counts
+        while True:
+            low = max(guess - step, 0.0)
+            low_counts = self._subproblem_counts(low)
+            if self._counts_cost(low_counts) > budget:
+                return low, high, low_counts, high_counts
+            if low == 0:
+                return 0.0, 0.0, low_counts, low_counts
+            high, high_counts, step = low, low_counts, 2 * step
+
+    def _search_multiplier(self, budget: float, deadline: float = None) -> Tuple[float, np.ndarray]:
+        """
+        search the smallest multiplier whose subproblem solutions respect the budget by the Illinois variant of
+        regula falsi on the spent budget, a decreasing step function of the multiplier that is close to continuous
+        for a large chain. the cost of the solution of a store does not increase with the multiplier, so a store
+        whose solutions at the ends of the bracket cost the same keeps its solution within it, and only the other
+        stores are solved again. the search stops once the ends of the bracket are one pizza apart, since the
+        greedy improvement spends the budget left anyway
+        :param budget: budget across the chain
+        :param deadline: time.perf_counter() at which to stop at the upper end of the bracket, no limit if None
+        :return: multiplier that respects the budget, 0 if the budget is not binding, its subproblem solutions
+        """
+        low, high, low_counts, high_counts = self._bracket_multiplier(budget)
+        excess_low = self._counts_cost(low_counts) - budget
+        excess_high = self._counts_cost(high_counts) - budget
+        costs = self._data_center.costs
+        max_cost = float(costs.max(initial=0.0))
+        # excesses that weigh the ends of the bracket in the interpolation
+        weight_low, weight_high = excess_low, excess_high
+        side = 0
+        for _ in range(self._NUM_SEARCH_STEPS):
+            if high - low <= 1e-12 * high or excess_low - excess_high <= max_cost:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                logging.info("the search for the lagrangian multiplier reaches its time limit.")
+                break
+            active = np.flatnonzero((costs * low_counts).sum(axis=1) != (costs * high_counts).sum(axis=1))
+            mid = (low * weight_high - high * weight_low) / (weight_high - weight_low)
+            if not low < mid < high:
+                mid = (low + high) / 2
+            mid_counts = high_counts.copy()
+            mid_counts[active] = self._subproblem_counts(mid, active)
+            excess = self._counts_cost(mid_counts) - budget
+            if excess > 0:
+                low, low_counts, excess_low, weight_low = mid, mid_counts, excess, excess
+                # the upper end is kept twice in a row, halve its weight so that it moves
+                weight_high = weight_high / 2 if side < 0 else weight_high
+                side = -1
+            else:
+                high, high_counts, excess_high, weight_high = mid, mid_counts, excess, excess
+                weight_low = weight_low / 2 if side > 0 else weight_low
+                side = 1
+        logging.info(f"find the lagrangian multiplier: {high}.")
+        return high, high_counts
+
+    def _subproblem_counts(self, multiplier: float, rows: np.ndarray = None) -> np.ndarray:
+        """
+        solve the subproblem of every store at a multiplier
+        :param multiplier: budget multiplier
+        :param rows: rows of the stores to solve, all if None
+        :return: (store x pizza type) pizza counts
+        """
+        costs = self._data_center.costs if rows is None else self._data_center.costs[rows]
+        max_count = self._data_center.max_pizza_count
+        counts = np.empty(costs.shape, dtype=np.int64)
+        for begin in range(0, len(costs), self._CHUNK_SIZE):
+            end = min(begin + self._CHUNK_SIZE, len(costs))
+            marginal = self._marginal_profits[begin:end] if rows is None else self._marginal_profits[rows[begin:end]]
+            threshold = multiplier * costs[begin:end, :, None]
+            chunk_counts = self._count_profitable_units(marginal, threshold[:, :, 0])
+            full = np.flatnonzero(chunk_counts.sum(axis=1) > max_count)
+            if len(full) > 0:
+                # a store at capacity takes its max_count best units, the ties of the last one in type order
+                full_value = marginal[full] - threshold[full]
+                last = -np.partition(-full_value.reshape(len(full), -1), max_count - 1, axis=1)[:, max_count - 1]
+                above = (full_value > last[:, None, None]).sum(axis=2)
+                ties = (full_value == last[:, None, None]).sum(axis=2)
+                left = max_count - above.sum(axis=1)
+                tied_before = np.cumsum(ties, axis=1) - ties
+                chunk_counts[full] = above + np.clip(left[:, None] - tied_before, 0, ties)
+            counts[begin:end] = chunk_counts
+        return counts
+
+    @staticmethod
+    def _count_profitable_units(marginal: np.ndarray, threshold: np.ndarray) -> np.ndarray:
+        """
+        count the units of every store-type pair whose marginal profit exceeds a threshold, by a binary search over
+        the counts, since the marginal profits of a pizza type do not increase with its count
+        :param marginal: (store x pizza type x count) marginal profits
+        :param threshold: (store x pizza type) threshold
+        :return: (store x pizza type) number of units
+        """
+        low = np.zeros(threshold.shape, dtype=np.int64)
+        high = np.full(threshold.shape, marginal.shape[2], dtype=np.int64)
+        for _ in range(int(marginal.shape[2]).bit_length()):
+            searching = low < high
+            mid = (low + high + 1) // 2
+            above = np.take_along_axis(marginal, np.maximum(mid - 1, 0)[:, :, None], axis=2)[:, :, 0] > threshold
+            low = np.where(searching & above, mid, low)
+            high = np.where(searching & ~above, mid - 1, high)
+        return low
+
+    def _counts_cost(self, counts: np.ndarray) -> float:
+        return float((self._data_center.costs * counts).sum())
+
+    def _counts_gain(self, counts: np.ndarray) -> np.ndarray:
+        # per store profit of the counts on top of the profit of displaying no pizza
+        gain = np.zeros(len(counts))
+        for begin in range(0, len(counts), self._CHUNK_SIZE):
+            end = min(begin + self._CHUNK_SIZE, len(counts))
+            taken = np.arange(self._marginal_profits.shape[2])[None, None, :] < counts[begin:end, :, None]
+            gain[begin:end] = np.where(taken, self._marginal_profits[begin:end], 0).sum(axis=(1, 2))
+        return gain
+
+    def _improve_greedily(self, counts: np.ndarray, remaining: float) -> np.ndarray:
+        """
+        spend the remaining budget on one more pizza per store at a time, the most profitable units per unit cost
+        first, until no unit with a positive marginal profit is affordable
+        """
+        costs = self._data_center.costs
+        max_count = self._data_center.max_pizza_count
+        counts = counts.copy()
+        rows = np.arange(len(counts))
+        while remaining > 0:
+            room = counts.sum(axis=1) < max_count
+            next_count = np.minimum(counts, max_count - 1)
+            gain = np.take_along_axis(self._marginal_profits, next_count[:, :, None], axis=2)[:, :, 0]
+            allowed = room[:, None] & (counts < max_count) & (gain > 0) & (costs <= remaining)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = np.where(allowed, gain / np.maximum(costs, 1e-12), -np.inf)
+            best = ratio.argmax(axis=1)
+            stores = np.flatnonzero(ratio[rows, best] > -np.inf)
+            if len(stores) == 0:
+                break
+            order = stores[np.argsort(-ratio[stores, best[stores]], kind='stable')]
+            # the first unit is affordable on its own, the ones after it as long as the remaining budget lasts
+            affordable = order[np.cumsum(costs[order, best[order]]) <= remaining]
+            counts[affordable, best[affordable]] += 1
+            remaining -= float(costs[affordable, best[affordable]].sum())
+        return counts
+
+    def _show_opt_values(self):
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+        df = pd.DataFrame(self._opt_pizza_count_matrix.T, index=self._data_center.pizza_types,
+                          columns=self._data_center.store_ids)
+        logging.debug(f"show pizza assortment results:\n{df}")
+
+    @property
+    def solve_time(self):
+        return self._solve_time
+
+    @property
+    def upper_bound(self):
+        return self._upper_bound
+
+    @property
+    def gap(self) -> float:
+        """
+        relative optimality gap of the solution against the Lagrangian bound
+        """
+        if self._opt_obj is None:
+            return np.inf
+        return max(0.0, self._upper_bound - self._opt_obj) / max(abs(self._upper_bound), 1e-9)
+
+    @property
+    def budget_multiplier(self):
+        return self._multiplier
+
+    @property
+    def maximal_profits(self):
+        return self._opt_obj
+
+    @property
+    def optimal_assortment(self) -> Dict[int, Dict[str, int]]:
+        # built on first access, which takes longer than the solve for a very large chain
+        if self._opt_pizza_count is None and self._opt_pizza_count_matrix is not None:
+            self._opt_pizza_count = assortment_dict(self._data_center, self._opt_pizza_count_matrix)
+        return self._opt_pizza_count
+
+    @property
+    def optimal_count_matrix(self) -> np.ndarray:
+        return self._opt_pizza_count_matrix
+
+    @property
+    def relaxed_count_matrix(self) -> np.ndarray:
+        """
+        (store x pizza type) subproblem solutions at the budget multiplier, which respect the budget, before the
+        remaining budget is spent greedily
+        """
+        return self._relaxed_count_matrix
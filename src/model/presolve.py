@@ -0,0 +1,346 @@
+import logging
+import time
+from typing import Dict, NamedTuple, Optional
+import numpy as np
+
+from src.common.data_center import DataCenter
+from src.model.pizza_assortment_optimizer_lagrangian import PizzaAssortmentOptimizerLagrangian
+from src.model.profit import profit_coefficients, tabulate_profits
+from src.model.solution import assortment_dict
+from src.model.solve_control import relative_gap
+from src.utils.metrics import record, timed
+
+
+class PresolveStats(NamedTuple):
+    """
+    how much the presolve shrank a model 1 instance
+    """
+    num_stores: int
+    # stores of the reduced instance
+    num_reduced_stores: int
+    # store and pizza type pairs fixed to a count of 0
+    num_fixed: int
+    # stores whose pairs are all fixed, left out of the reduced instance
+    num_removed: int
+    # stores merged into the representative of identical stores
+    num_aggregated: int
+    # count variables that are not fixed, before and after the presolve
+    num_variables: int
+    num_reduced_variables: int
+
+    @property
+    def reduction(self) -> float:
+        """
+        share of the count variables the presolve removed
+        """
+        return 1.0 - self.num_reduced_variables / max(self.num_variables, 1)
+
+
+class Presolve:
+    """
+    this class reduces a model 1 instance before it is solved.
+
+    1) a store-type pair whose margin (p - c) * alpha is not positive is fixed to a count of 0, a larger count only
+    consumes budget and capacity. a store whose pairs are all fixed is left out
+    2) stores whose parameters are identical, once the fixed pairs are blanked, are merged into one representative
+    weighted by the number of stores it stands for: its prices and costs are those of one store times the weight,
+    so that a count on the representative is the count of every store it stands for. the reduced instance is a
+    plain data center that every model 1 optimizer solves.
+
+    giving every identical store the same counts is exact when the budget is not binding. when it is, the optimum
+    may give some of them one pizza more than the others, so expand() is followed by improve(), which spends the
+    remaining budget on single stores
+    """
+
+    def __init__(self, data_center: DataCenter, aggregate: bool = True):
+        """
+        constructor
+        :param data_center: data center
+        :param aggregate: merge identical stores if True, only fix the pairs that cannot make a profit if False
+        """
+        self._data_center = data_center
+        coef = profit_coefficients(data_center)
+        # a count of 0 has no profit if beta > 0 and frees budget if the cost is not negative
+        self._fixed = (coef <= 0) & (data_center.costs >= 0) & (data_center.beta > 0)
+        kept = np.flatnonzero(~self._fixed.all(axis=1))
+
+        # the fixed pairs are blanked, so that stores that differ only in unprofitable pizza types are identical
+        fixed = self._fixed[kept]
+        prices = np.where(fixed, 0.0, data_center.prices[kept])
+        costs = np.where(fixed, 0.0, data_center.costs[kept])
+        alpha = np.where(fixed, 0.0, data_center.alpha[kept])
+        beta = np.where(fixed, 1.0, data_center.beta[kept])
+        if aggregate and len(kept) > 0:
+            _, first, inverse, weights = np.unique(np.hstack((prices, costs, alpha, beta)), axis=0,
+                                                   return_index=True, return_inverse=True, return_counts=True)
+            # the representatives keep the order of the stores they stand for
+            order = np.argsort(first, kind='stable')
+            position = np.empty_like(order)
+            position[order] = np.arange(len(order))
+            first, inverse, weights = first[order], position[inverse.reshape(-1)], weights[order]
+        else:
+            first, inverse, weights = np.arange(len(kept)), np.arange(len(kept)), np.ones(len(kept), dtype=np.int64)
+
+        # data center row -> reduced row, -1 for the stores left out
+        self._rows = np.full(data_center.num_stores, -1, dtype=np.int64)
+        self._rows[kept] = inverse
+        self._weights = weights
+        # (representative x pizza type) parameters of one of the stores a representative stands for
+        self._representatives = DataCenter(data_center.max_pizza_count, data_center.max_budget,
+                                           data_center.num_pizza_groups, data_center.pizza_types)
+        self._representatives.load(data_center.store_ids[kept[first]], prices[first], costs[first], alpha[first],
+                                   beta[first])
+        self._reduced = DataCenter(data_center.max_pizza_count, data_center.max_budget,
+                                   data_center.num_pizza_groups, data_center.pizza_types)
+        self._reduced.load(data_center.store_ids[kept[first]], prices[first] * weights[:, None],
+                           costs[first] * weights[:, None], alpha[first], beta[first])
+
+        num_types = len(data_center.pizza_types)
+        self._stats = PresolveStats(
+            num_stores=data_center.num_stores,
+            num_reduced_stores=len(first),
+            num_fixed=int(self._fixed.sum()),
+            num_removed=data_center.num_stores - len(kept),
+            num_aggregated=len(kept) - len(first),
+            num_variables=data_center.num_stores * num_types,
+            num_reduced_variables=int((~fixed[first]).sum()),
+        )
+
+    def expand(self, counts: np.ndarray) -> np.ndarray:
+        """
+        give every store the counts of its representative
+        :param counts: (representative x pizza type) pizza counts of the reduced instance
+        :return: (store x pizza type) pizza counts, 0 for the fixed pairs
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        expanded = np.zeros(self._fixed.shape, dtype=np.int64)
+        kept = self._rows >= 0
+        expanded[kept] = counts[self._rows[kept]]
+        expanded[self._fixed] = 0
+        return expanded
+
+    def improve(self, counts: np.ndarray) -> np.ndarray:
+        """
+        spend the remaining budget on one more pizza per store, the most profitable units per unit cost first,
+        until no unit with a positive marginal profit is affordable. the stores of a representative have the same
+        marginal profits, so only the representatives are tabulated
+        :param counts: (store x pizza type) pizza counts of expand()
+        :return: improved pizza counts
+        """
+        data_center = self._data_center
+        kept = np.flatnonzero(self._rows >= 0)
+        if len(kept) == 0:
+            return counts
+        costs = data_center.costs[kept]
+        max_count = data_center.max_pizza_count
+        # (representative x pizza type x count) marginal profit of the count-th pizza
+        marginal = np.diff(tabulate_profits(self._representatives), axis=2)
+        representatives = self._rows[kept][:, None]
+        types = np.arange(len(data_center.pizza_types))[None, :]
+        remaining = data_center.max_budget - float((data_center.costs * counts).sum())
+        counts = counts.copy()
+        sub = counts[kept]
+        rows = np.arange(len(kept))
+        while remaining > 0:
+            room = sub.sum(axis=1) < max_count
+            gain = marginal[representatives, types, np.minimum(sub, max_count - 1)]
+            allowed = room[:, None] & (sub < max_count) & (gain > 0) & (costs <= remaining)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = np.where(allowed, gain / np.maximum(costs, 1e-12), -np.inf)
+            best = ratio.argmax(axis=1)
+            stores = np.flatnonzero(ratio[rows, best] > -np.inf)
+            if len(stores) == 0:
+                break
+            order = stores[np.argsort(-ratio[stores, best[stores]], kind='stable')]
+            # the first unit is affordable on its own, the ones after it as long as the remaining budget lasts
+            affordable = order[np.cumsum(costs[order, best[order]]) <= remaining]
+            sub[affordable, best[affordable]] += 1
+            remaining -= float(costs[affordable, best[affordable]].sum())
+        counts[kept] = sub
+        return counts
+
+    @property
+    def reduced(self) -> DataCenter:
+        return self._reduced
+
+    @property
+    def weights(self) -> np.ndarray:
+        """
+        number of stores every representative of the reduced instance stands for
+        """
+        return self._weights
+
+    @property
+    def is_exact(self) -> bool:
+        """
+        True if no store was merged, the optimum of the reduced instance is then the one of the instance
+        """
+        return self._stats.num_aggregated == 0
+
+    @property
+    def stats(self) -> PresolveStats:
+        return self._stats
+
+
+class PresolvedOptimizer:
+    """
+    this class solves model 1 on the presolved instance with another optimizer and expands its solution back to
+    every store, see Presolve. if identical stores were merged, the solution comes with the Lagrangian upper bound
+    of the instance, which the reduced instance yields as well since the subproblem of a representative is the one
+    of every store it stands for times its weight.
+
+    the presolve does not apply to model 2: a store whose margin is not positive still has to display the count of
+    the group it joins
+    """
+
+    def __init__(self, optimizer, aggregate: bool = True):
+        """
+        constructor
+        :param optimizer: model 1 optimizer that solves the reduced instance
+        :param aggregate: merge identical stores if True, only fix the pairs that cannot make a profit if False.
+        the stores are not merged anyway if a profitable pair has beta > 1, since the Lagrangian bound and
+        improve() rely on concave profits
+        """
+        self._optimizer = optimizer
+        self._aggregate = aggregate
+        self._data_center: DataCenter = None
+        self._presolve: Presolve = None
+
+        self._opt_obj: float = None
+        self._opt_pizza_count: Dict[int, Dict[str, int]] = None
+        self._opt_pizza_count_matrix: np.ndarray = None
+        self._best_bound: Optional[float] = None
+        self._status: str = None
+        self._solve_time: float = None
+
+    def optimize(self, data_center: DataCenter):
+        logging.info("PresolvedOptimizer optimizer() starts.")
+        start = time.perf_counter()
+        self._data_center = data_center
+        self._opt_obj = self._opt_pizza_count = self._opt_pizza_count_matrix = None
+        self._best_bound = self._status = None
+        aggregate = self._aggregate
+        if aggregate and (data_center.beta[profit_coefficients(data_center) > 0] > 1).any():
+            # the Lagrangian bound of a merged instance needs concave profits
+            logging.info("beta > 1 makes the profit function convex, identical stores are not merged.")
+            aggregate = False
+        with timed("presolve"):
+            self._presolve = Presolve(data_center, aggregate)
+        stats = self._presolve.stats
+        record(presolve={**stats._asdict(), 'reduction': stats.reduction})
+        logging.info(f"presolve: {stats.num_stores} stores reduced to {stats.num_reduced_stores}, "
+                     f"{stats.num_fixed} pairs fixed, {stats.num_removed} stores removed, "
+                     f"{stats.num_aggregated} stores aggregated, {stats.reduction:.2%} of the variables removed")
+
+        reduced = self._presolve.reduced
+        if reduced.num_stores > 0:
+            self._optimizer.optimize(reduced)
+            reduced_counts = self._reduced_counts(reduced)
+            if reduced_counts is None:
+                self._opt_pizza_count = {}
+                logging.info("PresolvedOptimizer optimizer() completes, no solution of the reduced instance.")
+                return
+        else:
+            reduced_counts = np.zeros((0, len(data_center.pizza_types)), dtype=np.int64)
+        counts = self._presolve.expand(reduced_counts)
+
+        if reduced.num_stores == 0:
+            # no store can make a profit
+            self._status, self._best_bound = "optimal", 0.0
+        elif self._presolve.is_exact:
+            self._status = getattr(self._optimizer, 'status', None)
+            self._best_bound = getattr(self._optimizer, 'best_bound', None)
+            if self._best_bound is None:
+                self._best_bound = getattr(self._optimizer, 'upper_bound', None)
+        else:
+            lagrangian = self._optimizer
+            if not isinstance(lagrangian, PizzaAssortmentOptimizerLagrangian):
+                lagrangian = PizzaAssortmentOptimizerLagrangian()
+                with timed("presolve.bound"):
+                    lagrangian.solve(reduced)
+            self._best_bound = lagrangian.upper_bound
+            # the subproblem of a representative is solved by the counts of every store it stands for, so the
+            # expanded subproblem solutions are the ones of the instance, and spending the remaining budget on
+            # single stores yields the Lagrangian solution of the instance. the better of it and the expanded
+            # solution of the optimizer is kept
+            with timed("presolve.improve"):
+                counts = max((self._presolve.improve(candidate) for candidate in
+                              (counts, self._presolve.expand(lagrangian.relaxed_count_matrix))),
+                             key=lambda candidate: self._profit(data_center, candidate))
+
+        self._opt_pizza_count_matrix = counts
+        self._opt_obj = self._profit(data_center, counts)
+        if reduced.num_stores > 0 and not self._presolve.is_exact:
+            # the Lagrangian bound proves the expanded solution optimal, whatever the optimizer reports
+            self._status = "optimal" if self.gap <= 1e-9 else "feasible"
+        self._solve_time = time.perf_counter() - start
+        logging.info(f"solve success, opt_obj: {self._opt_obj}, bound: {self._best_bound}, "
+                     f"solve time: {self._solve_time:.3f} seconds")
+        logging.info("PresolvedOptimizer optimizer() completes.")
+
+    @staticmethod
+    def _profit(data_center: DataCenter, counts: np.ndarray) -> float:
+        return float((profit_coefficients(data_center) * counts ** data_center.beta).sum())
+
+    def _reduced_counts(self, reduced: DataCenter) -> Optional[np.ndarray]:
+        """
+        :return: (representative x pizza type) pizza counts of the optimizer, None if it found no solution
+        """
+        assortment = self._optimizer.optimal_assortment
+        if assortment is None or len(assortment) != reduced.num_stores:
+            return None
+        counts = getattr(self._optimizer, 'optimal_count_matrix', None)
+        if counts is not None:
+            return counts
+        counts = np.zeros((reduced.num_stores, len(reduced.pizza_types)), dtype=np.int64)
+        counts[reduced.rows_of(list(assortment.keys()))] = [[per_type[pizza_type] for pizza_type in
+                                                             reduced.pizza_types] for per_type in assortment.values()]
+        return counts
+
+    @property
+    def optimizer(self):
+        return self._optimizer
+
+    @property
+    def presolve_stats(self) -> PresolveStats:
+        return None if self._presolve is None else self._presolve.stats
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def best_bound(self) -> Optional[float]:
+        return self._best_bound
+
+    @property
+    def gap(self) -> Optional[float]:
+        """
+        relative optimality gap of the solution, None if the optimizer reports no bound
+        """
+        gap = relative_gap(self._opt_obj, self._best_bound)
+        if gap is None and self._presolve is not None and self._presolve.is_exact:
+            return getattr(self._optimizer, 'gap', None)
+        return gap
+
+    @property
+    def node_count(self):
+        return getattr(self._optimizer, 'node_count', None)
+
+    @property
+    def solve_time(self):
+        return self._solve_time
+
+    @property
+    def maximal_profits(self):
+        return self._opt_obj
+
+    @property
+    def optimal_assortment(self) -> Dict[int, Dict[str, int]]:
+        if self._opt_pizza_count is None and self._opt_pizza_count_matrix is not None:
+            self._opt_pizza_count = assortment_dict(self._data_center, self._opt_pizza_count_matrix)
+        return self._opt_pizza_count
+
+    @property
+    def optimal_count_matrix(self) -> np.ndarray:
+        return self._opt_pizza_count_matrix
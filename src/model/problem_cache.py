@@ -0,0 +1,129 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, Tuple
+
+import cvxpy as cpy
+import numpy as np
+
+from src.common.data_center import DataCenter
+
+
+def instance_shape_key(data_center: DataCenter, *variant: Hashable) -> Tuple:
+    """
+    create the cache key of an instance shape: the store set, the pizza types, the max. pizza count and the
+    model variant. the store data, e.g. prices, costs and alpha, are not part of it, they enter the compiled
+    problem as parameters
+    :param data_center: data center
+    :param variant: whatever else fixes the model structure, e.g. the build mode and the solver
+    :return: key
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(data_center.store_ids).tobytes())
+    return (digest.hexdigest(), data_center.num_stores, tuple(data_center.pizza_types),
+            data_center.max_pizza_count) + variant
+
+
+def problem_nbytes(problem: cpy.Problem) -> int:
+    """
+    estimate the memory footprint of a compiled problem: its variables and parameters, and the parameter tensors
+    cvxpy keeps after canonicalization
+    :param problem: cvxpy problem
+    :return: number of bytes
+    """
+    nbytes = 8 * sum(leaf.size for leaf in problem.variables() + problem.parameters())
+    param_prog = getattr(getattr(problem, '_cache', None), 'param_prog', None)
+    if param_prog is None:
+        return nbytes
+    for name in ('A', 'P', 'q', 'lb_tensor', 'ub_tensor'):
+        tensor = getattr(param_prog, name, None)
+        for attr in ('data', 'indices', 'indptr', 'row', 'col'):
+            array = getattr(tensor, attr, None)
+            if isinstance(array, np.ndarray):
+                nbytes += array.nbytes
+    return nbytes
+
+
+class ProblemCache:
+    """
+    this class keeps compiled cvxpy problems whose store data enter as parameters, so that a repeat solve of the
+    same instance shape skips building and canonicalization.
+
+    a problem is checked out by get() and checked in again by put() once solved, so that two optimizers never
+    solve the same problem object at once. the least recently used problems are evicted once the estimated
+    memory footprint of the cache exceeds its limit
+    """
+
+    def __init__(self, max_bytes: int = 256 * 2 ** 20):
+        """
+        constructor
+        :param max_bytes: max. estimated memory footprint of the cached problems
+        """
+        self._max_bytes = max_bytes
+        # key -> (compiled problem, its estimated memory footprint), the least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        """
+        check out a compiled problem
+        :param key: instance shape key, see instance_shape_key()
+        :return: the compiled problem, None if not cached
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._misses += 1
+                return None
+            self._hits += 1
+            compiled, nbytes = self._entries.pop(key)
+            self._nbytes -= nbytes
+            return compiled
+
+    def put(self, key: Hashable, compiled, nbytes: int) -> None:
+        """
+        check in a compiled problem as the most recently used one, and evict the least recently used ones that
+        no longer fit
+        :param key: instance shape key, see instance_shape_key()
+        :param compiled: compiled problem, along with whatever its optimizer needs to reuse it
+        :param nbytes: estimated memory footprint, see problem_nbytes()
+        :return:
+        """
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+            if nbytes > self._max_bytes:
+                self._evictions += 1
+                return
+            self._entries[key] = (compiled, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self._max_bytes:
+                _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
@@ -0,0 +1,135 @@
+from typing import TYPE_CHECKING, List, Tuple
+import numpy as np
+
+from src.common.data_center import DataCenter
+
+if TYPE_CHECKING:
+    import cvxpy as cpy
+
+
+def profit_coefficients(data_center: DataCenter) -> np.ndarray:
+    """
+    compute the (store x pizza type) coefficients (p - c) * alpha of the profit function
+    :param data_center: data center
+    :return: coefficient matrix
+    """
+    return (data_center.prices - data_center.costs) * data_center.alpha
+
+
+def tabulate_profits(data_center: DataCenter) -> np.ndarray:
+    """
+    tabulate the profit (p - c) * alpha * n^beta of every store-type pair for every integer pizza count n
+    :param data_center: data center
+    :return: (store x pizza type x (max_pizza_count + 1)) profit table
+    """
+    counts = np.arange(data_center.max_pizza_count + 1, dtype=np.float64)
+    coef = profit_coefficients(data_center)
+    return coef[:, :, None] * counts[None, None, :] ** data_center.beta[:, :, None]
+
+
+def create_profit_hypograph(var_count: 'cpy.Variable', data_center: DataCenter,
+                            parameterized: bool = False) -> Tuple['cpy.Maximize', List]:
+    """
+    create the profit objective sum((p - c) * alpha * x^beta) over a (store x pizza type) count variable.
+    x^beta is written as the hypograph t <= x^beta through one power cone constraint, and the counts of
+    store-type pairs that cannot make a profit are fixed to 0, since a larger count only consumes budget
+    :param var_count: (store x pizza type) pizza count variable
+    :param data_center: data center
+    :param parameterized: enter the coefficients (p - c) * alpha as a parameter if True, see
+    profit_parameter_value(). beta and the pairs that make a profit stay part of the model structure
+    :return: objective and the constraints defining it
+    """
+    import cvxpy as cpy
+
+    coef = profit_coefficients(data_center)
+    beta = data_center.beta
+    if (beta[coef > 0] > 1).any():
+        raise ValueError("beta > 1 makes the profit function convex")
+
+    var_demand = cpy.Variable(var_count.shape, name="t")
+    constraints = []
+    rows, cols = np.nonzero((coef > 0) & (beta < 1))
+    if len(rows) > 0:
+        constraints.append(cpy.PowCone3D(var_count[rows, cols], np.ones(len(rows)),
+                                         var_demand[rows, cols], beta[rows, cols]))
+    rows, cols = np.nonzero((coef > 0) & (beta >= 1))
+    if len(rows) > 0:
+        constraints.append(var_demand[rows, cols] <= var_count[rows, cols])
+    rows, cols = np.nonzero(coef <= 0)
+    if len(rows) > 0:
+        constraints.append(var_count[rows, cols] == 0)
+        constraints.append(var_demand[rows, cols] == 0)
+
+    if parameterized:
+        # an inner product keeps the parameter tensor of the compiled problem linear in the number of stores
+        param_coef = cpy.Parameter(coef.size, name="profit_coef", nonneg=True,
+                                   value=np.maximum(coef, 0).ravel(order='F'))
+        return cpy.Maximize(param_coef @ cpy.vec(var_demand, order='F')), constraints
+    objective = cpy.Maximize(cpy.sum(cpy.multiply(np.maximum(coef, 0), var_demand)))
+    return objective, constraints
+
+
+def create_profit_selection(var_count: 'cpy.Variable', data_center: DataCenter,
+                            parameterized: bool = False) -> Tuple['cpy.Maximize', List]:
+    """
+    create the profit objective sum((p - c) * alpha * x^beta) over a (store x pizza type) count variable as a
+    linear function: every store-type pair selects exactly one integer count through a boolean variable whose
+    profit is tabulated, so the model can be solved by MILP solvers that have no power cone support
+    :param var_count: (store x pizza type) pizza count variable
+    :param data_center: data center
+    :param parameterized: enter the profit table as a parameter if True, see profit_parameter_value()
+    :return: objective and the constraints defining it
+    """
+    import cvxpy as cpy
+
+    table = _selection_table(data_center)
+    num_rows, width = table.shape
+    var_select = cpy.Variable((num_rows, width), name="w", boolean=True)
+    constraints = [
+        cpy.sum(var_select, axis=1) == 1,
+        cpy.vec(var_count, order='F') == var_select @ np.arange(width),
+    ]
+    if parameterized:
+        param_table = cpy.Parameter(table.size, name="profit_table", value=table.ravel(order='F'))
+        return cpy.Maximize(param_table @ cpy.vec(var_select, order='F')), constraints
+    objective = cpy.Maximize(cpy.sum(cpy.multiply(table, var_select)))
+    return objective, constraints
+
+
+def _selection_table(data_center: DataCenter) -> np.ndarray:
+    table = tabulate_profits(data_center)
+    num_stores, num_types, width = table.shape
+    # rows follow the column-major order of vec(var_count): row = type * num_stores + store
+    return table.transpose(1, 0, 2).reshape(num_types * num_stores, width)
+
+
+def profit_parameter_value(param: 'cpy.Parameter', data_center: DataCenter) -> np.ndarray:
+    """
+    compute the value of the parameter of a parameterized create_profit_hypograph() or create_profit_selection()
+    objective for new store data, so that a compiled problem can be solved again without rebuilding it
+    :param param: parameter of the objective
+    :param data_center: data center of the same stores
+    :return: value of the parameter
+    """
+    if param.name() == "profit_table":
+        return _selection_table(data_center).ravel(order='F')
+    return np.maximum(profit_coefficients(data_center), 0).ravel(order='F')
+
+
+def profit_auxiliary_value(var_aux: 'cpy.Variable', counts: np.ndarray, data_center: DataCenter) -> np.ndarray:
+    """
+    compute the value of the auxiliary variable of create_profit_hypograph() or create_profit_selection() that
+    matches given pizza counts, used to warm start a solver
+    :param var_aux: auxiliary variable, t of the hypograph or w of the selection
+    :param counts: (store x pizza type) pizza counts
+    :param data_center: data center
+    :return: value of the auxiliary variable
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if var_aux.name() == "w":
+        rows = counts.ravel(order='F')
+        value = np.zeros(var_aux.shape)
+        value[np.arange(len(rows)), rows] = 1
+        return value
+    coef = profit_coefficients(data_center)
+    return np.where(coef > 0, counts ** np.minimum(data_center.beta, 1), 0)
@@ -0,0 +1,51 @@
+from typing import Dict, Tuple
+import numpy as np
+
+from src.common.data_center import DataCenter
+
+
+def assortment_dict(data_center: DataCenter, counts: np.ndarray) -> Dict[int, Dict[str, int]]:
+    """
+    convert a (store x pizza type) count matrix into the store -> pizza type -> count assortment
+    :param data_center: data center
+    :param counts: count matrix
+    :return: assortment
+    """
+    pizza_types = data_center.pizza_types
+    return {
+        store_id: dict(zip(pizza_types, row))
+        for store_id, row in zip(data_center.store_ids.tolist(), np.asarray(counts, dtype=int).tolist())
+    }
+
+
+def group_solution_dicts(data_center: DataCenter, counts: np.ndarray, assign: np.ndarray,
+                         count_type_group: np.ndarray) -> Tuple[Dict, Dict, Dict, Dict]:
+    """
+    convert the model 2 solution matrices into the nested dicts reported by the group optimizers
+    :param data_center: data center
+    :param counts: (store x pizza type) pizza counts
+    :param assign: (store x pizza type x group) binary group assignment
+    :param count_type_group: (pizza type x group) pizza count of every group
+    :return: store -> type -> count, store -> type -> group -> count, store -> type -> group -> assignment,
+    type -> group -> count
+    """
+    pizza_types = data_center.pizza_types
+    groups = range(data_center.num_pizza_groups)
+    counts = np.asarray(counts, dtype=int)
+    assign = np.asarray(assign, dtype=int)
+    count_group = (counts[:, :, None] * assign).tolist()
+    assign = assign.tolist()
+
+    count_per_store_type = assortment_dict(data_center, counts)
+    count_per_store_type_group = {}
+    assign_store_type_group = {}
+    for row, store_id in enumerate(data_center.store_ids.tolist()):
+        count_per_store_type_group[store_id] = {
+            pizza_type: dict(zip(groups, count_group[row][col])) for col, pizza_type in enumerate(pizza_types)
+        }
+        assign_store_type_group[store_id] = {
+            pizza_type: dict(zip(groups, assign[row][col])) for col, pizza_type in enumerate(pizza_types)
+        }
+    levels = np.asarray(count_type_group, dtype=int).tolist()
+    count_per_type_group = {pizza_type: dict(zip(groups, row)) for pizza_type, row in zip(pizza_types, levels)}
+    return count_per_store_type, count_per_store_type_group, assign_store_type_group, count_per_type_group
@@ -0,0 +1,172 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, NamedTuple, Optional
+
+
+class Incumbent(NamedTuple):
+    """
+    an improving solution found while serving a request
+    """
+    objective: float
+    # best bound on the objective known when the solution was found, None if the backend reports none
+    bound: Optional[float]
+    # relative gap of the objective to the bound, None without a bound
+    gap: Optional[float]
+    # seconds since the request started
+    elapsed: float
+    # backend that found the solution
+    backend: Optional[str]
+
+
+# takes every improving incumbent of a request, e.g. to answer a caller early
+IncumbentCallback = Callable[[Incumbent], None]
+
+
+def relative_gap(objective: Optional[float], bound: Optional[float]) -> Optional[float]:
+    """
+    :return: relative gap of an objective to an upper bound, None if either is unknown
+    """
+    if objective is None or bound is None:
+        return None
+    return max(0.0, bound - objective) / max(abs(bound), 1e-9)
+
+
+class SolveControl:
+    """
+    this class carries the deadline, the target gap and the incumbent callback of one request down to the
+    optimizers. an optimizer looks up the control activated in its context with active_control(), so that the
+    backend factories do not need to know about it. an optimizer whose solver reports from its own threads, e.g.
+    a CP-SAT solution callback, looks the control up before the solve and keeps it
+    """
+
+    def __init__(self, deadline: float = None, target_gap: float = None, on_incumbent: IncumbentCallback = None):
+        """
+        constructor
+        :param deadline: max. seconds from now to answer the request, no deadline if None
+        :param target_gap: relative gap at which a backend may stop searching, the backend default if None
+        :param on_incumbent: called with every improving incumbent
+        """
+        self._start = time.perf_counter()
+        self._deadline = deadline
+        self._target_gap = target_gap
+        self._on_incumbent = on_incumbent
+        # backend that is solving the request
+        self.backend: str = None
+        self._best: Optional[Incumbent] = None
+        # solver threads report concurrently
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """
+        make the control the one of the optimizers run in the context
+        """
+        token = _active_control.set(self)
+        try:
+            yield self
+        finally:
+            _active_control.reset(token)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def remaining(self) -> Optional[float]:
+        """
+        :return: seconds left until the deadline, None without a deadline
+        """
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - self.elapsed())
+
+    def time_limit(self, time_limit: Optional[float]) -> Optional[float]:
+        """
+        :param time_limit: time limit of a backend in seconds, no limit if None
+        :return: the time limit cut to the time left until the deadline
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return time_limit
+        return remaining if time_limit is None else min(time_limit, remaining)
+
+    def gap_reached(self, objective: Optional[float], bound: Optional[float]) -> bool:
+        """
+        :return: True if a solution is within the target gap of the bound, so that the search may stop
+        """
+        gap = relative_gap(objective, bound)
+        return self._target_gap is not None and gap is not None and gap <= self._target_gap
+
+    def report(self, objective: Optional[float], bound: Optional[float] = None) -> None:
+        """
+        pass a solution to the incumbent callback if it improves on the best one of the request
+        :param objective: objective of the solution
+        :param bound: best bound known, None if unknown
+        """
+        if objective is None:
+            return
+        with self._lock:
+            if self._best is not None and objective <= self._best.objective:
+                return
+            self._best = Incumbent(float(objective), None if bound is None else float(bound),
+                                   relative_gap(objective, bound), self.elapsed(), self.backend)
+            incumbent = self._best
+        logging.info(f"incumbent: {incumbent.objective}, bound: {incumbent.bound}, "
+                     f"elapsed: {incumbent.elapsed:.3f} seconds, backend: {incumbent.backend}")
+        if self._on_incumbent is None:
+            return
+        try:
+            self._on_incumbent(incumbent)
+        except Exception as ex:
+            logging.warning(f"incumbent callback raised {type(ex).__name__}: {ex}")
+
+    @property
+    def deadline(self) -> Optional[float]:
+        return self._deadline
+
+    @property
+    def target_gap(self) -> Optional[float]:
+        return self._target_gap
+
+    @property
+    def best(self) -> Optional[Incumbent]:
+        return self._best
+
+
+# control of the running request, None if the request has no deadline, target gap or incumbent callback
+_active_control: ContextVar[Optional[SolveControl]] = ContextVar('active_control', default=None)
+
+
+def active_control() -> Optional[SolveControl]:
+    return _active_control.get()
+
+
+def report_incumbent(objective: Optional[float], bound: Optional[float] = None) -> None:
+    """
+    pass a solution to the control of the running request, if any
+    """
+    control = _active_control.get()
+    if control is not None:
+        control.report(objective, bound)
+
+
+def target_gap() -> Optional[float]:
+    """
+    :return: target gap of the running request, None if it has none
+    """
+    control = _active_control.get()
+    return None if control is None else control.target_gap
+
+
+def remaining_time(time_limit: Optional[float], start: float) -> Optional[float]:
+    """
+    :param time_limit: time limit of a backend in seconds, no limit if None
+    :param start: time.perf_counter() at which the backend started
+    :return: seconds left of the time limit, cut to the time left until the deadline of the running request, None
+    without either
+    """
+    if time_limit is not None:
+        time_limit = max(0.0, time_limit - (time.perf_counter() - start))
+    control = _active_control.get()
+    return time_limit if control is None else control.time_limit(time_limit)
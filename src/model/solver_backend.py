@@ -0,0 +1,191 @@
+from typing import Callable, Dict, List
+
+from src.model.cvxpy_solvers import MI_CONIC_SOLVERS, OPEN_SOURCE_MI_SOLVERS
+
+# the optimizers and their solvers are imported by the factories below, so that registering the backends, e.g. on
+# importing OptService, does not load cvxpy or OR-Tools. only the backend that solves a request loads its solver
+
+# solvers of PizzaAssortmentOptimizerWtGroupOrtools.SOLVERS, repeated here to register the backends without
+# importing OR-Tools
+_ORTOOLS_SOLVERS = ("CP-SAT", "SCIP")
+
+
+class SolverBackend:
+    """
+    this class defines a named way to solve model 1 and / or model 2, it creates a fresh optimizer for every solve
+    """
+
+    def __init__(self, name: str, create_model1: Callable = None, create_model2: Callable = None,
+                 is_available: Callable[[], bool] = None):
+        """
+        constructor
+        :param name: backend name
+        :param create_model1: (time limit, thread cap) -> model 1 optimizer, None if the backend cannot solve model 1
+        :param create_model2: (time limit, thread cap) -> model 2 optimizer, None if the backend cannot solve model 2
+        :param is_available: tells if the backend can run in this environment, e.g. if its solver is installed
+        """
+        self._name = name
+        self._create_model1 = create_model1
+        self._create_model2 = create_model2
+        self._is_available = is_available
+
+    def supports(self, enable_group_constraint: bool) -> bool:
+        """
+        check if the backend can solve a model
+        :param enable_group_constraint: True for model 2, False for model 1
+        :return: True if supported
+        """
+        if enable_group_constraint:
+            return self._create_model2 is not None
+        return self._create_model1 is not None
+
+    def is_available(self) -> bool:
+        return self._is_available is None or self._is_available()
+
+    def create_optimizer(self, enable_group_constraint: bool, time_limit: float = None, num_threads: int = None):
+        """
+        create an optimizer
+        :param enable_group_constraint: True for model 2, False for model 1
+        :param time_limit: max. solve time in seconds, no limit if None
+        :param num_threads: max. number of solver threads, the solver default if None
+        :return: optimizer
+        """
+        if not self.supports(enable_group_constraint):
+            raise ValueError(f"backend {self._name} cannot solve model {2 if enable_group_constraint else 1}")
+        if enable_group_constraint:
+            return self._create_model2(time_limit, num_threads)
+        return self._create_model1(time_limit, num_threads)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+# backend name -> backend
+_BACKENDS: Dict[str, SolverBackend] = {}
+
+
+def register_backend(backend: SolverBackend) -> None:
+    """
+    add a backend to the registry, replacing any backend of the same name
+    :param backend: solver backend
+    :return:
+    """
+    _BACKENDS[backend.name] = backend
+
+
+def get_backend(name: str) -> SolverBackend:
+    """
+    look up a registered backend
+    :param name: backend name
+    :return: solver backend
+    """
+    if name not in _BACKENDS:
+        raise ValueError(f"unknown solver backend: {name}")
+    return _BACKENDS[name]
+
+
+def backend_names(enable_group_constraint: bool = None, available_only: bool = False) -> List[str]:
+    """
+    list the registered backends
+    :param enable_group_constraint: only the backends solving model 2 if True, model 1 if False, all if None
+    :param available_only: only the backends that can run in this environment if True
+    :return: backend names
+    """
+    return [
+        name for name, backend in _BACKENDS.items()
+        if (enable_group_constraint is None or backend.supports(enable_group_constraint))
+        and (not available_only or backend.is_available())
+    ]
+
+
+def _cvxpy_backend(solver: str) -> SolverBackend:
+    def create_model1(time_limit, num_threads):
+        from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
+        return PizzaAssortmentOptimizer(solver=solver, time_limit=time_limit, num_threads=num_threads)
+
+    def create_model2(time_limit, num_threads):
+        from src.model.pizza_assortment_optimizer_group import PizzaAssortmentOptimizerWtGroup
+        return PizzaAssortmentOptimizerWtGroup(solver=solver, time_limit=time_limit, num_threads=num_threads)
+
+    def is_available():
+        import cvxpy as cpy
+        return solver in cpy.installed_solvers()
+
+    return SolverBackend(f"cvxpy-{solver}", create_model1=create_model1, create_model2=create_model2,
+                         is_available=is_available)
+
+
+def _ortools_backend(solver: str) -> SolverBackend:
+    def create_model2(time_limit, num_threads):
+        from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+        kwargs = {}
+        if time_limit is not None:
+            kwargs['time_limit'] = time_limit
+        if num_threads is not None:
+            kwargs['num_workers'] = num_threads
+        return PizzaAssortmentOptimizerWtGroupOrtools(solver, **kwargs)
+
+    return SolverBackend(f"ortools-{solver}", create_model2=create_model2)
+
+
+def _decomposition_backend() -> SolverBackend:
+    def create_model2(time_limit, num_threads):
+        from src.model.pizza_assortment_optimizer_group_decomposition import \
+            PizzaAssortmentOptimizerWtGroupDecomposition
+        kwargs = {}
+        if time_limit is not None:
+            kwargs['time_limit'] = time_limit
+        if num_threads is not None:
+            kwargs['num_workers'] = num_threads
+        return PizzaAssortmentOptimizerWtGroupDecomposition(**kwargs)
+
+    return SolverBackend("decomposition", create_model2=create_model2)
+
+
+def _lns_backend() -> SolverBackend:
+    def create_model2(time_limit, num_threads):
+        from src.model.pizza_assortment_optimizer_group_lns import PizzaAssortmentOptimizerWtGroupLns
+        kwargs = {}
+        if time_limit is not None:
+            kwargs['time_limit'] = time_limit
+        if num_threads is not None:
+            kwargs['num_workers'] = num_threads
+        return PizzaAssortmentOptimizerWtGroupLns(**kwargs)
+
+    return SolverBackend("lns", create_model2=create_model2)
+
+
+def _knapsack_optimizer(time_limit, num_threads):
+    from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+    return PizzaAssortmentOptimizerKnapsack(time_limit=time_limit)
+
+
+def _lagrangian_optimizer(time_limit, num_threads):
+    from src.model.pizza_assortment_optimizer_lagrangian import PizzaAssortmentOptimizerLagrangian
+    return PizzaAssortmentOptimizerLagrangian(time_limit=time_limit)
+
+
+def _heuristic_optimizer(time_limit, num_threads):
+    from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+    return PizzaAssortmentOptimizerWtGroupHeuristic(time_limit=time_limit)
+
+
+def _register_default_backends():
+    # the knapsack engine is exact and single-threaded, at its time limit it answers its best solution and bound
+    register_backend(SolverBackend("knapsack", create_model1=_knapsack_optimizer))
+    # the Lagrangian decomposition of model 1 answers very large chains in seconds with a reported gap
+    register_backend(SolverBackend("lagrangian", create_model1=_lagrangian_optimizer))
+    for solver in MI_CONIC_SOLVERS + OPEN_SOURCE_MI_SOLVERS:
+        register_backend(_cvxpy_backend(solver))
+    for solver in _ORTOOLS_SOLVERS:
+        register_backend(_ortools_backend(solver))
+    # the constructive heuristic of model 2 answers fast with a reported gap and is single-threaded
+    register_backend(SolverBackend("heuristic", create_model2=_heuristic_optimizer))
+    # the large neighbourhood search of model 2 improves on the heuristic until its time limit
+    register_backend(_lns_backend())
+    # the decomposition over the pizza types of model 2 tightens the bound of the heuristic, in worker processes
+    register_backend(_decomposition_backend())
+
+
+_register_default_backends()
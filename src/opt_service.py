@@ -1,62 +1,747 @@
+import numpy as np
 import pandas as pd
+import asyncio
+import functools
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from src.common.data_center import DataCenter
-from src.processor.input_processor import InputProcessor
+from src.processor.input_processor import InputProcessor, PizzaData
 from src.processor.output_processor import OutputProcessor
+from src.utils.metrics import Metrics, MetricsSink, record, timed
+from src.utils.solution_cache import SolutionCache, solution_key
 from src.utils.validator import Validator
-from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
-from src.model.pizza_assortment_optimizer_group import PizzaAssortmentOptimizerWtGroup
+from src.model.presolve import PresolvedOptimizer
+from src.model.solve_control import IncumbentCallback, SolveControl, relative_gap
+from src.model.solver_backend import get_backend
 
-logging.basicConfig(level=logging.INFO)
+
+class OptResult(NamedTuple):
+    """
+    result of OptService.optimize_anytime()
+    """
+    # (store x pizza type) count table, see OptService.optimize()
+    assortment: pd.DataFrame
+    # "optimal" if the assortment is proven optimal, "best_found" if it is the best one found within the deadline
+    # or the target gap, "failed" if no backend found a valid assortment
+    status: str
+    objective: Optional[float]
+    # best bound on the objective, None if the backend reports none
+    bound: Optional[float]
+    # relative gap of the objective to the bound, None without a bound
+    gap: Optional[float]
+    # backend that found the assortment
+    backend: Optional[str]
+    # seconds from the start of the request to the answer
+    elapsed: float
+    errors: Dict
+
+    @property
+    def is_optimal(self) -> bool:
+        return self.status == "optimal"
+
+
+class _Call:
+    """
+    this class keeps the state of one optimize() or reoptimize() call apart from the service, so that concurrent
+    calls on one service do not overwrite each other. the service publishes the state of a call once it completes
+    """
+
+    def __init__(self, cancel_event: threading.Event = None, control: SolveControl = None):
+        """
+        constructor
+        :param cancel_event: set to cancel the call, it then stops before the next backend of the fallback chain
+        :param control: deadline, target gap and incumbent callback of the call, none if None
+        """
+        self.cancel_event = cancel_event
+        self.control = control
+        self.validator: Validator = None
+        # name of the backend that produced the assortment
+        self.backend: str = None
+        # optimizer of the last backend run by _solve()
+        self.optimizer = None
+        # (data center, enable_group_constraint, backends, time limits, optimizer) of the solved instance
+        self.last_solve: Tuple = None
+        # (data center, (store x pizza type) counts, (store x pizza type) groups or None) of a valid result
+        self.result: Tuple = None
+        # status, objective, best bound, gap and node count of the backend run that produced the assortment
+        self.solver_stats: Dict = {}
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
 
 
 class OptService:
     """
-    this class defines an optimization interface that provides service to solve the pizza assortment problem
+    this class defines an optimization interface that provides service to solve the pizza assortment problem.
+
+    a service can be shared by threads: every call keeps its model and solver state to itself, and result_table(),
+    backend and reoptimize() refer to the last completed call
     """
 
-    def __init__(self):
+    # default solver backends of model 1 and model 2, tried in order until one returns a valid assortment
+    MODEL1_BACKENDS = ("knapsack", "cvxpy-MOSEK", "cvxpy-HIGHS")
+    MODEL2_BACKENDS = ("cvxpy-MOSEK", "ortools-CP-SAT", "cvxpy-HIGHS", "heuristic")
+    # max. solve time in seconds of a backend without its own time limit
+    DEFAULT_TIME_LIMIT = 20.0
+    # max. share of changed stores that reoptimize() re-optimizes incrementally, a larger change is solved from scratch
+    MAX_REOPTIMIZE_SHARE = 0.2
+    # max. relative gap of an assortment that optimize_anytime() reports as optimal, the default relative MIP gap
+    # of the solvers
+    OPTIMAL_GAP = 1e-4
+
+    def __init__(self, model1_backends: Union[str, Sequence[str]] = MODEL1_BACKENDS,
+                 model2_backends: Union[str, Sequence[str]] = MODEL2_BACKENDS,
+                 time_limits: Dict[str, float] = None, num_threads: int = None,
+                 solution_cache: SolutionCache = None, metrics_sink: MetricsSink = None,
+                 max_concurrency: int = None, presolve: bool = False):
+        """
+        constructor
+        :param model1_backends: backend name or ordered fallback chain of backend names to solve model 1
+        :param model2_backends: backend name or ordered fallback chain of backend names to solve model 2
+        :param time_limits: backend name -> max. solve time in seconds
+        :param num_threads: max. number of solver threads, the solver defaults if None
+        :param solution_cache: cache answering a resubmitted input without solving it again, no caching if None
+        :param metrics_sink: takes the report of every optimize() and reoptimize() call, e.g. logging_sink
+        :param max_concurrency: max. number of optimize_async() calls solved at once, the number of cpus if None
+        :param presolve: solve model 1 on the presolved instance if True, see PresolvedOptimizer: the store-type
+        pairs that cannot make a profit are fixed to 0 and identical stores are solved as one
+        """
         logging.info("OptService constructor starts.")
         # parse inputs
         self._input_processor = InputProcessor()
-        # model 1 optimizer
-        self._pizza_assortment_optimizer = PizzaAssortmentOptimizer()
-        # model 2 optimizer
-        self._pizza_assortment_optimizer_wt_group = PizzaAssortmentOptimizerWtGroup()
-        # result validator
-        self._validator = None
+        # solver backends of model 1 and model 2
+        self._model1_backends = self._check_backends(model1_backends, False)
+        self._model2_backends = self._check_backends(model2_backends, True)
+        self._time_limits = dict(time_limits or {})
+        self._num_threads = num_threads
+        self._solution_cache = solution_cache
+        self._metrics_sink = metrics_sink
+        self._max_concurrency = max_concurrency or os.cpu_count() or 1
+        self._presolve = presolve
+        # threads of optimize_async(), created on first use
+        self._executor: ThreadPoolExecutor = None
+        # guards the state of the last completed call below and the executor
+        self._lock = threading.Lock()
+        # one reoptimize() at a time, it changes the optimizer of the last solve
+        self._reoptimize_lock = threading.Lock()
+        # name of the backend that produced the last assortment
+        self._backend: str = None
+        # (data center, enable_group_constraint, backends, time limits, optimizer) of the last solved instance,
+        # the optimizer is None if the solution came from the cache
+        self._last_solve: Tuple = None
+        # (data center, (store x pizza type) counts, (store x pizza type) groups or None) of the last valid result
+        self._result: Tuple = None
+        # optimal assortment per budget of the last budget frontier
+        self._frontier_assortments: List[pd.DataFrame] = []
         # process output
         self._output_processor = OutputProcessor()
         logging.info("OptService constructor completes.")
 
-    def optimize(self, pizza_data: pd.DataFrame, enable_group_constraint: bool):
+    @staticmethod
+    def _check_backends(backends: Union[str, Sequence[str]], enable_group_constraint: bool):
+        backends = (backends,) if isinstance(backends, str) else tuple(backends)
+        if len(backends) == 0:
+            raise ValueError("no solver backend given")
+        for name in backends:
+            if not get_backend(name).supports(enable_group_constraint):
+                raise ValueError(f"backend {name} cannot solve model {2 if enable_group_constraint else 1}")
+        return backends
+
+    def optimize(self, pizza_data: PizzaData, enable_group_constraint: bool,
+                 backends: Union[str, Sequence[str]] = None, time_limits: Dict[str, float] = None,
+                 return_report: bool = False):
         """
         the optimization interface
-        :param pizza_data: input data
+        :param pizza_data: input data, a data frame, a path to a csv, Parquet or Arrow file, an Arrow table or an
+        iterable of chunks, see InputProcessor.process()
         :param enable_group_constraint: a boolean variable indicating whether to consider the group constraints
+        :param backends: backend name or fallback chain for this call, the chain of the service if None
+        :param time_limits: backend name -> max. solve time in seconds for this call, on top of the service ones
+        :param return_report: also return the report of the call if True, see _report()
+        :return: result, error message if any, report if return_report
+        """
+        return self._run_optimize(_Call(), pizza_data, enable_group_constraint, backends, time_limits,
+                                  return_report)
+
+    async def optimize_async(self, pizza_data: PizzaData, enable_group_constraint: bool,
+                             backends: Union[str, Sequence[str]] = None, time_limits: Dict[str, float] = None,
+                             return_report: bool = False):
+        """
+        optimize() off the event loop, on a pool of max_concurrency threads, calls beyond it wait for a free
+        thread. cancelling the awaiting task drops a waiting call, and stops a running one before the next backend
+        of its fallback chain, its result is then not kept as the last result of the service
+        :return: see optimize()
+        """
+        loop = asyncio.get_running_loop()
+        call = _Call(threading.Event())
+        task = functools.partial(self._run_optimize, call, pizza_data, enable_group_constraint, backends,
+                                 time_limits, return_report)
+        try:
+            return await loop.run_in_executor(self._thread_pool(), task)
+        except asyncio.CancelledError:
+            call.cancel_event.set()
+            raise
+
+    def optimize_anytime(self, pizza_data: PizzaData, enable_group_constraint: bool, deadline: float = None,
+                         target_gap: float = None, on_incumbent: IncumbentCallback = None,
+                         backends: Union[str, Sequence[str]] = None,
+                         time_limits: Dict[str, float] = None) -> OptResult:
+        """
+        optimize() within a deadline, answering the best assortment found by then. the time limit of every backend
+        of the fallback chain is cut to the time left, the knapsack engine, the Lagrangian decomposition and the
+        heuristic then answer their best solution and bound found by the deadline
+        :param pizza_data: input data, see optimize()
+        :param enable_group_constraint: a boolean variable indicating whether to consider the group constraints
+        :param deadline: max. seconds to answer, no deadline if None
+        :param target_gap: relative gap at which the backends may stop searching, e.g. 0.01, the backend defaults
+        if None
+        :param on_incumbent: called with every improving solution (objective, bound, gap, elapsed seconds,
+        backend), from the solver threads for CP-SAT
+        :param backends: backend name or fallback chain for this call, the chain of the service if None
+        :param time_limits: backend name -> max. solve time in seconds for this call, on top of the service ones
+        :return: result, marked optimal or best found
+        """
+        call = _Call(control=SolveControl(deadline, target_gap, on_incumbent))
+        assortment, error_msg = self._run_optimize(call, pizza_data, enable_group_constraint, backends, time_limits,
+                                                   False)
+        stats = call.solver_stats
+        return OptResult(assortment, self._result_status(call, error_msg), stats.get('objective'),
+                         stats.get('best_bound'), stats.get('gap'), call.backend, call.control.elapsed(), error_msg)
+
+    def _result_status(self, call: _Call, error_msg: Dict) -> str:
+        """
+        :return: "optimal" if the backend proved the assortment of a call optimal, "best_found" if not, "failed" if
+        the call found no valid assortment
+        """
+        if len(error_msg) > 0 or call.result is None:
+            return "failed"
+        gap = call.solver_stats.get('gap')
+        if gap is not None:
+            return "optimal" if gap <= self.OPTIMAL_GAP else "best_found"
+        # a solver without a bound stops at its own gap, which is as good as optimal unless it was widened
+        target_gap = None if call.control is None else call.control.target_gap
+        if call.solver_stats.get('status') == "optimal" and (target_gap is None or target_gap <= self.OPTIMAL_GAP):
+            return "optimal"
+        return "best_found"
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._max_concurrency, thread_name_prefix="OptService")
+            return self._executor
+
+    def close(self) -> None:
+        """
+        shut down the threads of optimize_async(), they are created again on its next call
         :return:
         """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _run_optimize(self, call: _Call, pizza_data: PizzaData, enable_group_constraint: bool,
+                      backends: Union[str, Sequence[str]], time_limits: Dict[str, float], return_report: bool):
         logging.info("OptService optimize() starts.")
+        metrics, start = Metrics(), time.perf_counter()
+        with metrics.activate(), (nullcontext() if call.control is None else call.control.activate()):
+            result, error_msg = self._optimize(call, pizza_data, enable_group_constraint, backends, time_limits)
+        self._publish(call)
+        report = self._report("optimize", call, metrics, start, enable_group_constraint, error_msg)
+        logging.info("OptService optimize() completes.")
+        return (result, error_msg, report) if return_report else (result, error_msg)
+
+    def _publish(self, call: _Call) -> None:
+        """
+        keep the state of a completed call as the last one of the service, unless the call was cancelled
+        """
+        if call.cancelled:
+            return
+        with self._lock:
+            self._backend, self._last_solve, self._result = call.backend, call.last_solve, call.result
+
+    def _optimize(self, call: _Call, pizza_data: PizzaData, enable_group_constraint: bool,
+                  backends: Union[str, Sequence[str]], time_limits: Dict[str, float]):
         # process input for optimizer use
+        with timed("input"):
+            data_center: DataCenter = self._input_processor.process(pizza_data)
+        record(num_stores=data_center.num_stores)
+        call.validator = Validator(data_center)
+
+        if backends is None:
+            backends = self._model2_backends if enable_group_constraint else self._model1_backends
+        else:
+            backends = self._check_backends(backends, enable_group_constraint)
+        time_limits = {**self._time_limits, **(time_limits or {})}
+
+        key = None
+        if self._solution_cache is not None:
+            with timed("cache"):
+                key = solution_key(data_center, enable_group_constraint, backends, self._presolve,
+                                   {name: time_limits.get(name, self.DEFAULT_TIME_LIMIT) for name in backends})
+                solution = self._solution_cache.get(key)
+            record(cache_hit=solution is not None)
+            if solution is not None:
+                logging.info(f"answer from the solution cache, found by backend {solution['backend']}.")
+                call.backend = solution['backend']
+                call.solver_stats = solution.get('stats', {})
+                if call.control is not None:
+                    call.control.backend = call.backend
+                    call.control.report(call.solver_stats.get('objective'), call.solver_stats.get('best_bound'))
+                call.last_solve = (data_center, enable_group_constraint, backends, time_limits, None)
+                call.result = (data_center, call.validator.count_matrix(solution['assortment']),
+                               self._cached_groups(data_center, solution.get('groups')))
+                with timed("output"):
+                    return self._output_processor.process(solution['assortment']), {}
+
+        optimal_assortment, error_msg = self._solve_chain(call, data_center, enable_group_constraint, backends,
+                                                          time_limits)
+        # the best assortment found within a deadline or a target gap would stand in for the optimal one
+        if len(error_msg) < 1 and key is not None and (call.control is None or
+                                                       self._result_status(call, error_msg) == "optimal"):
+            solution = {'assortment': optimal_assortment, 'backend': call.backend, 'stats': call.solver_stats}
+            if call.result[2] is not None:
+                solution['groups'] = dict(zip(data_center.store_ids.tolist(), call.result[2].tolist()))
+            self._solution_cache.put(key, solution)
+
+        with timed("output"):
+            return self._count_table(call, optimal_assortment), error_msg
+
+    def reoptimize(self, changed_data: PizzaData = None, removed_stores: Sequence = (), return_report: bool = False):
+        """
+        re-optimize the last instance of optimize() or reoptimize() after a few stores changed, were added or were
+        removed. the optimizer of the last solve re-optimizes only what the change affects if it supports it: the
+        knapsack engine reuses the store frontiers and the budget multiplier, the heuristic keeps the groups of the
+        unchanged stores. otherwise, or if the change is too large to reuse the last solve, the instance is solved
+        from scratch by the fallback chain of the last solve
+        :param changed_data: input data of the changed and added stores, one row per store and pizza type
+        :param removed_stores: identifiers of the removed stores
+        :param return_report: also return the report of the call if True, see _report()
+        :return: result of the changed instance, error message if any, report if return_report
+        """
+        logging.info("OptService reoptimize() starts.")
+        with self._reoptimize_lock:
+            with self._lock:
+                backend, last_solve = self._backend, self._last_solve
+            if last_solve is None:
+                raise ValueError("no solved instance to re-optimize, call optimize() first")
+            call = _Call()
+            call.backend = backend
+            metrics, start = Metrics(), time.perf_counter()
+            with metrics.activate():
+                result, error_msg = self._reoptimize_delta(call, last_solve, changed_data, removed_stores)
+            self._publish(call)
+        report = self._report("reoptimize", call, metrics, start, last_solve[1], error_msg)
+        logging.info("OptService reoptimize() completes.")
+        return (result, error_msg, report) if return_report else (result, error_msg)
+
+    def _reoptimize_delta(self, call: _Call, last_solve: Tuple, changed_data: PizzaData, removed_stores: Sequence):
+        data_center, enable_group_constraint, backends, time_limits, optimizer = last_solve
+        changed = None
+        with timed("input"):
+            if changed_data is not None and not (isinstance(changed_data, pd.DataFrame) and changed_data.empty):
+                changed = self._input_processor.process(changed_data)
+            data_center, previous_rows = data_center.with_delta(changed, removed_stores)
+        record(num_stores=data_center.num_stores)
+        call.validator = Validator(data_center)
+
+        num_changed = int((previous_rows < 0).sum())
+        error_msg = {'reoptimize': f"backend {call.backend} cannot re-optimize"}
+        if num_changed > self.MAX_REOPTIMIZE_SHARE * data_center.num_stores:
+            error_msg = {'reoptimize': f"{num_changed} of {data_center.num_stores} stores changed"}
+        elif optimizer is not None and hasattr(optimizer, 'reoptimize'):
+            optimal_assortment, error_msg = self._reoptimize(call, optimizer, data_center, previous_rows,
+                                                             enable_group_constraint)
+        if len(error_msg) < 1:
+            call.last_solve = (data_center, enable_group_constraint, backends, time_limits, optimizer)
+            call.result = (data_center, *self._result_matrices(call, optimizer, optimal_assortment,
+                                                               enable_group_constraint))
+        else:
+            logging.info(f"solve from scratch, {error_msg}")
+            optimal_assortment, error_msg = self._solve_chain(call, data_center, enable_group_constraint, backends,
+                                                              time_limits)
+
+        with timed("output"):
+            return self._count_table(call, optimal_assortment), error_msg
+
+    def _reoptimize(self, call: _Call, optimizer, data_center: DataCenter, previous_rows,
+                    enable_group_constraint: bool):
+        """
+        re-optimize with the optimizer of the last solve and validate its assortment
+        :return: assortment, error message if any
+        """
+        start = time.perf_counter()
+        try:
+            with timed(f"backend.{call.backend}"):
+                optimizer.reoptimize(data_center, previous_rows)
+        except Exception as ex:
+            return {}, {'backend': f"backend {call.backend} raised {type(ex).__name__}: {ex}"}
+        call.solver_stats = self._solver_stats(optimizer)
+        record(**call.solver_stats)
+        optimal_assortment = optimizer.optimal_assortment
+        if len(optimal_assortment) != data_center.num_stores:
+            return optimal_assortment, {'backend': f"backend {call.backend} found no solution"}
+        with timed("validate"):
+            if enable_group_constraint:
+                error_msg = call.validator.validate_model2_solution(optimal_assortment,
+                                                                    optimizer.optimal_assign_store_type_group)
+            else:
+                error_msg = call.validator.validate_model1_solution(optimal_assortment)
+        logging.info(f"re-optimize {int((previous_rows < 0).sum())} changed stores with backend {call.backend} "
+                     f"in {time.perf_counter() - start:.3f} seconds.")
+        return optimal_assortment, error_msg
+
+    def _solve_chain(self, call: _Call, data_center: DataCenter, enable_group_constraint: bool,
+                     backends: Sequence[str], time_limits: Dict[str, float]):
+        """
+        solve a model with the backends of a fallback chain until one returns a valid assortment
+        :return: assortment, error message if no backend succeeded
+        """
+        optimal_assortment, error_msg = {}, {}
+        call.backend = None
+        call.last_solve = None
+        call.result = None
+        for name in backends:
+            if call.cancelled:
+                optimal_assortment, error_msg = {}, {'task': "cancelled"}
+                break
+            time_limit = time_limits.get(name, self.DEFAULT_TIME_LIMIT)
+            if call.control is not None:
+                if call.control.remaining() == 0:
+                    optimal_assortment, error_msg = {}, {'deadline': f"no valid assortment within "
+                                                                     f"{call.control.deadline} seconds"}
+                    break
+                time_limit = call.control.time_limit(time_limit)
+                call.control.backend = name
+            optimal_assortment, error_msg = self._solve(call, data_center, enable_group_constraint, name,
+                                                        time_limit)
+            if len(error_msg) < 1:
+                if call.control is not None:
+                    call.control.report(call.solver_stats['objective'], call.solver_stats['best_bound'])
+                call.backend = name
+                call.last_solve = (data_center, enable_group_constraint, backends, time_limits, call.optimizer)
+                call.result = (data_center, *self._result_matrices(call, call.optimizer, optimal_assortment,
+                                                                   enable_group_constraint))
+                break
+            logging.warning(f"backend {name} failed, {error_msg}")
+
+        if len(error_msg) > 0:
+            logging.error(error_msg)
+        return optimal_assortment, error_msg
+
+    def optimize_frontier(self, pizza_data: PizzaData, enable_group_constraint: bool, budgets: Sequence[float],
+                          backends: Union[str, Sequence[str]] = None, time_limits: Dict[str, float] = None):
+        """
+        solve the problem for a range of budgets with the first backend of the fallback chain that supports budget
+        frontiers and finds a valid assortment for every budget
+        :param pizza_data: input data
+        :param enable_group_constraint: a boolean variable indicating whether to consider the group constraints
+        :param budgets: budgets across the chain
+        :param backends: backend name or fallback chain for this call, the chain of the service if None
+        :param time_limits: backend name -> max. solve time in seconds per budget, on top of the service ones
+        :return: max. profit per budget, error message if any. the assortment per budget is kept in
+        frontier_assortments
+        """
+        logging.info("OptService optimize_frontier() starts.")
         data_center: DataCenter = self._input_processor.process(pizza_data)
-        self._validator = Validator(data_center)
-
-        if enable_group_constraint:
-            # solve model 2
-            self._pizza_assortment_optimizer_wt_group.optimize(data_center)
-            optimal_assortment = self._pizza_assortment_optimizer_wt_group.optimal_assortment
-            group_assignment = self._pizza_assortment_optimizer_wt_group.optimal_assign_store_type_group
-            error_msg = self._validator.validate_model2_solution(optimal_assortment, group_assignment)
+        if backends is None:
+            backends = self._model2_backends if enable_group_constraint else self._model1_backends
         else:
-            # solve model 1
-            self._pizza_assortment_optimizer.optimize(data_center)
-            optimal_assortment = self._pizza_assortment_optimizer.optimal_assortment
-            error_msg = self._validator.validate_model1_solution(optimal_assortment)
+            backends = self._check_backends(backends, enable_group_constraint)
+        time_limits = {**self._time_limits, **(time_limits or {})}
+
+        profits, assortments, error_msg = [], [], {}
+        frontier_backend = None
+        for name in backends:
+            profits, assortments, error_msg = self._solve_frontier(data_center, enable_group_constraint, budgets,
+                                                                   name, time_limits.get(name, self.DEFAULT_TIME_LIMIT))
+            if len(error_msg) < 1:
+                frontier_backend = name
+                break
+            logging.warning(f"backend {name} failed, {error_msg}")
 
         if len(error_msg) > 0:
             logging.error(error_msg)
+            profits, assortments = [float('nan')] * len(budgets), [{}] * len(budgets)
 
-        result = self._output_processor.process(optimal_assortment)
-        logging.info("OptService optimize() completes.")
-        return result, error_msg
+        frontier_assortments = [self._output_processor.process(assortment) for assortment in assortments]
+        with self._lock:
+            self._backend, self._frontier_assortments = frontier_backend, frontier_assortments
+        frontier = pd.DataFrame({'profit': profits}, index=pd.Index(budgets, name='budget'))
+        logging.info("OptService optimize_frontier() completes.")
+        return frontier, error_msg
+
+    def _solve_frontier(self, data_center: DataCenter, enable_group_constraint: bool, budgets: Sequence[float],
+                        name: str, time_limit: float):
+        """
+        solve the budget frontier with one backend and validate its assortment of every budget
+        :return: max. profit per budget, assortment per budget, error message if any
+        """
+        logging.info(f"solve the budget frontier of model {2 if enable_group_constraint else 1} with backend "
+                     f"{name}, time limit: {time_limit} seconds per budget.")
+        backend = get_backend(name)
+        if not backend.is_available():
+            return [], [], {'backend': f"backend {name} is not available"}
+        optimizer = backend.create_optimizer(enable_group_constraint, time_limit, self._num_threads)
+        if not hasattr(optimizer, 'optimize_frontier'):
+            return [], [], {'backend': f"backend {name} does not support budget frontiers"}
+        try:
+            profits = optimizer.optimize_frontier(data_center, budgets)
+        except Exception as ex:
+            return [], [], {'backend': f"backend {name} raised {type(ex).__name__}: {ex}"}
+
+        assortments = optimizer.frontier_assortments
+        for index, budget in enumerate(budgets):
+            if len(assortments[index]) != data_center.num_stores:
+                return [], [], {'backend': f"backend {name} found no solution for budget {budget}"}
+            validator = Validator(data_center.with_max_budget(budget))
+            if enable_group_constraint:
+                error_msg = validator.validate_model2_solution(assortments[index],
+                                                               optimizer.frontier_assign_store_type_group[index])
+            else:
+                error_msg = validator.validate_model1_solution(assortments[index])
+            if len(error_msg) > 0:
+                return [], [], error_msg
+        return list(profits), assortments, {}
+
+    def optimize_many(self, pizza_data_list: Sequence[PizzaData], enable_group_constraint: bool,
+                      backends: Union[str, Sequence[str]] = None, time_limits: Dict[str, float] = None,
+                      max_workers: int = None, num_threads: int = 1,
+                      deadline: float = None) -> List[Tuple[pd.DataFrame, Dict]]:
+        """
+        solve independent instances, e.g. one per region, week or scenario, over a pool of worker processes. the
+        metrics sink of the service takes the report of every instance, in the worker process that solved it, so
+        it must be picklable, e.g. logging_sink. the solution cache of the service is only used if the instances
+        are solved in this process, the worker processes do not share it
+        :param pizza_data_list: input data of every instance
+        :param enable_group_constraint: a boolean variable indicating whether to consider the group constraints
+        :param backends: backend name or fallback chain for every instance, the chain of the service if None
+        :param time_limits: backend name -> max. solve time in seconds of every instance, on top of the service ones
+        :param max_workers: number of worker processes, the number of cpus // num_threads if None. the instances
+        are solved one after another in this process if 1
+        :param num_threads: max. number of solver threads per worker, which keeps the workers from oversubscribing
+        the cpus, the service setting if None
+        :param deadline: max. seconds to solve every instance, from the start of its solve, see optimize_anytime().
+        an instance is then answered by the best assortment found, no deadline if None
+        :return: (result, error message) of every instance, in input order
+        """
+        if backends is None:
+            backends = self._model2_backends if enable_group_constraint else self._model1_backends
+        else:
+            backends = self._check_backends(backends, enable_group_constraint)
+        config = {'model1_backends': self._model1_backends, 'model2_backends': self._model2_backends,
+                  'time_limits': {**self._time_limits, **(time_limits or {})},
+                  'num_threads': self._num_threads if num_threads is None else num_threads,
+                  'metrics_sink': self._metrics_sink, 'presolve': self._presolve}
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 1) // (config['num_threads'] or 1))
+        max_workers = min(max_workers, len(pizza_data_list))
+        logging.info(f"OptService optimize_many() starts, {len(pizza_data_list)} instances, "
+                     f"{max_workers} workers.")
+
+        if max_workers <= 1:
+            service = OptService(solution_cache=self._solution_cache, **config)
+            return [_optimize_instance(service, pizza_data, enable_group_constraint, backends, deadline)
+                    for pizza_data in pizza_data_list]
+
+        results = []
+        with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(config,)) as executor:
+            futures = [executor.submit(_optimize_task, pizza_data, enable_group_constraint, backends, deadline)
+                       for pizza_data in pizza_data_list]
+            for index, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as ex:
+                    # the worker process died, e.g. it ran out of memory
+                    logging.error(f"instance {index} failed, {type(ex).__name__}: {ex}")
+                    results.append((self._output_processor.process({}),
+                                    {'task': f"worker raised {type(ex).__name__}: {ex}"}))
+        logging.info("OptService optimize_many() completes.")
+        return results
+
+    def _solve(self, call: _Call, data_center: DataCenter, enable_group_constraint: bool, name: str,
+               time_limit: float):
+        """
+        solve a model with one backend and validate its assortment
+        :return: assortment, error message if any
+        """
+        logging.info(f"solve model {2 if enable_group_constraint else 1} with backend {name}, "
+                     f"time limit: {time_limit} seconds.")
+        backend = get_backend(name)
+        if not backend.is_available():
+            return {}, {'backend': f"backend {name} is not available"}
+        optimizer = backend.create_optimizer(enable_group_constraint, time_limit, self._num_threads)
+        if self._presolve and not enable_group_constraint:
+            optimizer = PresolvedOptimizer(optimizer)
+        try:
+            with timed(f"backend.{name}"):
+                optimizer.optimize(data_center)
+        except Exception as ex:
+            return {}, {'backend': f"backend {name} raised {type(ex).__name__}: {ex}"}
+        call.optimizer = optimizer
+        call.solver_stats = self._solver_stats(optimizer)
+        record(**call.solver_stats)
+
+        optimal_assortment = optimizer.optimal_assortment
+        if len(optimal_assortment) != data_center.num_stores:
+            return optimal_assortment, {'backend': f"backend {name} found no solution"}
+        with timed("validate"):
+            if enable_group_constraint:
+                error_msg = call.validator.validate_model2_solution(optimal_assortment,
+                                                                    optimizer.optimal_assign_store_type_group)
+            else:
+                error_msg = call.validator.validate_model1_solution(optimal_assortment)
+        return optimal_assortment, error_msg
+
+    @staticmethod
+    def _solver_stats(optimizer) -> Dict:
+        """
+        :return: status, objective, best bound, relative gap and branch-and-bound node count of the last solve of
+        an optimizer, None for the ones it does not report
+        """
+        objective = optimizer.maximal_profits
+        bound = getattr(optimizer, 'best_bound', None)
+        if bound is None:
+            bound = getattr(optimizer, 'upper_bound', None)
+        gap = getattr(optimizer, 'gap', None)
+        if gap is None:
+            gap = relative_gap(objective, bound)
+        stats = {'status': getattr(optimizer, 'status', None), 'objective': objective, 'best_bound': bound,
+                 'gap': gap, 'node_count': getattr(optimizer, 'node_count', None)}
+        return {name: value.item() if isinstance(value, np.generic) else value for name, value in stats.items()}
+
+    def _report(self, name: str, call: _Call, metrics: Metrics, start: float, enable_group_constraint: bool,
+                error_msg: Dict) -> Dict:
+        """
+        assemble the report of a call and push it to the metrics sink
+        :return: 'call', 'model', 'num_stores', 'backend' that produced the result, 'cache_hit', 'total_seconds',
+        'phases': phase -> elapsed seconds, e.g. "input", "backend.knapsack", "build.create_matrix_objective",
+        "canonicalize", "solve", "retrieve", "validate", "output", 'solver': statistics of the last backend run,
+        'presolve': how much the presolve shrank the instance, see PresolveStats, None without presolve,
+        'errors': error messages
+        """
+        stats = dict(metrics.stats)
+        report = {
+            'call': name,
+            'model': 2 if enable_group_constraint else 1,
+            'num_stores': stats.pop('num_stores', None),
+            'backend': call.backend,
+            'cache_hit': stats.pop('cache_hit', False),
+            'total_seconds': time.perf_counter() - start,
+            'phases': dict(metrics.phases),
+            'presolve': stats.pop('presolve', None),
+            'solver': stats,
+            'errors': {str(key): message for key, message in error_msg.items()},
+        }
+        if self._metrics_sink is not None:
+            try:
+                self._metrics_sink(report)
+            except Exception as ex:
+                logging.warning(f"metrics sink raised {type(ex).__name__}: {ex}")
+        return report
+
+    @staticmethod
+    def _result_matrices(call: _Call, optimizer, assortment: Dict[int, Dict[str, int]],
+                         enable_group_constraint: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        take the solution matrices of an optimizer, or convert its assortment dicts if it does not keep them
+        :return: (store x pizza type) counts, (store x pizza type) groups, None for model 1
+        """
+        counts = getattr(optimizer, 'optimal_count_matrix', None)
+        if counts is None:
+            counts = call.validator.count_matrix(assortment)
+        if not enable_group_constraint:
+            return counts, None
+        assign = getattr(optimizer, 'optimal_assign_matrix', None)
+        if assign is None:
+            assign = call.validator.assignment_matrix(optimizer.optimal_assign_store_type_group)
+        return counts, np.asarray(assign).argmax(axis=2)
+
+    @staticmethod
+    def _cached_groups(data_center: DataCenter, groups: Dict[int, List[int]]) -> np.ndarray:
+        """
+        :return: (store x pizza type) groups of a cached model 2 solution, None for model 1
+        """
+        if groups is None:
+            return None
+        matrix = np.full((data_center.num_stores, len(data_center.pizza_types)), -1, dtype=np.int64)
+        matrix[data_center.rows_of(list(groups.keys()))] = list(groups.values())
+        return matrix
+
+    def _count_table(self, call: _Call, assortment: Dict[int, Dict[str, int]]) -> pd.DataFrame:
+        """
+        :return: (store x pizza type) count table of the result of a call, of the assortment if it is not valid
+        """
+        if call.result is None:
+            return self._output_processor.process(assortment)
+        return self._output_processor.process_matrix(*call.result[:2])
+
+    def result_table(self) -> pd.DataFrame:
+        """
+        columnar result of the last optimize() or reoptimize(), one row per store and pizza type with the pizza
+        count, the group, the expected demand, the cost and the profit, see OutputProcessor.result_table()
+        :return: result table
+        """
+        result = self._result
+        if result is None:
+            raise ValueError("no valid result, call optimize() first")
+        return self._output_processor.result_table(*result)
+
+    def write_result(self, path: str) -> None:
+        """
+        write the columnar result of the last optimize() or reoptimize() to a file
+        :param path: path to a csv, Parquet or Arrow IPC file
+        :return:
+        """
+        self._output_processor.write(self.result_table(), path)
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def frontier_assortments(self) -> List[pd.DataFrame]:
+        return self._frontier_assortments
+
+
+# service of a worker process of OptService.optimize_many()
+_worker_service: OptService = None
+
+
+def _init_worker(config: Dict) -> None:
+    """
+    create the service of a worker process once, it is reused by all the instances the worker solves
+    :param config: keyword arguments of the service: backends, time limits, thread cap, metrics sink and presolve
+    :return:
+    """
+    global _worker_service
+    _worker_service = OptService(**config)
+
+
+def _optimize_task(pizza_data: PizzaData, enable_group_constraint: bool, backends: Sequence[str],
+                   deadline: Optional[float]) -> Tuple[pd.DataFrame, Dict]:
+    return _optimize_instance(_worker_service, pizza_data, enable_group_constraint, backends, deadline)
+
+
+def _optimize_instance(service: OptService, pizza_data: PizzaData, enable_group_constraint: bool,
+                       backends: Sequence[str], deadline: Optional[float] = None) -> Tuple[pd.DataFrame, Dict]:
+    """
+    solve one instance of OptService.optimize_many(), an exception becomes the error message of the instance so
+    that it does not abort the batch
+    :return: result, error message
+    """
+    try:
+        if deadline is None:
+            return service.optimize(pizza_data, enable_group_constraint, backends)
+        result = service.optimize_anytime(pizza_data, enable_group_constraint, deadline, backends=backends)
+        return result.assortment, result.errors
+    except Exception as ex:
+        logging.error(f"instance failed, {type(ex).__name__}: {ex}")
+        return service._output_processor.process({}), {'task': f"raised {type(ex).__name__}: {ex}"}
@@ -1,40 +1,188 @@
+import os
+from typing import Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
 import pandas as pd
 import logging
 
-from src.common.store import Store
 from src.common.data_center import DataCenter
 
+# pizza data accepted by InputProcessor.process()
+PizzaData = Union[pd.DataFrame, str, os.PathLike, Iterable]
+
 
 class InputProcessor:
     """
     this class defines processors to parse input from various data sources
     """
 
-    def __init__(self):
-        pass
+    # column holding the store identifier
+    STORE_COLUMN = 'store'
+    # column holding the pizza type
+    TYPE_COLUMN = 'type'
+    # columns holding the store-type parameters
+    PARAM_COLUMNS = ['price', 'cost', 'alpha', 'beta']
+    # dtypes of the columns read from files, any other column, e.g. a stored index, is skipped
+    COLUMN_DTYPES = {STORE_COLUMN: np.int32, TYPE_COLUMN: 'category',
+                     **{column: np.float64 for column in PARAM_COLUMNS}}
+    # number of rows parsed at once from a file or an Arrow table
+    CHUNK_SIZE = 1_000_000
+    # file suffixes of the Parquet and Arrow IPC (Feather) formats, any other file is read as csv
+    PARQUET_SUFFIXES = ('.parquet', '.pq')
+    ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        """
+        constructor
+        :param chunk_size: number of rows parsed at once from a file or an Arrow table
+        """
+        self._chunk_size = chunk_size
 
-    def process(self, pizza_data: pd.DataFrame) -> DataCenter:
+    def process(self, pizza_data: PizzaData) -> DataCenter:
+        """
+        parse the pizza data chunk by chunk, every chunk is pivoted in one columnar pass into (store x pizza type)
+        parameter matrices, which are merged into the matrices kept by the data center. only the matrices of the
+        chunks are held, never all the input rows
+        :param pizza_data: one row per store and pizza type, either a data frame, a path to a csv, Parquet or
+        Arrow IPC file, an Arrow table or record batch reader, or an iterable of data frames or record batches such
+        as a chunked csv reader
+        :return: populated data center
+        """
         logging.info("InputProcessor starts.")
         data_center = DataCenter()
-        stores = data_center.stores
-
-        for idx, row in pizza_data.iterrows():
-            store_id = row['store']
-            if store_id not in stores:
-                # create a new store if not exists
-                stores[store_id] = Store(store_id)
-
-            # parse and save store data
-            pizza_type = str(row['type'])
-            price = row['price']
-            cost = row['cost']
-            alpha = row['alpha']
-            beta = row['beta']
-            store = stores[store_id]
-            store.prices[pizza_type] = price
-            store.costs[pizza_type] = cost
-            store.alpha[pizza_type] = alpha
-            store.beta[pizza_type] = beta
+        pizza_types = data_center.pizza_types
+
+        chunks, unknown_types = [], set()
+        for frame in self._frames(pizza_data):
+            store_ids, present, values = self._parse_chunk(frame, pizza_types, unknown_types)
+            chunks.append((store_ids, present, values))
+        if unknown_types:
+            logging.warning(f"ignore unknown pizza types: {sorted(unknown_types)}")
+
+        store_ids, values = self._merge_chunks(chunks, len(pizza_types))
+        self._check_missing_records(store_ids, pizza_types, np.isnan(values).any(axis=0))
+
+        data_center.load(store_ids, *values)
 
         logging.info("InputProcessor completes.")
         return data_center
+
+    def _frames(self, pizza_data) -> Iterator[pd.DataFrame]:
+        """
+        split the pizza data into data frames of the input columns
+        :param pizza_data: input of process()
+        :return: data frames
+        """
+        columns = list(self.COLUMN_DTYPES)
+        if isinstance(pizza_data, pd.DataFrame):
+            yield pizza_data[columns]
+        elif isinstance(pizza_data, (str, os.PathLike)):
+            yield from self._read_file(os.fspath(pizza_data))
+        elif hasattr(pizza_data, 'to_batches'):
+            # Arrow table
+            for batch in pizza_data.select(columns).to_batches(max_chunksize=self._chunk_size):
+                yield batch.to_pandas()
+        else:
+            # chunked csv reader, Arrow record batch reader or any other iterable of chunks
+            for chunk in pizza_data:
+                if isinstance(chunk, pd.DataFrame):
+                    yield chunk[columns]
+                else:
+                    yield chunk.select(columns).to_pandas()
+
+    def _read_file(self, path: str) -> Iterator[pd.DataFrame]:
+        """
+        read the input columns of a file chunk by chunk
+        :param path: path to a csv, Parquet or Arrow IPC file
+        :return: data frames
+        """
+        columns = list(self.COLUMN_DTYPES)
+        suffix = os.path.splitext(path)[1].lower()
+        if suffix in self.PARQUET_SUFFIXES:
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self._chunk_size, columns=columns):
+                yield batch.to_pandas()
+        elif suffix in self.ARROW_SUFFIXES:
+            import pyarrow as pa
+
+            with pa.memory_map(path) as source:
+                reader = pa.ipc.open_file(source)
+                for index in range(reader.num_record_batches):
+                    yield reader.get_batch(index).select(columns).to_pandas()
+        else:
+            with pd.read_csv(path, usecols=columns, dtype=self.COLUMN_DTYPES, chunksize=self._chunk_size) as reader:
+                yield from reader
+
+    def _parse_chunk(self, frame: pd.DataFrame, pizza_types: List[str],
+                     unknown_types: set) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        pivot a chunk of the pizza data into (store x pizza type) matrices
+        :param frame: data frame of the input columns
+        :param pizza_types: pizza types, one per matrix column
+        :param unknown_types: collects the pizza types that are not in pizza_types
+        :return: store ids in the order of their first record, (store x pizza type) record flags,
+        parameter -> (store x pizza type) matrix
+        """
+        # a repeated store-type record overrides the earlier ones
+        frame = frame.drop_duplicates(subset=[self.STORE_COLUMN, self.TYPE_COLUMN], keep='last')
+
+        # stores keep the order in which they first show up in the input
+        store_pos, store_ids = pd.factorize(frame[self.STORE_COLUMN], sort=False)
+        types = frame[self.TYPE_COLUMN]
+        if not isinstance(types.dtype, pd.CategoricalDtype):
+            types = types.astype(str)
+        type_pos = pd.Categorical(types, categories=pizza_types).codes
+
+        known = type_pos >= 0
+        if not known.all():
+            unknown_types.update(str(pizza_type) for pizza_type in types[~known].unique())
+
+        present = np.zeros((len(store_ids), len(pizza_types)), dtype=bool)
+        present[store_pos[known], type_pos[known]] = True
+        # parameter -> (store x pizza type) matrix, nan marks a missing record
+        values = np.full((len(self.PARAM_COLUMNS), len(store_ids), len(pizza_types)), np.nan)
+        params = frame[self.PARAM_COLUMNS].to_numpy(dtype=float)
+        values[:, store_pos[known], type_pos[known]] = params[known].T
+        return np.asarray(store_ids), present, values
+
+    def _merge_chunks(self, chunks: List[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                      num_types: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        merge the matrices of the chunks, a store may have records in several chunks, e.g. across the boundary of
+        two csv chunks, and the records of a later chunk override the earlier ones
+        :param chunks: (store ids, record flags, parameter matrices) of every chunk, in input order
+        :param num_types: number of pizza types
+        :return: store ids in the order of their first record, parameter -> (store x pizza type) matrix
+        """
+        if len(chunks) == 1:
+            return chunks[0][0], chunks[0][2]
+        if len(chunks) == 0:
+            return np.empty(0, dtype=np.int64), np.empty((len(self.PARAM_COLUMNS), 0, num_types))
+
+        rows, store_ids = pd.factorize(np.concatenate([chunk[0] for chunk in chunks]), sort=False)
+        values = np.full((len(self.PARAM_COLUMNS), len(store_ids), num_types), np.nan)
+        start = 0
+        for chunk_store_ids, present, chunk_values in chunks:
+            chunk_rows = rows[start:start + len(chunk_store_ids)]
+            start += len(chunk_store_ids)
+            values[:, chunk_rows] = np.where(present, chunk_values, values[:, chunk_rows])
+        return np.asarray(store_ids), values
+
+    @staticmethod
+    def _check_missing_records(store_ids, pizza_types, missing: np.ndarray):
+        """
+        this function makes sure every store has a complete record for every pizza type
+        :param store_ids: store identifiers, one per matrix row
+        :param pizza_types: pizza types, one per matrix column
+        :param missing: boolean (store x pizza type) matrix flagging missing or incomplete records
+        :return:
+        """
+        if not missing.any():
+            return
+        rows, cols = np.nonzero(missing)
+        missing_pairs = [(store_ids[row], pizza_types[col]) for row, col in zip(rows[:10], cols[:10])]
+        error_msg = (f"missing data for {len(rows)} store-type combinations, "
+                     f"e.g. (store, type): {missing_pairs}")
+        logging.error(error_msg)
+        raise ValueError(error_msg)
@@ -1,14 +1,123 @@
+import os
 from typing import Dict
+
+import numpy as np
 import pandas as pd
 
+from src.common.data_center import DataCenter
+
 
 class OutputProcessor:
+    """
+    this class turns the optimal assortment into results: the (store x pizza type) count table returned by the
+    optimization interface, and a columnar result table that can be written to csv, Parquet or Arrow files
+    """
+
+    # columns of the result table
+    RESULT_COLUMNS = ['store', 'type', 'count', 'group', 'demand', 'cost', 'profit']
+    # number of rows written at once
+    CHUNK_SIZE = 1_000_000
+    # file suffixes of the Parquet and Arrow IPC (Feather) formats, any other file is written as csv
+    PARQUET_SUFFIXES = ('.parquet', '.pq')
+    ARROW_SUFFIXES = ('.arrow', '.feather', '.ipc')
 
-    def __init__(self):
-        pass
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        """
+        constructor
+        :param chunk_size: number of rows written at once
+        """
+        self._chunk_size = chunk_size
 
     def process(self, assortment: Dict[int, Dict[str, int]]) -> pd.DataFrame:
         df = pd.DataFrame.from_dict(assortment, orient='index')
         df.index.name = 'store'
         df.columns.name = 'pizza type'
         return df
+
+    @staticmethod
+    def process_matrix(data_center: DataCenter, counts: np.ndarray) -> pd.DataFrame:
+        """
+        create the (store x pizza type) count table of process() straight from a count matrix
+        :param data_center: data center
+        :param counts: (store x pizza type) pizza counts
+        :return: count table
+        """
+        return pd.DataFrame(np.asarray(counts, dtype=np.int64),
+                            index=pd.Index(data_center.store_ids, name='store'),
+                            columns=pd.Index(data_center.pizza_types, name='pizza type'))
+
+    @staticmethod
+    def result_table(data_center: DataCenter, counts: np.ndarray, groups: np.ndarray = None) -> pd.DataFrame:
+        """
+        create the columnar result, one row per store and pizza type in the row order of the data center: the
+        pizza count, the group, the expected demand alpha * n^beta, the cost and the profit (p - c) * demand
+        :param data_center: data center
+        :param counts: (store x pizza type) pizza counts
+        :param groups: (store x pizza type) group of every store, -1 for no group, e.g. for model 1
+        :return: result table
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        num_stores, num_types = counts.shape
+        if groups is None:
+            groups = np.full(counts.shape, -1, dtype=np.int64)
+        demand = data_center.alpha * counts ** data_center.beta
+        return pd.DataFrame({
+            'store': np.repeat(data_center.store_ids, num_types),
+            'type': pd.Categorical.from_codes(np.tile(np.arange(num_types), num_stores),
+                                              categories=data_center.pizza_types),
+            'count': counts.ravel(),
+            'group': np.asarray(groups, dtype=np.int64).ravel(),
+            'demand': demand.ravel(),
+            'cost': (counts * data_center.costs).ravel(),
+            'profit': ((data_center.prices - data_center.costs) * demand).ravel(),
+        }, columns=OutputProcessor.RESULT_COLUMNS)
+
+    def write(self, table: pd.DataFrame, path: str) -> None:
+        """
+        write a result table chunk by chunk, the format follows the file suffix
+        :param table: result table
+        :param path: path to a csv, Parquet or Arrow IPC file
+        :return:
+        """
+        path = os.fspath(path)
+        suffix = os.path.splitext(path)[1].lower()
+        try:
+            import pyarrow as pa
+        except ImportError:
+            if suffix in self.PARQUET_SUFFIXES + self.ARROW_SUFFIXES:
+                raise
+            # pandas formats the floats of a csv an order of magnitude slower than Arrow
+            table.to_csv(path, index=False, chunksize=self._chunk_size)
+            return
+
+        arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+        if suffix in self.PARQUET_SUFFIXES:
+            import pyarrow.parquet as pq
+
+            pq.write_table(arrow_table, path, row_group_size=self._chunk_size)
+        elif suffix in self.ARROW_SUFFIXES:
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table, max_chunksize=self._chunk_size)
+        else:
+            import pyarrow.csv
+
+            pyarrow.csv.write_csv(arrow_table, path, pyarrow.csv.WriteOptions(batch_size=self._chunk_size))
+
+    def read(self, path: str) -> pd.DataFrame:
+        """
+        read a result table written by write(), the format follows the file suffix
+        :param path: path to a csv, Parquet or Arrow IPC file
+        :return: result table
+        """
+        path = os.fspath(path)
+        suffix = os.path.splitext(path)[1].lower()
+        if suffix in self.PARQUET_SUFFIXES:
+            import pyarrow.parquet as pq
+
+            return pq.read_table(path).to_pandas()
+        if suffix in self.ARROW_SUFFIXES:
+            import pyarrow as pa
+
+            with pa.memory_map(path, 'r') as source:
+                return pa.ipc.open_file(source).read_all().to_pandas()
+        return pd.read_csv(path)
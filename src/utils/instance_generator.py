@@ -0,0 +1,70 @@
+import string
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.common.data_center import DataCenter
+
+
+def pizza_type_names(num_pizza_types: int) -> List[str]:
+    """
+    :return: "A", "B", ... for up to 26 pizza types, "T0", "T1", ... for more
+    """
+    if num_pizza_types <= len(string.ascii_uppercase):
+        return list(string.ascii_uppercase[:num_pizza_types])
+    return [f"T{index}" for index in range(num_pizza_types)]
+
+
+def generate_instance(num_stores: int, num_pizza_types: int = 3, price_range: Tuple[float, float] = (10.0, 15.0),
+                      cost_range: Tuple[float, float] = (4.0, 6.0), alpha_range: Tuple[float, float] = (1.0, 3.0),
+                      beta_range: Tuple[float, float] = (0.1, 1.0), budget_tightness: float = 0.5,
+                      max_pizza_count: int = 20, num_pizza_groups: int = 3, num_profiles: int = None,
+                      seed: int = 0) -> DataCenter:
+    """
+    create a random instance, every store-type parameter is drawn uniformly from its range
+    :param num_stores: number of stores, identified by 1..num_stores
+    :param num_pizza_types: number of pizza types
+    :param price_range: (low, high) of the prices
+    :param cost_range: (low, high) of the costs
+    :param alpha_range: (low, high) of alpha
+    :param beta_range: (low, high) of beta, at most 1 to keep the profit concave
+    :param budget_tightness: budget as a share of the cost of filling every store to its capacity with its most
+    expensive pizza type, the budget is never binding from 1 on
+    :param max_pizza_count: max. no. of pizza a store can display
+    :param num_pizza_groups: number of groups for each pizza type
+    :param num_profiles: number of distinct store profiles, every store takes the parameters of a random profile,
+    e.g. for a chain of many identical stores. every store has its own parameters if None
+    :param seed: random seed, the same seed creates the same instance
+    :return: data center
+    """
+    rng = np.random.default_rng(seed)
+    shape = (num_stores if num_profiles is None else num_profiles, num_pizza_types)
+    prices = rng.uniform(*price_range, shape)
+    costs = rng.uniform(*cost_range, shape)
+    alpha = rng.uniform(*alpha_range, shape)
+    beta = rng.uniform(*beta_range, shape)
+    if num_profiles is not None:
+        profiles = rng.integers(num_profiles, size=num_stores)
+        prices, costs, alpha, beta = prices[profiles], costs[profiles], alpha[profiles], beta[profiles]
+    max_budget = budget_tightness * max_pizza_count * float(costs.max(axis=1, initial=0).sum())
+    data_center = DataCenter(max_pizza_count, max_budget, num_pizza_groups, pizza_type_names(num_pizza_types))
+    data_center.load(np.arange(1, num_stores + 1), prices, costs, alpha, beta)
+    return data_center
+
+
+def pizza_data(data_center: DataCenter) -> pd.DataFrame:
+    """
+    write the store data of an instance in the input format of the optimizer, one row per store and pizza type
+    :param data_center: data center
+    :return: pizza data
+    """
+    num_types = len(data_center.pizza_types)
+    return pd.DataFrame({
+        'store': np.repeat(data_center.store_ids, num_types),
+        'type': np.tile(data_center.pizza_types, data_center.num_stores),
+        'price': data_center.prices.ravel(),
+        'cost': data_center.costs.ravel(),
+        'alpha': data_center.alpha.ravel(),
+        'beta': data_center.beta.ravel(),
+    })
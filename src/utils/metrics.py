@@ -0,0 +1,94 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+# takes the report of every OptService call, e.g. to push it to a monitoring system
+MetricsSink = Callable[[Dict], None]
+
+
+class Metrics:
+    """
+    this class collects the elapsed seconds of the phases of one optimization call and the statistics of its
+    solver. the code of the call reports to the metrics activated in its context through timed(), add_time() and
+    record(), so the metrics are not passed around, and the instrumentation costs next to nothing if no metrics
+    are active
+    """
+
+    def __init__(self):
+        # phase -> elapsed seconds, summed over the repeats of the phase
+        self._phases: Dict[str, float] = {}
+        # statistic name -> value
+        self._stats: Dict[str, object] = {}
+
+    @contextmanager
+    def activate(self):
+        """
+        collect the phases and statistics reported in the context
+        """
+        token = _active_metrics.set(self)
+        try:
+            yield self
+        finally:
+            _active_metrics.reset(token)
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    def record(self, **stats) -> None:
+        self._stats.update(stats)
+
+    @property
+    def phases(self) -> Dict[str, float]:
+        return self._phases
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        return self._stats
+
+
+# metrics of the running call, None if the call is not instrumented
+_active_metrics: ContextVar[Optional[Metrics]] = ContextVar('active_metrics', default=None)
+
+
+@contextmanager
+def timed(phase: str):
+    """
+    add the elapsed seconds of the block to a phase of the active metrics
+    :param phase: phase name, e.g. "build.create_matrix_variables"
+    """
+    metrics = _active_metrics.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_time(phase, time.perf_counter() - start)
+
+
+def add_time(phase: str, seconds: float) -> None:
+    """
+    add seconds measured elsewhere, e.g. by a solver, to a phase of the active metrics
+    """
+    metrics = _active_metrics.get()
+    if metrics is not None and seconds is not None:
+        metrics.add_time(phase, seconds)
+
+
+def record(**stats) -> None:
+    """
+    keep statistics in the active metrics
+    """
+    metrics = _active_metrics.get()
+    if metrics is not None:
+        metrics.record(**stats)
+
+
+def logging_sink(report: Dict) -> None:
+    """
+    metrics sink that logs the report
+    """
+    logging.info(f"metrics: {report}")
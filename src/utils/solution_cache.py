@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from src.common.data_center import DataCenter
+
+
+def solution_key(data_center: DataCenter, enable_group_constraint: bool, backends: Sequence[str],
+                 presolve: bool = False, time_limits: Dict[str, float] = None) -> str:
+    """
+    hash the normalized input into a stable key: the store data in store id order, so that the row order of
+    the input does not matter, the constraint settings, the model, the backend chain, the presolve and the time
+    limits, so that a solution cut short by a time limit is not served to a call that allows more time
+    :param data_center: data center
+    :param enable_group_constraint: a boolean variable indicating whether to consider the group constraints
+    :param backends: backend fallback chain
+    :param presolve: True if the backends solve the presolved instance, see PresolvedOptimizer
+    :param time_limits: backend name -> max. solve time in seconds of the backends of the chain
+    :return: hex digest
+    """
+    store_ids = np.asarray(data_center.store_ids)
+    order = np.argsort(store_ids, kind='stable')
+    digest = hashlib.sha256()
+    settings = {
+        'pizza_types': list(data_center.pizza_types),
+        'max_pizza_count': data_center.max_pizza_count,
+        'max_budget': float(data_center.max_budget),
+        'num_pizza_groups': data_center.num_pizza_groups,
+        'enable_group_constraint': bool(enable_group_constraint),
+        'backends': list(backends),
+        'presolve': bool(presolve),
+        'time_limits': {name: float(limit) for name, limit in (time_limits or {}).items() if limit is not None},
+    }
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    if store_ids.dtype.kind in 'iub':
+        digest.update(store_ids[order].astype(np.int64).tobytes())
+    else:
+        digest.update('\x1f'.join(map(str, store_ids[order].tolist())).encode())
+    for matrix in (data_center.prices, data_center.costs, data_center.alpha, data_center.beta):
+        digest.update(np.ascontiguousarray(matrix[order], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+class SolutionCache:
+    """
+    this class keeps the solutions of OptService by the key of their input, see solution_key(), so that a
+    resubmitted input is answered without solving it again. the solutions are held in a LRU in memory and,
+    if a path is given, persisted to a SQLite file so that they survive a restart
+    """
+
+    def __init__(self, max_entries: int = 1024, path: str = None):
+        """
+        constructor
+        :param max_entries: max. number of solutions held in memory
+        :param path: SQLite file to persist the solutions to, memory only if None
+        """
+        self._max_entries = max_entries
+        # key -> solution, the least recently used first
+        self._entries: OrderedDict = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection = None
+        if path is not None:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, solution TEXT, created REAL)")
+            logging.info(f"persist solutions to {path}")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        look up a solution, in memory first and then on disk
+        :param key: input key
+        :return: solution, None if not cached
+        """
+        with self._lock:
+            solution = self._entries.get(key)
+            if solution is None and self._connection is not None:
+                row = self._connection.execute("SELECT solution FROM solutions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    solution = self._decode(row[0])
+                    self._remember(key, solution)
+            if solution is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return solution
+
+    def put(self, key: str, solution: Dict) -> None:
+        """
+        keep a solution
+        :param key: input key
+        :param solution: 'assortment': store -> pizza type -> count, 'backend': name of the backend that found it,
+        'groups': store -> group per pizza type, for model 2 only, 'stats': status, objective and bound of the
+        backend run
+        :return:
+        """
+        with self._lock:
+            self._remember(key, solution)
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)",
+                                             (key, self._encode(solution), time.time()))
+
+    def _remember(self, key: str, solution: Dict):
+        self._entries[key] = solution
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _encode(solution: Dict) -> str:
+        # json turns the keys into strings, so the assortment is written as (store id, counts) pairs
+        assortment = [[store_id.item() if isinstance(store_id, np.generic) else store_id,
+                       {pizza_type: int(count) for pizza_type, count in counts.items()}]
+                      for store_id, counts in solution['assortment'].items()]
+        encoded = {'assortment': assortment, 'backend': solution['backend']}
+        if 'groups' in solution:
+            encoded['groups'] = [[store_id.item() if isinstance(store_id, np.generic) else store_id, groups]
+                                 for store_id, groups in solution['groups'].items()]
+        if 'stats' in solution:
+            encoded['stats'] = solution['stats']
+        return json.dumps(encoded)
+
+    @staticmethod
+    def _decode(text: str) -> Dict:
+        solution = json.loads(text)
+        decoded = {'assortment': {store_id: counts for store_id, counts in solution['assortment']},
+                   'backend': solution['backend']}
+        if 'groups' in solution:
+            decoded['groups'] = {store_id: groups for store_id, groups in solution['groups']}
+        if 'stats' in solution:
+            decoded['stats'] = solution['stats']
+        return decoded
+
+    def clear(self) -> None:
+        """
+        drop all solutions, in memory and on disk
+        :return:
+        """
+        with self._lock:
+            self._entries.clear()
+            if self._connection is not None:
+                with self._connection:
+                    self._connection.execute("DELETE FROM solutions")
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
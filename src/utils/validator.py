@@ -1,12 +1,34 @@
-from typing import Dict
+import logging
+from typing import Dict, Hashable, List, NamedTuple, Tuple
+
+import numpy as np
+import pandas as pd
 
 from src.common.data_center import DataCenter
 
 
+class Violation(NamedTuple):
+    """
+    a broken operational constraint
+    """
+    # "pizza_count", "budget", "group_assignment", "group_size" or "group_count"
+    kind: str
+    # store id for a store row, (store id, pizza type) for an assignment, (pizza type, group) for a group, None for
+    # the budget
+    key: Hashable
+    # observed value, e.g. the pizza count of a store or the number of stores of a group
+    observed: float
+    # limit of the value
+    limit: float
+    message: str
+
+
 class Validator:
     """
     this class is responsible for validating the various model outputs to make sure all the
-    operational constraints are met.
+    operational constraints are met. the checks run on (store x pizza type) count matrices and
+    (store x pizza type x group) assignment matrices whose rows follow the data center, the nested dict outputs
+    of the optimizers are converted first
     """
 
     def __init__(self, data_center: DataCenter):
@@ -18,16 +40,7 @@ class Validator:
         :param assortment: model 1 output
         :return: error message if any
         """
-        errors = {}
-        error_pizza_count = self._check_max_pizza_count(assortment)
-        if len(error_pizza_count) > 0:
-            errors.update(error_pizza_count)
-
-        error_budget = self._check_max_budget(assortment)
-        if len(error_budget) > 0:
-            errors.update(error_budget)
-
-        return errors
+        return self.error_messages(self.check_model1(self.count_matrix(assortment)))
 
     def validate_model2_solution(self, assortment: Dict[int, Dict[str, int]],
                                  group_assignment: Dict[int, Dict[str, Dict[int, int]]]) -> Dict[str, str]:
@@ -37,95 +50,201 @@ class Validator:
         :param group_assignment: assignment
         :return: error message if any
         """
-        errors = {}
-        error_pizza_count = self._check_max_pizza_count(assortment)
-        if len(error_pizza_count) > 0:
-            errors.update(error_pizza_count)
-
-        error_budget = self._check_max_budget(assortment)
-        if len(error_budget) > 0:
-            errors.update(error_budget)
-
-        error_group = self._check_pizza_type_groups(assortment, group_assignment)
-        if len(error_group) > 0:
-            errors.update(error_group)
+        return self.error_messages(self.check_model2(self.count_matrix(assortment),
+                                                     self.assignment_matrix(group_assignment)))
 
-        return errors
+    def check_model1(self, counts: np.ndarray) -> List[Violation]:
+        """
+        check a model 1 result
+        :param counts: (store x pizza type) pizza counts
+        :return: violations, empty if the result is valid
+        """
+        counts = self._check_shape(counts, 2)
+        return self._check_max_pizza_count(counts) + self._check_max_budget(counts)
 
-    def _check_max_pizza_count(self, assortment: Dict[int, Dict[str, int]]) -> Dict[int, str]:
+    def check_model2(self, counts: np.ndarray, assign: np.ndarray) -> List[Violation]:
         """
-        this function checks if the total number of displayed pizzas exceeds the given limit
-        :param assortment: input assortment for validation
-        :return: error messages if any
+        check a model 2 result
+        :param counts: (store x pizza type) pizza counts
+        :param assign: (store x pizza type x group) binary group assignment
+        :return: violations, empty if the result is valid
         """
-        error_msg = {}
-        for store_id in assortment.keys():
-            total_count = sum(assortment[store_id].values())
-            if total_count > self._data_center.max_pizza_count:
-                error_msg[store_id] = (f'pizza count observed - allocated: {total_count}, '
-                                       f'limit: {self._data_center.max_pizza_count}')
-        return error_msg
+        counts = self._check_shape(counts, 2)
+        assign = self._check_shape(assign, 3)
+        return (self._check_max_pizza_count(counts) + self._check_max_budget(counts) +
+                self._check_pizza_type_groups(counts, assign))
 
-    def _check_max_budget(self, assortment: Dict[int, Dict[str, int]]) -> Dict[int, str]:
+    @staticmethod
+    def error_messages(violations: List[Violation]) -> Dict:
         """
-        this function checks if the budget constraint is violated or not
-        :param assortment: assortment for validation
+        key the messages of the violations the way the optimizers report errors, "budget" for the budget
+        :param violations: violations
         :return: error message if any
         """
-        total_costs = 0
-        for store_id in assortment.keys():
-            store = self._data_center.stores[store_id]
-            for pizza_type in assortment[store_id]:
-                total_costs += assortment[store_id][pizza_type] * store.costs[pizza_type]
         error_msg = {}
-        if total_costs > self._data_center.max_budget:
-            error_msg = {f"budget breach observed - used: {total_costs}, limit: {self._data_center.max_budget}"}
+        for violation in violations:
+            key = 'budget' if violation.key is None else violation.key
+            error_msg[key] = error_msg[key] + violation.message if key in error_msg else violation.message
         return error_msg
 
-    def _check_pizza_type_groups(self, assortment: Dict[int, Dict[str, int]],
-                                 group_assignment: Dict[int, Dict[str, Dict[int, int]]]) -> Dict[int, str]:
+    def count_matrix(self, assortment: Dict[int, Dict[str, int]]) -> np.ndarray:
+        """
+        convert a store -> pizza type -> count assortment into a count matrix, the stores it misses count 0
+        :param assortment: assortment
+        :return: (store x pizza type) pizza counts
+        """
+        pizza_types = self._data_center.pizza_types
+        counts = np.zeros((self._data_center.num_stores, len(pizza_types)), dtype=np.int64)
+        if len(assortment) > 0:
+            rows = self._rows_of(assortment.keys())
+            counts[rows] = [[per_type.get(pizza_type, 0) for pizza_type in pizza_types]
+                            for per_type in assortment.values()]
+        return counts
+
+    def assignment_matrix(self, group_assignment: Dict[int, Dict[str, Dict[int, int]]]) -> np.ndarray:
+        """
+        convert a store -> pizza type -> group -> indicator assignment into an assignment matrix, the stores it
+        misses are assigned nowhere
+        :param group_assignment: assignment
+        :return: (store x pizza type x group) binary group assignment
+        """
+        pizza_types = self._data_center.pizza_types
+        groups = range(self._data_center.num_pizza_groups)
+        assign = np.zeros((self._data_center.num_stores, len(pizza_types), len(groups)), dtype=np.int64)
+        if len(group_assignment) > 0:
+            rows = self._rows_of(group_assignment.keys())
+            assign[rows] = [[[per_group.get(group, 0) for group in groups]
+                             for per_group in (per_type[pizza_type] for pizza_type in pizza_types)]
+                            for per_type in group_assignment.values()]
+        return assign
+
+    def table_matrices(self, table: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        convert a result table of OutputProcessor.result_table() into a count and an assignment matrix, the store
+        and pizza type pairs it misses count 0 and join no group
+        :param table: result table, at least the 'store', 'type', 'count' and 'group' columns
+        :return: (store x pizza type) pizza counts, (store x pizza type x group) binary group assignment
+        """
+        pizza_types = self._data_center.pizza_types
+        num_groups = self._data_center.num_pizza_groups
+        rows = self._rows_of(table['store'].to_numpy())
+        cols = pd.Index(pizza_types).get_indexer(table['type'].astype(str))
+        if (cols < 0).any():
+            raise KeyError(f"unknown pizza types: {sorted(set(table['type'].astype(str)) - set(pizza_types))[:10]}")
+        groups = table['group'].to_numpy(dtype=np.int64)
+        if (groups >= num_groups).any():
+            raise ValueError(f"invalid groups: {sorted(set(groups[groups >= num_groups].tolist()))[:10]}, "
+                             f"expected less than {num_groups}")
+        counts = np.zeros((self._data_center.num_stores, len(pizza_types)), dtype=np.int64)
+        counts[rows, cols] = table['count'].to_numpy(dtype=np.int64)
+        assign = np.zeros(counts.shape + (num_groups,), dtype=np.int64)
+        joined = groups >= 0
+        assign[rows[joined], cols[joined], groups[joined]] = 1
+        return counts, assign
+
+    def _rows_of(self, store_ids) -> np.ndarray:
+        store_ids = np.array(list(store_ids))
+        rows = self._data_center.rows_of(store_ids)
+        if (rows < 0).any():
+            raise KeyError(f"unknown stores: {store_ids[rows < 0].tolist()[:10]}")
+        return rows
+
+    def _check_shape(self, matrix: np.ndarray, ndim: int) -> np.ndarray:
+        matrix = np.asarray(matrix)
+        shape = (self._data_center.num_stores, len(self._data_center.pizza_types),
+                 self._data_center.num_pizza_groups)[:ndim]
+        if matrix.shape != shape:
+            raise ValueError(f"invalid solution matrix shape: {matrix.shape}, expected: {shape}")
+        return matrix
+
+    def _check_max_pizza_count(self, counts: np.ndarray) -> List[Violation]:
+        """
+        this function checks if the total number of displayed pizzas exceeds the given limit
+        :param counts: (store x pizza type) pizza counts
+        :return: violations if any
+        """
+        max_count = self._data_center.max_pizza_count
+        total_counts = counts.sum(axis=1)
+        rows = np.flatnonzero(total_counts > max_count)
+        return [Violation('pizza_count', store_id, total_count, max_count,
+                          f'pizza count observed - allocated: {total_count}, limit: {max_count}')
+                for store_id, total_count in zip(self._data_center.store_ids[rows].tolist(),
+                                                 total_counts[rows].tolist())]
+
+    def _check_max_budget(self, counts: np.ndarray) -> List[Violation]:
+        """
+        this function checks if the budget constraint is violated or not
+        :param counts: (store x pizza type) pizza counts
+        :return: violations if any
+        """
+        total_costs = float((counts * self._data_center.costs).sum())
+        max_budget = self._data_center.max_budget
+        if total_costs <= max_budget:
+            return []
+        return [Violation('budget', None, total_costs, max_budget,
+                          f"budget breach observed - used: {total_costs}, limit: {max_budget}")]
+
+    def _check_pizza_type_groups(self, counts: np.ndarray, assign: np.ndarray) -> List[Violation]:
         """
         this function checks if whether
-        1) each pizza type has exactly three groups and
+        1) each store joins exactly one group of each pizza type and
         2) each group has at least two stores
         3) all stores in the same group have the same number of pizzas
-        :param assortment: assortment for validation
-        :param group_assignment: store-type-group assignment results
-        :return: error message if any
+        :param counts: (store x pizza type) pizza counts
+        :param assign: (store x pizza type x group) binary group assignment
+        :return: violations if any
+        """
+        pizza_types = self._data_center.pizza_types
+        num_groups = self._data_center.num_pizza_groups
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"store groups by pizza type:\n{self._group_table(counts, assign)}")
+
+        violations = []
+        num_joined = assign.sum(axis=2)
+        for row, col in np.argwhere(num_joined != 1).tolist():
+            store_id = self._data_center.store_ids[row].item()
+            violations.append(Violation('group_assignment', (store_id, pizza_types[col]), num_joined[row, col], 1,
+                                        f"store: {store_id} joins {num_joined[row, col]} groups "
+                                        f"for pizza type: {pizza_types[col]}"))
+
+        # (store x pizza type) index of the (pizza type x group) pair of every assigned store
+        joined = assign == 1
+        pair = np.broadcast_to(np.arange(len(pizza_types))[None, :, None] * num_groups +
+                               np.arange(num_groups)[None, None, :], assign.shape)[joined]
+        joined_counts = np.broadcast_to(counts[:, :, None], assign.shape)[joined]
+        sizes = np.bincount(pair, minlength=len(pizza_types) * num_groups)
+        min_counts = np.full(len(sizes), np.iinfo(np.int64).max)
+        max_counts = np.full(len(sizes), np.iinfo(np.int64).min)
+        np.minimum.at(min_counts, pair, joined_counts)
+        np.maximum.at(max_counts, pair, joined_counts)
+        for index in range(len(sizes)):
+            pizza_type, group = pizza_types[index // num_groups], index % num_groups
+            if sizes[index] < 2:
+                # not enough stores assigned to a group
+                violations.append(Violation('group_size', (pizza_type, group), sizes[index], 2,
+                                            f"not enough stores assigned to group: {group} "
+                                            f"for pizza type: {pizza_type}"))
+            # check if all the stores in the same group have the same allocation or not
+            if sizes[index] > 0 and min_counts[index] != max_counts[index]:
+                violations.append(Violation('group_count', (pizza_type, group),
+                                            max_counts[index] - min_counts[index], 0,
+                                            f"stores have different allocations in group: {group} "
+                                            f"for pizza type: {pizza_type}"))
+        return violations
+
+    def _group_table(self, counts: np.ndarray, assign: np.ndarray) -> pd.DataFrame:
         """
+        :return: pizza type x group table of the store -> pizza count of the stores assigned to every group
+        """
+        store_ids = self._data_center.store_ids.tolist()
         groups_by_type = {}
-        for pizza_type in self._data_center.pizza_types:
-            groups_by_type[pizza_type] = {
-                group: {}
-                for group in range(self._data_center.num_pizza_groups)
-            }
-
-        for store_id, count_per_type in assortment.items():
-            for pizza_type, count in count_per_type.items():
-                group_assign = group_assignment[store_id][pizza_type]
-                for group, indicator in group_assign.items():
-                    if indicator == 1:
-                        groups_by_type[pizza_type][group][store_id] = count
-
-        import pandas as pd
+        for col, pizza_type in enumerate(self._data_center.pizza_types):
+            groups_by_type[pizza_type] = {}
+            for group in range(self._data_center.num_pizza_groups):
+                rows = np.flatnonzero(assign[:, col, group] == 1).tolist()
+                groups_by_type[pizza_type][group] = {store_ids[row]: int(counts[row, col]) for row in rows}
         df = pd.DataFrame.from_dict(groups_by_type, orient='index')
         df.index.name = 'pizza type'
         df.columns.name = 'pizza group'
-        print("\nshow store groups by pizza type: ")
-        print(df)
-
-        error_msg = {}
-        for pizza_type in self._data_center.pizza_types:
-            groups = groups_by_type[pizza_type]
-            for group, store_allocation in groups.items():
-                if len(store_allocation) < 2:
-                    # not enough stores assigned to a group
-                    error_msg[(pizza_type, group)] = (f"not enough stores assigned to group: {group} "
-                                                      f"for pizza type: {pizza_type}")
-
-                # check if all the stores in the same group have the same allocation or not
-                if len(set(store_allocation.values())) != 1:
-                    error_msg[(pizza_type, group)] += (f"stores have different allocations in group: {group}"
-                                                       f"for pizza type: {pizza_type}")
+        return df
 
-        return error_msg
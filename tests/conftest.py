@@ -0,0 +1,14 @@
+import os
+import pandas as pd
+import pytest
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data")
+
+
+@pytest.fixture
+def small_pizza_data() -> pd.DataFrame:
+    """
+    :return: input data of the first 6 stores of new_pizza.csv, small enough for the exact model 2 solvers
+    """
+    pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+    return pizza[pizza['store'].isin(pizza['store'].unique()[:6])].copy()
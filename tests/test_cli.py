@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from src.cli import IMPORT_TIME_LIMIT, main
+from src.model import solver_backend
+from src.processor.output_processor import OutputProcessor
+from tests.conftest import DATA_PATH
+
+PIZZA_PATH = os.path.join(DATA_PATH, "new_pizza.csv")
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that the command line must not import before a subcommand needs them
+HEAVY_MODULES = ("numpy", "pandas", "pyarrow", "cvxpy", "ortools", "mosek")
+
+
+def imported_modules(module: str):
+    """
+    import a module in a fresh interpreter
+    :return: seconds to import the module, the heavy modules it imported
+    """
+    code = (f"import sys, time\n"
+            f"start = time.perf_counter()\n"
+            f"import {module}\n"
+            f"print(time.perf_counter() - start)\n"
+            f"print(' '.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n")
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT_PATH, capture_output=True, text=True,
+                            check=True).stdout.splitlines()
+    return float(output[0]), output[1].split()
+
+
+class TestCli:
+
+    def test_import(self):
+        seconds, modules = imported_modules("src.cli")
+        assert modules == []
+        assert seconds < IMPORT_TIME_LIMIT
+        # the service parses the input with pandas, the solvers are imported by the backend that solves
+        _, modules = imported_modules("src.opt_service")
+        assert "cvxpy" not in modules and "ortools" not in modules
+
+    def test_help(self):
+        result = subprocess.run([sys.executable, "-m", "src", "--help"], cwd=ROOT_PATH, capture_output=True,
+                                text=True)
+        assert result.returncode == 0
+        assert "optimize" in result.stdout and "benchmark" in result.stdout
+        with pytest.raises(SystemExit) as ex:
+            main(["optimize", PIZZA_PATH, "--backends", "GUROBI"])
+        assert ex.value.code == 2
+
+    def test_ortools_solvers(self):
+        from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+
+        assert solver_backend._ORTOOLS_SOLVERS == PizzaAssortmentOptimizerWtGroupOrtools.SOLVERS
+
+    def test_optimize_validate(self, tmp_path, capsys):
+        # a broken pyarrow, e.g. built against another NumPy, raises an ImportError of its own
+        try:
+            import pyarrow
+        except ImportError:
+            pytest.skip("pyarrow is not installed or cannot be imported")
+        path = str(tmp_path / "result.parquet")
+        assert main(["optimize", PIZZA_PATH, "--backends", "knapsack", "--output", path]) == 0
+        assert "status: optimal" in capsys.readouterr().out
+        assert main(["validate", PIZZA_PATH, "--result", path]) == 0
+        assert "0 violations" in capsys.readouterr().out
+        # a model 1 result joins no groups
+        assert main(["validate", PIZZA_PATH, "--result", path, "--model", "2"]) == 1
+
+        path = str(tmp_path / "result.csv")
+        assert main(["optimize", PIZZA_PATH, "--model", "2", "--backends", "heuristic", "--output", path]) == 0
+        assert main(["validate", PIZZA_PATH, "--result", path, "--model", "2"]) == 0
+        table = OutputProcessor().read(path)
+        table.loc[0, 'count'] += 1
+        table.to_csv(path, index=False)
+        assert main(["validate", PIZZA_PATH, "--result", path, "--model", "2"]) == 1
+        assert "violation" in capsys.readouterr().err
+
+    def test_errors(self, tmp_path, capsys):
+        assert main(["validate", str(tmp_path / "missing.csv")]) == 1
+        assert "error" in capsys.readouterr().err
+        pd.DataFrame({'store': [1], 'type': ['A'], 'price': [10.0]}).to_csv(tmp_path / "pizza.csv", index=False)
+        assert main(["optimize", str(tmp_path / "pizza.csv"), "--backends", "knapsack"]) == 1
+
+    def test_presolve(self, tmp_path, capsys):
+        path = str(tmp_path / "result.csv")
+        assert main(["optimize", PIZZA_PATH, "--backends", "cvxpy-HIGHS", "--presolve", "--output", path]) == 0
+        assert "status: optimal" in capsys.readouterr().out
+        assert main(["validate", PIZZA_PATH, "--result", path]) == 0
+
+    def test_benchmark(self, capsys):
+        assert main(["benchmark", PIZZA_PATH, "--backends", "knapsack", "lagrangian", "--repeat", "2"]) == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert len(lines) == 5
+        assert lines[1].split()[0] == "knapsack"
@@ -1,3 +1,5 @@
+from collections.abc import Mapping
+import numpy as np
 import pytest
 
 from src.common.data_center import DataCenter
@@ -9,8 +11,15 @@ class TestDataCenter:
     def data_center(self):
         return DataCenter()
 
+    @pytest.fixture(scope='class')
+    def loaded_data_center(self):
+        data_center = DataCenter()
+        matrix = np.ones((3, 3))
+        data_center.load([5, 1, 9], matrix, matrix, matrix, matrix)
+        return data_center
+
     def test_stores(self, data_center):
-        assert type(data_center.stores) == dict and len(data_center.stores) == 0
+        assert isinstance(data_center.stores, Mapping) and len(data_center.stores) == 0
 
     def test_pizza_types(self, data_center):
         pizza_types = data_center.pizza_types
@@ -24,3 +33,28 @@ class TestDataCenter:
 
     def test_num_pizza_groups(self, data_center):
         assert data_center.num_pizza_groups > 0
+
+    def test_matrices(self, loaded_data_center):
+        assert loaded_data_center.prices.shape == (3, len(loaded_data_center.pizza_types))
+        assert list(loaded_data_center.stores.keys()) == [5, 1, 9]
+
+    def test_rows(self, loaded_data_center):
+        assert loaded_data_center.row_of(9) == 2
+        assert 4 not in loaded_data_center.stores
+        assert loaded_data_center.rows_of([1, 5, 4]).tolist() == [1, 0, -1]
+
+    def test_duplicated_stores(self):
+        matrix = np.ones((2, 3))
+        with pytest.raises(ValueError):
+            DataCenter().load([1, 1], matrix, matrix, matrix, matrix)
+
+    def test_with_delta(self, loaded_data_center):
+        changed = DataCenter()
+        changed.load([9, 7], np.full((2, 3), 2.0), np.ones((2, 3)), np.ones((2, 3)), np.ones((2, 3)))
+        data_center, previous_rows = loaded_data_center.with_delta(changed, [1])
+        assert data_center.store_ids.tolist() == [5, 9, 7]
+        assert previous_rows.tolist() == [0, -1, -1]
+        assert data_center.prices[:, 0].tolist() == [1.0, 2.0, 2.0]
+        assert loaded_data_center.prices[2, 0] == 1.0
+        with pytest.raises(KeyError):
+            loaded_data_center.with_delta(removed_store_ids=[3])
@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.processor.input_processor import InputProcessor
+from tests.conftest import DATA_PATH
+
+
+class TestInputProcessor:
+
+    @pytest.fixture(scope='class')
+    def pizza(self):
+        return pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+
+    def test_stores(self, pizza):
+        data_center = InputProcessor().process(pizza)
+        assert list(data_center.stores.keys()) == list(pizza['store'].unique())
+
+    def test_values(self, pizza):
+        data_center = InputProcessor().process(pizza)
+        for _, row in pizza.iterrows():
+            store = data_center.stores[row['store']]
+            assert store.prices[row['type']] == row['price']
+            assert store.costs[row['type']] == row['cost']
+            assert store.alpha[row['type']] == row['alpha']
+            assert store.beta[row['type']] == row['beta']
+
+    def test_duplicated_records(self, pizza):
+        duplicate = pizza.iloc[[0]].copy()
+        duplicate['price'] = 99.0
+        data_center = InputProcessor().process(pd.concat([pizza, duplicate]))
+        assert data_center.stores[duplicate['store'].iloc[0]].prices[duplicate['type'].iloc[0]] == 99.0
+
+    def test_missing_records(self, pizza):
+        with pytest.raises(ValueError):
+            InputProcessor().process(pizza.iloc[1:])
+
+    def test_csv_file(self, pizza):
+        path = os.path.join(DATA_PATH, "new_pizza.csv")
+        data_center = InputProcessor(chunk_size=4).process(path)
+        assert data_center.store_ids.tolist() == list(pizza['store'].unique())
+        assert np.array_equal(data_center.prices, InputProcessor().process(pizza).prices)
+
+    def test_chunks(self, pizza):
+        duplicate = pizza.iloc[[0]].copy()
+        duplicate['price'] = 99.0
+        data = pd.concat([pizza, duplicate])
+        chunks = [data.iloc[start:start + 4] for start in range(0, len(data), 4)]
+        chunks[-1] = chunks[-1].astype({'type': 'category'})
+        data_center = InputProcessor().process(iter(chunks))
+        assert data_center.store_ids.tolist() == list(pizza['store'].unique())
+        assert data_center.stores[duplicate['store'].iloc[0]].prices[duplicate['type'].iloc[0]] == 99.0
+        with pytest.raises(ValueError):
+            InputProcessor().process(iter(chunks[1:]))
+
+    def test_arrow(self, pizza, tmp_path):
+        pa = pytest.importorskip('pyarrow')
+        pq = pytest.importorskip('pyarrow.parquet')
+        table = pa.Table.from_pandas(pizza)
+        expected = InputProcessor().process(pizza).prices
+        assert np.array_equal(InputProcessor(chunk_size=5).process(table).prices, expected)
+
+        pq.write_table(table, tmp_path / "pizza.parquet", row_group_size=5)
+        with pa.OSFile(str(tmp_path / "pizza.arrow"), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table, max_chunksize=5)
+        for name in ("pizza.parquet", "pizza.arrow"):
+            data_center = InputProcessor(chunk_size=5).process(tmp_path / name)
+            assert data_center.store_ids.tolist() == list(pizza['store'].unique())
+            assert np.array_equal(data_center.prices, expected)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.processor.input_processor import InputProcessor
+from src.utils.instance_generator import generate_instance, pizza_data, pizza_type_names
+from src.utils.validator import Validator
+
+
+class TestInstanceGenerator:
+
+    def test_seed(self):
+        data_center = generate_instance(50, seed=3)
+        assert data_center.store_ids.tolist() == list(range(1, 51))
+        assert np.array_equal(generate_instance(50, seed=3).beta, data_center.beta)
+        assert not np.array_equal(generate_instance(50, seed=4).beta, data_center.beta)
+        assert ((data_center.prices >= 10) & (data_center.prices <= 15)).all()
+
+    def test_budget_tightness(self):
+        loose = generate_instance(20, budget_tightness=1.0)
+        counts = np.full((20, 3), loose.max_pizza_count // 3)
+        assert (counts * loose.costs).sum() <= loose.max_budget
+        assert generate_instance(20, budget_tightness=0.2).max_budget == pytest.approx(0.2 * loose.max_budget)
+
+    def test_profiles(self):
+        data_center = generate_instance(100, num_profiles=4, seed=5)
+        assert data_center.num_stores == 100
+        assert len(np.unique(np.hstack((data_center.prices, data_center.alpha)), axis=0)) <= 4
+
+    def test_pizza_types(self):
+        assert pizza_type_names(2) == ["A", "B"]
+        assert pizza_type_names(30)[-1] == "T29"
+        data_center = generate_instance(30, num_pizza_types=5, num_pizza_groups=2, seed=1)
+        assert data_center.pizza_types == ["A", "B", "C", "D", "E"]
+
+        knapsack = PizzaAssortmentOptimizerKnapsack()
+        knapsack.optimize(data_center)
+        assert Validator(data_center).check_model1(knapsack.optimal_count_matrix) == []
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        heuristic.optimize(data_center)
+        assert Validator(data_center).check_model2(heuristic.optimal_count_matrix,
+                                                   heuristic.optimal_assign_matrix) == []
+
+    def test_pizza_data(self):
+        data_center = generate_instance(10)
+        parsed = InputProcessor().process(pizza_data(data_center))
+        assert np.array_equal(parsed.store_ids, data_center.store_ids)
+        assert np.array_equal(parsed.alpha, data_center.alpha)
@@ -0,0 +1,38 @@
+import pytest
+
+from src.utils.metrics import Metrics, add_time, record, timed
+
+
+class TestMetrics:
+
+    def test_phases(self):
+        metrics = Metrics()
+        with metrics.activate():
+            for _ in range(2):
+                with timed("build"):
+                    pass
+            add_time("solve", 1.5)
+            add_time("solve", None)
+            record(status="optimal", objective=3.0)
+        assert set(metrics.phases) == {"build", "solve"}
+        assert metrics.phases["solve"] == pytest.approx(1.5)
+        assert metrics.stats == {'status': "optimal", 'objective': 3.0}
+
+    def test_inactive(self):
+        metrics = Metrics()
+        with metrics.activate():
+            pass
+        # reports outside of an active context go nowhere
+        with timed("build"):
+            add_time("solve", 1.0)
+            record(status="optimal")
+        assert metrics.phases == {} and metrics.stats == {}
+
+    def test_nested(self):
+        outer, inner = Metrics(), Metrics()
+        with outer.activate():
+            with inner.activate():
+                add_time("solve", 1.0)
+            add_time("build", 2.0)
+        assert inner.phases == {"solve": 1.0}
+        assert outer.phases == {"build": 2.0}
@@ -7,7 +7,7 @@ from src.opt_service import OptService
 class TestModel1:
 
     def test_inst_1(self):
-        data_path = "/Users/klian/dev/learn/python/kohls-opt-assessment/tests/data"
+        data_path = os.path.join(os.path.dirname(__file__), "data")
         pizza_file = os.path.join(data_path, "new_pizza.csv")
         pizza = pd.read_csv(pizza_file)
 
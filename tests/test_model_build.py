@@ -0,0 +1,44 @@
+import os
+import cvxpy as cpy
+import pandas as pd
+import pytest
+
+from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
+from src.model.pizza_assortment_optimizer_group import PizzaAssortmentOptimizerWtGroup
+from src.processor.input_processor import InputProcessor
+from tests.conftest import DATA_PATH
+
+
+def relaxed_value(problem: cpy.Problem) -> float:
+    for var in problem.variables():
+        var.attributes['integer'] = False
+    relaxed = cpy.Problem(problem.objective, problem.constraints)
+    relaxed.solve(solver=cpy.SCS, eps=1e-7, max_iters=100_000)
+    return relaxed.value
+
+
+class TestModelBuild:
+
+    @pytest.fixture(scope='class')
+    def data_center(self):
+        return InputProcessor().process(pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv")))
+
+    @pytest.mark.parametrize('optimizer_cls', [PizzaAssortmentOptimizer, PizzaAssortmentOptimizerWtGroup])
+    def test_vectorized_build(self, data_center, optimizer_cls):
+        problem = optimizer_cls("vectorized").build(data_center)
+        assert problem.is_dcp()
+        assert (data_center.num_stores, len(data_center.pizza_types)) in {var.shape for var in problem.variables()}
+
+    def test_rebuild(self, data_center):
+        optimizer = PizzaAssortmentOptimizer("vectorized")
+        num_constraints = len(optimizer.build(data_center).constraints)
+        assert len(optimizer.build(data_center).constraints) == num_constraints
+
+    def test_invalid_build_mode(self):
+        with pytest.raises(ValueError):
+            PizzaAssortmentOptimizer("sparse")
+
+    def test_same_relaxation(self, data_center):
+        vectorized = relaxed_value(PizzaAssortmentOptimizer("vectorized").build(data_center))
+        scalar = relaxed_value(PizzaAssortmentOptimizer("scalar").build(data_center))
+        assert vectorized == pytest.approx(scalar, rel=1e-4)
@@ -0,0 +1,97 @@
+import itertools
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model.pizza_assortment_optimizer_group_decomposition import \
+    PizzaAssortmentOptimizerWtGroupDecomposition, _solve_type
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+from src.opt_service import OptService
+from src.utils.instance_generator import generate_instance
+from src.utils.validator import Validator
+from tests.conftest import DATA_PATH
+
+
+class TestModelGroupDecomposition:
+
+    def test_solve_type(self):
+        rng = np.random.default_rng(0)
+        net = rng.normal(size=(7, 6))
+        value, levels, groups = _solve_type(net, 3)
+        best = max(net[:, list(combo)].max(axis=1).sum()
+                   for combo in itertools.combinations_with_replacement(range(6), 3))
+        assert value == pytest.approx(best)
+        assert net[np.arange(7), levels[groups]].sum() == pytest.approx(value)
+
+    @pytest.mark.parametrize("num_stores, budget_per_store", [(10, 50), (200, 50), (200, 1_000)])
+    def test_feasible_solution(self, num_stores, budget_per_store):
+        data_center = generate_instance(num_stores, seed=num_stores).with_max_budget(num_stores * budget_per_store)
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic(exact_relaxation=False)
+        heuristic.solve(data_center)
+        decomposition = PizzaAssortmentOptimizerWtGroupDecomposition(num_workers=1)
+        counts, assign, levels = decomposition.solve(data_center)
+        assert decomposition.status == "feasible"
+        assert decomposition.maximal_profits >= heuristic.maximal_profits - 1e-6
+        # the decomposition bound is never weaker than the model 1 bound
+        assert decomposition.maximal_profits <= decomposition.upper_bound + 1e-6
+        assert decomposition.upper_bound <= heuristic.upper_bound + 1e-6
+        bounds = [bound for bound, _ in decomposition.bound_history]
+        assert bounds == sorted(bounds, reverse=True)
+        assert (assign.sum(axis=0) >= 2).all()
+        assert (counts == (assign * levels[None, :, :]).sum(axis=2)).all()
+        error_msg = Validator(data_center).validate_model2_solution(decomposition.optimal_assortment,
+                                                                    decomposition.optimal_assign_store_type_group)
+        assert len(error_msg) < 1
+
+    def test_tighter_bound(self):
+        data_center = generate_instance(200, seed=200).with_max_budget(200 * 50)
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic(exact_relaxation=False)
+        heuristic.solve(data_center)
+        decomposition = PizzaAssortmentOptimizerWtGroupDecomposition(num_workers=1)
+        decomposition.solve(data_center)
+        assert decomposition.gap < heuristic.gap / 2
+
+    def test_valid_bound(self):
+        data_center = generate_instance(8, seed=2).with_max_budget(8 * 50)
+        # costs in cents scale to integers without rounding, so that CP-SAT proves optimality
+        data_center.costs[:] = data_center.costs.round(2)
+        optimizer = PizzaAssortmentOptimizerWtGroupOrtools(time_limit=60.0, num_workers=1)
+        optimizer.optimize(data_center)
+        assert optimizer.status == "optimal"
+        decomposition = PizzaAssortmentOptimizerWtGroupDecomposition(num_workers=1)
+        decomposition.solve(data_center)
+        assert decomposition.upper_bound >= optimizer.maximal_profits - 1e-6
+
+    def test_worker_processes(self):
+        data_center = generate_instance(100, seed=5).with_max_budget(100 * 50)
+        serial = PizzaAssortmentOptimizerWtGroupDecomposition(max_iterations=10, num_workers=1)
+        serial.solve(data_center)
+        parallel = PizzaAssortmentOptimizerWtGroupDecomposition(max_iterations=10, num_workers=3)
+        parallel.solve(data_center)
+        assert parallel.upper_bound == pytest.approx(serial.upper_bound)
+        assert parallel.maximal_profits == pytest.approx(serial.maximal_profits)
+
+    def test_reoptimize(self):
+        data_center = generate_instance(100, seed=6).with_max_budget(100 * 50)
+        decomposition = PizzaAssortmentOptimizerWtGroupDecomposition(max_iterations=10, num_workers=1)
+        decomposition.solve(data_center)
+        changed = generate_instance(3, seed=7)
+        changed.load([5, 17, 101], changed.prices, changed.costs, changed.alpha, changed.beta)
+        data_center, previous_rows = data_center.with_delta(changed, [8])
+        decomposition.reoptimize(data_center, previous_rows)
+        cold = PizzaAssortmentOptimizerWtGroupDecomposition(max_iterations=10, num_workers=1)
+        cold.solve(data_center)
+        # the decomposition solves again rather than falling back to the repair of the heuristic
+        assert decomposition.upper_bound == pytest.approx(cold.upper_bound)
+        assert decomposition.maximal_profits == pytest.approx(cold.maximal_profits)
+        assert decomposition.num_iterations == cold.num_iterations
+
+    def test_opt_service(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        opt_service = OptService(model2_backends="decomposition")
+        opt_assortment, error_msg = opt_service.optimize(pizza, True)
+        assert len(error_msg) < 1
+        assert opt_service.backend == "decomposition"
+        assert len(opt_assortment) == 10
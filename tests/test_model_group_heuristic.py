@@ -0,0 +1,116 @@
+import itertools
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.common.data_center import DataCenter
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic, \
+    sort_groups
+from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+from src.model.profit import tabulate_profits
+from src.opt_service import OptService
+from src.processor.input_processor import InputProcessor
+from src.utils.instance_generator import generate_instance
+from src.utils.validator import Validator
+from tests.conftest import DATA_PATH
+
+
+class TestModelGroupHeuristic:
+
+    @pytest.mark.parametrize("num_stores, budget_per_store", [(6, 50), (10, 1_000), (200, 50), (200, 1_000)])
+    def test_feasible_solution(self, num_stores, budget_per_store):
+        data_center = generate_instance(num_stores, seed=num_stores).with_max_budget(num_stores * budget_per_store)
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        counts, assign, levels = heuristic.solve(data_center)
+        assert heuristic.status == "feasible"
+        assert 0 <= heuristic.gap < 0.2
+        assert heuristic.maximal_profits <= heuristic.upper_bound + 1e-6
+        assert (assign.sum(axis=0) >= 2).all()
+        assert (counts == (assign * levels[None, :, :]).sum(axis=2)).all()
+        validator = Validator(data_center)
+        error_msg = validator.validate_model2_solution(heuristic.optimal_assortment,
+                                                       heuristic.optimal_assign_store_type_group)
+        assert len(error_msg) < 1
+
+    def test_many_pizza_types(self):
+        # the count vectors of 8 pizza types are too many to enumerate for the relaxation
+        data_center = generate_instance(200, 8)
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        heuristic.solve(data_center)
+        assert heuristic.maximal_profits <= heuristic.upper_bound + 1e-6
+        error_msg = Validator(data_center).validate_model2_solution(heuristic.optimal_assortment,
+                                                                    heuristic.optimal_assign_store_type_group)
+        assert len(error_msg) < 1
+
+    def test_too_few_stores(self):
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        assert heuristic.solve(generate_instance(5, seed=0).with_max_budget(1_000)) is None
+        assert heuristic.status == "infeasible"
+
+    def test_cluster_stores(self):
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        heuristic._data_center = DataCenter()
+        groups, levels = heuristic._cluster_stores(np.array([0, 0, 1, 10, 11, 10, 20, 19]))
+        assert groups.tolist() == [0, 0, 0, 1, 1, 1, 2, 2]
+        assert levels.tolist() == [0, 10, 20]
+        # a cluster of equal counts is split into groups at the same level
+        groups, levels = heuristic._cluster_stores(np.full(6, 7))
+        assert np.bincount(groups).tolist() == [2, 2, 2]
+        assert levels.tolist() == [7, 7, 7]
+
+    def test_sort_groups(self):
+        groups, levels = np.array([[0, 2], [1, 0], [2, 1]]), np.array([[5, 3, 8], [4, 9, 1]])
+        counts = np.take_along_axis(levels.T, groups, axis=0)
+        sort_groups(groups, levels)
+        assert levels.tolist() == [[3, 5, 8], [1, 4, 9]]
+        assert (np.take_along_axis(levels.T, groups, axis=0) == counts).all()
+
+    def test_unfilled_group(self):
+        # 3 stores cannot fill 2 groups of at least 2 stores
+        data_center = DataCenter(max_pizza_count=5, num_pizza_groups=2, pizza_types=['A'])
+        data_center.load(np.arange(3), np.full((3, 1), 10.0), np.full((3, 1), 4.0), np.full((3, 1), 2.0),
+                         np.full((3, 1), 0.5))
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        heuristic._data_center = data_center
+        levels = np.array([[3, 4]])
+        combos = np.array(list(itertools.product(range(2), repeat=1)))
+        assert heuristic._assign_stores(levels, tabulate_profits(data_center), combos) is None
+        # the group that cannot be filled keeps its level
+        assert levels[0, 1] == 4
+
+    def test_warm_start(self):
+        data_center = generate_instance(10, seed=1).with_max_budget(500)
+        optimizer = PizzaAssortmentOptimizerWtGroupOrtools(time_limit=1.0)
+        optimizer.optimize(data_center)
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        heuristic.solve(data_center)
+        assert optimizer.maximal_profits >= heuristic.maximal_profits - 1e-6
+
+    def test_reoptimize(self):
+        data_center = generate_instance(200, seed=3).with_max_budget(200 * 50)
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        _, assign, _ = heuristic.solve(data_center)
+        changed = generate_instance(3, seed=4)
+        changed.load([5, 17, 201], changed.prices, changed.costs, changed.alpha, changed.beta)
+        data_center, previous_rows = data_center.with_delta(changed, [8])
+        _, new_assign, _ = heuristic.reoptimize(data_center, previous_rows)
+        assert heuristic.status == "feasible"
+        assert heuristic.maximal_profits <= heuristic.upper_bound + 1e-6
+        # the unchanged stores keep sharing their groups
+        kept = previous_rows >= 0
+        groups, new_groups = assign.argmax(axis=2)[previous_rows[kept]], new_assign.argmax(axis=2)[kept]
+        for col in range(groups.shape[1]):
+            assert ((groups[:, None, col] == groups[None, :, col]) ==
+                    (new_groups[:, None, col] == new_groups[None, :, col])).all()
+        error_msg = Validator(data_center).validate_model2_solution(heuristic.optimal_assortment,
+                                                                    heuristic.optimal_assign_store_type_group)
+        assert len(error_msg) < 1
+
+    def test_opt_service(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        opt_service = OptService(model2_backends="heuristic")
+        opt_assortment, error_msg = opt_service.optimize(pizza, True)
+        assert len(error_msg) < 1
+        assert opt_service.backend == "heuristic"
+        assert len(opt_assortment) == 10
@@ -0,0 +1,78 @@
+import os
+import pandas as pd
+import pytest
+
+from src.model.pizza_assortment_optimizer_group_heuristic import PizzaAssortmentOptimizerWtGroupHeuristic
+from src.model.pizza_assortment_optimizer_group_lns import PizzaAssortmentOptimizerWtGroupLns
+from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+from src.opt_service import OptService
+from src.utils.instance_generator import generate_instance
+from src.utils.validator import Validator
+from tests.conftest import DATA_PATH
+
+
+class TestModelGroupLns:
+
+    @pytest.mark.parametrize("num_stores, budget_per_store", [(10, 50), (200, 50), (200, 1_000)])
+    def test_feasible_solution(self, num_stores, budget_per_store):
+        data_center = generate_instance(num_stores, seed=num_stores).with_max_budget(num_stores * budget_per_store)
+        heuristic = PizzaAssortmentOptimizerWtGroupHeuristic()
+        heuristic.solve(data_center)
+        lns = PizzaAssortmentOptimizerWtGroupLns(time_limit=3.0, sub_time_limit=0.5, num_workers=1)
+        counts, assign, levels = lns.solve(data_center)
+        assert lns.status in ("feasible", "optimal")
+        assert lns.maximal_profits >= heuristic.maximal_profits - 1e-6
+        assert lns.maximal_profits <= lns.upper_bound + 1e-6
+        assert lns.num_iterations > 0
+        # the incumbent only improves
+        objectives = [objective for _, objective in lns.history]
+        assert objectives == sorted(objectives)
+        assert objectives[-1] == pytest.approx(lns.maximal_profits)
+        assert (assign.sum(axis=0) >= 2).all()
+        assert (counts == (assign * levels[None, :, :]).sum(axis=2)).all()
+        error_msg = Validator(data_center).validate_model2_solution(lns.optimal_assortment,
+                                                                    lns.optimal_assign_store_type_group)
+        assert len(error_msg) < 1
+
+    def test_whole_chain(self):
+        # a neighbourhood that frees every store is the full MIP, solved to optimality
+        data_center = generate_instance(8, seed=2).with_max_budget(8 * 50)
+        # costs in cents scale to integers without rounding
+        data_center.costs[:] = data_center.costs.round(2)
+        lns = PizzaAssortmentOptimizerWtGroupLns(time_limit=60.0, neighbourhood_size=8, sub_time_limit=60.0,
+                                                 num_workers=1)
+        lns.solve(data_center)
+        optimizer = PizzaAssortmentOptimizerWtGroupOrtools(time_limit=60.0, num_workers=1)
+        optimizer.optimize(data_center)
+        assert optimizer.status == "optimal"
+        assert lns.status == "optimal"
+        assert lns.maximal_profits == pytest.approx(optimizer.maximal_profits, rel=1e-4)
+
+    def test_progress_callback(self):
+        data_center = generate_instance(10, seed=10).with_max_budget(10 * 50)
+        progress = []
+
+        def stop_on_improvement(elapsed, objective, upper_bound):
+            progress.append((elapsed, objective, upper_bound))
+            return True
+
+        lns = PizzaAssortmentOptimizerWtGroupLns(time_limit=30.0, sub_time_limit=0.5, num_workers=1,
+                                                 progress_callback=stop_on_improvement)
+        lns.solve(data_center)
+        assert len(progress) == 1
+        assert lns.solve_time < 30.0
+        assert progress[0][1] == pytest.approx(lns.maximal_profits)
+        assert progress[0][2] == pytest.approx(lns.upper_bound)
+
+    def test_too_few_stores(self):
+        lns = PizzaAssortmentOptimizerWtGroupLns(time_limit=1.0)
+        assert lns.solve(generate_instance(5, seed=0).with_max_budget(1_000)) is None
+        assert lns.status == "infeasible"
+
+    def test_opt_service(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        opt_service = OptService(model2_backends="lns", time_limits={'lns': 2.0})
+        opt_assortment, error_msg = opt_service.optimize(pizza, True)
+        assert len(error_msg) < 1
+        assert opt_service.backend == "lns"
+        assert len(opt_assortment) == 10
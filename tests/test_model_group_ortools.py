@@ -0,0 +1,49 @@
+import pytest
+
+from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+from src.opt_service import OptService
+from src.processor.input_processor import InputProcessor
+from src.utils.validator import Validator
+
+class TestModelGroupOrtools:
+
+    def test_invalid_solver(self):
+        with pytest.raises(ValueError):
+            PizzaAssortmentOptimizerWtGroupOrtools("GUROBI")
+        with pytest.raises(ValueError):
+            OptService(model2_backends="GUROBI")
+
+    @pytest.mark.parametrize("solver", ["CP-SAT", "SCIP"])
+    def test_feasible_solution(self, solver, small_pizza_data):
+        data_center = InputProcessor().process(small_pizza_data)
+        optimizer = PizzaAssortmentOptimizerWtGroupOrtools(solver, time_limit=10.0)
+        optimizer.optimize(data_center)
+        assert optimizer.status in ("optimal", "feasible")
+        assert optimizer.maximal_profits <= optimizer.best_bound + 1e-6
+        validator = Validator(data_center)
+        error_msg = validator.validate_model2_solution(optimizer.optimal_assortment,
+                                                       optimizer.optimal_assign_store_type_group)
+        assert len(error_msg) < 1
+
+    def test_cp_sat_optimal(self, small_pizza_data):
+        # costs in cents scale to integers without rounding
+        small_pizza_data['cost'] = small_pizza_data['cost'].round(2)
+        data_center = InputProcessor().process(small_pizza_data)
+        optimizer = PizzaAssortmentOptimizerWtGroupOrtools("CP-SAT", time_limit=30.0)
+        optimizer.optimize(data_center)
+        assert optimizer.status == "optimal"
+        assert optimizer.maximal_profits == pytest.approx(optimizer.best_bound, rel=1e-6)
+
+    def test_cp_sat_rounded_costs(self, small_pizza_data):
+        # the rounded costs cut off solutions, so the proof of CP-SAT does not hold for the original problem
+        data_center = InputProcessor().process(small_pizza_data)
+        optimizer = PizzaAssortmentOptimizerWtGroupOrtools("CP-SAT", time_limit=30.0)
+        optimizer.optimize(data_center)
+        assert optimizer.status == "feasible"
+        assert optimizer.maximal_profits <= optimizer.best_bound + 1e-6
+
+    def test_opt_service(self, small_pizza_data):
+        opt_service = OptService(model2_backends="ortools-CP-SAT")
+        opt_assortment, error_msg = opt_service.optimize(small_pizza_data, True)
+        assert len(error_msg) < 1
+        assert len(opt_assortment) == 6
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from src.model.bounds import group_level_bounds, store_count_bounds
+from src.model.pizza_assortment_optimizer_group import PizzaAssortmentOptimizerWtGroup
+from src.model.pizza_assortment_optimizer_group_ortools import PizzaAssortmentOptimizerWtGroupOrtools
+from src.processor.input_processor import InputProcessor
+from src.utils.validator import Validator
+
+class TestModelGroupStrengthen:
+
+    def test_bounds(self, small_pizza_data):
+        data_center = InputProcessor().process(small_pizza_data)
+        count_bounds = store_count_bounds(data_center)
+        assert count_bounds.shape == data_center.costs.shape
+        assert np.all(count_bounds >= 0)
+        assert np.all(count_bounds <= data_center.max_pizza_count)
+        assert np.all(count_bounds * data_center.costs <= data_center.max_budget + 1e-6)
+        level_bounds = group_level_bounds(np.array([[1, 5], [4, 2], [3, 7]]))
+        assert level_bounds.tolist() == [3, 5]
+        assert group_level_bounds(np.array([[1, 5]])).tolist() == [1, 5]
+
+    def test_scalar_mode(self):
+        with pytest.raises(ValueError):
+            PizzaAssortmentOptimizerWtGroup(build_mode="scalar", strengthen=True)
+
+    def test_cvxpy_same_objective(self, small_pizza_data):
+        data_center = InputProcessor().process(small_pizza_data)
+        profits = []
+        for strengthen in (False, True):
+            optimizer = PizzaAssortmentOptimizerWtGroup(solver="HIGHS", time_limit=60.0, warm_start=False,
+                                                        strengthen=strengthen)
+            optimizer.optimize(data_center)
+            assert optimizer.status == "optimal"
+            profits.append(optimizer.maximal_profits)
+        assert profits[1] == pytest.approx(profits[0], rel=1e-6)
+
+    @pytest.mark.parametrize("solver", ["CP-SAT", "SCIP"])
+    def test_ortools_feasible_solution(self, solver, small_pizza_data):
+        data_center = InputProcessor().process(small_pizza_data)
+        optimizer = PizzaAssortmentOptimizerWtGroupOrtools(solver, time_limit=10.0, strengthen=True)
+        optimizer.optimize(data_center)
+        assert optimizer.status in ("optimal", "feasible")
+        assert optimizer.node_count is not None
+        error_msg = Validator(data_center).validate_model2_solution(optimizer.optimal_assortment,
+                                                                    optimizer.optimal_assign_store_type_group)
+        assert len(error_msg) < 1
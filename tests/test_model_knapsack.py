@@ -0,0 +1,115 @@
+import os
+from math import comb
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.common.data_center import DataCenter
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack, enumerate_count_vectors
+from src.model.profit import tabulate_profits
+from src.model.solve_control import SolveControl
+from src.opt_service import OptService
+from src.utils.instance_generator import generate_instance
+from tests.conftest import DATA_PATH
+
+
+def brute_force_profit(data_center: DataCenter) -> float:
+    vectors = enumerate_count_vectors(len(data_center.pizza_types), data_center.max_pizza_count)
+    table = tabulate_profits(data_center)
+    total_profit, total_cost = np.zeros(1), np.zeros(1)
+    for row in range(data_center.num_stores):
+        profit = sum(table[row, col, vectors[:, col]] for col in range(len(data_center.pizza_types)))
+        total_profit = (total_profit[:, None] + profit[None, :]).ravel()
+        total_cost = (total_cost[:, None] + (vectors @ data_center.costs[row])[None, :]).ravel()
+    return total_profit[total_cost <= data_center.max_budget].max()
+
+
+def used_budget(data_center: DataCenter, assortment) -> float:
+    return sum(count * data_center.stores[store_id].costs[pizza_type]
+               for store_id, counts in assortment.items()
+               for pizza_type, count in counts.items())
+
+
+class TestModelKnapsack:
+
+    def test_count_vectors(self):
+        vectors = enumerate_count_vectors(3, 20)
+        assert len(vectors) == comb(23, 3)
+        assert vectors.sum(axis=1).max() == 20 and vectors.min() == 0
+        assert len({tuple(vector) for vector in vectors.tolist()}) == len(vectors)
+
+    @pytest.mark.parametrize('seed', range(10))
+    def test_binding_budget(self, seed):
+        data_center = generate_instance(3, max_pizza_count=4, seed=seed).with_max_budget(10.0 + 5 * seed)
+        optimizer = PizzaAssortmentOptimizerKnapsack()
+        optimizer.optimize(data_center)
+        assert optimizer.maximal_profits == pytest.approx(brute_force_profit(data_center))
+        assert used_budget(data_center, optimizer.optimal_assortment) <= data_center.max_budget
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_budget_frontier(self, seed):
+        data_center = generate_instance(3, max_pizza_count=4, seed=seed).with_max_budget(0.0)
+        budgets = [30.0, 5.0, 1_000.0, 15.0]
+        optimizer = PizzaAssortmentOptimizerKnapsack()
+        profits = optimizer.optimize_frontier(data_center, budgets)
+        for budget, profit, assortment in zip(budgets, profits, optimizer.frontier_assortments):
+            assert profit == pytest.approx(brute_force_profit(data_center.with_max_budget(budget)))
+            assert used_budget(data_center, assortment) <= budget
+        assert np.all(optimizer.frontier_upper_bounds >= profits - 1e-6)
+
+    def test_large_binding_budget(self):
+        data_center = generate_instance(100, seed=1).with_max_budget(5_000)
+        optimizer = PizzaAssortmentOptimizerKnapsack()
+        optimizer.optimize(data_center)
+        assert used_budget(data_center, optimizer.optimal_assortment) <= data_center.max_budget
+        assert sum(optimizer.optimal_assortment[1].values()) <= data_center.max_pizza_count
+
+    def test_tight_budget(self):
+        # the states of the dynamic program must not exceed the budget by the tolerance on the profit
+        data_center = generate_instance(300, budget_tightness=0.3, seed=39)
+        optimizer = PizzaAssortmentOptimizerKnapsack()
+        optimizer.optimize(data_center)
+        assert (optimizer.optimal_count_matrix * data_center.costs).sum() <= data_center.max_budget
+
+    @pytest.mark.parametrize('limits', [{'max_states': 1}, {'time_limit': 0.0}])
+    def test_unfinished_dynamic_program(self, limits):
+        # the exact pass stops at its state cap or time limit and keeps its incumbent and the Lagrangian bound
+        data_center = generate_instance(300, budget_tightness=0.3, seed=1)
+        optimizer = PizzaAssortmentOptimizerKnapsack(**limits)
+        optimizer.optimize(data_center)
+        exact = PizzaAssortmentOptimizerKnapsack()
+        exact.optimize(data_center)
+        assert optimizer.status == "feasible" and exact.status == "optimal"
+        assert (optimizer.optimal_count_matrix * data_center.costs).sum() <= data_center.max_budget
+        assert optimizer.maximal_profits <= exact.maximal_profits + 1e-6
+        assert optimizer.upper_bound >= exact.maximal_profits - 1e-6
+
+    def test_deadline(self):
+        # the deadline of the request cuts the time limit of the optimizer
+        data_center = generate_instance(300, budget_tightness=0.3, seed=1)
+        optimizer = PizzaAssortmentOptimizerKnapsack(time_limit=20.0)
+        with SolveControl(deadline=0.0).activate():
+            optimizer.optimize(data_center)
+        assert optimizer.status == "feasible"
+        assert (optimizer.optimal_count_matrix * data_center.costs).sum() <= data_center.max_budget
+
+    @pytest.mark.parametrize('seed', range(3))
+    def test_reoptimize(self, seed):
+        data_center = generate_instance(100, seed=seed).with_max_budget(5_000)
+        optimizer = PizzaAssortmentOptimizerKnapsack()
+        optimizer.solve(data_center)
+        changed = generate_instance(3, seed=seed + 10)
+        changed.load([7, 42, 101], changed.prices, changed.costs, changed.alpha, changed.beta)
+        data_center, previous_rows = data_center.with_delta(changed, [3, 11])
+        optimizer.reoptimize(data_center, previous_rows)
+        cold = PizzaAssortmentOptimizerKnapsack()
+        cold.solve(data_center)
+        assert optimizer.maximal_profits == pytest.approx(cold.maximal_profits)
+        assert used_budget(data_center, optimizer.optimal_assortment) <= data_center.max_budget + 1e-6
+        assert list(optimizer.optimal_assortment) == data_center.store_ids.tolist()
+
+    def test_opt_service(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        opt_assortment, error_msg = OptService("knapsack").optimize(pizza, False)
+        assert len(error_msg) < 1
+        assert (opt_assortment.sum(axis=1) == 20).all()
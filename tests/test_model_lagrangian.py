@@ -0,0 +1,58 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.model.pizza_assortment_optimizer_lagrangian import PizzaAssortmentOptimizerLagrangian
+from src.opt_service import OptService
+from src.utils.instance_generator import generate_instance
+from tests.conftest import DATA_PATH
+
+
+class TestModelLagrangian:
+
+    @pytest.mark.parametrize("num_stores, budget_per_store", [(5, 20), (50, 50), (200, 30), (200, 1_000)])
+    def test_bounds(self, num_stores, budget_per_store):
+        data_center = generate_instance(num_stores, seed=num_stores).with_max_budget(num_stores * budget_per_store)
+        optimizer = PizzaAssortmentOptimizerLagrangian()
+        counts = optimizer.solve(data_center)
+        knapsack = PizzaAssortmentOptimizerKnapsack()
+        knapsack.solve(data_center)
+        assert optimizer.maximal_profits <= knapsack.maximal_profits + 1e-6
+        assert optimizer.upper_bound >= knapsack.maximal_profits - 1e-6
+        assert 0 <= optimizer.gap < 0.01
+        assert (counts * data_center.costs).sum() <= data_center.max_budget + 1e-6
+        assert counts.sum(axis=1).max() <= data_center.max_pizza_count
+
+    def test_linear_profit(self):
+        # beta = 1 makes all the units of a pizza type tie, the stores at capacity still take max_pizza_count units
+        data_center = generate_instance(100, beta_range=(0.1, 0.1), seed=0).with_max_budget(100 * 80)
+        data_center.load(data_center.store_ids, data_center.prices, data_center.costs, data_center.alpha,
+                         np.ones_like(data_center.beta))
+        counts = PizzaAssortmentOptimizerLagrangian().solve(data_center)
+        assert counts.sum(axis=1).max() <= data_center.max_pizza_count
+        assert (counts * data_center.costs).sum() <= data_center.max_budget + 1e-6
+
+    def test_large_chain(self):
+        data_center = generate_instance(100_000, seed=1).with_max_budget(100_000 * 50)
+        optimizer = PizzaAssortmentOptimizerLagrangian()
+        counts = optimizer.solve(data_center)
+        assert optimizer.budget_multiplier > 0
+        assert optimizer.gap < 1e-5
+        assert (counts * data_center.costs).sum() <= data_center.max_budget + 1e-6
+
+    def test_convex_profit(self):
+        data_center = generate_instance(5, seed=0).with_max_budget(100)
+        data_center.load(data_center.store_ids, data_center.prices, data_center.costs, data_center.alpha,
+                         np.full((5, 3), 1.5))
+        with pytest.raises(ValueError):
+            PizzaAssortmentOptimizerLagrangian().solve(data_center)
+
+    def test_opt_service(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        opt_service = OptService("lagrangian")
+        opt_assortment, error_msg = opt_service.optimize(pizza, False)
+        assert len(error_msg) < 1
+        expected, _ = OptService("knapsack").optimize(pizza, False)
+        pd.testing.assert_frame_equal(opt_assortment, expected)
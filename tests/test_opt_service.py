@@ -0,0 +1,278 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.opt_service import OptService, _Call
+from src.processor.input_processor import InputProcessor
+from src.utils.instance_generator import generate_instance, pizza_data as instance_data
+from src.utils.solution_cache import SolutionCache
+from tests.conftest import DATA_PATH
+
+
+def pizza_data(num_stores: int) -> pd.DataFrame:
+    pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+    return pizza[pizza['store'].isin(pizza['store'].unique()[:num_stores])]
+
+
+class TestOptService:
+
+    def test_optimize_many(self):
+        instances = [pizza_data(num_stores) for num_stores in (10, 4, 7)]
+        # the second instance misses a column and fails on its own
+        instances.insert(1, instances[0].drop(columns=['cost']))
+        opt_service = OptService()
+        expected = [opt_service.optimize(instance, False) for instance in instances[:1] + instances[2:]]
+        for max_workers in (1, 2):
+            results = opt_service.optimize_many(instances, False, max_workers=max_workers)
+            assert len(results) == 4
+            assert len(results[1][0]) == 0
+            assert 'task' in results[1][1]
+            for (opt_assortment, error_msg), (expected_assortment, _) in zip(results[:1] + results[2:], expected):
+                assert len(error_msg) < 1
+                pd.testing.assert_frame_equal(opt_assortment, expected_assortment)
+
+    def test_optimize_many_settings(self):
+        reports = []
+        solution_cache = SolutionCache()
+        opt_service = OptService(solution_cache=solution_cache, metrics_sink=reports.append)
+        instances = [pizza_data(5), pizza_data(5)]
+        # the instances solved in this process share the cache and report to the sink
+        results = opt_service.optimize_many(instances, False, max_workers=1, deadline=10.0)
+        assert all(len(error_msg) < 1 for _, error_msg in results)
+        assert solution_cache.hits == 1 and len(reports) == 2
+        results = opt_service.optimize_many(instances, False, max_workers=2, deadline=10.0)
+        assert all(len(error_msg) < 1 for _, error_msg in results)
+
+    def test_optimize_many_model2(self):
+        opt_service = OptService(model2_backends="heuristic")
+        results = opt_service.optimize_many([pizza_data(6), pizza_data(8)], True, max_workers=2)
+        assert [len(opt_assortment) for opt_assortment, _ in results] == [6, 8]
+        assert all(len(error_msg) < 1 for _, error_msg in results)
+
+    def test_optimize_frontier(self):
+        budgets = [400.0, 200.0, 300.0]
+        opt_service = OptService()
+        frontier, error_msg = opt_service.optimize_frontier(pizza_data(10), False, budgets)
+        assert len(error_msg) < 1
+        assert opt_service.backend == "knapsack"
+        assert frontier.index.tolist() == budgets
+        data_center = InputProcessor().process(pizza_data(10))
+        for budget, profit, opt_assortment in zip(budgets, frontier['profit'], opt_service.frontier_assortments):
+            optimizer = PizzaAssortmentOptimizerKnapsack()
+            optimizer.solve(data_center.with_max_budget(budget))
+            assert profit == pytest.approx(optimizer.maximal_profits)
+            assert len(opt_assortment) == 10
+        assert np.all(np.diff(frontier.loc[sorted(budgets), 'profit']) >= 0)
+
+    def test_optimize_frontier_model2(self):
+        budgets = [150.0, 100.0]
+        # the heuristic has no budget frontier, so the service falls back to the next backend
+        opt_service = OptService(model2_backends=("heuristic", "cvxpy-HIGHS"))
+        frontier, error_msg = opt_service.optimize_frontier(pizza_data(6), True, budgets)
+        assert len(error_msg) < 1
+        assert opt_service.backend == "cvxpy-HIGHS"
+        assert frontier.loc[150.0, 'profit'] >= frontier.loc[100.0, 'profit']
+        assert [len(opt_assortment) for opt_assortment in opt_service.frontier_assortments] == [6, 6]
+
+    def test_reoptimize(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        opt_service = OptService()
+        with pytest.raises(ValueError):
+            opt_service.reoptimize()
+        opt_service.optimize(pizza, False)
+        stores = pizza['store'].unique()
+        changed = pizza[pizza['store'] == stores[0]].assign(cost=lambda frame: frame['cost'] * 1.5)
+        opt_assortment, error_msg = opt_service.reoptimize(changed, removed_stores=[stores[1]])
+        assert len(error_msg) < 1
+        assert opt_service.backend == "knapsack"
+        updated = pd.concat([changed, pizza[~pizza['store'].isin(stores[:2])]])
+        expected, _ = OptService().optimize(updated, False)
+        pd.testing.assert_frame_equal(opt_assortment.sort_index(), expected.sort_index())
+
+    def test_reoptimize_model2(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        opt_service = OptService(model2_backends="heuristic")
+        opt_service.optimize(pizza, True)
+        added = pizza[pizza['store'] == pizza['store'].iloc[0]].assign(store=1_000)
+        opt_assortment, error_msg = opt_service.reoptimize(added)
+        assert len(error_msg) < 1
+        assert len(opt_assortment) == 11 and 1_000 in opt_assortment.index
+        # a change to most stores is solved from scratch
+        opt_assortment, error_msg = opt_service.reoptimize(pizza.assign(cost=pizza['cost'] * 1.1))
+        assert len(error_msg) < 1
+        assert len(opt_assortment) == 11
+
+    def test_result_table(self, tmp_path):
+        opt_service = OptService("knapsack")
+        opt_assortment, error_msg = opt_service.optimize(pizza_data(10), False)
+        table = opt_service.result_table()
+        assert table.columns.tolist() == ['store', 'type', 'count', 'group', 'demand', 'cost', 'profit']
+        assert len(table) == 30 and (table['group'] == -1).all()
+        counts = table.pivot(index='store', columns='type', values='count')
+        assert np.array_equal(counts.loc[opt_assortment.index, opt_assortment.columns], opt_assortment)
+        assert table['profit'].sum() == pytest.approx(opt_service._last_solve[4].maximal_profits)
+
+        for name in ("result.csv", "result.parquet"):
+            if name.endswith(".parquet"):
+                pytest.importorskip('pyarrow')
+            opt_service.write_result(tmp_path / name)
+            written = pd.read_csv(tmp_path / name) if name.endswith(".csv") else pd.read_parquet(tmp_path / name)
+            assert np.allclose(written['profit'], table['profit'])
+
+    def test_result_table_model2(self):
+        opt_service = OptService(model2_backends="heuristic")
+        _, error_msg = opt_service.optimize(pizza_data(8), True)
+        assert len(error_msg) < 1
+        table = opt_service.result_table()
+        assert table['group'].between(0, 2).all()
+        # all the stores of a group have the same count
+        assert (table.groupby(['type', 'group'], observed=True)['count'].nunique() == 1).all()
+
+    def test_report(self, capsys):
+        reports = []
+        opt_service = OptService(model1_backends="cvxpy-HIGHS", metrics_sink=reports.append)
+        opt_assortment, error_msg, report = opt_service.optimize(pizza_data(5), False, return_report=True)
+        assert len(error_msg) < 1
+        assert reports == [report]
+        assert report['call'] == "optimize" and report['model'] == 1 and report['num_stores'] == 5
+        assert report['backend'] == "cvxpy-HIGHS" and not report['cache_hit']
+        for phase in ("input", "backend.cvxpy-HIGHS", "build.create_matrix_variables", "solve", "validate",
+                      "output"):
+            assert phase in report['phases']
+        assert sum(report['phases'][phase] for phase in ("input", "backend.cvxpy-HIGHS", "validate", "output")) \
+            <= report['total_seconds']
+        assert report['solver']['objective'] == pytest.approx(opt_service._last_solve[4].maximal_profits)
+        # nothing is printed unless debug logging is on
+        assert capsys.readouterr().out == ""
+
+    def test_report_model2(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        opt_service = OptService(model2_backends="heuristic")
+        opt_service.optimize(pizza, True)
+        added = pizza[pizza['store'] == pizza['store'].iloc[0]].assign(store=1_000)
+        _, error_msg, report = opt_service.reoptimize(added, return_report=True)
+        assert len(error_msg) < 1
+        assert report['call'] == "reoptimize" and report['model'] == 2 and report['num_stores'] == 11
+        assert "backend.heuristic" in report['phases']
+        assert report['solver']['gap'] >= 0
+
+    def test_report_failing_sink(self):
+        def sink(report):
+            raise RuntimeError("sink is down")
+
+        opt_service = OptService(metrics_sink=sink)
+        opt_assortment, error_msg = opt_service.optimize(pizza_data(3), False)
+        assert len(opt_assortment) == 3 and len(error_msg) < 1
+
+    def test_threads(self):
+        instances = [pizza_data(num_stores) for num_stores in (3, 10, 5, 8)] * 2
+        expected = [OptService().optimize(instance, False)[0] for instance in instances]
+        opt_service = OptService()
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(lambda instance: opt_service.optimize(instance, False), instances))
+        for (opt_assortment, error_msg), expected_assortment in zip(results, expected):
+            assert len(error_msg) < 1
+            pd.testing.assert_frame_equal(opt_assortment, expected_assortment)
+        # the service keeps the result of one of the calls
+        assert len(opt_service.result_table()) in {3 * num_stores for num_stores in (3, 10, 5, 8)}
+
+    def test_optimize_async(self):
+        instances = [pizza_data(num_stores) for num_stores in (3, 10, 5)]
+        expected = [OptService().optimize(instance, False)[0] for instance in instances]
+        opt_service = OptService(max_concurrency=2)
+
+        async def optimize_all():
+            return await asyncio.gather(*(opt_service.optimize_async(instance, False) for instance in instances))
+
+        results = asyncio.run(optimize_all())
+        opt_service.close()
+        for (opt_assortment, error_msg), expected_assortment in zip(results, expected):
+            assert len(error_msg) < 1
+            pd.testing.assert_frame_equal(opt_assortment, expected_assortment)
+
+    def test_optimize_async_cancel(self):
+        opt_service = OptService(max_concurrency=1)
+
+        async def cancel_waiting():
+            first = asyncio.ensure_future(opt_service.optimize_async(pizza_data(4), False))
+            second = asyncio.ensure_future(opt_service.optimize_async(pizza_data(6), False))
+            await asyncio.sleep(0)
+            second.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await second
+            return await first
+
+        opt_assortment, error_msg = asyncio.run(cancel_waiting())
+        opt_service.close()
+        assert len(opt_assortment) == 4 and len(error_msg) < 1
+        assert len(opt_service.result_table()) == 12
+
+        # a running call stops before its next backend, and does not replace the last result
+        cancel_event = threading.Event()
+        cancel_event.set()
+        opt_assortment, error_msg = opt_service._run_optimize(_Call(cancel_event), pizza_data(6), False, None, None,
+                                                              False)
+        assert error_msg == {'task': "cancelled"}
+        assert len(opt_service.result_table()) == 12
+
+    def test_optimize_anytime(self):
+        incumbents = []
+        result = OptService().optimize_anytime(pizza_data(10), False, deadline=10.0, on_incumbent=incumbents.append)
+        assert result.is_optimal and result.backend == "knapsack"
+        assert result.gap == pytest.approx(0.0)
+        assert len(result.assortment) == 10 and len(result.errors) < 1
+        assert incumbents[-1].objective == pytest.approx(result.objective)
+
+    def test_optimize_anytime_model2(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        incumbents = []
+        result = OptService().optimize_anytime(pizza, True, deadline=2.0, on_incumbent=incumbents.append,
+                                               backends="ortools-CP-SAT")
+        # the search of CP-SAT is cut by the deadline
+        assert result.elapsed < 10.0
+        assert result.status in ("optimal", "best_found") and len(result.errors) < 1
+        assert result.objective <= result.bound + 1e-6
+        objectives = [incumbent.objective for incumbent in incumbents]
+        assert objectives == sorted(objectives) and objectives[-1] == pytest.approx(result.objective)
+        assert all(incumbent.backend == "ortools-CP-SAT" for incumbent in incumbents)
+
+    @pytest.mark.parametrize("backend", ["ortools-CP-SAT", "cvxpy-HIGHS"])
+    def test_optimize_anytime_mip_deadline(self, backend):
+        # the warm start and the model build count against the deadline as well as the search
+        pizza = instance_data(generate_instance(500, 3))
+        deadline = 2.0
+        start = time.perf_counter()
+        result = OptService().optimize_anytime(pizza, True, deadline=deadline, backends=backend)
+        assert time.perf_counter() - start <= deadline + 1.0
+        assert result.status in ("optimal", "best_found") and len(result.errors) < 1
+
+    def test_optimize_anytime_target_gap(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        result = OptService().optimize_anytime(pizza, True, target_gap=0.5, backends="lns")
+        # the heuristic start is within the target gap, the search stops at once
+        assert result.status == "best_found" and result.gap <= 0.5
+        assert result.elapsed < 10.0
+
+    def test_optimize_anytime_deadline(self):
+        result = OptService().optimize_anytime(pizza_data(5), False, deadline=0.0)
+        assert result.status == "failed" and 'deadline' in result.errors
+        assert result.objective is None
+
+    def test_optimize_anytime_cache(self):
+        pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+        solution_cache = SolutionCache()
+        opt_service = OptService(model2_backends="lns", solution_cache=solution_cache)
+        # the best assortment found within a target gap does not stand in for the optimal one
+        assert opt_service.optimize_anytime(pizza, True, target_gap=0.5).status == "best_found"
+        assert len(solution_cache) == 0
+        opt_service.optimize_anytime(pizza, False)
+        result = opt_service.optimize_anytime(pizza, False)
+        assert solution_cache.hits == 1
+        assert result.is_optimal and result.backend == "knapsack"
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.model.pizza_assortment_optimizer_lagrangian import PizzaAssortmentOptimizerLagrangian
+from src.model.presolve import Presolve, PresolvedOptimizer
+from src.opt_service import OptService
+from src.utils.instance_generator import generate_instance, pizza_data
+from src.utils.validator import Validator
+
+
+def knapsack_profit(data_center) -> float:
+    knapsack = PizzaAssortmentOptimizerKnapsack()
+    knapsack.solve(data_center)
+    return knapsack.maximal_profits
+
+
+class TestPresolve:
+
+    def test_reduction(self):
+        # costs above the prices make some pairs unprofitable
+        data_center = generate_instance(300, cost_range=(4.0, 13.0), num_profiles=20, seed=0)
+        presolve = Presolve(data_center)
+        stats = presolve.stats
+        assert stats.num_stores == 300 and stats.num_reduced_stores <= 20
+        assert stats.num_fixed > 0
+        assert stats.num_removed + stats.num_aggregated + stats.num_reduced_stores == 300
+        assert presolve.weights.sum() == 300 - stats.num_removed
+        assert 0.9 < stats.reduction < 1
+        assert not presolve.is_exact
+
+        reduced = presolve.reduced
+        assert reduced.num_stores == stats.num_reduced_stores
+        counts = PizzaAssortmentOptimizerKnapsack().solve(reduced)
+        expanded = presolve.expand(counts)
+        assert expanded.shape == (300, 3)
+        assert (expanded[(data_center.prices - data_center.costs) <= 0] == 0).all()
+        # a count on a representative is the count of every store it stands for
+        assert (reduced.costs * counts).sum() == pytest.approx((data_center.costs * expanded).sum())
+        assert Validator(data_center).check_model1(presolve.improve(expanded)) == []
+
+    def test_fixing_only(self):
+        data_center = generate_instance(200, cost_range=(4.0, 13.0), budget_tightness=0.3, seed=1)
+        presolve = Presolve(data_center, aggregate=False)
+        assert presolve.is_exact and presolve.stats.num_aggregated == 0
+        optimizer = PresolvedOptimizer(PizzaAssortmentOptimizerKnapsack())
+        optimizer.optimize(data_center)
+        assert optimizer.presolve_stats.num_fixed == presolve.stats.num_fixed
+        assert optimizer.maximal_profits == pytest.approx(knapsack_profit(data_center), rel=1e-9)
+        assert optimizer.gap == pytest.approx(0, abs=1e-9)
+
+    @pytest.mark.parametrize("budget_tightness", [0.3, 1.0])
+    def test_aggregated(self, budget_tightness):
+        data_center = generate_instance(300, budget_tightness=budget_tightness, num_profiles=20, seed=2)
+        optimum = knapsack_profit(data_center)
+        for inner in (PizzaAssortmentOptimizerKnapsack(), PizzaAssortmentOptimizerLagrangian(),
+                      PizzaAssortmentOptimizer(solver="HIGHS")):
+            optimizer = PresolvedOptimizer(inner)
+            optimizer.optimize(data_center)
+            assert Validator(data_center).check_model1(optimizer.optimal_count_matrix) == []
+            assert len(optimizer.optimal_assortment) == 300
+            assert optimizer.maximal_profits <= optimum + 1e-6
+            # the Lagrangian bound of the reduced instance bounds the instance
+            assert optimizer.best_bound >= optimum - 1e-6
+            assert optimizer.gap < 1e-3
+            if budget_tightness >= 1:
+                # identical stores have the same optimal counts if the budget is not binding
+                assert optimizer.maximal_profits == pytest.approx(optimum, rel=1e-9)
+                assert optimizer.status == "optimal"
+
+    def test_convex_profit(self):
+        # the Lagrangian bound of the merged stores needs concave profits, so the stores are not merged
+        data_center = generate_instance(20, num_profiles=2, beta_range=(1.1, 1.5), seed=5)
+        optimizer = PresolvedOptimizer(PizzaAssortmentOptimizerKnapsack())
+        optimizer.optimize(data_center)
+        assert optimizer.presolve_stats.num_aggregated == 0
+        assert Validator(data_center).check_model1(optimizer.optimal_count_matrix) == []
+        assert optimizer.maximal_profits == pytest.approx(knapsack_profit(data_center), rel=1e-9)
+
+    def test_nothing_profitable(self):
+        data_center = generate_instance(10, cost_range=(16.0, 20.0), seed=3)
+        optimizer = PresolvedOptimizer(PizzaAssortmentOptimizerKnapsack())
+        optimizer.optimize(data_center)
+        assert optimizer.presolve_stats.num_removed == 10
+        assert optimizer.maximal_profits == 0 and optimizer.status == "optimal"
+        assert (optimizer.optimal_count_matrix == 0).all()
+
+    def test_opt_service(self):
+        instance = pizza_data(generate_instance(200, num_profiles=10, seed=4))
+        expected, _ = OptService(model1_backends="knapsack").optimize(instance, False)
+        opt_service = OptService(model1_backends=("cvxpy-HIGHS", "knapsack"), presolve=True)
+        opt_assortment, error_msg, report = opt_service.optimize(instance, False, return_report=True)
+        assert len(error_msg) < 1
+        assert report['presolve']['num_reduced_stores'] <= 10
+        assert "presolve" in report['phases'] and "backend.cvxpy-HIGHS" in report['phases']
+        # the budget of the service is not binding, identical stores have the same optimal counts
+        assert np.array_equal(opt_assortment.to_numpy(), expected.to_numpy())
+        # model 2 is not presolved
+        _, error_msg, report = opt_service.optimize(instance, True, backends="heuristic", return_report=True)
+        assert len(error_msg) < 1 and report['presolve'] is None
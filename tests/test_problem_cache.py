@@ -0,0 +1,62 @@
+import os
+import pandas as pd
+import pytest
+
+from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
+from src.model.problem_cache import ProblemCache, instance_shape_key
+from src.processor.input_processor import InputProcessor
+from tests.conftest import DATA_PATH
+
+
+class TestProblemCache:
+
+    @pytest.fixture(scope='class')
+    def pizza(self):
+        return pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+
+    def test_lru_eviction(self):
+        cache = ProblemCache(max_bytes=100)
+        cache.put("a", "problem a", 40)
+        cache.put("b", "problem b", 40)
+        assert cache.get("a") == "problem a"
+        cache.put("a", "problem a", 40)
+        cache.put("c", "problem c", 40)
+        assert len(cache) == 2 and cache.nbytes == 80
+        assert cache.get("b") is None
+        assert cache.evictions == 1
+        cache.put("d", "problem d", 200)
+        assert cache.get("d") is None
+        assert (cache.hits, cache.misses, cache.evictions) == (1, 2, 2)
+
+    def test_checkout(self):
+        cache = ProblemCache()
+        cache.put("a", "problem a", 10)
+        assert cache.get("a") == "problem a"
+        assert cache.get("a") is None
+        assert len(cache) == 0 and cache.nbytes == 0
+
+    def test_instance_shape_key(self, pizza):
+        data_center = InputProcessor().process(pizza)
+        other = InputProcessor().process(pizza.assign(price=pizza['price'] * 2))
+        assert instance_shape_key(data_center, "model 1") == instance_shape_key(other, "model 1")
+        assert instance_shape_key(data_center, "model 1") != instance_shape_key(data_center, "model 2")
+        fewer = InputProcessor().process(pizza[pizza['store'] != pizza['store'].iloc[0]])
+        assert instance_shape_key(data_center, "model 1") != instance_shape_key(fewer, "model 1")
+
+    def test_repeat_solve(self, pizza):
+        cache = ProblemCache()
+        optimizer = PizzaAssortmentOptimizer(solver="HIGHS", cache=cache)
+        optimizer.optimize(InputProcessor().process(pizza))
+        assert (cache.hits, cache.misses, len(cache)) == (0, 1, 1)
+        assert cache.nbytes > 0
+
+        for price_factor in (1.5, 0.8):
+            data_center = InputProcessor().process(pizza.assign(price=pizza['price'] * price_factor))
+            cached = PizzaAssortmentOptimizer(solver="HIGHS", cache=cache)
+            cached.optimize(data_center)
+            # the compiled problem is reused with the new prices
+            assert cached._problem is optimizer._problem
+            fresh = PizzaAssortmentOptimizer(solver="HIGHS")
+            fresh.optimize(data_center)
+            assert cached.maximal_profits == pytest.approx(fresh.maximal_profits, rel=1e-4)
+        assert (cache.hits, cache.misses) == (2, 1)
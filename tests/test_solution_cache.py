@@ -0,0 +1,75 @@
+import os
+import pandas as pd
+import pytest
+
+from src.opt_service import OptService
+from src.processor.input_processor import InputProcessor
+from src.utils.solution_cache import SolutionCache, solution_key
+from tests.conftest import DATA_PATH
+
+
+class TestSolutionCache:
+
+    @pytest.fixture(scope='class')
+    def pizza(self):
+        return pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+
+    def test_solution_key(self, pizza):
+        key = solution_key(InputProcessor().process(pizza), False, ["knapsack"])
+        shuffled = pizza.sample(frac=1, random_state=0)
+        assert solution_key(InputProcessor().process(shuffled), False, ["knapsack"]) == key
+        assert solution_key(InputProcessor().process(pizza), True, ["knapsack"]) != key
+        assert solution_key(InputProcessor().process(pizza), False, ["cvxpy-HIGHS"]) != key
+        assert solution_key(InputProcessor().process(pizza), False, ["knapsack"], presolve=True) != key
+        limited = solution_key(InputProcessor().process(pizza), False, ["knapsack"], time_limits={'knapsack': 1.0})
+        assert limited != key
+        assert solution_key(InputProcessor().process(pizza), False, ["knapsack"],
+                            time_limits={'knapsack': 20.0}) != limited
+        changed = pizza.assign(price=pizza['price'] + 0.01)
+        assert solution_key(InputProcessor().process(changed), False, ["knapsack"]) != key
+
+    def test_lru(self):
+        cache = SolutionCache(max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, {'assortment': {}, 'backend': key})
+        assert cache.get("a") is None
+        assert cache.get("c")['backend'] == "c"
+        assert len(cache) == 2 and (cache.hits, cache.misses) == (1, 1)
+
+    def test_opt_service(self, pizza, tmp_path):
+        path = str(tmp_path / "cache" / "solutions.sqlite")
+        cache = SolutionCache(path=path)
+        opt_service = OptService("knapsack", solution_cache=cache)
+        expected, error_msg = opt_service.optimize(pizza, False)
+        assert len(error_msg) < 1 and cache.misses == 1
+        opt_assortment, error_msg = opt_service.optimize(pizza.iloc[::-1], False)
+        assert len(error_msg) < 1 and cache.hits == 1
+        assert opt_service.backend == "knapsack"
+        pd.testing.assert_frame_equal(opt_assortment, expected)
+        # a solution found within a time limit is not served to a call that allows more time
+        opt_service.optimize(pizza, False, time_limits={'knapsack': 60.0})
+        assert cache.hits == 1 and cache.misses == 2
+        cache.close()
+
+        # a restarted service answers from disk
+        restarted = SolutionCache(path=path)
+        opt_assortment, error_msg = OptService("knapsack", solution_cache=restarted).optimize(pizza, False)
+        assert restarted.hits == 1
+        pd.testing.assert_frame_equal(opt_assortment, expected)
+        restarted.close()
+
+    def test_groups(self, pizza, tmp_path):
+        path = str(tmp_path / "solutions.sqlite")
+        cache = SolutionCache(path=path)
+        opt_service = OptService(model2_backends="heuristic", solution_cache=cache)
+        _, error_msg = opt_service.optimize(pizza, True)
+        assert len(error_msg) < 1
+        expected = opt_service.result_table()
+        cache.close()
+
+        restarted = SolutionCache(path=path)
+        opt_service = OptService(model2_backends="heuristic", solution_cache=restarted)
+        opt_service.optimize(pizza, True)
+        assert restarted.hits == 1
+        pd.testing.assert_frame_equal(opt_service.result_table(), expected)
+        restarted.close()
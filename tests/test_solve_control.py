@@ -0,0 +1,73 @@
+import time
+
+import pytest
+
+from src.model.solve_control import SolveControl, active_control, relative_gap, remaining_time, report_incumbent, \
+    target_gap
+
+
+class TestSolveControl:
+
+    def test_relative_gap(self):
+        assert relative_gap(90.0, 100.0) == pytest.approx(0.1)
+        assert relative_gap(100.0, 100.0) == 0.0
+        assert relative_gap(None, 100.0) is None
+        assert relative_gap(90.0, None) is None
+
+    def test_report(self):
+        incumbents = []
+        control = SolveControl(on_incumbent=incumbents.append)
+        control.backend = "lns"
+        for objective, bound in ((10.0, 20.0), (9.0, 20.0), (15.0, None), (15.0, 16.0), (None, 20.0)):
+            control.report(objective, bound)
+        # only the improving solutions are passed on
+        assert [incumbent.objective for incumbent in incumbents] == [10.0, 15.0]
+        assert incumbents[0].gap == pytest.approx(0.5) and incumbents[1].gap is None
+        assert incumbents[0].backend == "lns"
+        assert incumbents[0].elapsed <= incumbents[1].elapsed
+        assert control.best == incumbents[-1]
+
+    def test_failing_callback(self):
+        def on_incumbent(incumbent):
+            raise RuntimeError("caller is gone")
+
+        control = SolveControl(on_incumbent=on_incumbent)
+        control.report(10.0)
+        assert control.best.objective == 10.0
+
+    def test_deadline(self):
+        control = SolveControl(deadline=0.05)
+        assert control.time_limit(20.0) <= 0.05
+        assert control.time_limit(0.01) == 0.01
+        assert control.time_limit(None) <= 0.05
+        time.sleep(0.06)
+        assert control.remaining() == 0
+        assert SolveControl().remaining() is None
+        assert SolveControl().time_limit(20.0) == 20.0
+
+    def test_remaining_time(self):
+        start = time.perf_counter() - 5.0
+        assert remaining_time(20.0, start) <= 15.0
+        assert remaining_time(1.0, start) == 0.0
+        assert remaining_time(None, start) is None
+        with SolveControl(deadline=0.05).activate():
+            assert remaining_time(20.0, start) <= 0.05
+            assert remaining_time(None, start) <= 0.05
+
+    def test_target_gap(self):
+        control = SolveControl(target_gap=0.05)
+        assert control.gap_reached(96.0, 100.0)
+        assert not control.gap_reached(90.0, 100.0)
+        assert not control.gap_reached(96.0, None)
+        assert not SolveControl().gap_reached(100.0, 100.0)
+
+    def test_active(self):
+        control = SolveControl(target_gap=0.01)
+        assert active_control() is None and target_gap() is None
+        report_incumbent(10.0)
+        with control.activate():
+            assert active_control() is control
+            assert target_gap() == 0.01
+            report_incumbent(10.0, 11.0)
+        assert active_control() is None
+        assert control.best.objective == 10.0
@@ -0,0 +1,81 @@
+import os
+import pandas as pd
+import pytest
+
+from src.model import solver_backend
+from src.model.pizza_assortment_optimizer import PizzaAssortmentOptimizer
+from src.model.pizza_assortment_optimizer_knapsack import PizzaAssortmentOptimizerKnapsack
+from src.model.solver_backend import SolverBackend, backend_names, get_backend
+from src.opt_service import OptService
+from src.processor.input_processor import InputProcessor
+from tests.conftest import DATA_PATH
+
+
+def pizza_data(num_stores: int = None) -> pd.DataFrame:
+    pizza = pd.read_csv(os.path.join(DATA_PATH, "new_pizza.csv"))
+    if num_stores is None:
+        return pizza
+    return pizza[pizza['store'].isin(pizza['store'].unique()[:num_stores])]
+
+
+class FailingOptimizer:
+
+    def optimize(self, data_center):
+        raise RuntimeError("solver crashed")
+
+
+class TestSolverBackend:
+
+    def test_registry(self):
+        assert "knapsack" in backend_names(False)
+        assert "knapsack" not in backend_names(True)
+        assert "ortools-CP-SAT" in backend_names(True)
+        assert "cvxpy-HIGHS" in backend_names(True, available_only=True)
+        with pytest.raises(ValueError):
+            get_backend("GUROBI")
+        with pytest.raises(ValueError):
+            get_backend("knapsack").create_optimizer(True)
+        with pytest.raises(ValueError):
+            OptService(model2_backends="knapsack")
+
+    def test_tabulated_objective(self):
+        data_center = InputProcessor().process(pizza_data())
+        data_center._max_budget = 300
+        knapsack = PizzaAssortmentOptimizerKnapsack()
+        knapsack.optimize(data_center)
+        optimizer = PizzaAssortmentOptimizer(solver="HIGHS")
+        optimizer.optimize(data_center)
+        assert optimizer.status == "optimal"
+        assert optimizer.maximal_profits == pytest.approx(knapsack.maximal_profits, rel=1e-6)
+        with pytest.raises(ValueError):
+            PizzaAssortmentOptimizer(build_mode="scalar", solver="HIGHS")
+
+    def test_open_source_model2(self):
+        opt_service = OptService(model2_backends="cvxpy-HIGHS")
+        opt_assortment, error_msg = opt_service.optimize(pizza_data(6), True, time_limits={"cvxpy-HIGHS": 30.0})
+        assert len(error_msg) < 1
+        assert opt_service.backend == "cvxpy-HIGHS"
+        assert len(opt_assortment) == 6
+
+    def test_fallback(self, monkeypatch):
+        time_limits = []
+
+        def create_failing(time_limit, num_threads):
+            time_limits.append(time_limit)
+            return FailingOptimizer()
+
+        monkeypatch.setitem(solver_backend._BACKENDS, "failing", SolverBackend("failing", create_failing))
+        monkeypatch.setitem(solver_backend._BACKENDS, "missing",
+                            SolverBackend("missing", create_failing, is_available=lambda: False))
+        opt_service = OptService(("missing", "failing", "knapsack"), time_limits={"failing": 5.0})
+        opt_assortment, error_msg = opt_service.optimize(pizza_data(), False)
+        assert len(error_msg) < 1
+        assert opt_service.backend == "knapsack"
+        assert len(opt_assortment) == 10
+        assert time_limits == [5.0]
+
+        opt_assortment, error_msg = opt_service.optimize(pizza_data(), False, backends=["missing", "failing"],
+                                                         time_limits={"failing": 1.0})
+        assert len(error_msg) > 0
+        assert opt_service.backend is None
+        assert time_limits == [5.0, 1.0]
@@ -1,26 +1,60 @@
+from collections.abc import Mapping
+import numpy as np
 import pytest
 
+from src.common.data_center import DataCenter
 from src.common.store import Store
 
 
+def small_data_center() -> DataCenter:
+    data_center = DataCenter()
+    matrix = np.arange(6, dtype=float).reshape(2, 3)
+    data_center.load([7, 3], matrix, matrix + 10, matrix + 20, matrix + 30)
+    return data_center
+
+
 class TestStore:
 
     @pytest.fixture(scope='class')
     def store(self):
         return Store(1)
 
+    @pytest.fixture(scope='class')
+    def data_center(self):
+        return small_data_center()
+
     def test_id(self):
         store = Store(0)
         assert store.id == 0
 
     def test_prices(self, store):
-        assert type(store.prices) == dict and len(store.prices) == 0
+        assert isinstance(store.prices, Mapping) and len(store.prices) == 0
 
     def test_costs(self, store):
-        assert type(store.costs) == dict and len(store.costs) == 0
+        assert isinstance(store.costs, Mapping) and len(store.costs) == 0
 
     def test_alpha(self, store):
-        assert type(store.alpha) == dict and len(store.alpha) == 0
+        assert isinstance(store.alpha, Mapping) and len(store.alpha) == 0
 
     def test_beta(self, store):
-        assert type(store.beta) == dict and len(store.beta) == 0
+        assert isinstance(store.beta, Mapping) and len(store.beta) == 0
+
+    def test_detached_update(self):
+        store = Store(1)
+        store.prices['A'] = 1.0
+        store.costs = {'A': 0.5}
+        assert dict(store.prices) == {'A': 1.0} and dict(store.costs) == {'A': 0.5}
+        assert len(Store(2).prices) == 0
+
+    def test_row_view(self, data_center):
+        store = data_center.stores[3]
+        assert store.id == 3
+        assert dict(store.prices) == {'A': 3.0, 'B': 4.0, 'C': 5.0}
+        assert store.costs['B'] == 14.0 and store.alpha['C'] == 25.0 and store.beta['A'] == 33.0
+
+    def test_row_view_update(self):
+        # the class-scoped data center stays unchanged
+        data_center = small_data_center()
+        store = data_center.stores[7]
+        store.prices = {'A': 99.0}
+        assert data_center.prices[0, 0] == 99.0
@@ -0,0 +1,71 @@
+import logging
+import numpy as np
+import pytest
+
+from src.common.data_center import DataCenter
+from src.model.solution import group_solution_dicts
+from src.utils.validator import Validator
+
+
+class TestValidator:
+
+    @pytest.fixture
+    def data_center(self):
+        data_center = DataCenter(max_pizza_count=10, max_budget=100, num_pizza_groups=2)
+        shape = (4, 3)
+        data_center.load([7, 3, 5, 1], np.full(shape, 10.0), np.ones(shape), np.ones(shape), np.full(shape, 0.5))
+        return data_center
+
+    @pytest.fixture
+    def solution(self):
+        counts = np.array([[1, 2, 3], [1, 2, 3], [4, 0, 3], [4, 0, 3]])
+        groups = np.array([[0, 0, 0], [0, 0, 1], [1, 1, 0], [1, 1, 1]])
+        return counts, np.eye(2, dtype=np.int64)[groups]
+
+    def test_valid_solution(self, data_center, solution):
+        validator = Validator(data_center)
+        assert validator.check_model1(solution[0]) == []
+        assert validator.check_model2(*solution) == []
+        assortment, _, assignment, _ = group_solution_dicts(data_center, solution[0], solution[1],
+                                                            np.array([[1, 4], [2, 0], [3, 3]]))
+        assert validator.validate_model1_solution(assortment) == {}
+        assert validator.validate_model2_solution(assortment, assignment) == {}
+
+    def test_pizza_count(self, data_center, solution):
+        counts = solution[0].copy()
+        counts[2, 1] = 5
+        violations = Validator(data_center).check_model1(counts)
+        assert [(v.kind, v.key, v.observed, v.limit) for v in violations] == [('pizza_count', 5, 12, 10)]
+
+    def test_budget(self, data_center, solution):
+        data_center = data_center.with_max_budget(20)
+        violations = Validator(data_center).check_model1(solution[0])
+        assert [(v.kind, v.key, v.observed, v.limit) for v in violations] == [('budget', None, 26.0, 20)]
+        assortment = {7: {'A': 1, 'B': 2, 'C': 3}, 3: {'A': 1, 'B': 2, 'C': 3},
+                      5: {'A': 4, 'B': 0, 'C': 3}, 1: {'A': 4, 'B': 0, 'C': 3}}
+        assert list(Validator(data_center).validate_model1_solution(assortment)) == ['budget']
+
+    def test_groups(self, data_center, solution):
+        counts, assign = solution[0].copy(), solution[1].copy()
+        # store 5 moves to group 0 of pizza type A, which leaves group 1 with 1 store at another count
+        assign[2, 0] = [1, 0]
+        # store 1 joins both groups of pizza type C
+        assign[3, 2] = [1, 1]
+        violations = Validator(data_center).check_model2(counts, assign)
+        assert sorted((v.kind, v.key) for v in violations) == [
+            ('group_assignment', (1, 'C')), ('group_count', ('A', 0)), ('group_size', ('A', 1))]
+        assert dict(((v.kind, v.key), v.observed) for v in violations)[('group_count', ('A', 0))] == 3
+
+    def test_invalid_shape(self, data_center, solution):
+        with pytest.raises(ValueError):
+            Validator(data_center).check_model2(solution[0][:3], solution[1])
+
+    def test_group_table(self, data_center, solution, capsys, caplog):
+        validator = Validator(data_center)
+        with caplog.at_level(logging.INFO):
+            validator.check_model2(*solution)
+        assert "store groups" not in caplog.text
+        with caplog.at_level(logging.DEBUG):
+            validator.check_model2(*solution)
+        assert "store groups by pizza type" in caplog.text
+        assert capsys.readouterr().out == ""